@@ -60,6 +60,14 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # Conexão recebida de app.migracoes (python -m app.migracoes)
+    conexao = config.attributes.get("connection")
+    if conexao is not None:
+        context.configure(connection=conexao, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     # Importar settings para obter a URL correta do banco
     from app.config import settings
     
@@ -0,0 +1,24 @@
+"""Esquema base (criado pela aplicação antes do versionamento)
+
+Revision ID: 001
+Revises: 
+Create Date: 2025-10-20
+
+"""
+
+
+# revision identifiers, used by Alembic.
+revision = '001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # As tabelas iniciais eram criadas por Base.metadata.create_all; esta
+    # revisão apenas marca esse ponto como raiz única do histórico
+    pass
+
+
+def downgrade():
+    pass
@@ -0,0 +1,22 @@
+"""Unir os ramos de telefone (003) e CPF (add_medico_cpf) do médico
+
+Revision ID: 003b
+Revises: 003, add_medico_cpf
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+
+
+# revision identifiers, used by Alembic.
+revision = '003b'
+down_revision = ('003', 'add_medico_cpf')
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    pass
+
+
+def downgrade():
+    pass
@@ -0,0 +1,41 @@
+"""Constraint de exclusão de horários sobrepostos por médico (RN4 no banco)
+
+Revision ID: 004
+Revises: 003b
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # "=" sobre inteiro dentro de um índice GiST requer btree_gist
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+
+    # Consultas ativas do mesmo médico não podem se sobrepor
+    op.execute("""
+        ALTER TABLE consulta
+        ADD CONSTRAINT ex_consulta_medico_horario
+        EXCLUDE USING gist (
+            id_medico_fk WITH =,
+            tsrange(data_hora_inicio, data_hora_fim, '[)') WITH &&
+        )
+        WHERE (status IN ('agendada', 'confirmada'))
+    """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("ALTER TABLE consulta DROP CONSTRAINT IF EXISTS ex_consulta_medico_horario")
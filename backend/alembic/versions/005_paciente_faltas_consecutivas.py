@@ -0,0 +1,44 @@
+"""Contador persistido de faltas consecutivas do paciente (RN3)
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'paciente',
+        sa.Column('faltas_consecutivas', sa.Integer(), nullable=False, server_default='0')
+    )
+
+    # Backfill: faltas posteriores ao último comparecimento de cada paciente
+    op.execute("""
+        UPDATE paciente
+        SET faltas_consecutivas = (
+            SELECT COUNT(*)
+            FROM consulta c
+            WHERE c.id_paciente_fk = paciente.id_paciente
+              AND c.status = 'faltou'
+              AND c.data_hora_inicio > COALESCE((
+                  SELECT MAX(r.data_hora_inicio)
+                  FROM consulta r
+                  WHERE r.id_paciente_fk = paciente.id_paciente
+                    AND r.status = 'realizada'
+              ), '0001-01-01 00:00:00')
+        )
+    """)
+
+
+def downgrade():
+    op.drop_column('paciente', 'faltas_consecutivas')
@@ -0,0 +1,57 @@
+"""Índices compostos e parciais da tabela consulta (e das tabelas de agenda do médico)
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+CONSULTA_ATIVA_SQL = "status IN ('agendada', 'confirmada')"
+
+# (nome, tabela, colunas, somente consultas ativas)
+INDICES = [
+    ('ix_consulta_medico_inicio', 'consulta', ['id_medico_fk', 'data_hora_inicio'], False),
+    ('ix_consulta_paciente_inicio', 'consulta', ['id_paciente_fk', 'data_hora_inicio'], False),
+    ('ix_consulta_inicio_id', 'consulta', ['data_hora_inicio', 'id_consulta'], False),
+    ('ix_consulta_status', 'consulta', ['status'], False),
+    ('ix_consulta_medico_inicio_ativa', 'consulta', ['id_medico_fk', 'data_hora_inicio'], True),
+    ('ix_consulta_paciente_inicio_ativa', 'consulta', ['id_paciente_fk', 'data_hora_inicio'], True),
+    ('ix_horario_trabalho_medico_dia', 'horario_trabalho', ['id_medico_fk', 'dia_semana'], False),
+    ('ix_bloqueio_horario_medico_data', 'bloqueio_horario', ['id_medico_fk', 'data'], False),
+]
+
+
+def upgrade():
+    postgres = op.get_bind().dialect.name == 'postgresql'
+
+    def criar():
+        for nome, tabela, colunas, parcial in INDICES:
+            where = sa.text(CONSULTA_ATIVA_SQL) if parcial else None
+            op.create_index(
+                nome, tabela, colunas,
+                postgresql_where=where,
+                sqlite_where=where,
+                postgresql_concurrently=postgres,
+                if_not_exists=True
+            )
+
+    if postgres:
+        # CREATE INDEX CONCURRENTLY não bloqueia escritas, mas não roda dentro de transação
+        with op.get_context().autocommit_block():
+            criar()
+    else:
+        criar()
+
+
+def downgrade():
+    for nome, tabela, _, _ in reversed(INDICES):
+        op.drop_index(nome, table_name=tabela, if_exists=True)
@@ -0,0 +1,39 @@
+"""Agregado mensal de consultas por plano de saúde
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Os meses fechados são consolidados sob demanda pela aplicação
+    op.create_table(
+        'agregado_mes',
+        sa.Column('mes', sa.Date(), primary_key=True),
+        sa.Column('gerado_em', sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        'consulta_mensal_plano',
+        sa.Column('mes', sa.Date(), primary_key=True),
+        sa.Column(
+            'id_plano_saude_fk', sa.Integer(),
+            sa.ForeignKey('plano_saude.id_plano_saude'), primary_key=True
+        ),
+        sa.Column('total', sa.Integer(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('consulta_mensal_plano')
+    op.drop_table('agregado_mes')
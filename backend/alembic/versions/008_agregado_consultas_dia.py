@@ -0,0 +1,48 @@
+"""Agregado diário de consultas por médico, especialidade, plano e status
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Os dias fechados são consolidados sob demanda pela aplicação
+    op.create_table(
+        'agregado_dia',
+        sa.Column('dia', sa.Date(), primary_key=True),
+        sa.Column('gerado_em', sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        'consulta_diaria',
+        sa.Column('id_consulta_diaria', sa.Integer(), primary_key=True),
+        sa.Column('dia', sa.Date(), nullable=False),
+        sa.Column('id_medico_fk', sa.Integer(), sa.ForeignKey('medico.id_medico'), nullable=False),
+        sa.Column(
+            'id_especialidade_fk', sa.Integer(),
+            sa.ForeignKey('especialidade.id_especialidade'), nullable=False
+        ),
+        sa.Column(
+            'id_plano_saude_fk', sa.Integer(),
+            sa.ForeignKey('plano_saude.id_plano_saude'), nullable=True
+        ),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+    )
+    op.create_index('ix_consulta_diaria_dia_medico', 'consulta_diaria', ['dia', 'id_medico_fk'])
+
+
+def downgrade():
+    op.drop_index('ix_consulta_diaria_dia_medico', table_name='consulta_diaria')
+    op.drop_table('consulta_diaria')
+    op.drop_table('agregado_dia')
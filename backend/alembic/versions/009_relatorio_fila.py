@@ -0,0 +1,46 @@
+"""Fila de relatórios: status, parâmetros e PDF gerado na tabela relatorio
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('relatorio', sa.Column('parametros', sa.Text(), nullable=True))
+    op.add_column('relatorio', sa.Column('chave', sa.String(length=64), nullable=True))
+    # Registros anteriores à fila foram gerados de forma síncrona: 'concluido'
+    # só preenche as linhas existentes; daqui em diante o padrão é 'pendente'
+    op.add_column(
+        'relatorio',
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='concluido')
+    )
+    with op.batch_alter_table('relatorio') as batch_op:
+        batch_op.alter_column(
+            'status', existing_type=sa.String(length=20), existing_nullable=False,
+            server_default='pendente'
+        )
+    op.add_column('relatorio', sa.Column('mensagem_erro', sa.Text(), nullable=True))
+    op.add_column('relatorio', sa.Column('data_conclusao', sa.DateTime(), nullable=True))
+    op.add_column('relatorio', sa.Column('arquivo_pdf', sa.LargeBinary(), nullable=True))
+    op.create_index('ix_relatorio_chave_geracao', 'relatorio', ['chave', 'data_geracao'])
+
+
+def downgrade():
+    op.drop_index('ix_relatorio_chave_geracao', table_name='relatorio')
+    op.drop_column('relatorio', 'arquivo_pdf')
+    op.drop_column('relatorio', 'data_conclusao')
+    op.drop_column('relatorio', 'mensagem_erro')
+    op.drop_column('relatorio', 'status')
+    op.drop_column('relatorio', 'chave')
+    op.drop_column('relatorio', 'parametros')
@@ -0,0 +1,43 @@
+"""Histórico de eventos das consultas (agendamento, cancelamento, reagendamento, status)
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Somente inserção; consultas anteriores a esta revisão não têm eventos
+    op.create_table(
+        'consulta_evento',
+        sa.Column('id_evento', sa.Integer(), primary_key=True),
+        sa.Column('id_consulta_fk', sa.Integer(), sa.ForeignKey('consulta.id_consulta'), nullable=False),
+        sa.Column('id_medico_fk', sa.Integer(), sa.ForeignKey('medico.id_medico'), nullable=False),
+        sa.Column('tipo', sa.String(length=20), nullable=False),
+        sa.Column('status_anterior', sa.String(length=50), nullable=True),
+        sa.Column('status_novo', sa.String(length=50), nullable=True),
+        sa.Column('data_consulta', sa.DateTime(), nullable=False),
+        sa.Column('data_consulta_anterior', sa.DateTime(), nullable=True),
+        sa.Column('ocorrido_em', sa.DateTime(), nullable=False),
+        sa.Column('antecedencia_minutos', sa.Integer(), nullable=True),
+    )
+    op.create_index('ix_consulta_evento_tipo_data', 'consulta_evento', ['tipo', 'data_consulta'])
+    op.create_index('ix_consulta_evento_ocorrido', 'consulta_evento', ['ocorrido_em'])
+    op.create_index('ix_consulta_evento_consulta', 'consulta_evento', ['id_consulta_fk', 'ocorrido_em'])
+
+
+def downgrade():
+    op.drop_index('ix_consulta_evento_consulta', table_name='consulta_evento')
+    op.drop_index('ix_consulta_evento_ocorrido', table_name='consulta_evento')
+    op.drop_index('ix_consulta_evento_tipo_data', table_name='consulta_evento')
+    op.drop_table('consulta_evento')
@@ -0,0 +1,36 @@
+"""Sessões de login renováveis (refresh tokens revogáveis)
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'sessao_usuario',
+        sa.Column('id_sessao', sa.Integer(), primary_key=True),
+        sa.Column('token_hash', sa.String(length=64), nullable=False, unique=True),
+        sa.Column('tipo_usuario', sa.String(length=20), nullable=False),
+        sa.Column('id_usuario', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('criada_em', sa.DateTime(), nullable=False),
+        sa.Column('expira_em', sa.DateTime(), nullable=False),
+        sa.Column('revogada_em', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_sessao_usuario_usuario', 'sessao_usuario', ['tipo_usuario', 'id_usuario'])
+
+
+def downgrade():
+    op.drop_index('ix_sessao_usuario_usuario', table_name='sessao_usuario')
+    op.drop_table('sessao_usuario')
@@ -0,0 +1,25 @@
+"""Data do último desbloqueio do paciente (RN3)
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Faltas anteriores ao desbloqueio não contam no recálculo do contador
+    op.add_column('paciente', sa.Column('desbloqueado_em', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('paciente', 'desbloqueado_em')
@@ -0,0 +1,46 @@
+"""Calendário materializado de slots (agenda_dia e agenda_slot)
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Os dias são gerados sob demanda pela aplicação na primeira leitura
+    op.create_table(
+        'agenda_dia',
+        sa.Column('id_medico_fk', sa.Integer(), sa.ForeignKey('medico.id_medico'), primary_key=True),
+        sa.Column('data', sa.Date(), primary_key=True),
+        sa.Column('gerado_em', sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        'agenda_slot',
+        sa.Column('id_slot', sa.Integer(), primary_key=True),
+        sa.Column('id_medico_fk', sa.Integer(), sa.ForeignKey('medico.id_medico'), nullable=False),
+        sa.Column('data', sa.Date(), nullable=False),
+        sa.Column('data_hora_inicio', sa.DateTime(), nullable=False),
+        sa.Column('disponivel', sa.Boolean(), nullable=False),
+        sa.UniqueConstraint('id_medico_fk', 'data_hora_inicio', name='uq_agenda_slot_medico_inicio'),
+    )
+    op.create_index('ix_agenda_slot_id_slot', 'agenda_slot', ['id_slot'])
+    op.create_index(
+        'ix_agenda_slot_medico_data_disponivel', 'agenda_slot', ['id_medico_fk', 'data', 'disponivel']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_agenda_slot_medico_data_disponivel', table_name='agenda_slot')
+    op.drop_index('ix_agenda_slot_id_slot', table_name='agenda_slot')
+    op.drop_table('agenda_slot')
+    op.drop_table('agenda_dia')
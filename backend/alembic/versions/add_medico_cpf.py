@@ -1,7 +1,7 @@
 """Adicionar campo CPF para médicos
 
 Revision ID: add_medico_cpf
-Revises: 
+Revises: 001
 Create Date: 2025-11-01
 
 """
@@ -11,7 +11,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision = 'add_medico_cpf'
-down_revision = None
+down_revision = '001'
 branch_labels = None
 depends_on = None
 
@@ -20,8 +20,57 @@ class Settings(BaseSettings):
     
     APP_ENV: str = "production" # 'production' ou 'test'
     
+    # Calendário de slots materializado (semanas à frente mantidas em agenda_slot)
+    AGENDA_SEMANAS_MATERIALIZADAS: int = 8
+    
+    # Validade (segundos) das estatísticas do painel administrativo em cache
+    ESTATISTICAS_CACHE_TTL_SEGUNDOS: int = 30
+    
+    # Fila de relatórios: threads de geração e janela (minutos) de reaproveitamento
+    RELATORIOS_WORKERS: int = 2
+    RELATORIOS_REUSO_MINUTOS: int = 10
+    
+    # Processos que montam os PDFs (0 = na própria thread)
+    RELATORIOS_PDF_PROCESSOS: int = 2
+    
+    # Threads dedicadas à verificação de senhas (bcrypt) no login
+    SENHA_VERIFICACAO_THREADS: int = 4
+    
+    # Tokens JWT já verificados mantidos em cache por processo (0 = desligado)
+    TOKEN_CACHE_TAMANHO: int = 10000
+    
+    # Sessões renováveis: validade do refresh token (horas) e do cache de sessões (segundos)
+    SESSAO_EXPIRE_HORAS: int = 12
+    SESSAO_CACHE_TTL_SEGUNDOS: int = 60
+    
     # Pode ser sobrescrito pela variável de ambiente
     DATABASE_URL: str | None = None
+    
+    # Pool de conexões (PostgreSQL); tempos em segundos
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Tempo máximo de cada instrução no servidor, em milissegundos (0 = sem limite)
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    # Conexão via PgBouncer em modo transaction: sem pool local nem parâmetros de sessão
+    DB_PGBOUNCER: bool = False
+    # Prepared statements no servidor por conexão (asyncpg; 0 = desligado; ignorado com PgBouncer)
+    DB_PREPARED_STATEMENTS_CACHE: int = 100
+    # Verificação do banco ao iniciar: tentativas e espera entre elas (segundos)
+    DB_CONEXAO_TENTATIVAS: int = 5
+    DB_CONEXAO_INTERVALO_SEGUNDOS: float = 2
+    
+    # Réplica de leitura (relatórios, dashboard e listagens); vazio = tudo no primário
+    DATABASE_REPLICA_URL: str | None = None
+    # Após uma escrita, o mesmo cliente lê do primário por esta janela (segundos)
+    REPLICA_JANELA_ESCRITA_SEGUNDOS: int = 5
+    # Réplica inacessível: leituras vão ao primário por esta pausa (segundos)
+    REPLICA_PAUSA_FALHA_SEGUNDOS: int = 30
+    
+    # Rotas /admin/popular-dados e /admin/limpar-dados (desligar em produção)
+    ROTAS_POPULATE: bool = True
 
     @property
     def TESTING(self) -> bool:
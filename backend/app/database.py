@@ -1,13 +1,241 @@
-from sqlalchemy import create_engine
+import logging
+import threading
+import time as relogio
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from app.config import settings
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool, StaticPool
+from starlette.requests import Request
+from app.config import Settings, settings
 
-# Criar engine com encoding UTF-8 explícito
-engine = create_engine(
-    settings.database_url,
-    connect_args={"options": "-c client_encoding=utf8"}
-)
+logger = logging.getLogger(__name__)
+
+# Perfis de conexão, escolhidos pela URL e por DB_PGBOUNCER
+PERFIL_POSTGRES = "postgres"
+PERFIL_PGBOUNCER = "pgbouncer"
+PERFIL_SQLITE = "sqlite"
+
+# Métodos HTTP que não alteram dados (não ativam a leitura no primário)
+METODOS_LEITURA = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Chave de Session.info das sessões de réplica: fábrica de sessões do primário,
+# para quem precisa gravar durante uma leitura (ex.: consolidar agregados)
+SESSAO_PRIMARIA = "sessao_primaria"
+
+# Leitura após escrita: instante da última escrita, devolvido pelo cliente
+COOKIE_ULTIMA_ESCRITA = "ultima_escrita"
+CABECALHO_ULTIMA_ESCRITA = "X-Ultima-Escrita"
+
+# Drivers assíncronos de cada banco (engine async)
+DRIVERS_ASYNC = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+class TelemetriaPool:
+    """
+    Contadores de espera por conexão de um pool (por processo)
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.zerar()
+
+    def zerar(self) -> None:
+        with self._trava:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.espera_total = 0.0
+            self.espera_maxima = 0.0
+
+    def registrar_espera(self, segundos: float) -> None:
+        with self._trava:
+            self.checkouts += 1
+            self.espera_total += segundos
+            self.espera_maxima = max(self.espera_maxima, segundos)
+
+    def registrar_timeout(self) -> None:
+        with self._trava:
+            self.timeouts += 1
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Checkouts, timeouts ("QueuePool limit") e espera média/máxima em ms"""
+        with self._trava:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "espera_media_ms": round(self.espera_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "espera_maxima_ms": round(self.espera_maxima * 1000, 3)
+            }
+
+
+class _EsperaInstrumentada:
+    """
+    Cada pool tem a sua TelemetriaPool (primário, réplica e assíncrono não se
+    misturam). A espera é medida em connect(), o método público que
+    Engine.connect() usa para obter a conexão; os eventos do pool só
+    disparam depois que ela foi obtida.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # recreate() (engine.dispose()) cria um pool novo, com contadores novos
+        self.telemetria = TelemetriaPool()
+
+    def connect(self):
+        inicio = relogio.perf_counter()
+        try:
+            conexao = super().connect()
+        except exc.TimeoutError:
+            self.telemetria.registrar_timeout()
+            raise
+        self.telemetria.registrar_espera(relogio.perf_counter() - inicio)
+        return conexao
+
+
+class PoolInstrumentado(_EsperaInstrumentada, QueuePool):
+    """QueuePool que mede o tempo de espera de cada checkout"""
+
+
+class PoolAsyncInstrumentado(_EsperaInstrumentada, AsyncAdaptedQueuePool):
+    """Pool do engine assíncrono, com a mesma medição de espera"""
+
+
+def perfil_conexao(url: str, config: Settings = settings) -> str:
+    """Perfil de conexão da URL: sqlite, pgbouncer ou postgres"""
+    if url.startswith("sqlite"):
+        return PERFIL_SQLITE
+    return PERFIL_PGBOUNCER if config.DB_PGBOUNCER else PERFIL_POSTGRES
+
+
+def url_async(url: str) -> str:
+    """URL equivalente com o driver assíncrono (asyncpg ou aiosqlite)"""
+    original = make_url(url)
+    backend = original.get_backend_name()
+    if backend not in DRIVERS_ASYNC:
+        raise ValueError(f"Banco sem driver assíncrono configurado: {backend}")
+    return original.set(drivername=DRIVERS_ASYNC[backend]).render_as_string(hide_password=False)
+
+
+def opcoes_engine(url: str, config: Settings = settings, assincrono: bool = False) -> Dict[str, Any]:
+    """
+    Argumentos do create_engine (ou create_async_engine) para o perfil da URL
+
+    - postgres: pool local instrumentado; encoding e statement_timeout
+      como parâmetros da sessão
+    - pgbouncer (modo transaction): sem pool local (NullPool) e sem
+      parâmetros de sessão, que o PgBouncer recusa; o statement_timeout
+      é aplicado com SET LOCAL no início de cada transação e, no asyncpg,
+      o cache de prepared statements fica desligado
+    - postgres com asyncpg: prepared statements no servidor, até
+      DB_PREPARED_STATEMENTS_CACHE por conexão
+    - sqlite: conexões compartilhadas entre threads; StaticPool em memória
+
+    Returns:
+        dict: kwargs do create_engine
+    """
+    perfil = perfil_conexao(url, config)
+    pool_local = PoolAsyncInstrumentado if assincrono else PoolInstrumentado
+
+    if perfil == PERFIL_SQLITE:
+        opcoes = {"connect_args": {"check_same_thread": False}}
+        if ":memory:" in url or make_url(url).database in (None, ""):
+            opcoes["poolclass"] = StaticPool
+        else:
+            opcoes["poolclass"] = pool_local
+        return opcoes
+
+    if perfil == PERFIL_PGBOUNCER:
+        return {
+            "poolclass": NullPool,
+            "connect_args": (
+                {"statement_cache_size": 0, "prepared_statement_cache_size": 0} if assincrono
+                else {"client_encoding": "utf8"}
+            )
+        }
+
+    timeout_ms = config.DB_STATEMENT_TIMEOUT_MS
+    if assincrono:
+        # asyncpg sempre usa UTF-8; demais parâmetros vão em server_settings.
+        # Cada SQL distinto vira um prepared statement da conexão, reaproveitado
+        # enquanto estiver no cache (as instruções prontas das regras repetem o SQL)
+        connect_args = {"prepared_statement_cache_size": config.DB_PREPARED_STATEMENTS_CACHE}
+        if timeout_ms > 0:
+            connect_args["server_settings"] = {"statement_timeout": str(timeout_ms)}
+    else:
+        parametros = "-c client_encoding=utf8"
+        if timeout_ms > 0:
+            parametros += f" -c statement_timeout={timeout_ms}"
+        connect_args = {"options": parametros}
+    return {
+        "poolclass": pool_local,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+        "connect_args": connect_args
+    }
+
+
+def _statement_timeout_por_transacao(alvo: Engine, url: str, config: Settings) -> None:
+    """No perfil pgbouncer, aplica o statement_timeout com SET LOCAL em cada transação"""
+    timeout_ms = config.DB_STATEMENT_TIMEOUT_MS
+    if perfil_conexao(url, config) != PERFIL_PGBOUNCER or timeout_ms <= 0:
+        return
+
+    @event.listens_for(alvo, "begin")
+    def aplicar_statement_timeout(conexao):
+        cursor = conexao.connection.cursor()
+        cursor.execute(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+        cursor.close()
+
+
+def criar_engine(url: str, config: Settings = settings) -> Engine:
+    """Engine configurado conforme o perfil da URL"""
+    nova_engine = create_engine(url, **opcoes_engine(url, config))
+    _statement_timeout_por_transacao(nova_engine, url, config)
+    return nova_engine
+
+
+def criar_engine_async(url: str, config: Settings = settings) -> AsyncEngine:
+    """Engine assíncrono (asyncpg/aiosqlite) com o mesmo perfil do engine síncrono"""
+    nova_engine = create_async_engine(url_async(url), **opcoes_engine(url, config, assincrono=True))
+    _statement_timeout_por_transacao(nova_engine.sync_engine, url, config)
+    return nova_engine
+
+
+def estatisticas_pool(alvo: Engine) -> Dict[str, Any]:
+    """
+    Estado do pool e contadores de espera, para a rota de telemetria
+
+    Returns:
+        dict: perfil, classe do pool, conexões em uso, ociosas e em overflow,
+              limites configurados e os contadores da TelemetriaPool do pool
+    """
+    pool = alvo.pool
+    dados: Dict[str, Any] = {
+        "perfil": perfil_conexao(str(alvo.url)),
+        "pool": type(pool).__name__
+    }
+    if isinstance(pool, QueuePool):
+        dados.update({
+            "tamanho": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "em_uso": pool.checkedout(),
+            "ociosas": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "timeout_segundos": pool.timeout()
+        })
+    telemetria = getattr(pool, "telemetria", None)
+    if telemetria is not None:
+        dados.update(telemetria.estatisticas())
+    return dados
+
+
+engine = criar_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -18,3 +246,218 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def sessao_derivada(db: Session) -> Session:
+    """
+    Sessão curta, com transação própria, no mesmo banco de `db`
+    Grava dados derivados (calendário, agregados) durante uma leitura sem
+    confirmar nem desfazer o que a sessão do chamador tem em andamento
+    """
+    return Session(bind=db.get_bind(), autoflush=False)
+
+
+def verificar_conexao(alvo: Optional[Engine] = None, tentativas: Optional[int] = None, intervalo: Optional[float] = None) -> None:
+    """
+    Confirma que o banco aceita conexões (início da aplicação)
+
+    Args:
+        alvo: Engine a verificar (padrão: o primário)
+        tentativas: Tentativas antes de desistir (padrão: DB_CONEXAO_TENTATIVAS)
+        intervalo: Espera entre tentativas, em segundos (padrão: DB_CONEXAO_INTERVALO_SEGUNDOS)
+
+    Raises:
+        DBAPIError: Se o banco continuar inacessível após todas as tentativas
+    """
+    alvo = alvo or engine
+    tentativas = max(1, tentativas or settings.DB_CONEXAO_TENTATIVAS)
+    intervalo = settings.DB_CONEXAO_INTERVALO_SEGUNDOS if intervalo is None else intervalo
+
+    for tentativa in range(1, tentativas + 1):
+        try:
+            with alvo.connect() as conexao:
+                conexao.execute(text("SELECT 1"))
+            return
+        except (exc.DBAPIError, exc.TimeoutError):
+            if tentativa == tentativas:
+                raise
+            logger.warning("Banco inacessível (tentativa %s de %s)", tentativa, tentativas)
+            relogio.sleep(intervalo)
+
+
+class RoteadorLeitura:
+    """
+    Escolhe o banco das rotas somente leitura: a réplica, se configurada e
+    acessível, ou o primário
+
+    - Leitura após escrita: o instante da última alteração bem-sucedida viaja
+      com o cliente (cookie e cabeçalho, ver LeituraAposEscrita); enquanto ele
+      estiver dentro de janela_escrita segundos, a leitura vai ao primário.
+      Por não ficar guardado no processo, vale em qualquer worker e sobrevive
+      à renovação do token
+    - Falha ao conectar na réplica: a leitura vai ao primário e a réplica
+      fica suspensa por pausa_falha segundos
+    """
+
+    def __init__(
+        self,
+        primario: Callable[[], Session],
+        replica: Optional[Engine] = None,
+        janela_escrita: float = 5,
+        pausa_falha: float = 30
+    ):
+        self.primario = primario
+        self.replica = replica
+        self._sessoes_replica = sessionmaker(autocommit=False, autoflush=False, bind=replica) if replica else None
+        self.janela_escrita = janela_escrita
+        self.pausa_falha = pausa_falha
+        self._suspensa_ate = 0.0
+        self._trava = threading.Lock()
+        self.leituras_replica = 0
+        self.leituras_primario = 0
+        self.falhas_replica = 0
+
+    @property
+    def ativo(self) -> bool:
+        return self.replica is not None
+
+    def _usar_replica(self, ultima_escrita: Optional[float]) -> bool:
+        # Relógio de parede: o instante pode ter sido gravado por outro worker
+        if ultima_escrita is not None and relogio.time() - ultima_escrita < self.janela_escrita:
+            return False
+        with self._trava:
+            return self.ativo and self._suspensa_ate <= relogio.monotonic()
+
+    def abrir_sessao(self, ultima_escrita: Optional[float] = None) -> Session:
+        """
+        Sessão de leitura para o cliente
+
+        Args:
+            ultima_escrita: Instante (epoch) da última escrita do cliente; None = sem leitura após escrita
+
+        Returns:
+            Session: Da réplica (com SESSAO_PRIMARIA em info) ou do primário
+        """
+        if self._usar_replica(ultima_escrita):
+            sessao = self._sessoes_replica()
+            try:
+                # Conecta já, para cair no primário se a réplica estiver fora
+                sessao.connection()
+            except (exc.DBAPIError, exc.TimeoutError):
+                sessao.close()
+                with self._trava:
+                    self.falhas_replica += 1
+                    self._suspensa_ate = relogio.monotonic() + self.pausa_falha
+            else:
+                sessao.info[SESSAO_PRIMARIA] = self.primario
+                with self._trava:
+                    self.leituras_replica += 1
+                return sessao
+
+        with self._trava:
+            self.leituras_primario += 1
+        return self.primario()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Leituras por destino, falhas da réplica e estado do pool da réplica"""
+        with self._trava:
+            dados: Dict[str, Any] = {
+                "ativa": self.ativo,
+                "suspensa": self._suspensa_ate > relogio.monotonic(),
+                "leituras_replica": self.leituras_replica,
+                "leituras_primario": self.leituras_primario,
+                "falhas_replica": self.falhas_replica
+            }
+        if self.ativo:
+            dados["pool"] = estatisticas_pool(self.replica)
+        return dados
+
+
+def ultima_escrita(request: Request) -> Optional[float]:
+    """Instante da última escrita informado pelo cliente (cookie ou cabeçalho)"""
+    valor = request.cookies.get(COOKIE_ULTIMA_ESCRITA) or request.headers.get(CABECALHO_ULTIMA_ESCRITA)
+    try:
+        return float(valor) if valor else None
+    except ValueError:
+        return None
+
+
+roteador_leitura = RoteadorLeitura(
+    SessionLocal,
+    criar_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None,
+    janela_escrita=settings.REPLICA_JANELA_ESCRITA_SEGUNDOS,
+    pausa_falha=settings.REPLICA_PAUSA_FALHA_SEGUNDOS
+)
+
+
+def get_db_leitura(request: Request):
+    """Sessão das rotas somente leitura (réplica, com queda para o primário)"""
+    db = roteador_leitura.abrir_sessao(ultima_escrita(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class LeituraAposEscrita:
+    """
+    Middleware ASGI: respostas de sucesso a métodos que alteram dados levam
+    o instante da escrita ao cliente, em um cookie que expira com a janela
+    de escrita e no cabeçalho X-Ultima-Escrita (para clientes sem cookies,
+    que o reenviam nas leituras seguintes)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in METODOS_LEITURA or not roteador_leitura.ativo:
+            await self.app(scope, receive, send)
+            return
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start" and mensagem["status"] < 400:
+                instante = f"{relogio.time():.3f}"
+                janela = max(int(roteador_leitura.janela_escrita), 1)
+                cookie = f"{COOKIE_ULTIMA_ESCRITA}={instante}; Max-Age={janela}; Path=/; HttpOnly; SameSite=Lax"
+                mensagem["headers"] = [
+                    *mensagem.get("headers", []),
+                    (b"set-cookie", cookie.encode("latin-1")),
+                    (CABECALHO_ULTIMA_ESCRITA.lower().encode("latin-1"), instante.encode("latin-1"))
+                ]
+            await send(mensagem)
+
+        await self.app(scope, receive, enviar)
+
+# Engine assíncrono: criado no primeiro uso, para que o driver async só
+# seja carregado por quem usa as rotas assíncronas
+_engine_async: Optional[AsyncEngine] = None
+_sessoes_async: Optional[async_sessionmaker] = None
+_trava_engine_async = threading.Lock()
+
+def obter_engine_async() -> AsyncEngine:
+    global _engine_async, _sessoes_async
+    with _trava_engine_async:
+        if _engine_async is None:
+            _engine_async = criar_engine_async(settings.database_url)
+            _sessoes_async = async_sessionmaker(
+                _engine_async, class_=AsyncSession, autoflush=False, expire_on_commit=False
+            )
+        return _engine_async
+
+def engine_async_ativo() -> Optional[AsyncEngine]:
+    """Engine assíncrono, se já criado (sem criá-lo)"""
+    return _engine_async
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    obter_engine_async()
+    async with _sessoes_async() as db:
+        yield db
+
+async def encerrar_engines() -> None:
+    """Fecha as conexões dos pools (fim da aplicação)"""
+    if _engine_async is not None:
+        await _engine_async.dispose()
+    if roteador_leitura.replica is not None:
+        roteador_leitura.replica.dispose()
+    engine.dispose()
@@ -1,15 +1,33 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
-from app.routers import auth, pacientes, medicos, admin, consultas, populate
+from app.config import settings
+from app.database import LeituraAposEscrita, encerrar_engines, verificar_conexao
+from app.routers import auth, pacientes, medicos, admin, consultas, assincrono
+from app.utils.pdf import encerrar_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Início e fim de cada worker
+
+    O esquema do banco não é criado aqui (python -m app.migracoes, antes do
+    deploy): o worker só confirma que o banco aceita conexões.
+    """
+    await run_in_threadpool(verificar_conexao)
+    yield
+    encerrar_pool()
+    await encerrar_engines()
 
-# Criar tabelas
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Clínica Saúde+ API",
     description="Sistema de Agendamento de Consultas Médicas",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -22,13 +40,21 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Leitura após escrita: quem acabou de alterar dados lê do primário, não da réplica
+app.add_middleware(LeituraAposEscrita)
+
 # Incluir routers
 app.include_router(auth.router)
 app.include_router(consultas.router)  # Router de consultas (NOVO)
 app.include_router(pacientes.router)
 app.include_router(medicos.router)
 app.include_router(admin.router)
-app.include_router(populate.router, prefix="/admin", tags=["Database"])
+app.include_router(assincrono.router)  # Versões async das rotas mais acessadas
+
+if settings.ROTAS_POPULATE:
+    # Importado só quando habilitado: carga de dados de teste não faz parte da API
+    from app.routers import populate
+    app.include_router(populate.router, prefix="/admin", tags=["Database"])
 
 @app.get("/")
 def root():
@@ -0,0 +1,74 @@
+"""
+Migrações do Banco - Clínica Saúde+
+Comando separado da aplicação, executado uma vez antes de subir (ou
+escalar) os workers; a aplicação não altera o esquema ao iniciar.
+
+    python -m app.migracoes
+
+O Alembic é a única fonte do esquema de bancos existentes:
+- banco versionado (tabela alembic_version): aplica as revisões pendentes;
+- banco criado pela aplicação antes do versionamento (tabelas sem
+  alembic_version): marca a revisão correspondente e aplica as seguintes;
+- banco vazio: cria as tabelas dos modelos e marca a revisão mais recente.
+"""
+import logging
+import os
+from typing import Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+from app.database import Base, engine
+from app import models  # noqa: F401 (registra as tabelas em Base.metadata)
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Revisão equivalente ao esquema que Base.metadata.create_all montava ao
+# iniciar a aplicação, antes de o banco ser versionado
+REVISAO_ESQUEMA_LEGADO = "003b"
+
+
+def _config_alembic():
+    from alembic.config import Config
+
+    config = Config(os.path.join(DIRETORIO_BACKEND, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(DIRETORIO_BACKEND, "alembic"))
+    return config
+
+
+def migrar(alvo: Optional[Engine] = None) -> None:
+    """
+    Atualiza o esquema do banco
+
+    Args:
+        alvo: Engine a migrar (padrão: o primário)
+    """
+    from alembic import command
+
+    alvo = alvo or engine
+    config = _config_alembic()
+    tabelas = set(inspect(alvo).get_table_names())
+
+    with alvo.begin() as conexao:
+        # alembic/env.py usa esta conexão em vez de abrir outra
+        config.attributes["connection"] = conexao
+
+        if "alembic_version" in tabelas:
+            logger.info("Aplicando revisões do Alembic")
+            command.upgrade(config, "head")
+        elif tabelas:
+            logger.info("Banco sem versionamento: marcando a revisão %s", REVISAO_ESQUEMA_LEGADO)
+            command.stamp(config, REVISAO_ESQUEMA_LEGADO)
+            command.upgrade(config, "head")
+        else:
+            logger.info("Banco vazio: criando as tabelas dos modelos")
+            Base.metadata.create_all(bind=conexao)
+            command.stamp(config, "head")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    migrar()
+    logger.info("Esquema do banco atualizado")
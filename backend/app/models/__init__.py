@@ -8,7 +8,15 @@ from app.models.models import (
     HorarioTrabalho,
     Consulta,
     Observacao,
-    BloqueioHorario
+    BloqueioHorario,
+    AgendaDia,
+    AgendaSlot,
+    AgregadoMes,
+    ConsultaMensalPlano,
+    AgregadoDia,
+    ConsultaDiaria,
+    ConsultaEvento,
+    SessaoUsuario
 )
 
 __all__ = [
@@ -21,5 +29,13 @@ __all__ = [
     "HorarioTrabalho",
     "Consulta",
     "Observacao",
-    "BloqueioHorario"
+    "BloqueioHorario",
+    "AgendaDia",
+    "AgendaSlot",
+    "AgregadoMes",
+    "ConsultaMensalPlano",
+    "AgregadoDia",
+    "ConsultaDiaria",
+    "ConsultaEvento",
+    "SessaoUsuario"
 ]
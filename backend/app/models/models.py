@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Text, Date, Time, Numeric
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Text, Date, Time, Numeric, Index, UniqueConstraint, LargeBinary
+from sqlalchemy import DDL, event, func, text
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -11,6 +13,9 @@ class StatusConsulta(str, enum.Enum):
     REALIZADA = "realizada"
     FALTOU = "faltou"
 
+# Predicado das consultas que ocupam a agenda (índices parciais e constraint de exclusão)
+CONSULTA_ATIVA_SQL = "status IN ('agendada', 'confirmada')"
+
 # ===== ENTIDADES CONFORME MER_Estrutura.txt =====
 
 class Especialidade(Base):
@@ -103,6 +108,8 @@ class Paciente(Base):
     - telefone
     - data_nascimento
     - esta_bloqueado
+    - faltas_consecutivas (RN3: faltas desde o último comparecimento ou desbloqueio)
+    - desbloqueado_em (RN3: último desbloqueio pelo administrador)
     - id_plano_saude_fk (FK, Nullable)
     """
     __tablename__ = "paciente"
@@ -115,6 +122,8 @@ class Paciente(Base):
     telefone = Column(String(20))
     data_nascimento = Column(Date, nullable=False)
     esta_bloqueado = Column(Boolean, default=False)
+    faltas_consecutivas = Column(Integer, nullable=False, default=0, server_default="0")
+    desbloqueado_em = Column(DateTime, nullable=True)
     id_plano_saude_fk = Column(Integer, ForeignKey("plano_saude.id_plano_saude"), nullable=True)
     
     # Relacionamentos
@@ -129,14 +138,27 @@ class Relatorio(Base):
     - data_geracao
     - dados_resultado
     - id_admin_fk (FK)
+    Geração assíncrona (fila de relatórios):
+    - parametros (JSON), chave (hash de tipo + parâmetros, para reaproveitamento)
+    - status (pendente, processando, concluido, erro), mensagem_erro
+    - data_conclusao, arquivo_pdf
     """
     __tablename__ = "relatorio"
+    __table_args__ = (
+        Index("ix_relatorio_chave_geracao", "chave", "data_geracao"),
+    )
     
     id_relatorio = Column(Integer, primary_key=True, index=True)
     tipo = Column(String(100), nullable=False)
     data_geracao = Column(DateTime, default=datetime.utcnow)
     dados_resultado = Column(Text)
     id_admin_fk = Column(Integer, ForeignKey("administrador.id_admin"), nullable=False)
+    parametros = Column(Text)
+    chave = Column(String(64))
+    status = Column(String(20), nullable=False, default="pendente", server_default="pendente")
+    mensagem_erro = Column(Text)
+    data_conclusao = Column(DateTime)
+    arquivo_pdf = Column(LargeBinary)
     
     # Relacionamentos
     administrador = relationship("Administrador", back_populates="relatorios")
@@ -151,6 +173,9 @@ class HorarioTrabalho(Base):
     - id_medico_fk (FK)
     """
     __tablename__ = "horario_trabalho"
+    __table_args__ = (
+        Index("ix_horario_trabalho_medico_dia", "id_medico_fk", "dia_semana"),
+    )
     
     id_horario = Column(Integer, primary_key=True, index=True)
     dia_semana = Column(Integer, nullable=False)  # 0=Segunda, 6=Domingo
@@ -172,6 +197,31 @@ class Consulta(Base):
     - id_medico_fk (FK)
     """
     __tablename__ = "consulta"
+    __table_args__ = (
+        # RN4 no banco: médico não pode ter duas consultas ativas sobrepostas (somente PostgreSQL)
+        ExcludeConstraint(
+            (text("id_medico_fk"), "="),
+            (func.tsrange(text("data_hora_inicio"), text("data_hora_fim"), text("'[)'")), "&&"),
+            name="ex_consulta_medico_horario",
+            using="gist",
+            where=text(CONSULTA_ATIVA_SQL),
+        ).ddl_if(dialect="postgresql"),
+        # Agenda do médico e histórico do paciente por período
+        Index("ix_consulta_medico_inicio", "id_medico_fk", "data_hora_inicio"),
+        Index("ix_consulta_paciente_inicio", "id_paciente_fk", "data_hora_inicio"),
+        # Listagem geral paginada por (data_hora_inicio, id_consulta) e contagens por período
+        Index("ix_consulta_inicio_id", "data_hora_inicio", "id_consulta"),
+        Index("ix_consulta_status", "status"),
+        # Somente consultas ativas: conflito de horário (RN4), disponibilidade e limite (RN2)
+        Index(
+            "ix_consulta_medico_inicio_ativa", "id_medico_fk", "data_hora_inicio",
+            postgresql_where=text(CONSULTA_ATIVA_SQL), sqlite_where=text(CONSULTA_ATIVA_SQL)
+        ),
+        Index(
+            "ix_consulta_paciente_inicio_ativa", "id_paciente_fk", "data_hora_inicio",
+            postgresql_where=text(CONSULTA_ATIVA_SQL), sqlite_where=text(CONSULTA_ATIVA_SQL)
+        ),
+    )
     
     id_consulta = Column(Integer, primary_key=True, index=True)
     data_hora_inicio = Column(DateTime, nullable=False)
@@ -185,6 +235,13 @@ class Consulta(Base):
     medico = relationship("Medico", back_populates="consultas")
     observacao = relationship("Observacao", back_populates="consulta", uselist=False)
 
+# A constraint de exclusão com "=" sobre inteiro requer a extensão btree_gist
+event.listen(
+    Consulta.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql")
+)
+
 class Observacao(Base):
     """
     Entidade: OBSERVACAO
@@ -214,6 +271,9 @@ class BloqueioHorario(Base):
     - id_medico_fk (FK)
     """
     __tablename__ = "bloqueio_horario"
+    __table_args__ = (
+        Index("ix_bloqueio_horario_medico_data", "id_medico_fk", "data"),
+    )
     
     id_bloqueio = Column(Integer, primary_key=True, index=True)
     data = Column(Date, nullable=False)
@@ -224,3 +284,168 @@ class BloqueioHorario(Base):
     
     # Relacionamentos
     medico = relationship("Medico", back_populates="bloqueios")
+
+
+# ===== ESTRUTURAS DERIVADAS (não fazem parte do MER) =====
+
+class AgendaDia(Base):
+    """
+    Calendário materializado: marca os dias já gerados em AGENDA_SLOT
+    - id_medico_fk (PK, FK)
+    - data (PK)
+    - gerado_em
+    """
+    __tablename__ = "agenda_dia"
+    
+    id_medico_fk = Column(Integer, ForeignKey("medico.id_medico"), primary_key=True)
+    data = Column(Date, primary_key=True)
+    gerado_em = Column(DateTime, default=datetime.utcnow)
+
+class AgendaSlot(Base):
+    """
+    Calendário materializado: slots de atendimento de cada médico
+    Derivado de HORARIO_TRABALHO, BLOQUEIO_HORARIO e CONSULTA
+    - id_slot (PK)
+    - id_medico_fk (FK)
+    - data
+    - data_hora_inicio
+    - disponivel
+    """
+    __tablename__ = "agenda_slot"
+    __table_args__ = (
+        UniqueConstraint("id_medico_fk", "data_hora_inicio", name="uq_agenda_slot_medico_inicio"),
+        Index("ix_agenda_slot_medico_data_disponivel", "id_medico_fk", "data", "disponivel"),
+    )
+    
+    id_slot = Column(Integer, primary_key=True, index=True)
+    id_medico_fk = Column(Integer, ForeignKey("medico.id_medico"), nullable=False)
+    data = Column(Date, nullable=False)
+    data_hora_inicio = Column(DateTime, nullable=False)
+    disponivel = Column(Boolean, nullable=False, default=True)
+
+class AgregadoMes(Base):
+    """
+    Agregado mensal: marca os meses fechados já consolidados em CONSULTA_MENSAL_PLANO
+    - mes (PK, primeiro dia do mês)
+    - gerado_em
+    """
+    __tablename__ = "agregado_mes"
+    
+    mes = Column(Date, primary_key=True)
+    gerado_em = Column(DateTime, default=datetime.utcnow)
+
+class ConsultaMensalPlano(Base):
+    """
+    Agregado mensal: total de consultas por plano de saúde em cada mês fechado
+    Derivado de CONSULTA e do plano do paciente no fechamento do mês
+    - mes (PK, primeiro dia do mês)
+    - id_plano_saude_fk (PK, FK)
+    - total
+    """
+    __tablename__ = "consulta_mensal_plano"
+    
+    mes = Column(Date, primary_key=True)
+    id_plano_saude_fk = Column(Integer, ForeignKey("plano_saude.id_plano_saude"), primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+
+class AgregadoDia(Base):
+    """
+    Agregado diário: marca os dias fechados já consolidados em CONSULTA_DIARIA
+    - dia (PK)
+    - gerado_em
+    """
+    __tablename__ = "agregado_dia"
+    
+    dia = Column(Date, primary_key=True)
+    gerado_em = Column(DateTime, default=datetime.utcnow)
+
+class ConsultaDiaria(Base):
+    """
+    Agregado diário: total de consultas por dia, médico, especialidade, plano e status
+    Derivado de CONSULTA, da especialidade do médico e do plano do paciente no fechamento do dia
+    - id_consulta_diaria (PK)
+    - dia
+    - id_medico_fk (FK)
+    - id_especialidade_fk (FK)
+    - id_plano_saude_fk (FK, Nullable: pacientes particulares)
+    - status
+    - total
+    """
+    __tablename__ = "consulta_diaria"
+    __table_args__ = (
+        Index("ix_consulta_diaria_dia_medico", "dia", "id_medico_fk"),
+    )
+    
+    id_consulta_diaria = Column(Integer, primary_key=True)
+    dia = Column(Date, nullable=False)
+    id_medico_fk = Column(Integer, ForeignKey("medico.id_medico"), nullable=False)
+    id_especialidade_fk = Column(Integer, ForeignKey("especialidade.id_especialidade"), nullable=False)
+    id_plano_saude_fk = Column(Integer, ForeignKey("plano_saude.id_plano_saude"), nullable=True)
+    status = Column(String(50), nullable=False)
+    total = Column(Integer, nullable=False, default=0)
+
+class ConsultaEvento(Base):
+    """
+    Histórico de eventos da consulta (somente inserção)
+    Gravado na mesma transação do agendamento, cancelamento, reagendamento
+    e mudança de status
+    - id_evento (PK)
+    - id_consulta_fk (FK)
+    - id_medico_fk (FK)
+    - tipo (agendamento, cancelamento, reagendamento, status)
+    - status_anterior / status_novo
+    - data_consulta: início da consulta após o evento
+    - data_consulta_anterior: início antes do reagendamento
+    - ocorrido_em
+    - antecedencia_minutos: de ocorrido_em até data_consulta
+    """
+    __tablename__ = "consulta_evento"
+    __table_args__ = (
+        # Relatórios: eventos de um tipo no período das consultas
+        Index("ix_consulta_evento_tipo_data", "tipo", "data_consulta"),
+        # Séries temporais pelo momento do evento
+        Index("ix_consulta_evento_ocorrido", "ocorrido_em"),
+        Index("ix_consulta_evento_consulta", "id_consulta_fk", "ocorrido_em"),
+    )
+    
+    id_evento = Column(Integer, primary_key=True)
+    id_consulta_fk = Column(Integer, ForeignKey("consulta.id_consulta"), nullable=False)
+    id_medico_fk = Column(Integer, ForeignKey("medico.id_medico"), nullable=False)
+    tipo = Column(String(20), nullable=False)
+    status_anterior = Column(String(50), nullable=True)
+    status_novo = Column(String(50), nullable=True)
+    data_consulta = Column(DateTime, nullable=False)
+    data_consulta_anterior = Column(DateTime, nullable=True)
+    ocorrido_em = Column(DateTime, nullable=False)
+    antecedencia_minutos = Column(Integer, nullable=True)
+    
+    consulta = relationship("Consulta")
+
+class SessaoUsuario(Base):
+    """
+    Sessão de login renovável (refresh token), revogável no servidor
+    Guarda apenas o SHA-256 do refresh token; o usuário é identificado
+    pelo par (tipo_usuario, id_usuario), sem FK por ser de qualquer das
+    três tabelas de usuários
+    - id_sessao (PK)
+    - token_hash (UK)
+    - tipo_usuario (paciente, medico, administrador)
+    - id_usuario
+    - email
+    - criada_em / expira_em
+    - revogada_em: preenchida no logout, troca de senha ou bloqueio
+    """
+    __tablename__ = "sessao_usuario"
+    __table_args__ = (
+        # Revogação de todas as sessões de um usuário
+        Index("ix_sessao_usuario_usuario", "tipo_usuario", "id_usuario"),
+    )
+    
+    id_sessao = Column(Integer, primary_key=True)
+    token_hash = Column(String(64), unique=True, nullable=False)
+    tipo_usuario = Column(String(20), nullable=False)
+    id_usuario = Column(Integer, nullable=False)
+    email = Column(String(255), nullable=False)
+    criada_em = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expira_em = Column(DateTime, nullable=False)
+    revogada_em = Column(DateTime, nullable=True)
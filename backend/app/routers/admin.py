@@ -4,15 +4,19 @@ Implementa todos os casos de uso do módulo Administrativo conforme CasosDeUso.t
 Atualizado para modelo conforme MER
 REFATORADO PARA JWT AUTHENTICATION
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_, desc, case
+from sqlalchemy import func, and_, or_, desc, case
 from sqlalchemy.exc import IntegrityError
-from typing import List
+from typing import List, Optional
 from datetime import date, datetime, timedelta
-from app.database import get_db
-from app.utils.auth import get_current_user, get_password_hash
+from app.database import engine, engine_async_ativo, estatisticas_pool, get_db, get_db_leitura, roteador_leitura
+from app.utils.auth import get_current_user, get_password_hash, tokens_verificados
+from app.utils.paginacao import (
+    LIMITE_PADRAO, LIMITE_MAXIMO,
+    aplicar_keyset, fechar_pagina, paginar_listagem, paginar_consultas
+)
 from app.models.models import (
     Administrador, Medico, Paciente, Consulta, PlanoSaude, Especialidade,
     Relatorio, Observacao
@@ -26,6 +30,7 @@ from app.schemas.schemas import (
     EstatisticasDashboard,
     ConsultaResponse,
     RelatorioResponse,
+    RelatorioSolicitacao,
     RelatorioConsultasPorMedico,
     RelatorioConsultasPorEspecialidade,
     RelatorioCancelamentos,
@@ -33,6 +38,16 @@ from app.schemas.schemas import (
     ObservacaoResponse
 )
 from app.services.regras_negocio import RegraPaciente
+from app.services.calendario import CalendarioSlots
+from app.services.agregados import AgregadoConsultasDia, AgregadoConsultasPlano
+from app.services.relatorios import RelatoriosAdmin, TIPOS_RELATORIO, parametros_relatorio
+from app.services.relatorios_pdf import MODELOS, resposta_pdf
+from app.services.fila_relatorios import FilaRelatorios, STATUS_CONCLUIDO
+from app.services.estatisticas import EstatisticasAdmin
+from app.services.sessoes import SessoesUsuario
+from app.services.exportacao import (
+    COLUNAS_CONSULTA, COLUNAS_RELATORIO, FORMATOS, ExportacaoDados, codificar
+)
 
 router = APIRouter(prefix="/admin", tags=["Administração"])
 
@@ -51,76 +66,63 @@ def verificar_admin(current_user: dict):
 @router.get("/dashboard", response_model=EstatisticasDashboard)
 def get_dashboard(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_leitura)
 ):
     """
     Retorna estatísticas gerais para o dashboard administrativo
+    Uma única consulta agregada, servida de cache de curta duração
     """
     verificar_admin(current_user)
     
-    hoje = date.today()
-    inicio_semana = hoje - timedelta(days=hoje.weekday())
-    inicio_mes = date(hoje.year, hoje.month, 1)
-    
-    # Estatísticas gerais
-    total_pacientes = db.query(Paciente).count()
-    total_medicos = db.query(Medico).count()
-    total_consultas = db.query(Consulta).count()
-    
-    # Consultas por período
-    consultas_hoje = db.query(Consulta).filter(
-        func.date(Consulta.data_hora_inicio) == hoje
-    ).count()
-    
-    consultas_semana = db.query(Consulta).filter(
-        func.date(Consulta.data_hora_inicio) >= inicio_semana,
-        func.date(Consulta.data_hora_inicio) <= hoje
-    ).count()
-    
-    consultas_mes = db.query(Consulta).filter(
-        func.extract('year', Consulta.data_hora_inicio) == hoje.year,
-        func.extract('month', Consulta.data_hora_inicio) == hoje.month
-    ).count()
-    
-    # Consultas por status
-    consultas_agendadas = db.query(Consulta).filter(
-        Consulta.status == "agendada"
-    ).count()
-    
-    consultas_realizadas = db.query(Consulta).filter(
-        Consulta.status == "realizada"
-    ).count()
+    return EstatisticasAdmin.contagens(db)
+
+
+@router.get("/telemetria")
+def get_telemetria(current_user: dict = Depends(get_current_user)):
+    """
+    Instrumentação do processo: pool de conexões (em uso, ociosas, overflow,
+    espera no checkout e timeouts), cache de tokens verificados e leituras
+    roteadas para a réplica
+    Os contadores são por worker e acumulados desde o início do processo
+    """
+    verificar_admin(current_user)
     
-    return {
-        "total_pacientes": total_pacientes,
-        "total_medicos": total_medicos,
-        "total_consultas": total_consultas,
-        "consultas_hoje": consultas_hoje,
-        "consultas_semana": consultas_semana,
-        "consultas_mes": consultas_mes,
-        "consultas_agendadas": consultas_agendadas,
-        "consultas_realizadas": consultas_realizadas
+    telemetria = {
+        "pool_conexoes": estatisticas_pool(engine),
+        "cache_tokens": tokens_verificados.estatisticas(),
+        "replica_leitura": roteador_leitura.estatisticas()
     }
+    engine_async = engine_async_ativo()
+    if engine_async is not None:
+        telemetria["pool_conexoes_async"] = estatisticas_pool(engine_async.sync_engine)
+    return telemetria
 
 
 # ============ Gerenciamento de Médicos ============
 
 @router.get("/medicos", response_model=List[MedicoResponse])
 def listar_medicos(
+    response: Response,
+    limite: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    cursor: Optional[str] = None,
+    campos: Optional[str] = Query(None, alias="fields", description="Campos retornados, separados por vírgula"),
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_leitura)
 ):
     """
     Caso de Uso: Gerenciar Cadastro de Médicos (listar)
-    Lista todos os médicos cadastrados
+    Lista os médicos cadastrados, em ordem alfabética e paginados por cursor
     """
     verificar_admin(current_user)
     
-    medicos = db.query(Medico).options(
-        joinedload(Medico.especialidade)
-    ).all()
-    
-    return medicos
+    return paginar_listagem(
+        db.query(Medico), Medico, (Medico.nome, Medico.id_medico), response,
+        schema=MedicoResponse,
+        relacoes={"especialidade": joinedload(Medico.especialidade)},
+        limite=limite,
+        cursor=cursor,
+        campos=campos
+    )
 
 
 @router.get("/medicos/{medico_id}", response_model=MedicoResponse)
@@ -289,6 +291,7 @@ def atualizar_medico(
     # Atualizar senha
     if medico_data.senha is not None:
         medico.senha_hash = get_password_hash(medico_data.senha)
+        SessoesUsuario.revogar_do_usuario(db, "medico", medico.id_medico)
     
     # Atualizar telefone
     if medico_data.telefone is not None:
@@ -347,6 +350,7 @@ def excluir_medico(
             detail="Não é possível excluir médico com consultas cadastradas"
         )
     
+    CalendarioSlots.invalidar_medico(db, medico_id, a_partir_de=date.min)
     db.delete(medico)
     db.commit()
     
@@ -358,45 +362,92 @@ def excluir_medico(
 
 # ============ Gerenciamento de Pacientes ============
 
+# Colunas permitidas na ordenação da listagem de pacientes
+ORDENACAO_PACIENTES = {
+    "nome": Paciente.nome,
+    "cpf": Paciente.cpf,
+    "email": Paciente.email,
+    "id": Paciente.id_paciente,
+}
+
+
 @router.get("/pacientes", response_model=List[dict])
 def listar_pacientes(
+    response: Response,
+    busca: Optional[str] = Query(None, description="Trecho do nome, CPF ou email"),
+    bloqueado: Optional[bool] = None,
+    ordenar_por: str = Query("nome", pattern="^(nome|cpf|email|id)$"),
+    ordem: str = Query("asc", pattern="^(asc|desc)$"),
+    limite: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_leitura)
 ):
     """
-    Lista todos os pacientes cadastrados com estatísticas de consultas
+    Lista os pacientes cadastrados com estatísticas de consultas
+    
+    Paginação por cursor: a próxima página vem no cabeçalho X-Proximo-Cursor.
+    Os pacientes da página e suas estatísticas saem de uma única consulta agrupada.
     """
     verificar_admin(current_user)
     
-    pacientes = db.query(Paciente).options(
-        joinedload(Paciente.plano_saude)
+    coluna_ordem = ORDENACAO_PACIENTES[ordenar_por]
+    colunas = [coluna_ordem, Paciente.id_paciente] if ordenar_por != "id" else [Paciente.id_paciente]
+    descendente = ordem == "desc"
+    
+    # Página de pacientes (filtro + keyset sobre a tabela paciente)
+    filtro = db.query(Paciente.id_paciente)
+    if busca and busca.strip():
+        termo = busca.strip()
+        condicoes = [Paciente.nome.ilike(f"%{termo}%"), Paciente.email.ilike(f"%{termo}%")]
+        digitos = "".join(c for c in termo if c.isdigit())
+        if digitos:
+            condicoes.append(Paciente.cpf.like(f"%{digitos}%"))
+        filtro = filtro.filter(or_(*condicoes))
+    if bloqueado is not None:
+        filtro = filtro.filter(Paciente.esta_bloqueado == bloqueado)
+    pagina = aplicar_keyset(filtro, colunas, cursor, limite, descendente).subquery()
+    
+    # Estatísticas por soma condicional, agrupadas apenas para a página
+    total_consultas = func.coalesce(func.sum(case((Consulta.status == 'realizada', 1), else_=0)), 0)
+    consultas_agendadas = func.coalesce(func.sum(case((Consulta.status == 'agendada', 1), else_=0)), 0)
+    
+    linhas = db.query(
+        Paciente,
+        PlanoSaude.id_plano_saude,
+        PlanoSaude.nome,
+        PlanoSaude.cobertura_info,
+        total_consultas.label("total_consultas"),
+        consultas_agendadas.label("consultas_agendadas")
+    ).join(
+        pagina, pagina.c.id_paciente == Paciente.id_paciente
+    ).outerjoin(
+        PlanoSaude, PlanoSaude.id_plano_saude == Paciente.id_plano_saude_fk
+    ).outerjoin(
+        Consulta, Consulta.id_paciente_fk == Paciente.id_paciente
+    ).group_by(
+        Paciente.id_paciente, PlanoSaude.id_plano_saude
+    ).order_by(
+        *[c.desc() if descendente else c.asc() for c in colunas]
     ).all()
     
-    # Adicionar estatísticas de consultas para cada paciente
+    linhas, _ = fechar_pagina(
+        linhas, limite,
+        chave=lambda linha: [getattr(linha[0], c.key) for c in colunas],
+        response=response
+    )
+    
     resultado = []
-    for paciente in pacientes:
-        # Contar total de consultas realizadas
-        total_consultas = db.query(Consulta).filter(
-            Consulta.id_paciente_fk == paciente.id_paciente,
-            Consulta.status == 'realizada'
-        ).count()
-        
-        # Contar consultas agendadas (futuras)
-        consultas_agendadas = db.query(Consulta).filter(
-            Consulta.id_paciente_fk == paciente.id_paciente,
-            Consulta.status == 'agendada'
-        ).count()
-        
-        # Serializar plano_saude se existir
+    for paciente, plano_id, plano_nome, plano_cobertura, total, agendadas in linhas:
         plano_saude_dict = None
-        if paciente.plano_saude:
+        if plano_id is not None:
             plano_saude_dict = {
-                'id_plano_saude': paciente.plano_saude.id_plano_saude,
-                'nome': paciente.plano_saude.nome,
-                'cobertura_info': paciente.plano_saude.cobertura_info
+                'id_plano_saude': plano_id,
+                'nome': plano_nome,
+                'cobertura_info': plano_cobertura
             }
         
-        paciente_dict = {
+        resultado.append({
             'id_paciente': paciente.id_paciente,
             'nome': paciente.nome,
             'cpf': paciente.cpf,
@@ -406,10 +457,9 @@ def listar_pacientes(
             'esta_bloqueado': paciente.esta_bloqueado,
             'id_plano_saude_fk': paciente.id_plano_saude_fk,
             'plano_saude': plano_saude_dict,
-            'total_consultas': total_consultas,
-            'consultas_agendadas': consultas_agendadas
-        }
-        resultado.append(paciente_dict)
+            'total_consultas': int(total),
+            'consultas_agendadas': int(agendadas)
+        })
     
     return resultado
 
@@ -457,6 +507,7 @@ def bloquear_paciente(
         )
     
     paciente.esta_bloqueado = True
+    SessoesUsuario.revogar_do_usuario(db, "paciente", paciente.id_paciente)
     db.commit()
     db.refresh(paciente)
     
@@ -482,8 +533,7 @@ def desbloquear_paciente(
             detail="Paciente não encontrado"
         )
     
-    paciente.esta_bloqueado = False
-    paciente.faltas_consecutivas = 0
+    RegraPaciente.registrar_desbloqueio(paciente)
     db.commit()
     db.refresh(paciente)
     
@@ -494,20 +544,34 @@ def desbloquear_paciente(
 
 @router.get("/consultas", response_model=List[ConsultaResponse])
 def listar_consultas(
+    response: Response,
+    status_consulta: Optional[str] = Query(None, alias="status"),
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    limite: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    cursor: Optional[str] = None,
+    campos: Optional[str] = Query(None, alias="fields", description="Campos retornados, separados por vírgula"),
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_leitura)
 ):
     """
-    Lista todas as consultas do sistema
+    Lista as consultas do sistema, das mais recentes para as mais antigas
+    Paginação por cursor (cabeçalho X-Proximo-Cursor) e projeção opcional com fields=
     """
     verificar_admin(current_user)
     
-    consultas = db.query(Consulta).options(
-        joinedload(Consulta.paciente),
-        joinedload(Consulta.medico).joinedload(Medico.especialidade)
-    ).all()
+    query = db.query(Consulta)
+    if status_consulta:
+        query = query.filter(Consulta.status == status_consulta)
+    if data_inicio:
+        query = query.filter(Consulta.data_hora_inicio >= datetime.combine(data_inicio, datetime.min.time()))
+    if data_fim:
+        query = query.filter(Consulta.data_hora_inicio < datetime.combine(data_fim + timedelta(days=1), datetime.min.time()))
     
-    return consultas
+    return paginar_consultas(
+        query, response,
+        limite=limite, cursor=cursor, campos=campos, descendente=True
+    )
 
 
 # ============ Gerenciamento de Planos de Saúde ============
@@ -515,7 +579,7 @@ def listar_consultas(
 @router.get("/planos-saude", response_model=List[PlanoSaudeResponse])
 def listar_planos_saude(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_leitura)
 ):
     """
     Caso de Uso: Gerenciar Planos de Saúde (listar)
@@ -527,52 +591,43 @@ def listar_planos_saude(
     return planos
 
 
+# Mês no formato AAAA-MM (parâmetros de período das estatísticas)
+PADRAO_MES = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+
+def _ler_mes(valor: Optional[str], padrao: date) -> date:
+    """Converte AAAA-MM (já validado pelo padrão) no primeiro dia do mês"""
+    if not valor:
+        return padrao
+    ano, mes = valor.split("-")
+    return date(int(ano), int(mes), 1)
+
+
 @router.get("/planos-saude/estatisticas")
 def listar_planos_saude_com_estatisticas(
+    mes_inicio: Optional[str] = Query(None, pattern=PADRAO_MES, description="Primeiro mês (AAAA-MM); padrão: mês atual"),
+    mes_fim: Optional[str] = Query(None, pattern=PADRAO_MES, description="Último mês (AAAA-MM); padrão: mês de início"),
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_leitura)
 ):
     """
     Caso de Uso: Gerenciar Planos de Saúde (listar com estatísticas)
     Lista todos os planos de saúde com estatísticas de pacientes e consultas
+    
+    consultas_mes é o total de consultas dos pacientes do plano no período
+    (por padrão, o mês atual). Meses fechados vêm do agregado mensal.
     """
     verificar_admin(current_user)
     
-    planos = db.query(PlanoSaude).all()
-    
-    resultado = []
-    total_pacientes = db.query(Paciente).count()
-    
-    for plano in planos:
-        # Contar pacientes cadastrados neste plano
-        qtd_pacientes = db.query(Paciente).filter(
-            Paciente.id_plano_saude_fk == plano.id_plano_saude
-        ).count()
-        
-        # Contar consultas do mês atual para pacientes deste plano
-        from datetime import datetime
-        primeiro_dia_mes = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        consultas_mes = db.query(Consulta).join(
-            Paciente, Paciente.id_paciente == Consulta.id_paciente_fk
-        ).filter(
-            Paciente.id_plano_saude_fk == plano.id_plano_saude,
-            Consulta.data_hora_inicio >= primeiro_dia_mes
-        ).count()
-        
-        # Calcular percentual de pacientes
-        percentual = (qtd_pacientes / total_pacientes * 100) if total_pacientes > 0 else 0
-        
-        resultado.append({
-            "id_plano_saude": plano.id_plano_saude,
-            "nome": plano.nome,
-            "cobertura_info": plano.cobertura_info,
-            "qtd_pacientes": qtd_pacientes,
-            "percentual_pacientes": round(percentual, 1),
-            "consultas_mes": consultas_mes
-        })
+    inicio = _ler_mes(mes_inicio, date.today().replace(day=1))
+    fim = _ler_mes(mes_fim, inicio)
+    if fim < inicio:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="mes_fim deve ser igual ou posterior a mes_inicio"
+        )
     
-    return resultado
+    return AgregadoConsultasPlano.estatisticas_planos(db, inicio, fim)
 
 
 @router.post("/planos-saude", response_model=PlanoSaudeResponse, status_code=status.HTTP_201_CREATED)
@@ -669,6 +724,8 @@ def excluir_plano_saude(
             detail=f"Não é possível excluir plano com {pacientes_com_plano} paciente(s) vinculado(s)"
         )
     
+    AgregadoConsultasPlano.invalidar(db, plano_id)
+    AgregadoConsultasDia.invalidar(db, plano_id)
     db.delete(plano)
     db.commit()
     
@@ -683,7 +740,7 @@ def excluir_plano_saude(
 @router.get("/especialidades", response_model=List[EspecialidadeResponse])
 def listar_especialidades(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_leitura)
 ):
     """Lista todas as especialidades"""
     verificar_admin(current_user)
@@ -765,7 +822,7 @@ def relatorio_consultas_por_medico(
     data_fim: date = None,
     formato: str = None,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_leitura)
 ):
     """
     Caso de Uso: Gerar Relatórios em PDF
@@ -773,107 +830,13 @@ def relatorio_consultas_por_medico(
     """
     verificar_admin(current_user)
     
-    query = db.query(
-        Medico.nome.label("medico_nome"),
-        Especialidade.nome.label("especialidade"),
-        func.count(Consulta.id_consulta).label("total_consultas"),
-        func.sum(case((Consulta.status == "realizada", 1), else_=0)).label("consultas_realizadas"),
-        func.sum(case((Consulta.status == "cancelada", 1), else_=0)).label("consultas_canceladas")
-    ).join(
-        Consulta, Consulta.id_medico_fk == Medico.id_medico
-    ).join(
-        Especialidade, Especialidade.id_especialidade == Medico.id_especialidade_fk
-    )
-    
-    # Filtro por médico específico
-    if medico_id:
-        query = query.filter(Medico.id_medico == medico_id)
-    
-    if data_inicio:
-        query = query.filter(func.date(Consulta.data_hora_inicio) >= data_inicio)
-    if data_fim:
-        query = query.filter(func.date(Consulta.data_hora_inicio) <= data_fim)
-    
-    resultados = query.group_by(
-        Medico.id_medico, Medico.nome, Especialidade.nome
-    ).all()
-    
-    dados = [
-        {
-            "medico_nome": r.medico_nome,
-            "especialidade": r.especialidade,
-            "total_consultas": r.total_consultas,
-            "consultas_realizadas": r.consultas_realizadas or 0,
-            "consultas_canceladas": r.consultas_canceladas or 0
-        }
-        for r in resultados
-    ]
+    # Soma o agregado diário (hoje e dias futuros vêm da tabela consulta)
+    dados = RelatoriosAdmin.consultas_por_medico(db, medico_id, data_inicio, data_fim)
     
     # Se solicitado PDF, gera e retorna
     if formato == "pdf":
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib import colors
-        from reportlab.lib.units import cm
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet
-        from io import BytesIO
-        
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        # Título
-        titulo = Paragraph("<b>Relatório de Consultas por Médico</b>", styles['Title'])
-        elements.append(titulo)
-        elements.append(Spacer(1, 0.5*cm))
-        
-        # Período
-        periodo_texto = "Período: "
-        if data_inicio and data_fim:
-            periodo_texto += f"{data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}"
-        elif data_inicio:
-            periodo_texto += f"A partir de {data_inicio.strftime('%d/%m/%Y')}"
-        elif data_fim:
-            periodo_texto += f"Até {data_fim.strftime('%d/%m/%Y')}"
-        else:
-            periodo_texto += "Todos os registros"
-        
-        elements.append(Paragraph(periodo_texto, styles['Normal']))
-        elements.append(Spacer(1, 0.5*cm))
-        
-        # Tabela
-        table_data = [['Médico', 'Especialidade', 'Total', 'Realizadas', 'Canceladas']]
-        for d in dados:
-            table_data.append([
-                d['medico_nome'],
-                d['especialidade'],
-                str(d['total_consultas']),
-                str(d['consultas_realizadas']),
-                str(d['consultas_canceladas'])
-            ])
-        
-        table = Table(table_data, colWidths=[6*cm, 4*cm, 2*cm, 2*cm, 2*cm])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(table)
-        doc.build(elements)
-        
-        buffer.seek(0)
-        return StreamingResponse(
-            buffer,
-            media_type="application/pdf",
-            headers={"Content-Disposition": "inline; filename=relatorio_consultas_medico.pdf"}
-        )
+        parametros = parametros_relatorio("consultas-por-medico", data_inicio, data_fim, medico_id=medico_id)
+        return resposta_pdf("consultas-por-medico", dados, parametros)
     
     return dados
 
@@ -885,7 +848,7 @@ def relatorio_consultas_por_especialidade(
     data_fim: date = None,
     formato: str = None,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_leitura)
 ):
     """
     Caso de Uso: Gerar Relatórios em PDF
@@ -893,99 +856,13 @@ def relatorio_consultas_por_especialidade(
     """
     verificar_admin(current_user)
     
-    query = db.query(
-        Especialidade.nome.label("especialidade"),
-        func.count(Consulta.id_consulta).label("total_consultas"),
-        func.count(func.distinct(Medico.id_medico)).label("total_medicos")
-    ).join(
-        Medico, Medico.id_especialidade_fk == Especialidade.id_especialidade
-    ).join(
-        Consulta, Consulta.id_medico_fk == Medico.id_medico
-    )
-    
-    # Filtro por especialidade específica
-    if especialidade_id:
-        query = query.filter(Especialidade.id_especialidade == especialidade_id)
-    
-    if data_inicio:
-        query = query.filter(func.date(Consulta.data_hora_inicio) >= data_inicio)
-    if data_fim:
-        query = query.filter(func.date(Consulta.data_hora_inicio) <= data_fim)
-    
-    resultados = query.group_by(Especialidade.id_especialidade, Especialidade.nome).all()
-    
-    dados = [
-        {
-            "especialidade": r.especialidade,
-            "total_consultas": r.total_consultas,
-            "total_medicos": r.total_medicos
-        }
-        for r in resultados
-    ]
+    # Soma o agregado diário (hoje e dias futuros vêm da tabela consulta)
+    dados = RelatoriosAdmin.consultas_por_especialidade(db, especialidade_id, data_inicio, data_fim)
     
     # Se solicitado PDF, gera e retorna
     if formato == "pdf":
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib import colors
-        from reportlab.lib.units import cm
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet
-        from io import BytesIO
-        
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        # Título
-        titulo = Paragraph("<b>Relatório de Consultas por Especialidade</b>", styles['Title'])
-        elements.append(titulo)
-        elements.append(Spacer(1, 0.5*cm))
-        
-        # Período
-        periodo_texto = "Período: "
-        if data_inicio and data_fim:
-            periodo_texto += f"{data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}"
-        elif data_inicio:
-            periodo_texto += f"A partir de {data_inicio.strftime('%d/%m/%Y')}"
-        elif data_fim:
-            periodo_texto += f"Até {data_fim.strftime('%d/%m/%Y')}"
-        else:
-            periodo_texto += "Todos os registros"
-        
-        elements.append(Paragraph(periodo_texto, styles['Normal']))
-        elements.append(Spacer(1, 0.5*cm))
-        
-        # Tabela
-        table_data = [['Especialidade', 'Total de Consultas', 'Médicos Atuantes']]
-        for d in dados:
-            table_data.append([
-                d['especialidade'],
-                str(d['total_consultas']),
-                str(d['total_medicos'])
-            ])
-        
-        table = Table(table_data, colWidths=[8*cm, 4*cm, 4*cm])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(table)
-        doc.build(elements)
-        
-        buffer.seek(0)
-        return StreamingResponse(
-            buffer,
-            media_type="application/pdf",
-            headers={"Content-Disposition": "inline; filename=relatorio_consultas_especialidade.pdf"}
-        )
+        parametros = parametros_relatorio("consultas-por-especialidade", data_inicio, data_fim, especialidade_id=especialidade_id)
+        return resposta_pdf("consultas-por-especialidade", dados, parametros)
     
     return dados
 
@@ -996,7 +873,7 @@ def relatorio_cancelamentos(
     data_fim: date = None,
     formato: str = None,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_leitura)
 ):
     """
     Caso de Uso: Gerar Relatórios em PDF
@@ -1004,86 +881,13 @@ def relatorio_cancelamentos(
     """
     verificar_admin(current_user)
     
-    query = db.query(Consulta)
-    
-    if data_inicio:
-        query = query.filter(func.date(Consulta.data_hora_inicio) >= data_inicio)
-    if data_fim:
-        query = query.filter(func.date(Consulta.data_hora_inicio) <= data_fim)
-    
-    total_consultas = query.count()
-    total_cancelamentos = query.filter(Consulta.status == "cancelada").count()
-    
-    taxa_cancelamento = (total_cancelamentos / total_consultas * 100) if total_consultas > 0 else 0
-    
-    dados = {
-        "total_consultas": total_consultas,
-        "total_cancelamentos": total_cancelamentos,
-        "taxa_cancelamento": round(taxa_cancelamento, 2)
-    }
+    # Soma o agregado diário (hoje e dias futuros vêm da tabela consulta)
+    dados = RelatoriosAdmin.cancelamentos(db, data_inicio, data_fim)
     
     # Se solicitado PDF, gera e retorna
     if formato == "pdf":
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib import colors
-        from reportlab.lib.units import cm
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet
-        from io import BytesIO
-        
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        # Título
-        titulo = Paragraph("<b>Relatório de Taxa de Cancelamentos</b>", styles['Title'])
-        elements.append(titulo)
-        elements.append(Spacer(1, 0.5*cm))
-        
-        # Período
-        periodo_texto = "Período: "
-        if data_inicio and data_fim:
-            periodo_texto += f"{data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}"
-        elif data_inicio:
-            periodo_texto += f"A partir de {data_inicio.strftime('%d/%m/%Y')}"
-        elif data_fim:
-            periodo_texto += f"Até {data_fim.strftime('%d/%m/%Y')}"
-        else:
-            periodo_texto += "Todos os registros"
-        
-        elements.append(Paragraph(periodo_texto, styles['Normal']))
-        elements.append(Spacer(1, 0.5*cm))
-        
-        # Tabela
-        table_data = [
-            ['Métrica', 'Valor'],
-            ['Total de Consultas', str(dados['total_consultas'])],
-            ['Total de Cancelamentos', str(dados['total_cancelamentos'])],
-            ['Taxa de Cancelamento', f"{dados['taxa_cancelamento']}%"]
-        ]
-        
-        table = Table(table_data, colWidths=[8*cm, 4*cm])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(table)
-        doc.build(elements)
-        
-        buffer.seek(0)
-        return StreamingResponse(
-            buffer,
-            media_type="application/pdf",
-            headers={"Content-Disposition": "inline; filename=relatorio_cancelamentos.pdf"}
-        )
+        parametros = parametros_relatorio("cancelamentos", data_inicio, data_fim)
+        return resposta_pdf("cancelamentos", dados, parametros)
     
     return dados
 
@@ -1095,7 +899,7 @@ def relatorio_pacientes_frequentes(
     limite: int = 10,
     formato: str = None,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_leitura)
 ):
     """
     Caso de Uso: Gerar Relatórios em PDF
@@ -1103,101 +907,12 @@ def relatorio_pacientes_frequentes(
     """
     verificar_admin(current_user)
     
-    query = db.query(
-        Paciente.nome.label("paciente_nome"),
-        Paciente.cpf,
-        func.count(Consulta.id_consulta).label("total_consultas"),
-        func.max(Consulta.data_hora_inicio).label("ultima_consulta")
-    ).join(
-        Consulta, Consulta.id_paciente_fk == Paciente.id_paciente
-    )
-    
-    if data_inicio:
-        query = query.filter(func.date(Consulta.data_hora_inicio) >= data_inicio)
-    if data_fim:
-        query = query.filter(func.date(Consulta.data_hora_inicio) <= data_fim)
-    
-    resultados = query.group_by(
-        Paciente.id_paciente, Paciente.nome, Paciente.cpf
-    ).order_by(
-        desc(func.count(Consulta.id_consulta))
-    ).limit(limite).all()
-    
-    dados = [
-        {
-            "paciente_nome": r.paciente_nome,
-            "cpf": r.cpf,
-            "total_consultas": r.total_consultas,
-            "ultima_consulta": r.ultima_consulta.strftime('%d/%m/%Y') if r.ultima_consulta else 'N/A'
-        }
-        for r in resultados
-    ]
+    dados = RelatoriosAdmin.pacientes_frequentes(db, data_inicio, data_fim, limite)
     
     # Se solicitado PDF, gera e retorna
     if formato == "pdf":
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib import colors
-        from reportlab.lib.units import cm
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet
-        from io import BytesIO
-        
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        # Título
-        titulo = Paragraph(f"<b>Relatório de Pacientes Mais Frequentes (Top {limite})</b>", styles['Title'])
-        elements.append(titulo)
-        elements.append(Spacer(1, 0.5*cm))
-        
-        # Período
-        periodo_texto = "Período: "
-        if data_inicio and data_fim:
-            periodo_texto += f"{data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}"
-        elif data_inicio:
-            periodo_texto += f"A partir de {data_inicio.strftime('%d/%m/%Y')}"
-        elif data_fim:
-            periodo_texto += f"Até {data_fim.strftime('%d/%m/%Y')}"
-        else:
-            periodo_texto += "Todos os registros"
-        
-        elements.append(Paragraph(periodo_texto, styles['Normal']))
-        elements.append(Spacer(1, 0.5*cm))
-        
-        # Tabela
-        table_data = [['Posição', 'Paciente', 'CPF', 'Total de Consultas', 'Última Consulta']]
-        for idx, d in enumerate(dados, 1):
-            table_data.append([
-                str(idx),
-                d['paciente_nome'],
-                d['cpf'],
-                str(d['total_consultas']),
-                d['ultima_consulta']
-            ])
-        
-        table = Table(table_data, colWidths=[1.5*cm, 5*cm, 3*cm, 3*cm, 3*cm])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(table)
-        doc.build(elements)
-        
-        buffer.seek(0)
-        return StreamingResponse(
-            buffer,
-            media_type="application/pdf",
-            headers={"Content-Disposition": "inline; filename=relatorio_pacientes_frequentes.pdf"}
-        )
+        parametros = parametros_relatorio("pacientes-frequentes", data_inicio, data_fim, limite=limite)
+        return resposta_pdf("pacientes-frequentes", dados, parametros)
     
     return dados
 
@@ -1205,18 +920,19 @@ def relatorio_pacientes_frequentes(
 @router.get("/relatorios/estatisticas-gerais")
 def get_estatisticas_gerais(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_leitura)
 ):
     """
     Retorna estatísticas gerais para dashboard de relatórios
     """
     verificar_admin(current_user)
     
-    # Total de consultas por status
-    total_consultas = db.query(Consulta).count()
-    realizadas = db.query(Consulta).filter(Consulta.status == 'realizada').count()
-    agendadas = db.query(Consulta).filter(Consulta.status == 'agendada').count()
-    canceladas = db.query(Consulta).filter(Consulta.status == 'cancelada').count()
+    # Total de consultas por status (mesma consulta agregada do dashboard)
+    contagens = EstatisticasAdmin.contagens(db)
+    total_consultas = contagens["total_consultas"]
+    realizadas = contagens["consultas_realizadas"]
+    agendadas = contagens["consultas_agendadas"]
+    canceladas = contagens["consultas_canceladas"]
     
     # Percentuais
     perc_realizadas = (realizadas / total_consultas * 100) if total_consultas > 0 else 0
@@ -1224,23 +940,7 @@ def get_estatisticas_gerais(
     perc_canceladas = (canceladas / total_consultas * 100) if total_consultas > 0 else 0
     
     # Especialidades mais procuradas
-    especialidades_query = db.query(
-        Especialidade.nome,
-        func.count(Consulta.id_consulta).label('total')
-    ).join(
-        Medico, Medico.id_especialidade_fk == Especialidade.id_especialidade
-    ).join(
-        Consulta, Consulta.id_medico_fk == Medico.id_medico
-    ).group_by(
-        Especialidade.nome
-    ).order_by(
-        desc('total')
-    ).limit(3).all()
-    
-    especialidades_top = [
-        {"nome": esp.nome, "total": esp.total}
-        for esp in especialidades_query
-    ]
+    especialidades_top = EstatisticasAdmin.especialidades_mais_procuradas(db, limite=3)
     
     return {
         "total_consultas": total_consultas,
@@ -1252,3 +952,192 @@ def get_estatisticas_gerais(
         "perc_canceladas": round(perc_canceladas, 2),
         "especialidades_top": especialidades_top
     }
+
+
+@router.get("/relatorios/serie-temporal")
+def get_serie_temporal(
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    granularidade: str = Query("dia", pattern="^(dia|semana|mes)$"),
+    dimensao: Optional[str] = Query(None, pattern="^(status|medico|especialidade)$"),
+    medico_id: Optional[int] = None,
+    especialidade_id: Optional[int] = None,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db_leitura)
+):
+    """
+    Quantidade de consultas por dia, semana ou mês, opcionalmente por status, médico ou especialidade
+    Intervalos sem consultas vêm com zero (padrão: últimos 30 dias)
+    """
+    verificar_admin(current_user)
+    
+    data_fim = data_fim or date.today()
+    data_inicio = data_inicio or data_fim - timedelta(days=29)
+    _validar_periodo(data_inicio, data_fim)
+    
+    try:
+        return RelatoriosAdmin.serie_temporal(
+            db, data_inicio, data_fim, granularidade, dimensao,
+            medico_id=medico_id, especialidade_id=especialidade_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+# ============ Relatórios Assíncronos ============
+
+def _buscar_relatorio(db: Session, relatorio_id: int) -> Relatorio:
+    relatorio = db.query(Relatorio).filter(Relatorio.id_relatorio == relatorio_id).first()
+    if not relatorio:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Relatório não encontrado"
+        )
+    return relatorio
+
+
+@router.post(
+    "/relatorios/solicitacoes",
+    response_model=RelatorioResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+def solicitar_relatorio(
+    solicitacao: RelatorioSolicitacao,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Caso de Uso: Gerar Relatórios em PDF (assíncrono)
+    Enfileira o relatório e retorna imediatamente; o PDF é gerado em segundo plano
+    
+    Um pedido idêntico recente (mesmo tipo e filtros) devolve o relatório já
+    existente, concluído ou em andamento.
+    """
+    verificar_admin(current_user)
+    
+    parametros = parametros_relatorio(
+        solicitacao.tipo, solicitacao.data_inicio, solicitacao.data_fim,
+        medico_id=solicitacao.medico_id,
+        especialidade_id=solicitacao.especialidade_id,
+        limite=solicitacao.limite
+    )
+    return FilaRelatorios.enfileirar(db, current_user["id"], solicitacao.tipo, parametros)
+
+
+@router.get("/relatorios/solicitacoes/{relatorio_id}", response_model=RelatorioResponse)
+def consultar_relatorio(
+    relatorio_id: int,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db_leitura)
+):
+    """
+    Status de um relatório enfileirado (pendente, processando, concluido, erro)
+    Concluído, traz os dados em dados_resultado (JSON)
+    """
+    verificar_admin(current_user)
+    return _buscar_relatorio(db, relatorio_id)
+
+
+@router.get("/relatorios/solicitacoes/{relatorio_id}/pdf")
+def baixar_relatorio(
+    relatorio_id: int,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db_leitura)
+):
+    """
+    Download do PDF de um relatório concluído
+    """
+    verificar_admin(current_user)
+    
+    relatorio = _buscar_relatorio(db, relatorio_id)
+    if relatorio.status != STATUS_CONCLUIDO:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Relatório ainda não disponível (status: {relatorio.status})"
+        )
+    
+    return Response(
+        content=relatorio.arquivo_pdf,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"inline; filename={MODELOS[relatorio.tipo].arquivo}"}
+    )
+
+
+# ============ Exportação em Massa ============
+
+PADRAO_FORMATO = "^(csv|ndjson)$"
+
+
+def _resposta_exportacao(pedacos, formato: str, nome: str) -> StreamingResponse:
+    return StreamingResponse(
+        pedacos,
+        media_type=FORMATOS[formato],
+        headers={"Content-Disposition": f"attachment; filename={nome}.{formato}"}
+    )
+
+
+def _validar_periodo(data_inicio: Optional[date], data_fim: Optional[date]):
+    if data_inicio and data_fim and data_inicio > data_fim:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="data_inicio deve ser anterior ou igual a data_fim"
+        )
+
+
+@router.get("/exportacoes/consultas")
+def exportar_consultas(
+    formato: str = Query("csv", pattern=PADRAO_FORMATO),
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    medico_id: Optional[int] = None,
+    status_consulta: Optional[str] = Query(None, alias="status"),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db_leitura)
+):
+    """
+    Exporta as consultas (com paciente, médico, especialidade e plano) em CSV ou NDJSON
+    
+    O arquivo é transmitido enquanto é lido do banco com cursor no servidor:
+    a memória usada é a de um lote, qualquer que seja o período exportado.
+    """
+    verificar_admin(current_user)
+    _validar_periodo(data_inicio, data_fim)
+    
+    lotes = ExportacaoDados.consultas(db, data_inicio, data_fim, medico_id, status_consulta)
+    return _resposta_exportacao(codificar(COLUNAS_CONSULTA, lotes, formato), formato, "consultas")
+
+
+@router.get("/exportacoes/relatorios/{tipo}")
+def exportar_relatorio(
+    tipo: str,
+    formato: str = Query("csv", pattern=PADRAO_FORMATO),
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    medico_id: Optional[int] = None,
+    especialidade_id: Optional[int] = None,
+    limite: Optional[int] = Query(None, ge=1, le=1000),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db_leitura)
+):
+    """
+    Exporta os dados de um relatório administrativo em CSV ou NDJSON
+    
+    Aceita os mesmos filtros da rota do relatório; filtros que o tipo não
+    usa são ignorados.
+    """
+    verificar_admin(current_user)
+    if tipo not in TIPOS_RELATORIO:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Relatório não encontrado"
+        )
+    _validar_periodo(data_inicio, data_fim)
+    
+    parametros = parametros_relatorio(
+        tipo, data_inicio, data_fim,
+        medico_id=medico_id, especialidade_id=especialidade_id, limite=limite
+    )
+    linhas = ExportacaoDados.relatorio(db, tipo, parametros)
+    return _resposta_exportacao(
+        codificar(COLUNAS_RELATORIO[tipo], [linhas], formato), formato, f"relatorio_{tipo}"
+    )
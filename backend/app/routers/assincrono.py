@@ -0,0 +1,134 @@
+"""
+Router Assíncrono - Sistema Clínica Saúde+
+Versões async das rotas mais acessadas (login, refresh, disponibilidade,
+listagem e agendamento de consultas), sobre AsyncSession (asyncpg no
+PostgreSQL, aiosqlite no SQLite).
+
+As requisições em espera pelo banco não ocupam threads do pool do
+FastAPI. As regras de negócio são as mesmas das rotas síncronas: o corpo
+de cada rota roda com AsyncSession.run_sync, que entrega às funções de
+pacientes.py/regras_negocio.py uma Session comum sobre a conexão async.
+
+A exceção é a disponibilidade: gerar os slots (e materializar o
+calendário) é trabalho de CPU, que dentro do run_sync rodaria na thread do
+event loop. Essas duas rotas usam uma Session síncrona no pool de threads.
+"""
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database import get_async_db, get_db
+from app.routers.auth import conferir_senha, renovar_sessao, resposta_token, validar_login
+from app.routers.pacientes import (
+    consultas_do_paciente, efetuar_agendamento, horarios_disponiveis_medico, montar_disponibilidade
+)
+from app.schemas.schemas import (
+    BuscaDisponibilidadeResponse, ConsultaCreate, ConsultaResponse, LoginRequest, RefreshRequest, Token
+)
+from app.services.concorrencia import agenda_medico_exclusiva_async
+from app.services.estatisticas import EstatisticasAdmin
+from app.services.identidade import IdentidadeUsuario
+from app.services.sessoes import SessoesUsuario
+from app.utils.paginacao import LIMITE_MAXIMO, LIMITE_PADRAO
+
+router = APIRouter(prefix="/async", tags=["Assíncrono"])
+
+
+# ============ Autenticação ============
+
+@router.post("/auth/login", response_model=Token)
+async def login(login_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Login unificado (mesmo contrato de /auth/login)
+    """
+    identidades = await db.run_sync(IdentidadeUsuario.buscar, login_data.email)
+    identidade = validar_login(await conferir_senha(identidades, login_data.senha))
+
+    refresh_token = await db.run_sync(
+        SessoesUsuario.criar, identidade.tipo, identidade.id, identidade.email
+    )
+    return resposta_token(identidade.tipo, identidade.id, identidade.email, refresh_token)
+
+
+@router.post("/auth/refresh", response_model=Token)
+async def renovar_token(dados: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Novo access token a partir do refresh token (mesmo contrato de /auth/refresh)
+    """
+    sessao = await db.run_sync(SessoesUsuario.validar, dados.refresh_token)
+    return renovar_sessao(sessao, dados.refresh_token)
+
+
+# ============ Disponibilidade ============
+
+@router.get("/pacientes/medicos/{medico_id}/horarios-disponiveis")
+async def get_horarios_disponiveis(
+    medico_id: int,
+    data: date,
+    duracao_minutos: int = Query(30, ge=5, le=240),
+    db: Session = Depends(get_db)
+):
+    """
+    Horários disponíveis de um médico na data (mesmo contrato da rota síncrona)
+    """
+    return await run_in_threadpool(horarios_disponiveis_medico, db, medico_id, data, duracao_minutos)
+
+
+@router.get("/pacientes/disponibilidade", response_model=BuscaDisponibilidadeResponse)
+async def buscar_disponibilidade(
+    data_inicio: date,
+    data_fim: date,
+    especialidade_id: Optional[int] = None,
+    medico_ids: Optional[List[int]] = Query(None),
+    duracao_minutos: int = Query(30, ge=5, le=240),
+    db: Session = Depends(get_db)
+):
+    """
+    Horários livres de vários médicos no período (mesmo contrato da rota síncrona)
+    """
+    return await run_in_threadpool(
+        montar_disponibilidade, db, data_inicio, data_fim, especialidade_id, medico_ids, duracao_minutos
+    )
+
+
+# ============ Consultas ============
+
+@router.get("/pacientes/consultas/{paciente_id}", response_model=List[ConsultaResponse])
+async def listar_consultas(
+    paciente_id: int,
+    response: Response,
+    limite: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    cursor: Optional[str] = None,
+    campos: Optional[str] = Query(None, alias="fields", description="Campos retornados, separados por vírgula"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Consultas do paciente, paginadas por cursor (mesmo contrato da rota síncrona)
+    """
+    return await db.run_sync(consultas_do_paciente, paciente_id, response, limite, cursor, campos)
+
+
+@router.post("/pacientes/consultas", response_model=ConsultaResponse, status_code=status.HTTP_201_CREATED)
+async def agendar_consulta(
+    paciente_id: int,
+    consulta_data: ConsultaCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Caso de Uso: Agendar Consulta (mesmas regras RN2, RN3, RN4 da rota síncrona)
+    """
+    def agendar(sessao: Session) -> ConsultaResponse:
+        nova_consulta = efetuar_agendamento(sessao, paciente_id, consulta_data)
+        sessao.refresh(nova_consulta)
+        # Serializa ainda dentro do run_sync: médico e paciente são carregados sob demanda
+        return ConsultaResponse.model_validate(nova_consulta)
+
+    async with agenda_medico_exclusiva_async(db, consulta_data.id_medico):
+        consulta = await db.run_sync(agendar)
+
+    EstatisticasAdmin.invalidar()
+    return consulta
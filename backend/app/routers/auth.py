@@ -4,57 +4,61 @@ Atualizado para trabalhar com modelo conforme MER
 Suporta login para Paciente, Médico e Administrador
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import timedelta
+from typing import List, Optional
 from app.database import get_db
 from app.models.models import Paciente, Medico, Administrador
-from app.schemas.schemas import Token, LoginRequest, AlterarSenhaRequest
-from app.utils.auth import verify_password, create_access_token, get_password_hash
+from app.schemas.schemas import Token, LoginRequest, RefreshRequest, AlterarSenhaRequest
+from app.services.identidade import Identidade, IdentidadeUsuario
+from app.services.sessoes import SessaoAtiva, SessoesUsuario
+from app.utils.auth import (
+    verify_password, verify_password_async, create_access_token, get_password_hash
+)
 from app.config import settings
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/auth", tags=["Autenticação"])
 
 
+# Chave primária de cada tipo de usuário
+CHAVE_USUARIO = {"paciente": "id_paciente", "medico": "id_medico", "administrador": "id_admin"}
+
+
 class LoginCRMRequest(BaseModel):
     crm: str
     senha: str
 
 
-def autenticar_usuario(email: str, senha: str, db: Session) -> tuple:
+async def autenticar_usuario(email: str, senha: str, db: Session) -> Optional[Identidade]:
     """
-    Tenta autenticar usuário em todas as tabelas (Paciente, Medico, Administrador)
+    Autentica o usuário em qualquer das tabelas (Paciente, Medico, Administrador)
+    
+    O e-mail é resolvido em uma única consulta; o bcrypt roda no pool
+    dedicado, normalmente uma única vez por login.
     
     Returns:
-        tuple: (user_object, user_type: str) ou (None, None)
+        Identidade: tipo, id, email, senha_hash e esta_bloqueado; ou None
     """
-    # Tentar autenticar como Paciente
-    paciente = db.query(Paciente).filter(Paciente.email == email).first()
-    if paciente and verify_password(senha, paciente.senha_hash):
-        return paciente, "paciente"
-    
-    # Tentar autenticar como Médico
-    medico = db.query(Medico).filter(Medico.email == email).first()
-    if medico and verify_password(senha, medico.senha_hash):
-        return medico, "medico"
-    
-    # Tentar autenticar como Administrador
-    admin = db.query(Administrador).filter(Administrador.email == email).first()
-    if admin and verify_password(senha, admin.senha_hash):
-        return admin, "administrador"
+    identidades = await run_in_threadpool(IdentidadeUsuario.buscar, db, email)
+    return await conferir_senha(identidades, senha)
+
+
+async def conferir_senha(identidades: List[Identidade], senha: str) -> Optional[Identidade]:
+    """Primeira identidade cuja senha confere (bcrypt no pool dedicado)"""
+    for identidade in identidades:
+        if await verify_password_async(senha, identidade.senha_hash):
+            return identidade
     
-    return None, None
+    return None
 
 
-@router.post("/login", response_model=Token)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+def validar_login(identidade: Optional[Identidade]) -> Identidade:
     """
-    Login unificado para todos os tipos de usuários (Paciente, Médico, Administrador)
-    Conforme requisito: Login com e-mail e senha alfanumérica (8 a 20 caracteres)
+    Recusa credenciais inválidas (401) e pacientes bloqueados (403)
     """
-    usuario, tipo_usuario = autenticar_usuario(login_data.email, login_data.senha, db)
-    
-    if not usuario:
+    if not identidade:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
@@ -62,70 +66,111 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
         )
     
     # Verificar se paciente está bloqueado (RN3)
-    if tipo_usuario == "paciente" and usuario.esta_bloqueado:
+    if identidade.tipo == "paciente" and identidade.esta_bloqueado:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Conta bloqueada por faltas consecutivas. Entre em contato com a administração."
         )
     
-    # Criar token JWT
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-    # Definir user_id baseado no tipo
-    if tipo_usuario == "paciente":
-        user_id = usuario.id_paciente
-    elif tipo_usuario == "medico":
-        user_id = usuario.id_medico
-    else:  # administrador
-        user_id = usuario.id_admin
-    
-    access_token = create_access_token(
+    return identidade
+
+
+def emitir_access_token(tipo: str, id_usuario: int, email: str) -> str:
+    """Access token JWT de curta duração (ACCESS_TOKEN_EXPIRE_MINUTES)"""
+    return create_access_token(
         data={
-            "sub": usuario.email,
-            "tipo": tipo_usuario,
-            "id": user_id  # Mudado de user_id para id
+            "sub": email,
+            "tipo": tipo,
+            "id": id_usuario
         },
-        expires_delta=access_token_expires
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     )
-    
+
+
+async def iniciar_sessao(db: Session, tipo: str, id_usuario: int, email: str) -> dict:
+    """
+    Resposta de login: access token e refresh token de uma nova sessão
+    """
+    refresh_token = await run_in_threadpool(SessoesUsuario.criar, db, tipo, id_usuario, email)
+    return resposta_token(tipo, id_usuario, email, refresh_token)
+
+
+def resposta_token(tipo: str, id_usuario: int, email: str, refresh_token: str) -> dict:
+    """Corpo das respostas de login e refresh (schema Token)"""
     return {
-        "access_token": access_token,
+        "access_token": emitir_access_token(tipo, id_usuario, email),
         "token_type": "bearer",
-        "user_type": tipo_usuario,
-        "user_id": user_id
+        "user_type": tipo,
+        "user_id": id_usuario,
+        "refresh_token": refresh_token
     }
 
 
+def renovar_sessao(sessao: Optional[SessaoAtiva], refresh_token: str) -> dict:
+    """Novo access token da sessão; 401 se ela expirou ou foi encerrada"""
+    if not sessao:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Sessão expirada ou encerrada. Faça login novamente.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return resposta_token(sessao.tipo, sessao.id_usuario, sessao.email, refresh_token)
+
+
+@router.post("/login", response_model=Token)
+async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+    """
+    Login unificado para todos os tipos de usuários (Paciente, Médico, Administrador)
+    Conforme requisito: Login com e-mail e senha alfanumérica (8 a 20 caracteres)
+    """
+    identidade = validar_login(await autenticar_usuario(login_data.email, login_data.senha, db))
+    
+    # Criar token JWT e a sessão renovável
+    return await iniciar_sessao(db, identidade.tipo, identidade.id, identidade.email)
+
+
 @router.post("/login/crm", response_model=Token)
-def login_medico_por_crm(login_data: LoginCRMRequest, db: Session = Depends(get_db)):
+async def login_medico_por_crm(login_data: LoginCRMRequest, db: Session = Depends(get_db)):
     """
     Login alternativo para médicos usando CRM ao invés de email
     """
-    medico = db.query(Medico).filter(Medico.crm == login_data.crm).first()
+    medico = await run_in_threadpool(
+        lambda: db.query(Medico.id_medico, Medico.email, Medico.senha_hash).filter(
+            Medico.crm == login_data.crm
+        ).first()
+    )
     
-    if not medico or not verify_password(login_data.senha, medico.senha_hash):
+    if not medico or not await verify_password_async(login_data.senha, medico.senha_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="CRM ou senha incorretos",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Criar token JWT
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={
-            "sub": medico.email,
-            "tipo": "medico",
-            "user_id": medico.id_medico
-        },
-        expires_delta=access_token_expires
-    )
+    # Criar token JWT e a sessão renovável
+    return await iniciar_sessao(db, "medico", medico.id_medico, medico.email)
+
+
+@router.post("/refresh", response_model=Token)
+def renovar_token(dados: RefreshRequest, db: Session = Depends(get_db)):
+    """
+    Troca o refresh token de uma sessão ativa por um novo access token
+    Não verifica senha: a sessão vem do cache ou de uma consulta pela chave
+    """
+    return renovar_sessao(SessoesUsuario.validar(db, dados.refresh_token), dados.refresh_token)
+
+
+@router.post("/logout")
+def logout(dados: RefreshRequest, db: Session = Depends(get_db)):
+    """
+    Encerra a sessão: o refresh token deixa de renovar o access token
+    """
+    SessoesUsuario.revogar(db, dados.refresh_token)
     
     return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user_type": "medico",
-        "user_id": medico.id_medico
+        "sucesso": True,
+        "mensagem": "Sessão encerrada"
     }
 
 
@@ -179,6 +224,8 @@ def alterar_senha(
     
     # Atualizar senha
     usuario.senha_hash = get_password_hash(dados.senha_nova)
+    # Encerrar as sessões abertas com a senha antiga
+    SessoesUsuario.revogar_do_usuario(db, tipo_usuario, getattr(usuario, CHAVE_USUARIO[tipo_usuario]))
     db.commit()
     
     return {
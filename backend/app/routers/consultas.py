@@ -3,14 +3,18 @@ Router de Consultas - Sistema Clínica Saúde+
 Implementa todas as operações de agendamento, cancelamento e reagendamento
 Com validação completa das Regras de Negócio (RN1-RN4)
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional
 from app.database import get_db
 from app.models.models import Consulta, Paciente, Medico, HorarioTrabalho
 from app.schemas.schemas import ConsultaResponse, ConsultaCreate, ConsultaUpdate
 from app.utils.auth import get_current_user
+from app.routers.pacientes import efetuar_agendamento, efetuar_cancelamento, efetuar_reagendamento
+from app.services.concorrencia import agenda_medico_exclusiva
+from app.services.estatisticas import EstatisticasAdmin
+from app.utils.paginacao import LIMITE_PADRAO, LIMITE_MAXIMO, paginar_consultas
 
 router = APIRouter(prefix="/consultas", tags=["Consultas"])
 
@@ -35,69 +39,6 @@ def validar_paciente_bloqueado(paciente: Paciente):
         )
 
 
-def validar_horario_trabalho_medico(data_hora: datetime, medico_id: int, db: Session):
-    """RN2: Validar se o horário está dentro do expediente do médico"""
-    dia_semana = DIAS_SEMANA[data_hora.weekday()]
-    
-    # Buscar horário de trabalho do médico para o dia
-    horario = db.query(HorarioTrabalho).filter(
-        HorarioTrabalho.id_medico_fk == medico_id,
-        HorarioTrabalho.dia_semana == dia_semana
-    ).first()
-    
-    if not horario:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Médico não trabalha às {dia_semana}s"
-        )
-    
-    # Validar se hora está dentro do expediente
-    hora_consulta = data_hora.time()
-    if not (horario.hora_inicio <= hora_consulta <= horario.hora_fim):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Horário fora do expediente do médico. Horário disponível: {horario.hora_inicio} às {horario.hora_fim}"
-        )
-
-
-def validar_conflito_horario(data_hora: datetime, medico_id: int, db: Session, consulta_id: int = None):
-    """RN3: Validar se já existe consulta no mesmo horário"""
-    # Buscar consultas no mesmo horário (±30min para evitar sobreposição)
-    inicio_janela = data_hora - timedelta(minutes=30)
-    fim_janela = data_hora + timedelta(minutes=30)
-    
-    query = db.query(Consulta).filter(
-        Consulta.id_medico_fk == medico_id,
-        Consulta.data_hora >= inicio_janela,
-        Consulta.data_hora <= fim_janela,
-        Consulta.status.in_(["Agendada", "Confirmada"])
-    )
-    
-    # Se for reagendamento, excluir a própria consulta
-    if consulta_id:
-        query = query.filter(Consulta.id_consulta != consulta_id)
-    
-    consulta_existente = query.first()
-    
-    if consulta_existente:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Horário já ocupado. Por favor, escolha outro horário."
-        )
-
-
-def validar_antecedencia_minima(data_hora: datetime):
-    """RN4: Validar antecedência mínima de 24 horas"""
-    agora = datetime.now()
-    diferenca = data_hora - agora
-    
-    if diferenca.total_seconds() < 24 * 3600:  # 24 horas em segundos
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cancelamento/reagendamento requer antecedência mínima de 24 horas"
-        )
-
-
 @router.post("/agendar", response_model=ConsultaResponse, status_code=status.HTTP_201_CREATED)
 def agendar_consulta(
     consulta_data: ConsultaCreate,
@@ -133,34 +74,11 @@ def agendar_consulta(
     # RN1: Validar se paciente está bloqueado
     validar_paciente_bloqueado(paciente)
     
-    # Buscar médico
-    medico = db.query(Medico).filter(
-        Medico.id_medico == consulta_data.id_medico
-    ).first()
+    # Demais regras, evento e slots: mesmo fluxo da rota de pacientes
+    with agenda_medico_exclusiva(db, consulta_data.id_medico):
+        nova_consulta = efetuar_agendamento(db, paciente.id_paciente, consulta_data)
     
-    if not medico:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Médico não encontrado"
-        )
-    
-    # RN2: Validar horário de trabalho
-    validar_horario_trabalho_medico(consulta_data.data_hora, consulta_data.id_medico, db)
-    
-    # RN3: Validar conflito de horários
-    validar_conflito_horario(consulta_data.data_hora, consulta_data.id_medico, db)
-    
-    # Criar consulta
-    nova_consulta = Consulta(
-        id_paciente_fk=paciente.id_paciente,
-        id_medico_fk=consulta_data.id_medico,
-        data_hora=consulta_data.data_hora,
-        tipo=consulta_data.tipo,
-        status="Agendada"
-    )
-    
-    db.add(nova_consulta)
-    db.commit()
+    EstatisticasAdmin.invalidar()
     db.refresh(nova_consulta)
     
     return nova_consulta
@@ -168,20 +86,22 @@ def agendar_consulta(
 
 @router.get("/minhas", response_model=List[ConsultaResponse])
 def listar_minhas_consultas(
+    response: Response,
+    limite: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    cursor: Optional[str] = None,
+    campos: Optional[str] = Query(None, alias="fields", description="Campos retornados, separados por vírgula"),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    """Listar consultas do paciente ou médico logado"""
+    """Listar consultas do paciente ou médico logado (paginadas por cursor)"""
     
     if current_user["tipo"] == "paciente":
-        consultas = db.query(Consulta).filter(
-            Consulta.id_paciente_fk == current_user["id"]
-        ).order_by(Consulta.data_hora.desc()).all()
+        query = db.query(Consulta).filter(Consulta.id_paciente_fk == current_user["id"])
+        descendente = True
     
     elif current_user["tipo"] == "medico":
-        consultas = db.query(Consulta).filter(
-            Consulta.id_medico_fk == current_user["id"]
-        ).order_by(Consulta.data_hora).all()
+        query = db.query(Consulta).filter(Consulta.id_medico_fk == current_user["id"])
+        descendente = False
     
     else:
         raise HTTPException(
@@ -189,7 +109,10 @@ def listar_minhas_consultas(
             detail="Acesso negado"
         )
     
-    return consultas
+    return paginar_consultas(
+        query, response,
+        limite=limite, cursor=cursor, campos=campos, descendente=descendente
+    )
 
 
 @router.get("/{consulta_id}", response_model=ConsultaResponse)
@@ -262,19 +185,9 @@ def cancelar_consulta(
                 detail="Acesso negado"
             )
     
-    # Validar status
-    if consulta.status == "Cancelada":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Consulta já está cancelada"
-        )
-    
-    # RN4: Validar antecedência mínima
-    validar_antecedencia_minima(consulta.data_hora)
-    
-    # Cancelar
-    consulta.status = "Cancelada"
-    db.commit()
+    # RN4 (antecedência), evento e slots: mesmo fluxo da rota de pacientes
+    efetuar_cancelamento(db, consulta)
+    EstatisticasAdmin.invalidar()
     db.refresh(consulta)
     
     return consulta
@@ -318,34 +231,9 @@ def reagendar_consulta(
             detail="Acesso negado"
         )
     
-    # Validar status
-    if consulta.status != "Agendada":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Apenas consultas agendadas podem ser reagendadas"
-        )
-    
-    # RN4: Validar antecedência mínima da data ORIGINAL
-    validar_antecedencia_minima(consulta.data_hora)
-    
-    # RN2: Validar novo horário no expediente
-    validar_horario_trabalho_medico(
-        consulta_update.nova_data_hora,
-        consulta.id_medico_fk,
-        db
-    )
-    
-    # RN3: Validar conflito no novo horário
-    validar_conflito_horario(
-        consulta_update.nova_data_hora,
-        consulta.id_medico_fk,
-        db,
-        consulta_id=consulta_id
-    )
-    
-    # Reagendar
-    consulta.data_hora = consulta_update.nova_data_hora
-    db.commit()
+    # RN4, expediente, conflito, evento e slots: mesmo fluxo da rota de pacientes
+    efetuar_reagendamento(db, consulta, consulta_update.nova_data_hora)
+    EstatisticasAdmin.invalidar()
     db.refresh(consulta)
     
     return consulta
@@ -3,12 +3,12 @@ Router de Médicos - Sistema Clínica Saúde+
 Implementa todos os casos de uso do módulo Médico conforme CasosDeUso.txt
 Atualizado para modelo conforme MER
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_, or_, func
-from typing import List
+from typing import List, Optional
 from datetime import date, datetime, time
-from app.database import get_db
+from app.database import get_db, get_db_leitura
 from app.models.models import (
     Medico, Consulta, HorarioTrabalho, Observacao,
     Paciente, Especialidade, BloqueioHorario
@@ -20,6 +20,13 @@ from app.schemas.schemas import (
     ObservacaoCreate, ObservacaoUpdate, ObservacaoResponse,
     BloqueioHorarioCreate, BloqueioHorarioResponse
 )
+from app.services.agregados import AgregadoConsultasDia
+from app.services.calendario import CalendarioSlots
+from app.services.disponibilidade import STATUS_ATIVOS
+from app.services.estatisticas import EstatisticasAdmin
+from app.services.eventos import EventosConsulta, EVENTO_CANCELAMENTO, EVENTO_STATUS
+from app.services.regras_negocio import RegraPaciente
+from app.utils.paginacao import LIMITE_PADRAO, LIMITE_MAXIMO, paginar_consultas
 
 router = APIRouter(prefix="/medicos", tags=["Médicos"])
 
@@ -145,6 +152,7 @@ def cadastrar_horarios(
         db.add(novo_horario)
         horarios_criados.append(novo_horario)
     
+    CalendarioSlots.invalidar_medico(db, medico_id)
     db.commit()
     for horario in horarios_criados:
         db.refresh(horario)
@@ -153,7 +161,7 @@ def cadastrar_horarios(
 
 
 @router.get("/horarios/{medico_id}", response_model=List[HorarioTrabalhoResponse])
-def listar_horarios(medico_id: int, db: Session = Depends(get_db)):
+def listar_horarios(medico_id: int, db: Session = Depends(get_db_leitura)):
     """
     Lista todos os horários de trabalho configurados pelo médico
     """
@@ -196,6 +204,7 @@ def excluir_horario(
         )
     
     db.delete(horario)
+    CalendarioSlots.invalidar_medico(db, medico_id)
     db.commit()
     
     return {
@@ -207,26 +216,28 @@ def excluir_horario(
 @router.get("/consultas/{medico_id}", response_model=List[ConsultaResponse])
 def listar_consultas(
     medico_id: int,
+    response: Response,
     data_inicio: date = None,
     data_fim: date = None,
-    db: Session = Depends(get_db)
+    limite: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    cursor: Optional[str] = None,
+    campos: Optional[str] = Query(None, alias="fields", description="Campos retornados, separados por vírgula"),
+    db: Session = Depends(get_db_leitura)
 ):
     """
     Caso de Uso: Visualizar Consultas Agendadas
     Lista consultas do médico, opcionalmente filtradas por período
+    Paginação por cursor (cabeçalho X-Proximo-Cursor) e projeção opcional com fields=
     """
     # Verificar se médico existe
-    medico = db.query(Medico).filter(Medico.id_medico == medico_id).first()
-    if not medico:
+    medico_existe = db.query(Medico.id_medico).filter(Medico.id_medico == medico_id).first()
+    if not medico_existe:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Médico não encontrado"
         )
     
-    query = db.query(Consulta).options(
-        joinedload(Consulta.paciente),
-        joinedload(Consulta.medico)
-    ).filter(Consulta.id_medico_fk == medico_id)
+    query = db.query(Consulta).filter(Consulta.id_medico_fk == medico_id)
     
     if data_inicio:
         data_inicio_dt = datetime.combine(data_inicio, time.min)
@@ -236,19 +247,27 @@ def listar_consultas(
         data_fim_dt = datetime.combine(data_fim, time.max)
         query = query.filter(Consulta.data_hora_inicio <= data_fim_dt)
     
-    consultas = query.order_by(Consulta.data_hora_inicio).all()
-    
-    return consultas
+    return paginar_consultas(query, response, limite=limite, cursor=cursor, campos=campos)
 
 
 @router.get("/consultas/hoje/{medico_id}", response_model=List[ConsultaResponse])
-def consultas_hoje(medico_id: int, db: Session = Depends(get_db)):
+def consultas_hoje(
+    medico_id: int,
+    response: Response,
+    limite: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    cursor: Optional[str] = None,
+    campos: Optional[str] = Query(None, alias="fields", description="Campos retornados, separados por vírgula"),
+    db: Session = Depends(get_db)
+):
     """
     Lista consultas do dia atual do médico
     Caso de Uso: Visualizar Consultas Agendadas (por data)
     """
     hoje = date.today()
-    return listar_consultas(medico_id, data_inicio=hoje, data_fim=hoje, db=db)
+    return listar_consultas(
+        medico_id, response, data_inicio=hoje, data_fim=hoje,
+        limite=limite, cursor=cursor, campos=campos, db=db
+    )
 
 
 @router.put("/consultas/{consulta_id}/status", response_model=ConsultaResponse)
@@ -262,7 +281,7 @@ def atualizar_status_consulta(
     Atualiza status da consulta (agendada, confirmada, realizada, faltou)
     Caso de Uso: Visualizar Consultas Agendadas (marcar como realizada)
     
-    RN3: Se marcar como 'faltou', incrementa contador de faltas do paciente
+    RN3: Mudanças de/para 'faltou' ou 'realizada' atualizam o contador de faltas do paciente
     """
     # Buscar consulta
     consulta = db.query(Consulta).filter(
@@ -289,15 +308,28 @@ def atualizar_status_consulta(
     status_antigo = consulta.status
     consulta.status = novo_status
     
-    # RN3: Aplicar regra de faltas consecutivas
-    if novo_status == 'faltou' and status_antigo != 'faltou':
-        # Não precisa fazer nada aqui, a verificação é feita ao tentar agendar
-        pass
-    elif novo_status == 'realizada' and status_antigo != 'realizada':
-        # Quando consulta é realizada, não há falta (útil para histórico)
-        pass
+    # Mudança entre status ativo e inativo libera ou ocupa o horário no calendário
+    if (status_antigo in STATUS_ATIVOS) != (novo_status in STATUS_ATIVOS):
+        CalendarioSlots.regenerar_dia(db, medico_id, consulta.data_hora_inicio.date())
+    
+    # RN3: Manter o contador de faltas consecutivas na mesma transação
+    # (o bloqueio em si é aplicado ao tentar agendar)
+    if status_antigo != novo_status and (
+        status_antigo in RegraPaciente.STATUS_DESFECHO or novo_status in RegraPaciente.STATUS_DESFECHO
+    ):
+        RegraPaciente.atualizar_faltas_consecutivas(db, consulta.id_paciente_fk)
+    
+    # Dia já consolidado nos relatórios é recalculado na próxima leitura
+    if status_antigo != novo_status:
+        AgregadoConsultasDia.invalidar_dia(db, consulta.data_hora_inicio.date())
+        EventosConsulta.registrar(
+            db, consulta,
+            EVENTO_CANCELAMENTO if novo_status == "cancelada" else EVENTO_STATUS,
+            status_anterior=status_antigo
+        )
     
     db.commit()
+    EstatisticasAdmin.invalidar()
     db.refresh(consulta)
     
     return consulta
@@ -535,6 +567,7 @@ def criar_bloqueio(
     )
     
     db.add(novo_bloqueio)
+    CalendarioSlots.regenerar_dia(db, medico_id, bloqueio_data.data)
     db.commit()
     db.refresh(novo_bloqueio)
     
@@ -545,7 +578,7 @@ def criar_bloqueio(
 def listar_bloqueios(
     medico_id: int,
     data_inicio: date = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_leitura)
 ):
     """
     Lista bloqueios de horário do médico
@@ -586,6 +619,7 @@ def excluir_bloqueio(
         )
     
     db.delete(bloqueio)
+    CalendarioSlots.regenerar_dia(db, medico_id, bloqueio.data)
     db.commit()
     
     return {"mensagem": "Bloqueio excluído com sucesso"}
@@ -3,29 +3,66 @@ Router de Pacientes - Sistema Clínica Saúde+
 Implementa todos os casos de uso do módulo Paciente conforme CasosDeUso.txt
 Atualizado para modelo conforme MER
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timedelta, date
-from app.database import get_db
+from app.database import get_db, get_db_leitura
 from app.models.models import Paciente, Medico, Consulta, Especialidade, PlanoSaude, HorarioTrabalho
 from app.schemas.schemas import (
     PacienteCreate, PacienteUpdate, PacienteAlterarSenha, PacienteResponse,
     ConsultaCreate, ConsultaResponse, ConsultaCancelar, ConsultaReagendar,
     MedicoResponse, EspecialidadeResponse, PlanoSaudeResponse,
-    HorariosDisponiveisResponse
+    HorariosDisponiveisResponse, BuscaDisponibilidadeResponse
 )
 from app.utils.auth import get_password_hash, verify_password
+from app.utils.paginacao import LIMITE_PADRAO, LIMITE_MAXIMO, paginar_consultas
 from app.services.regras_negocio import (
     ValidadorAgendamento,
     RegraConsulta,
     RegraPaciente,
     RegraHorarioDisponivel
 )
+from app.services.calendario import CalendarioSlots
+from app.services.concorrencia import agenda_medico_exclusiva, e_conflito_de_agenda
+from app.services.estatisticas import EstatisticasAdmin
+from app.services.sessoes import SessoesUsuario
+from app.services.eventos import (
+    EventosConsulta, EVENTO_AGENDAMENTO, EVENTO_CANCELAMENTO, EVENTO_REAGENDAMENTO
+)
 
 router = APIRouter(prefix="/pacientes", tags=["Pacientes"])
 
+# Limite do período aceito pela busca de disponibilidade
+MAX_DIAS_BUSCA_DISPONIBILIDADE = 62
+
+
+def _erro_conflito_agenda(
+    db: Session,
+    erro: IntegrityError,
+    medico_id: int,
+    data_hora_inicio: datetime,
+    data_hora_fim: datetime,
+    consulta_id_ignorar: int = None
+) -> HTTPException:
+    """
+    Converte a violação de exclusividade da agenda (outro agendamento gravado
+    em paralelo) na mesma mensagem 400 da validação RN4
+    """
+    if e_conflito_de_agenda(erro):
+        _, mensagem = RegraConsulta.validar_conflito_horario_medico(
+            db, medico_id, data_hora_inicio, data_hora_fim, consulta_id_ignorar
+        )
+        if mensagem == "Horário disponível":
+            mensagem = "Horário indisponível. O médico já possui consulta agendada neste horário."
+        return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=mensagem)
+    
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Erro ao agendar consulta: dados inválidos"
+    )
+
 
 @router.post("/cadastro", response_model=PacienteResponse, status_code=status.HTTP_201_CREATED)
 def cadastrar_paciente(paciente_data: PacienteCreate, db: Session = Depends(get_db)):
@@ -87,7 +124,7 @@ def cadastrar_paciente(paciente_data: PacienteCreate, db: Session = Depends(get_
 
 
 @router.get("/planos-saude", response_model=List[PlanoSaudeResponse])
-def listar_planos_saude(db: Session = Depends(get_db)):
+def listar_planos_saude(db: Session = Depends(get_db_leitura)):
     """
     Lista todos os planos de saúde disponíveis
     """
@@ -189,43 +226,20 @@ def alterar_senha(
     
     # Atualizar senha
     paciente.senha_hash = get_password_hash(dados_senha.senha_nova)
+    SessoesUsuario.revogar_do_usuario(db, "paciente", paciente.id_paciente)
     db.commit()
     
     return {"message": "Senha alterada com sucesso"}
 
 
-@router.post("/consultas", response_model=ConsultaResponse, status_code=status.HTTP_201_CREATED)
-def agendar_consulta(
-    paciente_id: int,
-    consulta_data: ConsultaCreate,
-    db: Session = Depends(get_db)
-):
+def efetuar_agendamento(db: Session, paciente_id: int, consulta_data: ConsultaCreate) -> Consulta:
     """
-    Caso de Uso: Agendar Consulta
-    Permite agendar escolhendo médico e horário disponível
+    Valida as regras de negócio e grava a consulta (com evento e slots)
     
-    Regras de Negócio aplicadas:
-    - RN2: Máximo 2 consultas futuras por paciente
-    - RN3: Bloqueio após 3 faltas consecutivas
-    - RN4: Evitar conflitos de horário
-    - RN: Validar horário de trabalho do médico
+    Deve ser chamada com a agenda do médico já reservada
+    (agenda_medico_exclusiva ou agenda_medico_exclusiva_async).
+    Usada pela rota síncrona e, via AsyncSession.run_sync, pela assíncrona.
     """
-    # Verificar se paciente existe
-    paciente = db.query(Paciente).filter(Paciente.id_paciente == paciente_id).first()
-    if not paciente:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Paciente não encontrado"
-        )
-    
-    # Verificar se médico existe
-    medico = db.query(Medico).filter(Medico.id_medico == consulta_data.id_medico).first()
-    if not medico:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Médico não encontrado"
-        )
-    
     # Obter data_hora do schema (pode vir como data_hora ou data_hora_inicio)
     data_hora = getattr(consulta_data, 'data_hora', None) or getattr(consulta_data, 'data_hora_inicio', None)
     
@@ -237,10 +251,27 @@ def agendar_consulta(
     
     data_hora_fim = data_hora + timedelta(minutes=30)
     
+    # Existência de paciente/médico e todas as regras em uma única consulta
+    fatos = ValidadorAgendamento.consultar_fatos_agendamento(
+        db, paciente_id, consulta_data.id_medico, data_hora, data_hora_fim
+    )
+    
+    if not fatos["paciente_existe"]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Paciente não encontrado"
+        )
+    
+    if not fatos["medico_existe"]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Médico não encontrado"
+        )
+    
     # Validar todas as regras de negócio
     pode_agendar, mensagem = ValidadorAgendamento.validar_novo_agendamento(
         db, paciente_id, consulta_data.id_medico,
-        data_hora, data_hora_fim
+        data_hora, data_hora_fim, fatos=fatos
     )
     
     if not pode_agendar:
@@ -259,60 +290,91 @@ def agendar_consulta(
     )
     
     db.add(nova_consulta)
-    db.commit()
+    EventosConsulta.registrar(db, nova_consulta, EVENTO_AGENDAMENTO)
+    CalendarioSlots.ocupar(db, consulta_data.id_medico, data_hora, data_hora_fim)
+    
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise _erro_conflito_agenda(db, e, consulta_data.id_medico, data_hora, data_hora_fim)
+    
+    return nova_consulta
+
+
+@router.post("/consultas", response_model=ConsultaResponse, status_code=status.HTTP_201_CREATED)
+def agendar_consulta(
+    paciente_id: int,
+    consulta_data: ConsultaCreate,
+    db: Session = Depends(get_db)
+):
+    """
+    Caso de Uso: Agendar Consulta
+    Permite agendar escolhendo médico e horário disponível
+    
+    Regras de Negócio aplicadas:
+    - RN2: Máximo 2 consultas futuras por paciente
+    - RN3: Bloqueio após 3 faltas consecutivas
+    - RN4: Evitar conflitos de horário
+    - RN: Validar horário de trabalho do médico
+    """
+    # Validação e gravação serializadas por médico (evita agendamento duplo)
+    with agenda_medico_exclusiva(db, consulta_data.id_medico):
+        nova_consulta = efetuar_agendamento(db, paciente_id, consulta_data)
+    
+    EstatisticasAdmin.invalidar()
     db.refresh(nova_consulta)
     
     return nova_consulta
 
 
 @router.get("/consultas/{paciente_id}", response_model=List[ConsultaResponse])
-def listar_consultas(paciente_id: int, db: Session = Depends(get_db)):
+def listar_consultas(
+    paciente_id: int,
+    response: Response,
+    limite: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    cursor: Optional[str] = None,
+    campos: Optional[str] = Query(None, alias="fields", description="Campos retornados, separados por vírgula"),
+    db: Session = Depends(get_db_leitura)
+):
     """
     Caso de Uso: Visualizar Consultas
-    Lista todas as consultas do paciente (futuras e passadas)
+    Lista as consultas do paciente (futuras e passadas), das mais recentes para as mais antigas
+    Paginação por cursor (cabeçalho X-Proximo-Cursor) e projeção opcional com fields=
     """
+    return consultas_do_paciente(db, paciente_id, response, limite, cursor, campos)
+
+
+def consultas_do_paciente(
+    db: Session,
+    paciente_id: int,
+    response: Response,
+    limite: int = LIMITE_PADRAO,
+    cursor: Optional[str] = None,
+    campos: Optional[str] = None
+):
+    """Página de consultas do paciente (rotas síncrona e assíncrona)"""
     # Verificar se paciente existe
-    paciente = db.query(Paciente).filter(Paciente.id_paciente == paciente_id).first()
-    if not paciente:
+    paciente_existe = db.query(Paciente.id_paciente).filter(Paciente.id_paciente == paciente_id).first()
+    if not paciente_existe:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Paciente não encontrado"
         )
     
-    # Buscar consultas com informações de médico e paciente
-    consultas = db.query(Consulta).options(
-        joinedload(Consulta.medico).joinedload(Medico.especialidade),
-        joinedload(Consulta.paciente)
-    ).filter(
-        Consulta.id_paciente_fk == paciente_id
-    ).order_by(Consulta.data_hora_inicio.desc()).all()
-    
-    return consultas
+    return paginar_consultas(
+        db.query(Consulta).filter(Consulta.id_paciente_fk == paciente_id),
+        response,
+        limite=limite, cursor=cursor, campos=campos, descendente=True
+    )
 
 
-@router.delete("/consultas/{consulta_id}", status_code=status.HTTP_200_OK)
-def cancelar_consulta(
-    consulta_id: int,
-    paciente_id: int,
-    cancelamento_data: ConsultaCancelar,
-    db: Session = Depends(get_db)
-):
-    """
-    Caso de Uso: Cancelar Consulta
-    RN1: Cancelamento apenas até 24h antes do horário agendado
+def efetuar_cancelamento(db: Session, consulta: Consulta) -> None:
     """
-    # Buscar consulta
-    consulta = db.query(Consulta).filter(
-        Consulta.id_consulta == consulta_id,
-        Consulta.id_paciente_fk == paciente_id
-    ).first()
-    
-    if not consulta:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Consulta não encontrada"
-        )
+    Valida e grava o cancelamento (com evento e regeneração dos slots do dia)
     
+    Usada pela rota de pacientes e pela rota legada /consultas/{id}/cancelar.
+    """
     # Verificar se já está cancelada
     if consulta.status == "cancelada":
         raise HTTPException(
@@ -336,26 +398,23 @@ def cancelar_consulta(
         )
     
     # Cancelar consulta
+    status_anterior = consulta.status
     consulta.status = "cancelada"
+    EventosConsulta.registrar(db, consulta, EVENTO_CANCELAMENTO, status_anterior=status_anterior)
+    CalendarioSlots.regenerar_dia(db, consulta.id_medico_fk, consulta.data_hora_inicio.date())
     db.commit()
-    
-    return {
-        "sucesso": True,
-        "mensagem": "Consulta cancelada com sucesso"
-    }
 
 
-@router.put("/consultas/{consulta_id}/reagendar", response_model=ConsultaResponse)
-def reagendar_consulta(
+@router.delete("/consultas/{consulta_id}", status_code=status.HTTP_200_OK)
+def cancelar_consulta(
     consulta_id: int,
     paciente_id: int,
-    reagendamento_data: ConsultaReagendar,
+    cancelamento_data: ConsultaCancelar,
     db: Session = Depends(get_db)
 ):
     """
-    Caso de Uso: Reagendar Consulta
-    RN1: Reagendamento apenas até 24h antes do horário atual
-    RN4: Validar conflitos de horário
+    Caso de Uso: Cancelar Consulta
+    RN1: Cancelamento apenas até 24h antes do horário agendado
     """
     # Buscar consulta
     consulta = db.query(Consulta).filter(
@@ -369,6 +428,21 @@ def reagendar_consulta(
             detail="Consulta não encontrada"
         )
     
+    efetuar_cancelamento(db, consulta)
+    EstatisticasAdmin.invalidar()
+    
+    return {
+        "sucesso": True,
+        "mensagem": "Consulta cancelada com sucesso"
+    }
+
+
+def efetuar_reagendamento(db: Session, consulta: Consulta, nova_data_hora: datetime) -> Consulta:
+    """
+    Valida e grava o reagendamento (com evento e slots dos dois dias)
+    
+    Usada pela rota de pacientes e pela rota legada /consultas/{id}/reagendar.
+    """
     # Verificar status
     if consulta.status == "cancelada":
         raise HTTPException(
@@ -390,9 +464,6 @@ def reagendar_consulta(
             detail=mensagem
         )
     
-    # Nova data/hora (suporta ambos os nomes de campo)
-    nova_data_hora = getattr(reagendamento_data, 'nova_data_hora', None) or getattr(reagendamento_data, 'nova_data_hora_inicio', None) or getattr(reagendamento_data, 'data_hora_inicio', None)
-    
     if not nova_data_hora:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -400,10 +471,12 @@ def reagendar_consulta(
         )
     
     nova_data_hora_fim = nova_data_hora + timedelta(minutes=30)
+    medico_id = consulta.id_medico_fk
+    consulta_id = consulta.id_consulta
     
     # Validar horário de trabalho
     no_horario, msg_horario = RegraConsulta.validar_horario_trabalho_medico(
-        db, consulta.id_medico_fk, nova_data_hora
+        db, medico_id, nova_data_hora
     )
     if not no_horario:
         raise HTTPException(
@@ -411,21 +484,68 @@ def reagendar_consulta(
             detail=msg_horario
         )
     
-    # Validar conflito (ignorando a própria consulta)
-    sem_conflito, msg_conflito = RegraConsulta.validar_conflito_horario_medico(
-        db, consulta.id_medico_fk, nova_data_hora, nova_data_hora_fim,
-        consulta_id_ignorar=consulta_id
-    )
-    if not sem_conflito:
+    with agenda_medico_exclusiva(db, medico_id):
+        # Validar conflito (ignorando a própria consulta)
+        sem_conflito, msg_conflito = RegraConsulta.validar_conflito_horario_medico(
+            db, medico_id, nova_data_hora, nova_data_hora_fim,
+            consulta_id_ignorar=consulta_id
+        )
+        if not sem_conflito:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=msg_conflito
+            )
+        
+        # Reagendar consulta
+        inicio_antigo = consulta.data_hora_inicio
+        data_antiga = inicio_antigo.date()
+        consulta.data_hora_inicio = nova_data_hora
+        consulta.data_hora_fim = nova_data_hora_fim
+        EventosConsulta.registrar(
+            db, consulta, EVENTO_REAGENDAMENTO,
+            status_anterior=consulta.status, data_anterior=inicio_antigo
+        )
+        CalendarioSlots.regenerar_dia(db, medico_id, data_antiga)
+        CalendarioSlots.ocupar(db, medico_id, nova_data_hora, nova_data_hora_fim)
+        
+        try:
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            raise _erro_conflito_agenda(db, e, medico_id, nova_data_hora, nova_data_hora_fim, consulta_id)
+    
+    return consulta
+
+
+@router.put("/consultas/{consulta_id}/reagendar", response_model=ConsultaResponse)
+def reagendar_consulta(
+    consulta_id: int,
+    paciente_id: int,
+    reagendamento_data: ConsultaReagendar,
+    db: Session = Depends(get_db)
+):
+    """
+    Caso de Uso: Reagendar Consulta
+    RN1: Reagendamento apenas até 24h antes do horário atual
+    RN4: Validar conflitos de horário
+    """
+    # Buscar consulta
+    consulta = db.query(Consulta).filter(
+        Consulta.id_consulta == consulta_id,
+        Consulta.id_paciente_fk == paciente_id
+    ).first()
+    
+    if not consulta:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=msg_conflito
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Consulta não encontrada"
         )
     
-    # Reagendar consulta
-    consulta.data_hora_inicio = nova_data_hora
-    consulta.data_hora_fim = nova_data_hora_fim
-    db.commit()
+    # Nova data/hora (suporta ambos os nomes de campo)
+    nova_data_hora = getattr(reagendamento_data, 'nova_data_hora', None) or getattr(reagendamento_data, 'nova_data_hora_inicio', None) or getattr(reagendamento_data, 'data_hora_inicio', None)
+    
+    efetuar_reagendamento(db, consulta, nova_data_hora)
+    EstatisticasAdmin.invalidar()
     db.refresh(consulta)
     
     return consulta
@@ -453,12 +573,18 @@ def buscar_medicos(
 def get_horarios_disponiveis(
     medico_id: int,
     data: date,
+    duracao_minutos: int = Query(30, ge=5, le=240),
     db: Session = Depends(get_db)
 ):
     """
     Retorna horários disponíveis de um médico para uma data específica
-    Considera horários de trabalho e consultas já agendadas
+    Considera horários de trabalho, bloqueios e consultas já agendadas
     """
+    return horarios_disponiveis_medico(db, medico_id, data, duracao_minutos)
+
+
+def horarios_disponiveis_medico(db: Session, medico_id: int, data: date, duracao_minutos: int = 30) -> dict:
+    """Horários livres do médico na data (rotas síncrona e assíncrona)"""
     # Verificar se médico existe
     medico = db.query(Medico).filter(Medico.id_medico == medico_id).first()
     if not medico:
@@ -469,7 +595,7 @@ def get_horarios_disponiveis(
     
     # Listar horários disponíveis usando serviço de regras de negócio
     horarios = RegraHorarioDisponivel.listar_horarios_disponiveis(
-        db, medico_id, data, duracao_consulta_minutos=30
+        db, medico_id, data, duracao_consulta_minutos=duracao_minutos
     )
     
     return {
@@ -478,15 +604,108 @@ def get_horarios_disponiveis(
     }
 
 
+@router.get("/disponibilidade", response_model=BuscaDisponibilidadeResponse)
+def buscar_disponibilidade(
+    data_inicio: date,
+    data_fim: date,
+    especialidade_id: Optional[int] = None,
+    medico_ids: Optional[List[int]] = Query(None),
+    duracao_minutos: int = Query(30, ge=5, le=240),
+    db: Session = Depends(get_db)
+):
+    """
+    Busca horários livres de vários médicos em um período
+    Filtra por especialidade e/ou lista de médicos; retorna também o primeiro
+    horário livre encontrado (ex.: primeira consulta de Cardiologia em 30 dias)
+    """
+    return montar_disponibilidade(db, data_inicio, data_fim, especialidade_id, medico_ids, duracao_minutos)
+
+
+def montar_disponibilidade(
+    db: Session,
+    data_inicio: date,
+    data_fim: date,
+    especialidade_id: Optional[int] = None,
+    medico_ids: Optional[List[int]] = None,
+    duracao_minutos: int = 30
+) -> dict:
+    """Busca de disponibilidade validada e montada (rotas síncrona e assíncrona)"""
+    if especialidade_id is None and not medico_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe especialidade_id ou medico_ids"
+        )
+    
+    if data_fim < data_inicio:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="data_fim deve ser igual ou posterior a data_inicio"
+        )
+    
+    if (data_fim - data_inicio).days + 1 > MAX_DIAS_BUSCA_DISPONIBILIDADE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Período máximo de busca: {MAX_DIAS_BUSCA_DISPONIBILIDADE} dias"
+        )
+    
+    query = db.query(Medico)
+    if especialidade_id is not None:
+        query = query.filter(Medico.id_especialidade_fk == especialidade_id)
+    if medico_ids:
+        query = query.filter(Medico.id_medico.in_(medico_ids))
+    medicos = query.order_by(Medico.nome).all()
+    
+    disponibilidade = RegraHorarioDisponivel.listar_disponibilidade_periodo(
+        db, [m.id_medico for m in medicos], data_inicio, data_fim,
+        duracao_consulta_minutos=duracao_minutos
+    )
+    
+    primeiro_horario = None
+    id_medico_primeiro = None
+    resultado_medicos = []
+    
+    for medico in medicos:
+        dias = disponibilidade.get(medico.id_medico, {})
+        primeiro_medico = None
+        if dias:
+            primeiro_medico = dias[min(dias)][0]
+            if primeiro_horario is None or primeiro_medico < primeiro_horario:
+                primeiro_horario = primeiro_medico
+                id_medico_primeiro = medico.id_medico
+        
+        resultado_medicos.append({
+            "id_medico": medico.id_medico,
+            "nome": medico.nome,
+            "id_especialidade_fk": medico.id_especialidade_fk,
+            "primeiro_horario": primeiro_medico,
+            "dias": [
+                {
+                    "data": dia,
+                    "horarios_disponiveis": [slot.strftime("%H:%M") for slot in slots]
+                }
+                for dia, slots in sorted(dias.items())
+            ]
+        })
+    
+    return {
+        "data_inicio": data_inicio,
+        "data_fim": data_fim,
+        "duracao_minutos": duracao_minutos,
+        "primeiro_horario": primeiro_horario,
+        "id_medico_primeiro_horario": id_medico_primeiro,
+        "medicos": resultado_medicos
+    }
+
+
 @router.get("/especialidades", response_model=List[EspecialidadeResponse])
-def listar_especialidades(db: Session = Depends(get_db)):
+def listar_especialidades(db: Session = Depends(get_db_leitura)):
     """Lista todas as especialidades médicas disponíveis"""
     especialidades = db.query(Especialidade).all()
     return especialidades
 
 
 @router.get("/planos-saude", response_model=List[PlanoSaudeResponse])
-def listar_planos_saude(db: Session = Depends(get_db)):
+def listar_planos_saude(db: Session = Depends(get_db_leitura)):
     """Lista todos os planos de saúde disponíveis (para cadastro)"""
     planos = db.query(PlanoSaude).all()
     return planos
@@ -12,8 +12,10 @@ import bcrypt
 from app.database import get_db
 from app.models.models import (
     Administrador, Paciente, Medico, PlanoSaude, Especialidade,
-    HorarioTrabalho, Consulta
+    HorarioTrabalho, Consulta, ConsultaEvento, SessaoUsuario
 )
+from app.services.agregados import AgregadoConsultasDia, AgregadoConsultasPlano
+from app.services.sessoes import SessoesUsuario
 
 router = APIRouter()
 
@@ -243,6 +245,10 @@ def limpar_dados(db: Session = Depends(get_db)):
     
     try:
         # Deletar em ordem para respeitar foreign keys
+        AgregadoConsultasPlano.invalidar(db)
+        AgregadoConsultasDia.invalidar(db)
+        db.query(ConsultaEvento).delete()
+        db.query(SessaoUsuario).delete()
         db.query(Consulta).delete()
         db.query(HorarioTrabalho).delete()
         db.query(Paciente).delete()
@@ -252,6 +258,7 @@ def limpar_dados(db: Session = Depends(get_db)):
         db.query(PlanoSaude).delete()
         
         db.commit()
+        SessoesUsuario.invalidar_cache()
         
         return {
             "success": True,
@@ -20,6 +20,10 @@ class Token(BaseModel):
     token_type: str
     user_type: str  # 'paciente', 'medico', 'administrador'
     user_id: int
+    refresh_token: Optional[str] = None  # troca por novo access token em /auth/refresh
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     email: Optional[str] = None
@@ -342,10 +346,23 @@ class RelatorioResponse(RelatorioBase):
     data_geracao: datetime
     dados_resultado: Optional[str] = None
     id_admin_fk: int
+    parametros: Optional[str] = None
+    status: str
+    mensagem_erro: Optional[str] = None
+    data_conclusao: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+class RelatorioSolicitacao(BaseModel):
+    """Pedido de geração assíncrona (filtros usados conforme o tipo)"""
+    tipo: str = Field(..., pattern="^(consultas-por-medico|consultas-por-especialidade|cancelamentos|pacientes-frequentes)$")
+    data_inicio: Optional[date] = None
+    data_fim: Optional[date] = None
+    medico_id: Optional[int] = None
+    especialidade_id: Optional[int] = None
+    limite: Optional[int] = Field(None, ge=1, le=1000)
+
 # ============ Schemas para Relatórios Específicos ============
 class RelatorioConsultasPorMedico(BaseModel):
     medico_nome: str
@@ -363,6 +380,10 @@ class RelatorioCancelamentos(BaseModel):
     total_consultas: int
     total_cancelamentos: int
     taxa_cancelamento: float
+    total_remarcacoes: int
+    taxa_remarcacao: float
+    antecedencia_media_agendamento_horas: Optional[float] = None
+    antecedencia_media_cancelamento_horas: Optional[float] = None
 
 class RelatorioPacientesFrequentes(BaseModel):
     paciente_nome: str
@@ -379,6 +400,7 @@ class EstatisticasDashboard(BaseModel):
     consultas_mes: int
     consultas_agendadas: int
     consultas_realizadas: int
+    consultas_canceladas: int = 0
 
 # ============ Bloqueio Horario Schemas ============
 class BloqueioHorarioBase(BaseModel):
@@ -402,6 +424,25 @@ class HorariosDisponiveisResponse(BaseModel):
     data: date
     horarios_disponiveis: List[str]
 
+class DisponibilidadeDia(BaseModel):
+    data: date
+    horarios_disponiveis: List[str]
+
+class DisponibilidadeMedico(BaseModel):
+    id_medico: int
+    nome: str
+    id_especialidade_fk: int
+    primeiro_horario: Optional[datetime] = None
+    dias: List[DisponibilidadeDia]
+
+class BuscaDisponibilidadeResponse(BaseModel):
+    data_inicio: date
+    data_fim: date
+    duracao_minutos: int
+    primeiro_horario: Optional[datetime] = None
+    id_medico_primeiro_horario: Optional[int] = None
+    medicos: List[DisponibilidadeMedico]
+
 class MensagemResponse(BaseModel):
     mensagem: str
 
@@ -7,10 +7,12 @@ from .regras_negocio import (
     RegraHorarioDisponivel,
     ValidadorAgendamento
 )
+from .disponibilidade import MotorDisponibilidade
 
 __all__ = [
     "RegraConsulta",
     "RegraPaciente",
     "RegraHorarioDisponivel",
-    "ValidadorAgendamento"
+    "ValidadorAgendamento",
+    "MotorDisponibilidade"
 ]
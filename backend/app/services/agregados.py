@@ -0,0 +1,458 @@
+"""
+Agregados de Consultas - Clínica Saúde+
+Totais de consultas consolidados por período, para que relatórios e
+estatísticas não precisem varrer o histórico a cada acesso.
+
+Períodos fechados são consolidados uma única vez, sob demanda:
+- meses anteriores ao corrente em consulta_mensal_plano (por plano);
+- dias anteriores a hoje em consulta_diaria (por médico, especialidade,
+  plano e status).
+O período em aberto (mês corrente, ou hoje e os dias futuros) é sempre lido
+da tabela consulta por intervalo de data_hora_inicio (indexado).
+
+A consolidação é gravada em uma sessão própria (sessao_derivada), sem
+confirmar nem desfazer a transação de quem está lendo.
+
+Em uma sessão da réplica de leitura (SESSAO_PRIMARIA em Session.info), a
+consolidação que faltar é gravada no primário e a leitura em curso conta o
+período inteiro na tabela consulta da réplica.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Date, and_, func, insert, literal, select, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Subquery
+
+from app.database import SESSAO_PRIMARIA, sessao_derivada
+from app.models.models import (
+    AgregadoDia, AgregadoMes, Consulta, ConsultaDiaria, ConsultaMensalPlano,
+    Medico, Paciente, PlanoSaude
+)
+
+
+def inicio_do_mes(dia: date) -> date:
+    """Primeiro dia do mês de `dia`"""
+    return dia.replace(day=1)
+
+
+def proximo_mes(mes: date) -> date:
+    """Primeiro dia do mês seguinte a `mes`"""
+    return (mes.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def mes_anterior(mes: date) -> date:
+    """Primeiro dia do mês anterior a `mes`"""
+    return (mes.replace(day=1) - timedelta(days=1)).replace(day=1)
+
+
+class AgregadoConsultasPlano:
+    """
+    Consultas por plano de saúde e mês (consolidação dos meses fechados)
+    """
+
+    @staticmethod
+    def _consolidar_mes(db: Session, mes: date) -> None:
+        """Grava os totais do mês e o seu marcador (sem commit)"""
+        inicio = datetime.combine(mes, time.min)
+        fim = datetime.combine(proximo_mes(mes), time.min)
+
+        db.execute(
+            insert(ConsultaMensalPlano).from_select(
+                ["mes", "id_plano_saude_fk", "total"],
+                select(
+                    literal(mes, Date),
+                    Paciente.id_plano_saude_fk,
+                    func.count(Consulta.id_consulta)
+                ).join(
+                    Paciente, Paciente.id_paciente == Consulta.id_paciente_fk
+                ).where(
+                    Consulta.data_hora_inicio >= inicio,
+                    Consulta.data_hora_inicio < fim,
+                    Paciente.id_plano_saude_fk.isnot(None)
+                ).group_by(Paciente.id_plano_saude_fk)
+            )
+        )
+        db.execute(AgregadoMes.__table__.insert(), [{"mes": mes, "gerado_em": datetime.utcnow()}])
+
+    @staticmethod
+    def garantir_meses(db: Session, mes_inicio: date, mes_fim: date, hoje: Optional[date] = None) -> bool:
+        """
+        Consolida os meses fechados do período que ainda não foram consolidados
+
+        Dois processos podem consolidar o mesmo mês ao mesmo tempo; quem
+        perder a corrida descarta o próprio trabalho e usa o do outro.
+
+        Args:
+            mes_inicio: Primeiro mês do período
+            mes_fim: Último mês do período (meses em aberto são ignorados)
+            hoje: Data de referência (padrão: hoje)
+
+        Returns:
+            bool: False se os meses faltantes não estão disponíveis nesta
+                  sessão (réplica: consolidados no primário)
+        """
+        ultimo_fechado = mes_anterior(hoje or date.today())
+        mes_fim = min(mes_fim, ultimo_fechado)
+        if mes_fim < mes_inicio:
+            return True
+
+        existentes = {
+            mes for (mes,) in db.query(AgregadoMes.mes).filter(
+                and_(AgregadoMes.mes >= mes_inicio, AgregadoMes.mes <= mes_fim)
+            ).all()
+        }
+        faltando = []
+        mes = mes_inicio
+        while mes <= mes_fim:
+            if mes not in existentes:
+                faltando.append(mes)
+            mes = proximo_mes(mes)
+        if not faltando:
+            return True
+
+        primaria = db.info.get(SESSAO_PRIMARIA)
+        if primaria is not None:
+            with primaria() as escrita:
+                AgregadoConsultasPlano.garantir_meses(escrita, faltando[0], faltando[-1], hoje)
+            return False
+
+        with sessao_derivada(db) as escrita:
+            try:
+                with escrita.begin_nested():
+                    for mes in faltando:
+                        AgregadoConsultasPlano._consolidar_mes(escrita, mes)
+                escrita.commit()
+            except IntegrityError:
+                # Só o savepoint é desfeito; os meses consolidados pelo outro processo ficam
+                pass
+        return True
+
+    @staticmethod
+    def invalidar(db: Session, plano_id: Optional[int] = None) -> None:
+        """
+        Descarta meses consolidados (sem commit)
+
+        Necessário quando consultas passadas são inseridas ou removidas
+        diretamente (carga de dados) ou antes de excluir um plano.
+
+        Args:
+            plano_id: Descarta só as linhas deste plano (padrão: tudo, com os marcadores)
+        """
+        if plano_id is not None:
+            db.query(ConsultaMensalPlano).filter(
+                ConsultaMensalPlano.id_plano_saude_fk == plano_id
+            ).delete(synchronize_session=False)
+            return
+        db.query(ConsultaMensalPlano).delete(synchronize_session=False)
+        db.query(AgregadoMes).delete(synchronize_session=False)
+
+    @staticmethod
+    def estatisticas_planos(
+        db: Session,
+        mes_inicio: date,
+        mes_fim: date,
+        hoje: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Pacientes e consultas de cada plano de saúde em uma única consulta
+
+        Meses fechados do período vêm de consulta_mensal_plano; a parte do
+        período a partir do mês corrente é contada na tabela consulta.
+
+        Args:
+            mes_inicio: Primeiro mês do período
+            mes_fim: Último mês do período (inclusive)
+            hoje: Data de referência (padrão: hoje)
+
+        Returns:
+            list: Um dict por plano, com qtd_pacientes, percentual_pacientes
+                  e consultas_mes (consultas no período)
+        """
+        mes_inicio, mes_fim = inicio_do_mes(mes_inicio), inicio_do_mes(mes_fim)
+        mes_corrente = inicio_do_mes(hoje or date.today())
+        inicio_aberto = max(mes_inicio, mes_corrente)
+        if not AgregadoConsultasPlano.garantir_meses(db, mes_inicio, mes_fim, hoje):
+            inicio_aberto = mes_inicio
+
+        partes = []
+        if mes_inicio < inicio_aberto:
+            partes.append(
+                select(
+                    ConsultaMensalPlano.id_plano_saude_fk.label("id_plano"),
+                    ConsultaMensalPlano.total.label("total")
+                ).where(
+                    ConsultaMensalPlano.mes >= mes_inicio,
+                    ConsultaMensalPlano.mes <= min(mes_fim, mes_anterior(mes_corrente))
+                )
+            )
+        if mes_fim >= inicio_aberto:
+            partes.append(
+                select(
+                    Paciente.id_plano_saude_fk.label("id_plano"),
+                    func.count(Consulta.id_consulta).label("total")
+                ).join(
+                    Paciente, Paciente.id_paciente == Consulta.id_paciente_fk
+                ).where(
+                    Consulta.data_hora_inicio >= datetime.combine(inicio_aberto, time.min),
+                    Consulta.data_hora_inicio < datetime.combine(proximo_mes(mes_fim), time.min),
+                    Paciente.id_plano_saude_fk.isnot(None)
+                ).group_by(Paciente.id_plano_saude_fk)
+            )
+
+        periodo = (union_all(*partes) if len(partes) > 1 else partes[0]).subquery()
+        consultas = select(
+            periodo.c.id_plano, func.sum(periodo.c.total).label("total")
+        ).group_by(periodo.c.id_plano).subquery()
+        pacientes = select(
+            Paciente.id_plano_saude_fk.label("id_plano"),
+            func.count(Paciente.id_paciente).label("total")
+        ).group_by(Paciente.id_plano_saude_fk).subquery()
+        total_pacientes = select(func.count(Paciente.id_paciente)).scalar_subquery()
+
+        linhas = db.execute(
+            select(
+                PlanoSaude.id_plano_saude,
+                PlanoSaude.nome,
+                PlanoSaude.cobertura_info,
+                func.coalesce(pacientes.c.total, 0).label("qtd_pacientes"),
+                func.coalesce(consultas.c.total, 0).label("consultas_mes"),
+                total_pacientes.label("total_pacientes")
+            ).outerjoin(
+                pacientes, pacientes.c.id_plano == PlanoSaude.id_plano_saude
+            ).outerjoin(
+                consultas, consultas.c.id_plano == PlanoSaude.id_plano_saude
+            ).order_by(PlanoSaude.id_plano_saude)
+        ).all()
+
+        resultado = []
+        for linha in linhas:
+            qtd_pacientes = int(linha.qtd_pacientes)
+            percentual = (qtd_pacientes / linha.total_pacientes * 100) if linha.total_pacientes else 0
+            resultado.append({
+                "id_plano_saude": linha.id_plano_saude,
+                "nome": linha.nome,
+                "cobertura_info": linha.cobertura_info,
+                "qtd_pacientes": qtd_pacientes,
+                "percentual_pacientes": round(percentual, 1),
+                "consultas_mes": int(linha.consultas_mes)
+            })
+        return resultado
+
+
+class AgregadoConsultasDia:
+    """
+    Consultas por dia, médico, especialidade, plano e status (consolidação dos dias fechados)
+
+    Um dia fechado só muda quando o status de uma consulta passada é
+    alterado; a rota correspondente chama invalidar_dia() na mesma transação
+    e o dia é reconsolidado na próxima leitura.
+    """
+
+    @staticmethod
+    def _consolidar(db: Session, data_inicio: date, data_fim: date) -> None:
+        """Grava os totais e os marcadores dos dias do período (sem commit)"""
+        dia = func.date(Consulta.data_hora_inicio)
+        db.execute(
+            insert(ConsultaDiaria).from_select(
+                ["dia", "id_medico_fk", "id_especialidade_fk", "id_plano_saude_fk", "status", "total"],
+                select(
+                    dia,
+                    Consulta.id_medico_fk,
+                    Medico.id_especialidade_fk,
+                    Paciente.id_plano_saude_fk,
+                    func.coalesce(Consulta.status, ""),
+                    func.count(Consulta.id_consulta)
+                ).join(
+                    Medico, Medico.id_medico == Consulta.id_medico_fk
+                ).join(
+                    Paciente, Paciente.id_paciente == Consulta.id_paciente_fk
+                ).where(
+                    Consulta.data_hora_inicio >= datetime.combine(data_inicio, time.min),
+                    Consulta.data_hora_inicio < datetime.combine(data_fim + timedelta(days=1), time.min)
+                ).group_by(
+                    dia, Consulta.id_medico_fk, Medico.id_especialidade_fk,
+                    Paciente.id_plano_saude_fk, Consulta.status
+                )
+            )
+        )
+
+        agora = datetime.utcnow()
+        total_dias = (data_fim - data_inicio).days + 1
+        db.execute(
+            AgregadoDia.__table__.insert(),
+            [{"dia": data_inicio + timedelta(days=i), "gerado_em": agora} for i in range(total_dias)]
+        )
+
+    @staticmethod
+    def _remover(db: Session, data_inicio: date, data_fim: date) -> None:
+        """Remove totais e marcadores dos dias do período (sem commit)"""
+        db.query(ConsultaDiaria).filter(
+            and_(ConsultaDiaria.dia >= data_inicio, ConsultaDiaria.dia <= data_fim)
+        ).delete(synchronize_session=False)
+        db.query(AgregadoDia).filter(
+            and_(AgregadoDia.dia >= data_inicio, AgregadoDia.dia <= data_fim)
+        ).delete(synchronize_session=False)
+
+    @staticmethod
+    def garantir_dias(db: Session, data_inicio: date, data_fim: date, hoje: Optional[date] = None) -> bool:
+        """
+        Consolida os dias fechados do período que ainda não foram consolidados
+
+        Os dias faltantes são recalculados como um único intervalo (do
+        primeiro ao último faltante), com uma só consulta agrupada.
+
+        Args:
+            data_inicio: Primeiro dia do período
+            data_fim: Último dia do período (hoje e dias futuros são ignorados)
+            hoje: Data de referência (padrão: hoje)
+
+        Returns:
+            bool: False se os dias faltantes não estão disponíveis nesta
+                  sessão (réplica: consolidados no primário)
+        """
+        data_fim = min(data_fim, (hoje or date.today()) - timedelta(days=1))
+        if data_fim < data_inicio:
+            return True
+
+        existentes = {
+            dia for (dia,) in db.query(AgregadoDia.dia).filter(
+                and_(AgregadoDia.dia >= data_inicio, AgregadoDia.dia <= data_fim)
+            ).all()
+        }
+        total_dias = (data_fim - data_inicio).days + 1
+        faltando = [
+            data_inicio + timedelta(days=i) for i in range(total_dias)
+            if data_inicio + timedelta(days=i) not in existentes
+        ]
+        if not faltando:
+            return True
+
+        primaria = db.info.get(SESSAO_PRIMARIA)
+        if primaria is not None:
+            with primaria() as escrita:
+                AgregadoConsultasDia.garantir_dias(escrita, faltando[0], faltando[-1], hoje)
+            return False
+
+        with sessao_derivada(db) as escrita:
+            try:
+                with escrita.begin_nested():
+                    AgregadoConsultasDia._remover(escrita, faltando[0], faltando[-1])
+                    AgregadoConsultasDia._consolidar(escrita, faltando[0], faltando[-1])
+                escrita.commit()
+            except IntegrityError:
+                # Só o savepoint é desfeito; os dias consolidados pelo outro processo ficam
+                pass
+        return True
+
+    @staticmethod
+    def invalidar_dia(db: Session, dia: date, hoje: Optional[date] = None) -> None:
+        """Descarta a consolidação de um dia fechado (sem commit; dias em aberto são ignorados)"""
+        if dia < (hoje or date.today()):
+            AgregadoConsultasDia._remover(db, dia, dia)
+
+    @staticmethod
+    def invalidar(db: Session, plano_id: Optional[int] = None) -> None:
+        """
+        Descarta dias consolidados (sem commit)
+
+        Args:
+            plano_id: Antes de excluir um plano, só desvincula as suas linhas
+                      (passam a contar como particulares); padrão: descarta tudo
+        """
+        if plano_id is not None:
+            db.query(ConsultaDiaria).filter(
+                ConsultaDiaria.id_plano_saude_fk == plano_id
+            ).update({ConsultaDiaria.id_plano_saude_fk: None}, synchronize_session=False)
+            return
+        db.query(ConsultaDiaria).delete(synchronize_session=False)
+        db.query(AgregadoDia).delete(synchronize_session=False)
+
+    @staticmethod
+    def fatos(
+        db: Session,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        medico_id: Optional[int] = None,
+        especialidade_id: Optional[int] = None,
+        hoje: Optional[date] = None
+    ) -> Subquery:
+        """
+        Totais de consultas do período, prontos para agregação
+
+        Dias fechados vêm de consulta_diaria (consolidados antes, se preciso);
+        hoje e os dias futuros são agrupados diretamente de consulta. Na
+        réplica, sem a consolidação disponível, todo o período vem de consulta.
+
+        Args:
+            data_inicio: Primeiro dia (padrão: dia da primeira consulta)
+            data_fim: Último dia, inclusive (padrão: sem limite)
+            medico_id: Restringe a um médico
+            especialidade_id: Restringe a uma especialidade
+            hoje: Data de referência (padrão: hoje)
+
+        Returns:
+            Subquery com as colunas dia, id_medico, id_especialidade,
+            id_plano, status e total
+        """
+        hoje = hoje or date.today()
+        if data_inicio is None:
+            primeira = db.query(func.min(Consulta.data_hora_inicio)).scalar()
+            data_inicio = primeira.date() if primeira else hoje
+
+        partes = []
+        inicio_aberto = max(data_inicio, hoje)
+        ultimo_fechado = hoje - timedelta(days=1)
+        fim_fechado = min(data_fim, ultimo_fechado) if data_fim else ultimo_fechado
+        if data_inicio <= fim_fechado:
+            if not AgregadoConsultasDia.garantir_dias(db, data_inicio, fim_fechado, hoje):
+                inicio_aberto = data_inicio
+            else:
+                consolidado = select(
+                    ConsultaDiaria.dia.label("dia"),
+                    ConsultaDiaria.id_medico_fk.label("id_medico"),
+                    ConsultaDiaria.id_especialidade_fk.label("id_especialidade"),
+                    ConsultaDiaria.id_plano_saude_fk.label("id_plano"),
+                    ConsultaDiaria.status.label("status"),
+                    ConsultaDiaria.total.label("total")
+                ).where(
+                    ConsultaDiaria.dia >= data_inicio,
+                    ConsultaDiaria.dia <= fim_fechado
+                )
+                if medico_id:
+                    consolidado = consolidado.where(ConsultaDiaria.id_medico_fk == medico_id)
+                if especialidade_id:
+                    consolidado = consolidado.where(ConsultaDiaria.id_especialidade_fk == especialidade_id)
+                partes.append(consolidado)
+
+        if not partes or data_fim is None or data_fim >= inicio_aberto:
+            dia = func.date(Consulta.data_hora_inicio)
+            aberto = select(
+                dia.label("dia"),
+                Consulta.id_medico_fk.label("id_medico"),
+                Medico.id_especialidade_fk.label("id_especialidade"),
+                Paciente.id_plano_saude_fk.label("id_plano"),
+                func.coalesce(Consulta.status, "").label("status"),
+                func.count(Consulta.id_consulta).label("total")
+            ).join(
+                Medico, Medico.id_medico == Consulta.id_medico_fk
+            ).join(
+                Paciente, Paciente.id_paciente == Consulta.id_paciente_fk
+            ).where(
+                Consulta.data_hora_inicio >= datetime.combine(inicio_aberto, time.min)
+            ).group_by(
+                dia, Consulta.id_medico_fk, Medico.id_especialidade_fk,
+                Paciente.id_plano_saude_fk, Consulta.status
+            )
+            if data_fim is not None:
+                aberto = aberto.where(
+                    Consulta.data_hora_inicio < datetime.combine(data_fim + timedelta(days=1), time.min)
+                )
+            if medico_id:
+                aberto = aberto.where(Consulta.id_medico_fk == medico_id)
+            if especialidade_id:
+                aberto = aberto.where(Medico.id_especialidade_fk == especialidade_id)
+            partes.append(aberto)
+
+        return (union_all(*partes) if len(partes) > 1 else partes[0]).subquery("fatos")
@@ -0,0 +1,187 @@
+"""
+Calendário de Slots Materializado - Clínica Saúde+
+Mantém na tabela agenda_slot os slots de cada médico para as próximas semanas,
+derivados de HorarioTrabalho, BloqueioHorario e das consultas ativas.
+A leitura de disponibilidade vira uma busca indexada; as rotas que alteram a
+agenda atualizam o calendário na mesma transação.
+"""
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import sessao_derivada
+from app.models.models import AgendaDia, AgendaSlot
+
+
+class CalendarioSlots:
+    """
+    Operações de leitura e manutenção incremental do calendário de slots
+    """
+
+    # Duração dos slots materializados (a mesma usada no agendamento)
+    DURACAO_MINUTOS = 30
+
+    @staticmethod
+    def janela_materializada(hoje: Optional[date] = None) -> Tuple[date, date]:
+        """Período coberto pelo calendário: de hoje até N semanas à frente"""
+        hoje = hoje or date.today()
+        return hoje, hoje + timedelta(weeks=settings.AGENDA_SEMANAS_MATERIALIZADAS) - timedelta(days=1)
+
+    @staticmethod
+    def _materializar(db: Session, medico_ids: List[int], data_inicio: date, data_fim: date) -> None:
+        """Gera slots e marcadores de dia para o período (sem commit)"""
+        from app.services.regras_negocio import RegraHorarioDisponivel
+
+        calculado = RegraHorarioDisponivel.calcular_disponibilidade_periodo(
+            db, medico_ids, data_inicio, data_fim,
+            duracao_consulta_minutos=CalendarioSlots.DURACAO_MINUTOS
+        )
+        agora = datetime.utcnow()
+        dias = []
+        slots = []
+        for medico_id in medico_ids:
+            por_dia = calculado.get(medico_id, {})
+            dia = data_inicio
+            while dia <= data_fim:
+                dias.append({"id_medico_fk": medico_id, "data": dia, "gerado_em": agora})
+                slots.extend(
+                    {"id_medico_fk": medico_id, "data": dia, "data_hora_inicio": slot, "disponivel": True}
+                    for slot in por_dia.get(dia, [])
+                )
+                dia += timedelta(days=1)
+
+        if dias:
+            db.execute(AgendaDia.__table__.insert(), dias)
+        if slots:
+            db.execute(AgendaSlot.__table__.insert(), slots)
+
+    @staticmethod
+    def _remover(db: Session, medico_id: int, data_inicio: date, data_fim: Optional[date] = None) -> None:
+        """Remove slots e marcadores de um médico a partir de uma data (sem commit)"""
+        filtros_slot = [AgendaSlot.id_medico_fk == medico_id, AgendaSlot.data >= data_inicio]
+        filtros_dia = [AgendaDia.id_medico_fk == medico_id, AgendaDia.data >= data_inicio]
+        if data_fim is not None:
+            filtros_slot.append(AgendaSlot.data <= data_fim)
+            filtros_dia.append(AgendaDia.data <= data_fim)
+        db.query(AgendaSlot).filter(and_(*filtros_slot)).delete(synchronize_session=False)
+        db.query(AgendaDia).filter(and_(*filtros_dia)).delete(synchronize_session=False)
+
+    @staticmethod
+    def garantir_dias(db: Session, medico_ids: List[int], data_inicio: date, data_fim: date) -> None:
+        """
+        Materializa os dias ainda não gerados do período
+
+        Os dias são gravados e confirmados em uma sessão própria; a transação
+        de `db` não é confirmada nem desfeita. Dois processos podem tentar
+        gerar o mesmo dia ao mesmo tempo; quem perder a corrida descarta o
+        próprio trabalho e usa o do outro.
+        """
+        if not medico_ids or data_fim < data_inicio:
+            return
+
+        existentes = set(
+            db.query(AgendaDia.id_medico_fk, AgendaDia.data).filter(
+                and_(
+                    AgendaDia.id_medico_fk.in_(medico_ids),
+                    AgendaDia.data >= data_inicio,
+                    AgendaDia.data <= data_fim
+                )
+            ).all()
+        )
+        total_dias = (data_fim - data_inicio).days + 1
+        faltando = [
+            medico_id for medico_id in medico_ids
+            if sum(1 for m, _ in existentes if m == medico_id) < total_dias
+        ]
+        if not faltando:
+            return
+
+        # Chamado em leituras: a geração é confirmada fora da sessão do chamador
+        with sessao_derivada(db) as escrita:
+            try:
+                with escrita.begin_nested():
+                    for medico_id in faltando:
+                        CalendarioSlots._remover(escrita, medico_id, data_inicio, data_fim)
+                    CalendarioSlots._materializar(escrita, faltando, data_inicio, data_fim)
+                escrita.commit()
+            except IntegrityError:
+                # Só o savepoint é desfeito; os dias gerados pelo outro processo ficam
+                pass
+
+    @staticmethod
+    def listar(
+        db: Session,
+        medico_ids: List[int],
+        data_inicio: date,
+        data_fim: date
+    ) -> Dict[int, Dict[date, List[datetime]]]:
+        """
+        Lê os slots livres do calendário (o período deve estar na janela materializada)
+
+        Returns:
+            dict: {medico_id: {data: [inícios de slot]}} apenas com datas que têm slots
+        """
+        CalendarioSlots.garantir_dias(db, medico_ids, data_inicio, data_fim)
+
+        resultado: Dict[int, Dict[date, List[datetime]]] = {medico_id: {} for medico_id in medico_ids}
+        linhas = db.query(AgendaSlot.id_medico_fk, AgendaSlot.data, AgendaSlot.data_hora_inicio).filter(
+            and_(
+                AgendaSlot.id_medico_fk.in_(medico_ids),
+                AgendaSlot.data >= data_inicio,
+                AgendaSlot.data <= data_fim,
+                AgendaSlot.disponivel == True
+            )
+        ).order_by(AgendaSlot.id_medico_fk, AgendaSlot.data_hora_inicio).all()
+
+        for medico_id, dia, inicio in linhas:
+            resultado[medico_id].setdefault(dia, []).append(inicio)
+        return resultado
+
+    # ============ Manutenção incremental ============
+
+    @staticmethod
+    def ocupar(db: Session, medico_id: int, data_hora_inicio: datetime, data_hora_fim: datetime) -> None:
+        """Marca como indisponíveis os slots que se sobrepõem a uma nova consulta"""
+        duracao = timedelta(minutes=CalendarioSlots.DURACAO_MINUTOS)
+        db.query(AgendaSlot).filter(
+            and_(
+                AgendaSlot.id_medico_fk == medico_id,
+                AgendaSlot.data_hora_inicio > data_hora_inicio - duracao,
+                AgendaSlot.data_hora_inicio < data_hora_fim
+            )
+        ).update({AgendaSlot.disponivel: False}, synchronize_session=False)
+
+    @staticmethod
+    def regenerar_dia(db: Session, medico_id: int, data: date) -> None:
+        """
+        Recalcula um dia já materializado (cancelamento, reagendamento, bloqueios)
+
+        Dias fora da janela ou ainda não gerados são ignorados: serão gerados
+        com o estado atual na próxima leitura.
+        """
+        inicio, fim = CalendarioSlots.janela_materializada()
+        if data < inicio or data > fim:
+            return
+
+        materializado = db.query(AgendaDia.data).filter(
+            and_(AgendaDia.id_medico_fk == medico_id, AgendaDia.data == data)
+        ).first()
+        if not materializado:
+            return
+
+        # Sessões usam autoflush=False: garantir que o recálculo veja as alterações pendentes
+        db.flush()
+        CalendarioSlots._remover(db, medico_id, data, data)
+        CalendarioSlots._materializar(db, [medico_id], data, data)
+
+    @staticmethod
+    def invalidar_medico(db: Session, medico_id: int, a_partir_de: Optional[date] = None) -> None:
+        """
+        Descarta o calendário do médico a partir de uma data (padrão: hoje)
+        Usado quando os horários de trabalho mudam ou o médico é excluído
+        """
+        CalendarioSlots._remover(db, medico_id, a_partir_de or date.today())
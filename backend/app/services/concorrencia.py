@@ -0,0 +1,79 @@
+"""
+Controle de Concorrência no Agendamento - Clínica Saúde+
+Serializa validação + gravação de consultas por médico, para que dois
+pacientes não passem juntos pela checagem de conflito (RN4).
+
+- PostgreSQL: advisory lock de transação por médico (liberado no commit/rollback),
+  com a constraint de exclusão da tabela consulta como garantia final
+- Demais bancos (SQLite em dev/testes): lock de processo por médico,
+  compartilhado pelas rotas síncronas e assíncronas
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# Namespace dos advisory locks de agenda (primeiro argumento de pg_advisory_xact_lock)
+CHAVE_LOCK_AGENDA = 7301
+
+# SQLSTATE de exclusion_violation no PostgreSQL
+SQLSTATE_EXCLUSION_VIOLATION = "23P01"
+
+_locks_locais: Dict[int, threading.Lock] = defaultdict(threading.Lock)
+_locks_locais_guarda = threading.Lock()
+
+
+def _lock_local(medico_id: int) -> threading.Lock:
+    with _locks_locais_guarda:
+        return _locks_locais[medico_id]
+
+
+@contextmanager
+def agenda_medico_exclusiva(db: Session, medico_id: int) -> Iterator[None]:
+    """
+    Garante acesso exclusivo à agenda do médico durante o bloco
+
+    O commit da consulta deve acontecer dentro do bloco: no PostgreSQL o lock é
+    liberado pelo próprio commit/rollback; nos demais bancos, na saída do bloco.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(CHAVE_LOCK_AGENDA, medico_id)))
+        yield
+        return
+
+    with _lock_local(medico_id):
+        yield
+
+
+@asynccontextmanager
+async def agenda_medico_exclusiva_async(db: AsyncSession, medico_id: int) -> AsyncIterator[None]:
+    """
+    Versão de agenda_medico_exclusiva para as rotas com AsyncSession
+
+    Fora do PostgreSQL, o lock de processo é tentado sem bloquear o event
+    loop (o dono do lock pode ser outra corrotina do mesmo loop).
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(select(func.pg_advisory_xact_lock(CHAVE_LOCK_AGENDA, medico_id)))
+        yield
+        return
+
+    trava = _lock_local(medico_id)
+    while not trava.acquire(blocking=False):
+        await asyncio.sleep(0.005)
+    try:
+        yield
+    finally:
+        trava.release()
+
+
+def e_conflito_de_agenda(erro: IntegrityError) -> bool:
+    """Indica se o erro veio da constraint de exclusão de horários do médico"""
+    codigo = getattr(erro.orig, "pgcode", None) or getattr(erro.orig, "sqlstate", None)
+    return codigo == SQLSTATE_EXCLUSION_VIOLATION or "ex_consulta_medico_horario" in str(erro.orig)
@@ -0,0 +1,192 @@
+"""
+Motor de Disponibilidade - Clínica Saúde+
+Calcula os horários livres de um médico por subtração de intervalos ordenados:
+janelas de trabalho (HorarioTrabalho) menos bloqueios (BloqueioHorario) e
+consultas ativas, em uma única passada linear.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import datetime, date, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import literal
+
+from app.models.models import Consulta, HorarioTrabalho, BloqueioHorario
+
+# Intervalo semiaberto [inicio, fim)
+Intervalo = Tuple[datetime, datetime]
+
+# Status que ocupam a agenda do médico
+STATUS_ATIVOS = ('agendada', 'confirmada')
+
+
+def filtro_consulta_ativa():
+    """
+    Filtro SQL de consultas ativas
+
+    Os status vão como literais no SQL (e não como parâmetros) para que o
+    planejador reconheça o predicado dos índices parciais de consulta.
+    """
+    return Consulta.status.in_([literal(s, literal_execute=True) for s in STATUS_ATIVOS])
+
+
+def mesclar_intervalos(intervalos: Iterable[Intervalo]) -> List[Intervalo]:
+    """
+    Ordena e mescla intervalos sobrepostos ou adjacentes
+
+    Args:
+        intervalos: Intervalos (inicio, fim) em qualquer ordem
+
+    Returns:
+        List[Intervalo]: Intervalos ordenados e disjuntos
+    """
+    mesclados: List[Intervalo] = []
+    for inicio, fim in sorted(i for i in intervalos if i[0] < i[1]):
+        if mesclados and inicio <= mesclados[-1][1]:
+            if fim > mesclados[-1][1]:
+                mesclados[-1] = (mesclados[-1][0], fim)
+        else:
+            mesclados.append((inicio, fim))
+    return mesclados
+
+
+def subtrair_intervalos(base: List[Intervalo], remover: List[Intervalo]) -> List[Intervalo]:
+    """
+    Subtrai `remover` de `base` em uma passada linear
+
+    Ambas as listas devem estar ordenadas e disjuntas (ver mesclar_intervalos).
+
+    Returns:
+        List[Intervalo]: Trechos de `base` não cobertos por `remover`
+    """
+    livres: List[Intervalo] = []
+    j = 0
+    for inicio, fim in base:
+        # Descartar intervalos que terminam antes desta janela
+        while j < len(remover) and remover[j][1] <= inicio:
+            j += 1
+
+        cursor = inicio
+        k = j
+        while k < len(remover) and remover[k][0] < fim:
+            if remover[k][0] > cursor:
+                livres.append((cursor, remover[k][0]))
+            cursor = max(cursor, remover[k][1])
+            k += 1
+
+        if cursor < fim:
+            livres.append((cursor, fim))
+    return livres
+
+
+def intervalos_no_periodo(intervalos: List[Intervalo], inicio: datetime, fim: datetime) -> List[Intervalo]:
+    """
+    Trecho de `intervalos` que cruza [inicio, fim), localizado por busca binária
+
+    Como a lista é ordenada e disjunta, inícios e fins crescem juntos; o custo
+    não depende de quantos intervalos ficam fora do período.
+
+    Returns:
+        List[Intervalo]: Intervalos que se sobrepõem ao período
+    """
+    primeiro = bisect_right(intervalos, inicio, key=lambda intervalo: intervalo[1])
+    ultimo = bisect_left(intervalos, fim, lo=primeiro, key=lambda intervalo: intervalo[0])
+    return intervalos[primeiro:ultimo]
+
+
+def gerar_slots(
+    janelas: List[Intervalo],
+    ocupados: List[Intervalo],
+    duracao: timedelta
+) -> List[datetime]:
+    """
+    Gera os inícios de slot livres dentro das janelas de trabalho
+
+    Os slots seguem a grade de cada janela (início da janela + n * duração) e
+    só são retornados se couberem inteiramente em um trecho livre.
+
+    Args:
+        janelas: Janelas de trabalho ordenadas e disjuntas
+        ocupados: Intervalos ocupados ordenados e disjuntos (podem cobrir um
+                  período maior; só os que cruzam cada janela são percorridos)
+        duracao: Duração de cada slot
+
+    Returns:
+        List[datetime]: Inícios de slot em ordem crescente
+    """
+    slots: List[datetime] = []
+    for janela in janelas:
+        inicio_janela = janela[0]
+        ocupados_janela = intervalos_no_periodo(ocupados, *janela)
+        for inicio_livre, fim_livre in subtrair_intervalos([janela], ocupados_janela):
+            # Primeiro ponto da grade dentro do trecho livre
+            passos = -((inicio_janela - inicio_livre) // duracao)
+            slot = inicio_janela + passos * duracao
+            while slot + duracao <= fim_livre:
+                slots.append(slot)
+                slot += duracao
+    return slots
+
+
+class MotorDisponibilidade:
+    """
+    Converte as entidades do modelo em intervalos e calcula a agenda livre
+    """
+
+    @staticmethod
+    def janelas_trabalho(horarios: Iterable[HorarioTrabalho], data: date) -> List[Intervalo]:
+        """Janelas de trabalho do médico na data (apenas do dia da semana correspondente)"""
+        dia_semana = data.weekday()
+        return mesclar_intervalos(
+            (datetime.combine(data, h.hora_inicio), datetime.combine(data, h.hora_fim))
+            for h in horarios
+            if h.dia_semana == dia_semana
+        )
+
+    @staticmethod
+    def intervalos_ocupados(
+        bloqueios: Iterable[BloqueioHorario],
+        consultas: Iterable[Consulta],
+        duracao_padrao: timedelta
+    ) -> List[Intervalo]:
+        """Bloqueios e consultas ativas como intervalos ordenados e disjuntos"""
+        intervalos = [
+            (datetime.combine(b.data, b.hora_inicio), datetime.combine(b.data, b.hora_fim))
+            for b in bloqueios
+        ]
+        for consulta in consultas:
+            if consulta.status not in STATUS_ATIVOS:
+                continue
+            fim = consulta.data_hora_fim or consulta.data_hora_inicio + duracao_padrao
+            intervalos.append((consulta.data_hora_inicio, fim))
+        return mesclar_intervalos(intervalos)
+
+    @staticmethod
+    def calcular_slots(
+        horarios: Iterable[HorarioTrabalho],
+        bloqueios: Iterable[BloqueioHorario],
+        consultas: Iterable[Consulta],
+        data: date,
+        duracao_consulta_minutos: int = 30,
+        ocupados: Optional[List[Intervalo]] = None
+    ) -> List[datetime]:
+        """
+        Calcula os slots livres de um médico em uma data
+
+        Args:
+            horarios: Horários de trabalho do médico
+            bloqueios: Bloqueios do médico (podem incluir outras datas)
+            consultas: Consultas do médico (podem incluir outras datas)
+            data: Data desejada
+            duracao_consulta_minutos: Duração do slot em minutos
+            ocupados: Intervalos ocupados já calculados (dispensa bloqueios/consultas)
+
+        Returns:
+            List[datetime]: Inícios dos slots livres
+        """
+        duracao = timedelta(minutes=duracao_consulta_minutos)
+        janelas = MotorDisponibilidade.janelas_trabalho(horarios, data)
+        if not janelas:
+            return []
+        if ocupados is None:
+            ocupados = MotorDisponibilidade.intervalos_ocupados(bloqueios, consultas, duracao)
+        return gerar_slots(janelas, ocupados, duracao)
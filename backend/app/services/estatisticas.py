@@ -0,0 +1,116 @@
+"""
+Estatísticas Administrativas - Clínica Saúde+
+Contagens do dashboard e dos relatórios em uma única consulta agregada
+(somas condicionais sobre intervalos de data_hora_inicio, que usam índice),
+mantidas em um cache em memória de curta duração.
+
+O cache é por processo: as rotas que agendam ou mudam status de consultas
+chamam EstatisticasAdmin.invalidar(); entre processos diferentes a validade
+fica limitada pelo TTL.
+"""
+import threading
+import time as relogio
+from datetime import date, datetime, time, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy import case, desc, func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.models import Consulta, Especialidade, Medico, Paciente
+
+
+class EstatisticasAdmin:
+    """
+    Cálculo e cache das estatísticas do painel administrativo
+    """
+
+    _cache: Dict[Tuple[str, date], Tuple[float, Any]] = {}
+    _trava = threading.Lock()
+
+    @staticmethod
+    def invalidar() -> None:
+        """Descarta as estatísticas em cache (chamar após alterar consultas)"""
+        with EstatisticasAdmin._trava:
+            EstatisticasAdmin._cache.clear()
+
+    @staticmethod
+    def _em_cache(chave: str, calcular: Callable[[], Any]) -> Any:
+        """Retorna o valor em cache ou o recalcula; a chave inclui o dia corrente"""
+        ttl = settings.ESTATISTICAS_CACHE_TTL_SEGUNDOS
+        chave_dia = (chave, date.today())
+        agora = relogio.monotonic()
+
+        with EstatisticasAdmin._trava:
+            item = EstatisticasAdmin._cache.get(chave_dia)
+        if item and agora - item[0] < ttl:
+            return item[1]
+
+        valor = calcular()
+        if ttl > 0:
+            with EstatisticasAdmin._trava:
+                EstatisticasAdmin._cache[chave_dia] = (agora, valor)
+        return valor
+
+    @staticmethod
+    def calcular_contagens(db: Session) -> Dict[str, int]:
+        """
+        Calcula todas as contagens do painel em uma única consulta
+
+        Returns:
+            dict: totais de pacientes, médicos e consultas, consultas de hoje,
+                  da semana (até hoje) e do mês, e consultas por status
+        """
+        hoje = date.today()
+        inicio_hoje = datetime.combine(hoje, time.min)
+        fim_hoje = inicio_hoje + timedelta(days=1)
+        inicio_semana = inicio_hoje - timedelta(days=hoje.weekday())
+        inicio_mes = datetime(hoje.year, hoje.month, 1)
+        inicio_proximo_mes = (inicio_mes + timedelta(days=32)).replace(day=1)
+
+        def contar_se(condicao) -> Any:
+            return func.coalesce(func.sum(case((condicao, 1), else_=0)), 0)
+
+        inicio = Consulta.data_hora_inicio
+        linha = db.execute(
+            select(
+                select(func.count(Paciente.id_paciente)).scalar_subquery().label("total_pacientes"),
+                select(func.count(Medico.id_medico)).scalar_subquery().label("total_medicos"),
+                func.count(Consulta.id_consulta).label("total_consultas"),
+                contar_se((inicio >= inicio_hoje) & (inicio < fim_hoje)).label("consultas_hoje"),
+                contar_se((inicio >= inicio_semana) & (inicio < fim_hoje)).label("consultas_semana"),
+                contar_se((inicio >= inicio_mes) & (inicio < inicio_proximo_mes)).label("consultas_mes"),
+                contar_se(Consulta.status == "agendada").label("consultas_agendadas"),
+                contar_se(Consulta.status == "realizada").label("consultas_realizadas"),
+                contar_se(Consulta.status == "cancelada").label("consultas_canceladas"),
+            ).select_from(Consulta)
+        ).one()
+
+        return {chave: int(valor or 0) for chave, valor in linha._mapping.items()}
+
+    @staticmethod
+    def contagens(db: Session) -> Dict[str, int]:
+        """Contagens do painel (ver calcular_contagens), servidas do cache"""
+        return EstatisticasAdmin._em_cache(
+            "contagens", lambda: EstatisticasAdmin.calcular_contagens(db)
+        )
+
+    @staticmethod
+    def especialidades_mais_procuradas(db: Session, limite: int = 3) -> List[Dict[str, Any]]:
+        """Especialidades com mais consultas, servidas do cache"""
+        def calcular() -> List[Dict[str, Any]]:
+            linhas = db.query(
+                Especialidade.nome,
+                func.count(Consulta.id_consulta).label('total')
+            ).join(
+                Medico, Medico.id_especialidade_fk == Especialidade.id_especialidade
+            ).join(
+                Consulta, Consulta.id_medico_fk == Medico.id_medico
+            ).group_by(
+                Especialidade.nome
+            ).order_by(
+                desc('total')
+            ).limit(limite).all()
+            return [{"nome": esp.nome, "total": esp.total} for esp in linhas]
+
+        return EstatisticasAdmin._em_cache(f"especialidades_top_{limite}", calcular)
@@ -0,0 +1,108 @@
+"""
+Eventos de Consulta - Clínica Saúde+
+Histórico somente de inserção das transições das consultas (consulta_evento).
+
+As rotas de agendamento, cancelamento, reagendamento e mudança de status
+registram um evento na mesma transação da alteração. O reagendamento
+sobrescreve data_hora_inicio na consulta; o evento guarda o horário
+anterior, o que permite medir remarcações e a antecedência de agendamentos
+e cancelamentos sem reconstruir o estado a partir da tabela consulta.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.models import Consulta, ConsultaEvento
+
+EVENTO_AGENDAMENTO = "agendamento"
+EVENTO_CANCELAMENTO = "cancelamento"
+EVENTO_REAGENDAMENTO = "reagendamento"
+EVENTO_STATUS = "status"
+
+
+class EventosConsulta:
+    """
+    Registro e agregação dos eventos de consulta
+    """
+
+    @staticmethod
+    def registrar(
+        db: Session,
+        consulta: Consulta,
+        tipo: str,
+        status_anterior: Optional[str] = None,
+        data_anterior: Optional[datetime] = None,
+        agora: Optional[datetime] = None
+    ) -> ConsultaEvento:
+        """
+        Adiciona à sessão o evento de uma alteração da consulta (gravado no commit da rota)
+
+        Args:
+            consulta: Consulta já com os valores novos (pode ainda não ter id)
+            tipo: EVENTO_AGENDAMENTO, EVENTO_CANCELAMENTO, EVENTO_REAGENDAMENTO ou EVENTO_STATUS
+            status_anterior: Status antes da alteração
+            data_anterior: Início da consulta antes do reagendamento
+            agora: Momento do evento (padrão: agora, no mesmo relógio das regras de 24h)
+
+        Returns:
+            ConsultaEvento: Evento adicionado
+        """
+        agora = agora or datetime.now()
+        evento = ConsultaEvento(
+            consulta=consulta,
+            id_medico_fk=consulta.id_medico_fk,
+            tipo=tipo,
+            status_anterior=status_anterior,
+            status_novo=consulta.status,
+            data_consulta=consulta.data_hora_inicio,
+            data_consulta_anterior=data_anterior,
+            ocorrido_em=agora,
+            antecedencia_minutos=int((consulta.data_hora_inicio - agora).total_seconds() // 60)
+        )
+        db.add(evento)
+        return evento
+
+    @staticmethod
+    def resumo(
+        db: Session,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """
+        Totais de eventos e antecedência média por tipo, para consultas no período
+
+        Uma única consulta agrupada por tipo sobre o índice (tipo, data_consulta).
+
+        Args:
+            data_inicio: Primeiro dia das consultas (inclusivo)
+            data_fim: Último dia das consultas (inclusivo)
+
+        Returns:
+            dict: tipo -> {"total": int, "antecedencia_media_minutos": float | None}
+        """
+        stmt = select(
+            ConsultaEvento.tipo,
+            func.count().label("total"),
+            func.avg(ConsultaEvento.antecedencia_minutos).label("antecedencia")
+        ).where(
+            ConsultaEvento.tipo.in_((EVENTO_AGENDAMENTO, EVENTO_CANCELAMENTO, EVENTO_REAGENDAMENTO))
+        )
+        if data_inicio:
+            stmt = stmt.where(ConsultaEvento.data_consulta >= datetime.combine(data_inicio, time.min))
+        if data_fim:
+            stmt = stmt.where(
+                ConsultaEvento.data_consulta < datetime.combine(data_fim + timedelta(days=1), time.min)
+            )
+
+        resumo = {
+            tipo: {"total": 0, "antecedencia_media_minutos": None}
+            for tipo in (EVENTO_AGENDAMENTO, EVENTO_CANCELAMENTO, EVENTO_REAGENDAMENTO)
+        }
+        for linha in db.execute(stmt.group_by(ConsultaEvento.tipo)):
+            resumo[linha.tipo] = {
+                "total": linha.total,
+                "antecedencia_media_minutos": float(linha.antecedencia) if linha.antecedencia is not None else None
+            }
+        return resumo
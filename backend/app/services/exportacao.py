@@ -0,0 +1,181 @@
+"""
+Exportação de Dados - Clínica Saúde+
+Exportação em massa das consultas e dos relatórios em CSV ou NDJSON.
+
+As consultas são lidas com cursor no servidor (yield_per/stream_results) e
+serializadas lote a lote em um gerador consumido pela StreamingResponse:
+a memória usada não depende da quantidade de linhas exportadas. Cada linha
+é uma tupla de colunas, sem objetos ORM nem relacionamentos carregados.
+"""
+import csv
+import json
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.models import Consulta, Especialidade, Medico, Paciente, PlanoSaude
+from app.services.relatorios import RelatoriosAdmin
+
+# Linhas buscadas por ida ao banco e serializadas por pedaço da resposta
+TAMANHO_LOTE = 1000
+
+# Formato -> media type da resposta
+FORMATOS: Dict[str, str] = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+COLUNAS_CONSULTA: Tuple[str, ...] = (
+    "id_consulta", "data_hora_inicio", "data_hora_fim", "status",
+    "id_paciente", "paciente_nome", "paciente_cpf",
+    "id_medico", "medico_nome", "medico_crm",
+    "especialidade", "plano_saude",
+)
+
+# Colunas de cada relatório (as chaves devolvidas por RelatoriosAdmin)
+COLUNAS_RELATORIO: Dict[str, Tuple[str, ...]] = {
+    "consultas-por-medico": (
+        "medico_nome", "especialidade", "total_consultas", "consultas_realizadas", "consultas_canceladas"
+    ),
+    "consultas-por-especialidade": ("especialidade", "total_consultas", "total_medicos"),
+    "cancelamentos": (
+        "total_consultas", "total_cancelamentos", "taxa_cancelamento", "total_remarcacoes", "taxa_remarcacao",
+        "antecedencia_media_agendamento_horas", "antecedencia_media_cancelamento_horas"
+    ),
+    "pacientes-frequentes": ("paciente_nome", "cpf", "total_consultas", "ultima_consulta"),
+}
+
+
+def _valor(valor: Any) -> Any:
+    """Datas em ISO 8601; demais valores como vieram do banco"""
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def codificar(
+    colunas: Sequence[str],
+    lotes: Iterable[Sequence[Sequence[Any]]],
+    formato: str
+) -> Iterator[str]:
+    """
+    Serializa lotes de linhas, um pedaço de texto por lote
+
+    Args:
+        colunas: Nomes das colunas (cabeçalho do CSV, chaves do NDJSON)
+        lotes: Lotes de linhas (tuplas na ordem de colunas)
+        formato: 'csv' ou 'ndjson'
+
+    Returns:
+        Iterator[str]: Pedaços do arquivo; no CSV o primeiro é o cabeçalho
+    """
+    if formato == "csv":
+        buffer = StringIO()
+        escritor = csv.writer(buffer, lineterminator="\n")
+        escritor.writerow(colunas)
+        yield buffer.getvalue()
+        for lote in lotes:
+            buffer.seek(0)
+            buffer.truncate()
+            escritor.writerows([_valor(v) for v in linha] for linha in lote)
+            yield buffer.getvalue()
+    else:
+        for lote in lotes:
+            yield "".join(
+                json.dumps(dict(zip(colunas, map(_valor, linha))), ensure_ascii=False) + "\n"
+                for linha in lote
+            )
+
+
+class ExportacaoDados:
+    """
+    Fontes de dados da exportação em massa
+    """
+
+    @staticmethod
+    def consultas(
+        db: Session,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        medico_id: Optional[int] = None,
+        status: Optional[str] = None
+    ) -> Iterator[List[Tuple]]:
+        """
+        Consultas com paciente, médico, especialidade e plano, em lotes
+
+        O resultado é percorrido com cursor no servidor: só um lote fica em
+        memória por vez. A ordem (data_hora_inicio, id_consulta) segue o
+        índice de data das consultas.
+
+        Args:
+            data_inicio: Primeiro dia (inclusivo)
+            data_fim: Último dia (inclusivo)
+            medico_id: Apenas consultas deste médico
+            status: Apenas consultas neste status
+
+        Returns:
+            Iterator[List[Tuple]]: Lotes de até TAMANHO_LOTE linhas na ordem de COLUNAS_CONSULTA
+        """
+        stmt = select(
+            Consulta.id_consulta,
+            Consulta.data_hora_inicio,
+            Consulta.data_hora_fim,
+            Consulta.status,
+            Paciente.id_paciente,
+            Paciente.nome,
+            Paciente.cpf,
+            Medico.id_medico,
+            Medico.nome,
+            Medico.crm,
+            Especialidade.nome,
+            PlanoSaude.nome
+        ).join(
+            Paciente, Paciente.id_paciente == Consulta.id_paciente_fk
+        ).join(
+            Medico, Medico.id_medico == Consulta.id_medico_fk
+        ).join(
+            Especialidade, Especialidade.id_especialidade == Medico.id_especialidade_fk
+        ).outerjoin(
+            PlanoSaude, PlanoSaude.id_plano_saude == Paciente.id_plano_saude_fk
+        )
+
+        if data_inicio:
+            stmt = stmt.where(Consulta.data_hora_inicio >= datetime.combine(data_inicio, time.min))
+        if data_fim:
+            stmt = stmt.where(Consulta.data_hora_inicio < datetime.combine(data_fim + timedelta(days=1), time.min))
+        if medico_id:
+            stmt = stmt.where(Consulta.id_medico_fk == medico_id)
+        if status:
+            stmt = stmt.where(Consulta.status == status)
+
+        stmt = stmt.order_by(Consulta.data_hora_inicio, Consulta.id_consulta)
+        resultado = db.execute(stmt.execution_options(yield_per=TAMANHO_LOTE))
+        try:
+            for lote in resultado.partitions():
+                yield [tuple(linha) for linha in lote]
+        finally:
+            resultado.close()
+
+    @staticmethod
+    def relatorio(db: Session, tipo: str, parametros: Dict[str, Any]) -> List[Tuple]:
+        """
+        Dados de um relatório administrativo em formato tabular
+
+        Os relatórios já chegam agregados (uma linha por médico, especialidade
+        ou paciente); o de cancelamentos vira uma única linha.
+
+        Args:
+            tipo: Chave de TIPOS_RELATORIO
+            parametros: Parâmetros normalizados (parametros_relatorio)
+
+        Returns:
+            List[Tuple]: Linhas na ordem de COLUNAS_RELATORIO[tipo]
+        """
+        dados = RelatoriosAdmin.gerar(db, tipo, parametros)
+        if isinstance(dados, dict):
+            dados = [dados]
+        colunas = COLUNAS_RELATORIO[tipo]
+        return [tuple(d[c] for c in colunas) for d in dados]
@@ -0,0 +1,140 @@
+"""
+Fila de Relatórios - Clínica Saúde+
+Geração assíncrona de relatórios persistida na tabela relatorio.
+
+A rota apenas registra o pedido (status 'pendente') e devolve o id; um pool
+de threads do processo calcula os dados, monta o PDF e grava o resultado.
+Os dados são lidos da réplica de leitura, quando configurada; o status e o
+PDF são gravados no primário. O cliente consulta o status e baixa o PDF pelo id. Pedidos idênticos (mesmo
+tipo e parâmetros) feitos dentro da janela de reaproveitamento recebem o
+relatório já existente, concluído ou ainda em andamento.
+
+Pedidos pendentes não sobrevivem ao reinício do processo: passada a janela
+de reaproveitamento, um novo pedido igual gera outro relatório.
+"""
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal, roteador_leitura
+from app.models.models import Relatorio
+from app.services.relatorios import RelatoriosAdmin
+from app.services.relatorios_pdf import gerar_pdf
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDENTE = "pendente"
+STATUS_PROCESSANDO = "processando"
+STATUS_CONCLUIDO = "concluido"
+STATUS_ERRO = "erro"
+
+
+class FilaRelatorios:
+    """
+    Enfileiramento e execução dos relatórios assíncronos
+    """
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _trava = threading.Lock()
+
+    @staticmethod
+    def chave(tipo: str, parametros: Dict[str, Any]) -> str:
+        """Hash que identifica pedidos equivalentes (tipo + parâmetros normalizados)"""
+        texto = json.dumps({"tipo": tipo, "parametros": parametros}, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _despachar(relatorio_id: int) -> None:
+        """Entrega o relatório ao pool de threads (criado no primeiro uso)"""
+        with FilaRelatorios._trava:
+            if FilaRelatorios._executor is None:
+                FilaRelatorios._executor = ThreadPoolExecutor(
+                    max_workers=settings.RELATORIOS_WORKERS, thread_name_prefix="relatorio"
+                )
+            executor = FilaRelatorios._executor
+        executor.submit(FilaRelatorios.executar, relatorio_id)
+
+    @staticmethod
+    def enfileirar(db: Session, admin_id: int, tipo: str, parametros: Dict[str, Any]) -> Relatorio:
+        """
+        Registra um pedido de relatório ou reaproveita um pedido idêntico recente
+
+        Args:
+            admin_id: Administrador que pediu o relatório
+            tipo: Chave de TIPOS_RELATORIO
+            parametros: Parâmetros normalizados (parametros_relatorio)
+
+        Returns:
+            Relatorio: Pedido novo (pendente) ou o existente reaproveitado
+        """
+        chave = FilaRelatorios.chave(tipo, parametros)
+        limite = datetime.utcnow() - timedelta(minutes=settings.RELATORIOS_REUSO_MINUTOS)
+
+        existente = db.query(Relatorio).filter(
+            Relatorio.chave == chave,
+            Relatorio.data_geracao >= limite,
+            Relatorio.status.in_((STATUS_PENDENTE, STATUS_PROCESSANDO, STATUS_CONCLUIDO))
+        ).order_by(Relatorio.data_geracao.desc()).first()
+        if existente:
+            return existente
+
+        relatorio = Relatorio(
+            tipo=tipo,
+            parametros=json.dumps(parametros, sort_keys=True),
+            chave=chave,
+            status=STATUS_PENDENTE,
+            id_admin_fk=admin_id
+        )
+        db.add(relatorio)
+        db.commit()
+        db.refresh(relatorio)
+
+        FilaRelatorios._despachar(relatorio.id_relatorio)
+        return relatorio
+
+    @staticmethod
+    def executar(relatorio_id: int, db: Optional[Session] = None) -> None:
+        """
+        Calcula os dados, monta o PDF e grava o resultado do relatório
+
+        Args:
+            relatorio_id: Pedido a executar
+            db: Sessão a usar em tudo (padrão: sessões próprias, com os dados
+                lidos pelo roteador de leitura)
+        """
+        sessao = db or SessionLocal()
+        try:
+            relatorio = sessao.query(Relatorio).filter(Relatorio.id_relatorio == relatorio_id).first()
+            if relatorio is None or relatorio.status != STATUS_PENDENTE:
+                return
+            relatorio.status = STATUS_PROCESSANDO
+            sessao.commit()
+
+            try:
+                parametros = json.loads(relatorio.parametros or "{}")
+                if db is None:
+                    with roteador_leitura.abrir_sessao() as leitura:
+                        dados = RelatoriosAdmin.gerar(leitura, relatorio.tipo, parametros)
+                else:
+                    dados = RelatoriosAdmin.gerar(sessao, relatorio.tipo, parametros)
+                relatorio.dados_resultado = json.dumps(dados, ensure_ascii=False)
+                relatorio.arquivo_pdf = gerar_pdf(relatorio.tipo, dados, parametros)
+                relatorio.status = STATUS_CONCLUIDO
+            except Exception as e:
+                logger.exception("Falha ao gerar o relatório %s", relatorio_id)
+                sessao.rollback()
+                relatorio.status = STATUS_ERRO
+                relatorio.mensagem_erro = str(e)
+
+            relatorio.data_conclusao = datetime.utcnow()
+            sessao.commit()
+        finally:
+            if db is None:
+                sessao.close()
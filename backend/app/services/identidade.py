@@ -0,0 +1,68 @@
+"""
+Identidade de Usuários - Clínica Saúde+
+Resolução de e-mail -> (tipo, id, hash da senha) em uma única consulta.
+
+Pacientes, médicos e administradores ficam em tabelas separadas; o login
+precisa descobrir em qual delas está o e-mail. Em vez de três consultas
+em sequência, uma UNION ALL consulta as três pelo índice único de e-mail
+de cada tabela em uma só ida ao banco, sem carregar objetos ORM.
+"""
+from typing import List, NamedTuple
+
+from sqlalchemy import false, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.models import Administrador, Medico, Paciente
+
+# Ordem de tentativa quando o mesmo e-mail existe em mais de uma tabela
+TIPOS_USUARIO = ("paciente", "medico", "administrador")
+
+
+class Identidade(NamedTuple):
+    """Dados de login de um usuário"""
+    tipo: str
+    id: int
+    email: str
+    senha_hash: str
+    esta_bloqueado: bool
+
+
+class IdentidadeUsuario:
+    """
+    Consulta unificada de identidades para autenticação
+    """
+
+    @staticmethod
+    def buscar(db: Session, email: str) -> List[Identidade]:
+        """
+        Identidades com o e-mail informado, na ordem de TIPOS_USUARIO
+
+        Args:
+            email: E-mail do login
+
+        Returns:
+            List[Identidade]: Normalmente zero ou uma; mais de uma só se o
+                              e-mail estiver cadastrado em tabelas diferentes
+        """
+        consulta = union_all(
+            select(
+                literal("paciente").label("tipo"),
+                Paciente.id_paciente.label("id"),
+                Paciente.email.label("email"),
+                Paciente.senha_hash.label("senha_hash"),
+                Paciente.esta_bloqueado.label("esta_bloqueado")
+            ).where(Paciente.email == email),
+            select(
+                literal("medico"), Medico.id_medico, Medico.email, Medico.senha_hash, false()
+            ).where(Medico.email == email),
+            select(
+                literal("administrador"), Administrador.id_admin, Administrador.email,
+                Administrador.senha_hash, false()
+            ).where(Administrador.email == email)
+        )
+
+        identidades = [
+            Identidade(r.tipo, r.id, r.email, r.senha_hash, bool(r.esta_bloqueado))
+            for r in db.execute(consulta)
+        ]
+        return sorted(identidades, key=lambda i: TIPOS_USUARIO.index(i.tipo))
@@ -1,12 +1,150 @@
 """
 Serviços de Regras de Negócio - Clínica Saúde+
 Implementa todas as regras de negócio especificadas no EstudoDeCaso.txt
+
+As consultas ao banco das regras são instruções montadas uma única vez, na
+importação, com parâmetros nomeados (bindparam): cada chamada só fornece os
+valores. A chave de cache de uma instrução pronta é calculada uma vez e o
+SQL compilado vem do cache do SQLAlchemy; no PostgreSQL com asyncpg, o
+mesmo texto SQL reaproveita o prepared statement da conexão.
 """
-from datetime import datetime, timedelta, date
+from datetime import datetime, timedelta, date, time
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
-from app.models.models import Consulta, Paciente, Medico, HorarioTrabalho
-from typing import List, Optional
+from sqlalchemy import Select, and_, bindparam, func, select, exists
+from app.models.models import Consulta, Paciente, Medico, HorarioTrabalho, BloqueioHorario
+from app.services.disponibilidade import MotorDisponibilidade, filtro_consulta_ativa
+from app.services.sessoes import SessoesUsuario
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+
+# ============ Instruções parametrizadas ============
+
+# RN2: consultas futuras ativas do paciente
+_CONSULTAS_FUTURAS = select(func.count(Consulta.id_consulta)).where(
+    Consulta.id_paciente_fk == bindparam("paciente_id"),
+    Consulta.data_hora_inicio > bindparam("agora"),
+    filtro_consulta_ativa()
+)
+
+# RN4: consulta ativa do médico sobreposta ao intervalo
+_FILTRO_CONFLITO = and_(
+    Consulta.id_medico_fk == bindparam("medico_id"),
+    filtro_consulta_ativa(),
+    Consulta.data_hora_inicio < bindparam("data_hora_fim"),
+    Consulta.data_hora_fim > bindparam("data_hora_inicio")
+)
+_CONFLITO_MEDICO = select(Consulta).where(_FILTRO_CONFLITO).limit(1)
+_CONFLITO_MEDICO_IGNORANDO = select(Consulta).where(
+    _FILTRO_CONFLITO, Consulta.id_consulta != bindparam("consulta_id_ignorar")
+).limit(1)
+
+# Expediente do médico que contém o horário
+_HORARIO_TRABALHO = select(HorarioTrabalho).where(
+    HorarioTrabalho.id_medico_fk == bindparam("medico_id"),
+    HorarioTrabalho.dia_semana == bindparam("dia_semana"),
+    HorarioTrabalho.hora_inicio <= bindparam("hora"),
+    HorarioTrabalho.hora_fim > bindparam("hora")
+).limit(1)
+
+# RN3: paciente e faltas posteriores ao último comparecimento e ao último desbloqueio
+_PACIENTE = select(Paciente).where(Paciente.id_paciente == bindparam("paciente_id"))
+_PACIENTE_PARA_ATUALIZAR = _PACIENTE.with_for_update()
+_FALTAS_PERSISTIDAS = select(Paciente.faltas_consecutivas).where(
+    Paciente.id_paciente == bindparam("paciente_id")
+)
+_FALTAS_DESDE_COMPARECIMENTO = select(func.count(Consulta.id_consulta)).where(
+    Consulta.id_paciente_fk == bindparam("paciente_id"),
+    Consulta.status == 'faltou',
+    Consulta.data_hora_inicio > func.coalesce(
+        select(func.max(Consulta.data_hora_inicio)).where(
+            Consulta.id_paciente_fk == bindparam("paciente_id"),
+            Consulta.status == 'realizada'
+        ).scalar_subquery(),
+        datetime.min
+    ),
+    Consulta.data_hora_inicio > func.coalesce(
+        select(Paciente.desbloqueado_em).where(
+            Paciente.id_paciente == bindparam("paciente_id")
+        ).scalar_subquery(),
+        datetime.min
+    )
+)
+
+# Disponibilidade de um médico em uma data
+_HORARIOS_DO_DIA = select(HorarioTrabalho).where(
+    HorarioTrabalho.id_medico_fk == bindparam("medico_id"),
+    HorarioTrabalho.dia_semana == bindparam("dia_semana")
+)
+_BLOQUEIOS_DO_DIA = select(BloqueioHorario).where(
+    BloqueioHorario.id_medico_fk == bindparam("medico_id"),
+    BloqueioHorario.data == bindparam("data")
+)
+_CONSULTAS_ATIVAS_MEDICO = select(Consulta).where(
+    Consulta.id_medico_fk == bindparam("medico_id"),
+    Consulta.data_hora_inicio >= bindparam("desde"),
+    Consulta.data_hora_inicio < bindparam("ate"),
+    filtro_consulta_ativa()
+)
+
+# Disponibilidade de vários médicos em um período (listas expandidas na execução)
+_HORARIOS_MEDICOS = select(HorarioTrabalho).where(
+    HorarioTrabalho.id_medico_fk.in_(bindparam("medico_ids", expanding=True))
+)
+_BLOQUEIOS_PERIODO = select(BloqueioHorario).where(
+    BloqueioHorario.id_medico_fk.in_(bindparam("medico_ids", expanding=True)),
+    BloqueioHorario.data >= bindparam("data_inicio"),
+    BloqueioHorario.data <= bindparam("data_fim")
+)
+_CONSULTAS_ATIVAS_PERIODO = select(Consulta).where(
+    Consulta.id_medico_fk.in_(bindparam("medico_ids", expanding=True)),
+    Consulta.data_hora_inicio >= bindparam("desde"),
+    Consulta.data_hora_inicio < bindparam("ate"),
+    filtro_consulta_ativa()
+)
+
+
+def montar_fatos_agendamento() -> Select:
+    """
+    Instrução única com os fatos de RN2, RN3, RN4 e do horário de trabalho
+
+    Parâmetros: paciente_id, medico_id, agora, dia_semana, hora,
+    data_hora_inicio e data_hora_fim.
+    """
+    paciente_id = bindparam("paciente_id")
+    medico_id = bindparam("medico_id")
+
+    # Horário de trabalho do médico
+    no_horario = exists().where(
+        HorarioTrabalho.id_medico_fk == medico_id,
+        HorarioTrabalho.dia_semana == bindparam("dia_semana"),
+        HorarioTrabalho.hora_inicio <= bindparam("hora"),
+        HorarioTrabalho.hora_fim > bindparam("hora")
+    )
+
+    # RN4: primeira consulta ativa sobreposta
+    conflito_inicio = select(Consulta.data_hora_inicio).where(_FILTRO_CONFLITO).order_by(
+        Consulta.data_hora_inicio
+    ).limit(1).scalar_subquery()
+    conflito_fim = select(Consulta.data_hora_fim).where(_FILTRO_CONFLITO).order_by(
+        Consulta.data_hora_inicio
+    ).limit(1).scalar_subquery()
+
+    return select(
+        exists().where(Paciente.id_paciente == paciente_id).label("paciente_existe"),
+        exists().where(Medico.id_medico == medico_id).label("medico_existe"),
+        select(Paciente.esta_bloqueado).where(
+            Paciente.id_paciente == paciente_id
+        ).scalar_subquery().label("esta_bloqueado"),
+        _FALTAS_PERSISTIDAS.scalar_subquery().label("faltas_consecutivas"),
+        _CONSULTAS_FUTURAS.scalar_subquery().label("consultas_futuras"),
+        no_horario.label("no_horario_trabalho"),
+        conflito_inicio.label("conflito_inicio"),
+        conflito_fim.label("conflito_fim")
+    )
+
+
+_FATOS_AGENDAMENTO = montar_fatos_agendamento()
 
 
 class RegraConsulta:
@@ -59,15 +197,9 @@ class RegraConsulta:
         Returns:
             tuple: (pode_agendar: bool, mensagem: str)
         """
-        agora = datetime.now()
-        
-        consultas_futuras = db.query(Consulta).filter(
-            and_(
-                Consulta.id_paciente_fk == paciente_id,
-                Consulta.data_hora_inicio > agora,
-                Consulta.status.in_(['agendada', 'confirmada'])
-            )
-        ).count()
+        consultas_futuras = db.execute(
+            _CONSULTAS_FUTURAS, {"paciente_id": paciente_id, "agora": datetime.now()}
+        ).scalar()
         
         if consultas_futuras >= 2:
             return False, f"Limite de consultas futuras atingido. Você já possui {consultas_futuras} consultas agendadas. Máximo permitido: 2."
@@ -95,20 +227,16 @@ class RegraConsulta:
         Returns:
             tuple: (sem_conflito: bool, mensagem: str)
         """
-        query = db.query(Consulta).filter(
-            and_(
-                Consulta.id_medico_fk == medico_id,
-                Consulta.status.in_(['agendada', 'confirmada']),
-                # Verifica sobreposição de horários
-                Consulta.data_hora_inicio < data_hora_fim,
-                Consulta.data_hora_fim > data_hora_inicio
-            )
-        )
-        
+        parametros = {
+            "medico_id": medico_id,
+            "data_hora_inicio": data_hora_inicio,
+            "data_hora_fim": data_hora_fim
+        }
         if consulta_id_ignorar:
-            query = query.filter(Consulta.id_consulta != consulta_id_ignorar)
-        
-        conflito = query.first()
+            parametros["consulta_id_ignorar"] = consulta_id_ignorar
+            conflito = db.scalars(_CONFLITO_MEDICO_IGNORANDO, parametros).first()
+        else:
+            conflito = db.scalars(_CONFLITO_MEDICO, parametros).first()
         
         if conflito:
             return False, f"Horário indisponível. O médico já possui consulta agendada das {conflito.data_hora_inicio.strftime('%H:%M')} às {conflito.data_hora_fim.strftime('%H:%M')}."
@@ -135,13 +263,8 @@ class RegraConsulta:
         dia_semana = data_hora_inicio.weekday()  # 0=Segunda, 6=Domingo
         hora = data_hora_inicio.time()
         
-        horario_trabalho = db.query(HorarioTrabalho).filter(
-            and_(
-                HorarioTrabalho.id_medico_fk == medico_id,
-                HorarioTrabalho.dia_semana == dia_semana,
-                HorarioTrabalho.hora_inicio <= hora,
-                HorarioTrabalho.hora_fim > hora
-            )
+        horario_trabalho = db.scalars(
+            _HORARIO_TRABALHO, {"medico_id": medico_id, "dia_semana": dia_semana, "hora": hora}
         ).first()
         
         if not horario_trabalho:
@@ -156,10 +279,14 @@ class RegraPaciente:
     Regras de Negócio para Pacientes
     """
     
+    # Status que encerram uma consulta: comparecimento ou falta
+    STATUS_DESFECHO = ('realizada', 'faltou')
+    
     @staticmethod
     def contar_faltas_consecutivas(db: Session, paciente_id: int) -> int:
         """
-        Conta quantas faltas consecutivas o paciente teve (status='faltou')
+        Retorna quantas faltas consecutivas o paciente teve (status='faltou')
+        Lê o contador persistido em Paciente.faltas_consecutivas
         
         Args:
             db: Sessão do banco de dados
@@ -168,56 +295,59 @@ class RegraPaciente:
         Returns:
             int: Número de faltas consecutivas
         """
-        # Buscar consultas passadas ordenadas por data decrescente
-        consultas = db.query(Consulta).filter(
-            and_(
-                Consulta.id_paciente_fk == paciente_id,
-                Consulta.data_hora_inicio < datetime.now()
-            )
-        ).order_by(Consulta.data_hora_inicio.desc()).all()
-        
-        faltas_consecutivas = 0
-        for consulta in consultas:
-            if consulta.status == 'faltou':
-                faltas_consecutivas += 1
-            else:
-                # Se encontrou uma consulta que não foi falta, para a contagem
-                break
-        
-        return faltas_consecutivas
+        faltas = db.execute(_FALTAS_PERSISTIDAS, {"paciente_id": paciente_id}).scalar()
+        return faltas or 0
     
     @staticmethod
-    def verificar_bloqueio_por_faltas(db: Session, paciente_id: int) -> tuple[bool, str]:
+    def calcular_faltas_consecutivas(db: Session, paciente_id: int) -> int:
         """
-        RN3: Se o paciente faltar a 3 consultas seguidas sem aviso,
-        o sistema deve bloquear novos agendamentos até liberação pela administração
+        Calcula no banco as faltas posteriores ao último comparecimento do paciente
+        e ao último desbloqueio feito pelo administrador
         
         Args:
             db: Sessão do banco de dados
             paciente_id: ID do paciente
             
         Returns:
-            tuple: (esta_bloqueado: bool, mensagem: str)
+            int: Número de faltas consecutivas
+        """
+        return db.execute(_FALTAS_DESDE_COMPARECIMENTO, {"paciente_id": paciente_id}).scalar() or 0
+    
+    @staticmethod
+    def atualizar_faltas_consecutivas(db: Session, paciente_id: int) -> int:
         """
-        paciente = db.query(Paciente).filter(Paciente.id_paciente == paciente_id).first()
+        Recalcula o contador de faltas consecutivas do paciente (sem commit)
+        Deve ser chamado na mesma transação que altera o status da consulta
         
+        Args:
+            db: Sessão do banco de dados
+            paciente_id: ID do paciente
+            
+        Returns:
+            int: Novo valor do contador
+        """
+        # Trava a linha do paciente para que duas mudanças de status não se sobreponham
+        paciente = db.scalars(_PACIENTE_PARA_ATUALIZAR, {"paciente_id": paciente_id}).first()
         if not paciente:
-            return True, "Paciente não encontrado"
-        
-        if paciente.esta_bloqueado:
-            faltas = RegraPaciente.contar_faltas_consecutivas(db, paciente_id)
-            return True, f"Paciente bloqueado por {faltas} faltas consecutivas. Entre em contato com a administração."
+            return 0
         
-        # Verificar se deve ser bloqueado
-        faltas_consecutivas = RegraPaciente.contar_faltas_consecutivas(db, paciente_id)
-        
-        if faltas_consecutivas >= 3:
-            # Bloquear paciente automaticamente
-            paciente.esta_bloqueado = True
-            db.commit()
-            return True, f"Paciente bloqueado automaticamente por {faltas_consecutivas} faltas consecutivas. Entre em contato com a administração."
+        # Sessões usam autoflush=False: o cálculo precisa ver o novo status
+        db.flush()
+        paciente.faltas_consecutivas = RegraPaciente.calcular_faltas_consecutivas(db, paciente_id)
+        return paciente.faltas_consecutivas
+    
+    @staticmethod
+    def registrar_desbloqueio(paciente: Paciente) -> None:
+        """
+        Desbloqueia o paciente e zera o contador (sem commit)
+        As faltas anteriores ao desbloqueio deixam de contar nos recálculos
         
-        return False, "Paciente não está bloqueado"
+        Args:
+            paciente: Paciente a desbloquear
+        """
+        paciente.esta_bloqueado = False
+        paciente.faltas_consecutivas = 0
+        paciente.desbloqueado_em = datetime.now()
     
     @staticmethod
     def desbloquear_paciente(db: Session, paciente_id: int) -> tuple[bool, str]:
@@ -231,7 +361,7 @@ class RegraPaciente:
         Returns:
             tuple: (sucesso: bool, mensagem: str)
         """
-        paciente = db.query(Paciente).filter(Paciente.id_paciente == paciente_id).first()
+        paciente = db.scalars(_PACIENTE, {"paciente_id": paciente_id}).first()
         
         if not paciente:
             return False, "Paciente não encontrado"
@@ -239,7 +369,7 @@ class RegraPaciente:
         if not paciente.esta_bloqueado:
             return False, "Paciente não está bloqueado"
         
-        paciente.esta_bloqueado = False
+        RegraPaciente.registrar_desbloqueio(paciente)
         db.commit()
         
         return True, "Paciente desbloqueado com sucesso"
@@ -259,7 +389,7 @@ class RegraHorarioDisponivel:
     ) -> List[str]:
         """
         Lista os horários disponíveis de um médico para uma data específica
-        considerando seu horário de trabalho e consultas já agendadas
+        considerando seu horário de trabalho, bloqueios e consultas já agendadas
         
         Args:
             db: Sessão do banco de dados
@@ -270,55 +400,187 @@ class RegraHorarioDisponivel:
         Returns:
             List[str]: Lista de horários disponíveis no formato "HH:MM"
         """
-        dia_semana = data.weekday()
+        from app.services.calendario import CalendarioSlots
+        
+        # Dentro da janela materializada a leitura é uma busca indexada no calendário
+        inicio_janela, fim_janela = CalendarioSlots.janela_materializada()
+        if (duracao_consulta_minutos == CalendarioSlots.DURACAO_MINUTOS
+                and inicio_janela <= data <= fim_janela):
+            slots = CalendarioSlots.listar(db, [medico_id], data, data)[medico_id].get(data, [])
+            return [slot.strftime("%H:%M") for slot in slots]
         
         # Buscar horários de trabalho do médico neste dia da semana
-        horarios_trabalho = db.query(HorarioTrabalho).filter(
-            and_(
-                HorarioTrabalho.id_medico_fk == medico_id,
-                HorarioTrabalho.dia_semana == dia_semana
-            )
+        horarios_trabalho = db.scalars(
+            _HORARIOS_DO_DIA, {"medico_id": medico_id, "dia_semana": data.weekday()}
         ).all()
         
         if not horarios_trabalho:
             return []
         
-        # Buscar consultas já agendadas nesta data
-        consultas_agendadas = db.query(Consulta).filter(
-            and_(
-                Consulta.id_medico_fk == medico_id,
-                func.date(Consulta.data_hora_inicio) == data,
-                Consulta.status.in_(['agendada', 'confirmada'])
-            )
-        ).all()
+        # Bloqueios da data
+        bloqueios = db.scalars(_BLOQUEIOS_DO_DIA, {"medico_id": medico_id, "data": data}).all()
         
-        horarios_disponiveis = []
+        # Consultas ativas que tocam a data (faixa de timestamps, usa índice)
+        inicio_dia = datetime.combine(data, time.min)
+        consultas_agendadas = db.scalars(_CONSULTAS_ATIVAS_MEDICO, {
+            "medico_id": medico_id,
+            "desde": inicio_dia - timedelta(days=1),
+            "ate": inicio_dia + timedelta(days=1)
+        }).all()
         
-        for horario_trabalho in horarios_trabalho:
-            hora_atual = horario_trabalho.hora_inicio
-            hora_fim = horario_trabalho.hora_fim
+        slots = MotorDisponibilidade.calcular_slots(
+            horarios_trabalho, bloqueios, consultas_agendadas, data,
+            duracao_consulta_minutos=duracao_consulta_minutos
+        )
+        
+        return [slot.strftime("%H:%M") for slot in slots]
+    
+    @staticmethod
+    def listar_disponibilidade_periodo(
+        db: Session,
+        medico_ids: List[int],
+        data_inicio: date,
+        data_fim: date,
+        duracao_consulta_minutos: int = 30,
+        apenas_futuros: bool = True
+    ) -> Dict[int, Dict[date, List[datetime]]]:
+        """
+        Lista os horários livres de vários médicos em um intervalo de datas
+        Usa o calendário materializado para a parte do período dentro da janela
+        e calcula o restante em memória
+        
+        Args:
+            db: Sessão do banco de dados
+            medico_ids: IDs dos médicos
+            data_inicio: Primeira data (inclusive)
+            data_fim: Última data (inclusive)
+            duracao_consulta_minutos: Duração do slot em minutos
+            apenas_futuros: Descarta slots que já passaram
+            
+        Returns:
+            dict: {medico_id: {data: [inícios de slot]}} apenas com datas que têm slots
+        """
+        from app.services.calendario import CalendarioSlots
+        
+        if not medico_ids or data_fim < data_inicio:
+            return {}
+        
+        resultado: Dict[int, Dict[date, List[datetime]]] = {medico_id: {} for medico_id in medico_ids}
+        
+        def acumular(parcial: Dict[int, Dict[date, List[datetime]]]):
+            for medico_id, dias in parcial.items():
+                resultado[medico_id].update(dias)
+        
+        inicio_janela, fim_janela = CalendarioSlots.janela_materializada()
+        inicio_cal = max(data_inicio, inicio_janela)
+        fim_cal = min(data_fim, fim_janela)
+        
+        if duracao_consulta_minutos == CalendarioSlots.DURACAO_MINUTOS and inicio_cal <= fim_cal:
+            acumular(CalendarioSlots.listar(db, medico_ids, inicio_cal, fim_cal))
+            trechos = [(data_inicio, inicio_cal - timedelta(days=1)), (fim_cal + timedelta(days=1), data_fim)]
+        else:
+            trechos = [(data_inicio, data_fim)]
+        
+        for inicio_trecho, fim_trecho in trechos:
+            if inicio_trecho <= fim_trecho:
+                acumular(RegraHorarioDisponivel.calcular_disponibilidade_periodo(
+                    db, medico_ids, inicio_trecho, fim_trecho,
+                    duracao_consulta_minutos=duracao_consulta_minutos
+                ))
+        
+        if apenas_futuros:
+            agora = datetime.now()
+            for dias in resultado.values():
+                for dia in list(dias):
+                    dias[dia] = [slot for slot in dias[dia] if slot > agora]
+                    if not dias[dia]:
+                        del dias[dia]
+        
+        return resultado
+    
+    @staticmethod
+    def calcular_disponibilidade_periodo(
+        db: Session,
+        medico_ids: List[int],
+        data_inicio: date,
+        data_fim: date,
+        duracao_consulta_minutos: int = 30
+    ) -> Dict[int, Dict[date, List[datetime]]]:
+        """
+        Calcula os horários livres de vários médicos em um intervalo de datas
+        com um número fixo de consultas ao banco (horários, bloqueios e consultas
+        são carregados de uma vez para todo o período)
+        
+        Args:
+            db: Sessão do banco de dados
+            medico_ids: IDs dos médicos
+            data_inicio: Primeira data (inclusive)
+            data_fim: Última data (inclusive)
+            duracao_consulta_minutos: Duração do slot em minutos
+            
+        Returns:
+            dict: {medico_id: {data: [inícios de slot]}} apenas com datas que têm slots
+        """
+        if not medico_ids or data_fim < data_inicio:
+            return {}
+        
+        inicio_periodo = datetime.combine(data_inicio, time.min)
+        fim_periodo = datetime.combine(data_fim + timedelta(days=1), time.min)
+        duracao = timedelta(minutes=duracao_consulta_minutos)
+        
+        horarios_por_medico: Dict[int, List[HorarioTrabalho]] = defaultdict(list)
+        for horario in db.scalars(_HORARIOS_MEDICOS, {"medico_ids": list(medico_ids)}):
+            horarios_por_medico[horario.id_medico_fk].append(horario)
+        
+        if not horarios_por_medico:
+            return {}
+        
+        medicos_com_horario = list(horarios_por_medico.keys())
+        
+        bloqueios_por_medico: Dict[int, List[BloqueioHorario]] = defaultdict(list)
+        for bloqueio in db.scalars(_BLOQUEIOS_PERIODO, {
+            "medico_ids": medicos_com_horario, "data_inicio": data_inicio, "data_fim": data_fim
+        }):
+            bloqueios_por_medico[bloqueio.id_medico_fk].append(bloqueio)
+        
+        consultas_por_medico: Dict[int, List[Consulta]] = defaultdict(list)
+        for consulta in db.scalars(_CONSULTAS_ATIVAS_PERIODO, {
+            "medico_ids": medicos_com_horario,
+            "desde": inicio_periodo - timedelta(days=1),
+            "ate": fim_periodo
+        }):
+            consultas_por_medico[consulta.id_medico_fk].append(consulta)
+        
+        resultado: Dict[int, Dict[date, List[datetime]]] = {}
+        
+        for medico_id in medico_ids:
+            horarios = horarios_por_medico.get(medico_id)
+            if not horarios:
+                continue
+            
+            # Ocupação do período inteiro calculada uma única vez por médico;
+            # cada janela do dia percorre só o seu trecho (busca binária)
+            ocupados = MotorDisponibilidade.intervalos_ocupados(
+                bloqueios_por_medico.get(medico_id, []),
+                consultas_por_medico.get(medico_id, []),
+                duracao
+            )
+            
+            dias: Dict[date, List[datetime]] = {}
+            dia = data_inicio
+            while dia <= data_fim:
+                slots = MotorDisponibilidade.calcular_slots(
+                    horarios, [], [], dia,
+                    duracao_consulta_minutos=duracao_consulta_minutos,
+                    ocupados=ocupados
+                )
+                if slots:
+                    dias[dia] = slots
+                dia += timedelta(days=1)
             
-            while hora_atual < hora_fim:
-                # Criar datetime para verificar conflito
-                data_hora = datetime.combine(data, hora_atual)
-                data_hora_fim = data_hora + timedelta(minutes=duracao_consulta_minutos)
-                
-                # Verificar se este horário tem conflito com alguma consulta
-                tem_conflito = False
-                for consulta in consultas_agendadas:
-                    if (data_hora < consulta.data_hora_fim and 
-                        data_hora_fim > consulta.data_hora_inicio):
-                        tem_conflito = True
-                        break
-                
-                if not tem_conflito:
-                    horarios_disponiveis.append(hora_atual.strftime("%H:%M"))
-                
-                # Avançar para o próximo slot
-                hora_atual = (datetime.combine(date.today(), hora_atual) + 
-                             timedelta(minutes=duracao_consulta_minutos)).time()
-        
-        return sorted(horarios_disponiveis)
+            resultado[medico_id] = dias
+        
+        return resultado
 
 
 class ValidadorAgendamento:
@@ -326,42 +588,119 @@ class ValidadorAgendamento:
     Valida todas as regras antes de criar um agendamento
     """
     
+    # Ordem em que as regras são avaliadas (a primeira violada define a mensagem)
+    ORDEM_REGRAS = ("RN3", "RN2", "horario_trabalho", "RN4")
+    
     @staticmethod
-    def validar_novo_agendamento(
+    def consultar_fatos_agendamento(
         db: Session,
         paciente_id: int,
         medico_id: int,
         data_hora_inicio: datetime,
         data_hora_fim: datetime
+    ) -> Dict[str, Any]:
+        """
+        Levanta, em uma única consulta ao banco, todos os dados necessários
+        para avaliar RN2, RN3, RN4 e o horário de trabalho do médico
+        
+        Returns:
+            dict: paciente_existe, medico_existe, esta_bloqueado, faltas_consecutivas,
+                  consultas_futuras, no_horario_trabalho, conflito_inicio, conflito_fim
+        """
+        linha = db.execute(_FATOS_AGENDAMENTO, {
+            "paciente_id": paciente_id,
+            "medico_id": medico_id,
+            "agora": datetime.now(),
+            "dia_semana": data_hora_inicio.weekday(),
+            "hora": data_hora_inicio.time(),
+            "data_hora_inicio": data_hora_inicio,
+            "data_hora_fim": data_hora_fim
+        }).one()
+        
+        return dict(linha._mapping)
+    
+    @staticmethod
+    def avaliar_regras(
+        fatos: Dict[str, Any],
+        data_hora_inicio: datetime
+    ) -> Dict[str, tuple[bool, str]]:
+        """
+        Avalia todas as regras a partir dos fatos levantados, sem acessar o banco
+        
+        Returns:
+            dict: {regra: (aprovada: bool, mensagem: str)} para cada item de ORDEM_REGRAS
+        """
+        faltas = fatos["faltas_consecutivas"] or 0
+        futuras = fatos["consultas_futuras"] or 0
+        veredito: Dict[str, tuple[bool, str]] = {}
+        
+        # RN3
+        if not fatos["paciente_existe"]:
+            veredito["RN3"] = (False, "Paciente não encontrado")
+        elif fatos["esta_bloqueado"]:
+            veredito["RN3"] = (False, f"Paciente bloqueado por {faltas} faltas consecutivas. Entre em contato com a administração.")
+        elif faltas >= 3:
+            veredito["RN3"] = (False, f"Paciente bloqueado automaticamente por {faltas} faltas consecutivas. Entre em contato com a administração.")
+        else:
+            veredito["RN3"] = (True, "Paciente não está bloqueado")
+        
+        # RN2
+        if futuras >= 2:
+            veredito["RN2"] = (False, f"Limite de consultas futuras atingido. Você já possui {futuras} consultas agendadas. Máximo permitido: 2.")
+        else:
+            veredito["RN2"] = (True, f"Você pode agendar mais {2 - futuras} consulta(s)")
+        
+        # Horário de trabalho
+        if not fatos["no_horario_trabalho"]:
+            dias = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
+            veredito["horario_trabalho"] = (False, f"Médico não atende neste horário. Verifique os horários disponíveis para {dias[data_hora_inicio.weekday()]}.")
+        else:
+            veredito["horario_trabalho"] = (True, "Horário dentro do expediente do médico")
+        
+        # RN4
+        if fatos["conflito_inicio"] is not None:
+            veredito["RN4"] = (False, f"Horário indisponível. O médico já possui consulta agendada das {fatos['conflito_inicio'].strftime('%H:%M')} às {fatos['conflito_fim'].strftime('%H:%M')}.")
+        else:
+            veredito["RN4"] = (True, "Horário disponível")
+        
+        return veredito
+    
+    @staticmethod
+    def validar_novo_agendamento(
+        db: Session,
+        paciente_id: int,
+        medico_id: int,
+        data_hora_inicio: datetime,
+        data_hora_fim: datetime,
+        fatos: Optional[Dict[str, Any]] = None
     ) -> tuple[bool, str]:
         """
         Valida todas as regras de negócio antes de criar um novo agendamento
+        Os dados vêm de uma única consulta (consultar_fatos_agendamento), que pode
+        ser passada pronta em `fatos` por quem já a executou
         
         Returns:
             tuple: (pode_agendar: bool, mensagem: str)
         """
-        # Validar se paciente está bloqueado
-        bloqueado, msg_bloqueio = RegraPaciente.verificar_bloqueio_por_faltas(db, paciente_id)
-        if bloqueado:
-            return False, msg_bloqueio
+        if fatos is None:
+            fatos = ValidadorAgendamento.consultar_fatos_agendamento(
+                db, paciente_id, medico_id, data_hora_inicio, data_hora_fim
+            )
         
-        # Validar limite de consultas futuras
-        pode_agendar, msg_limite = RegraConsulta.validar_limite_consultas_futuras(db, paciente_id)
-        if not pode_agendar:
-            return False, msg_limite
+        veredito = ValidadorAgendamento.avaliar_regras(fatos, data_hora_inicio)
         
-        # Validar se está no horário de trabalho do médico
-        no_horario, msg_horario = RegraConsulta.validar_horario_trabalho_medico(
-            db, medico_id, data_hora_inicio
-        )
-        if not no_horario:
-            return False, msg_horario
+        # RN3: bloquear paciente automaticamente ao atingir 3 faltas consecutivas
+        if (fatos["paciente_existe"] and not fatos["esta_bloqueado"]
+                and (fatos["faltas_consecutivas"] or 0) >= 3):
+            db.query(Paciente).filter(Paciente.id_paciente == paciente_id).update(
+                {Paciente.esta_bloqueado: True}, synchronize_session=False
+            )
+            SessoesUsuario.revogar_do_usuario(db, "paciente", paciente_id)
+            db.commit()
         
-        # Validar conflito de horário
-        sem_conflito, msg_conflito = RegraConsulta.validar_conflito_horario_medico(
-            db, medico_id, data_hora_inicio, data_hora_fim
-        )
-        if not sem_conflito:
-            return False, msg_conflito
+        for regra in ValidadorAgendamento.ORDEM_REGRAS:
+            aprovada, mensagem = veredito[regra]
+            if not aprovada:
+                return False, mensagem
         
         return True, "Agendamento válido"
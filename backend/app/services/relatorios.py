@@ -0,0 +1,438 @@
+"""
+Relatórios Administrativos - Clínica Saúde+
+Dados dos relatórios de /admin/relatorios.
+
+Os relatórios por médico, por especialidade e de cancelamentos somam o
+agregado diário (AgregadoConsultasDia); só hoje e os dias futuros são lidos
+da tabela consulta. O relatório de pacientes frequentes precisa do paciente
+e da data da última consulta, que o agregado não guarda: ele lê a tabela
+consulta com filtros de intervalo sobre data_hora_inicio (indexados).
+
+Remarcações e antecedências vêm do histórico de eventos (EventosConsulta),
+que guarda o que o estado atual da consulta não guarda.
+
+A série temporal também lê os totais diários do agregado e os distribui em
+intervalos (dia, semana ou mês) no próprio banco, devolvendo zero nos
+intervalos sem consultas.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, DateTime, and_, case, cast, desc, func, literal, literal_column, select, true, union_all
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.selectable import CTE
+
+from app.models.models import Consulta, Especialidade, Medico, Paciente
+from app.services.agregados import AgregadoConsultasDia, inicio_do_mes, proximo_mes
+from app.services.eventos import (
+    EventosConsulta, EVENTO_AGENDAMENTO, EVENTO_CANCELAMENTO, EVENTO_REAGENDAMENTO
+)
+
+
+# Granularidades aceitas pela série temporal
+GRANULARIDADES: Tuple[str, ...] = ("dia", "semana", "mes")
+
+# Dimensões de quebra da série temporal
+DIMENSOES: Tuple[str, ...] = ("status", "medico", "especialidade")
+
+# Intervalos por série: limita a resposta e a lista de intervalos literais
+# montada nos bancos sem generate_series
+MAX_INTERVALOS = 400
+
+_PASSOS_POSTGRES = {"dia": "1 day", "semana": "1 week", "mes": "1 month"}
+
+
+def inicio_do_intervalo(dia: date, granularidade: str) -> date:
+    """Primeiro dia do intervalo que contém `dia` (semanas começam na segunda)"""
+    if granularidade == "semana":
+        return dia - timedelta(days=dia.weekday())
+    if granularidade == "mes":
+        return inicio_do_mes(dia)
+    return dia
+
+
+def proximo_intervalo(inicio: date, granularidade: str) -> date:
+    """Primeiro dia do intervalo seguinte"""
+    if granularidade == "semana":
+        return inicio + timedelta(days=7)
+    if granularidade == "mes":
+        return proximo_mes(inicio)
+    return inicio + timedelta(days=1)
+
+
+def _intervalos(db: Session, inicios: List[date], granularidade: str) -> CTE:
+    """
+    Tabela de intervalos (inicio, fim exclusivo) do período
+
+    No PostgreSQL é gerada por generate_series; nos demais bancos, pela
+    união das datas já calculadas.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        passo = literal_column(f"interval '{_PASSOS_POSTGRES[granularidade]}'")
+        serie = select(
+            func.generate_series(
+                cast(literal(inicios[0]), DateTime), cast(literal(inicios[-1]), DateTime), passo,
+                type_=DateTime
+            ).label("momento")
+        ).subquery("serie")
+        return select(
+            cast(serie.c.momento, Date).label("inicio"),
+            cast(serie.c.momento + passo, Date).label("fim")
+        ).cte("intervalos")
+
+    return union_all(*[
+        select(
+            literal(inicio, Date).label("inicio"),
+            literal(proximo_intervalo(inicio, granularidade), Date).label("fim")
+        )
+        for inicio in inicios
+    ]).cte("intervalos")
+
+
+class RelatoriosAdmin:
+    """
+    Consultas dos relatórios administrativos
+    """
+
+    @staticmethod
+    def _somar_se(coluna, status: str) -> Any:
+        return func.coalesce(func.sum(case((coluna.status == status, coluna.total), else_=0)), 0)
+
+    @staticmethod
+    def _horas(minutos: Optional[float]) -> Optional[float]:
+        return round(minutos / 60, 1) if minutos is not None else None
+
+    @staticmethod
+    def consultas_por_medico(
+        db: Session,
+        medico_id: Optional[int] = None,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Quantidade de consultas por médico no período
+
+        Returns:
+            list: medico_nome, especialidade, total_consultas,
+                  consultas_realizadas e consultas_canceladas
+        """
+        fatos = AgregadoConsultasDia.fatos(db, data_inicio, data_fim, medico_id=medico_id)
+        resultados = db.execute(
+            select(
+                Medico.nome.label("medico_nome"),
+                Especialidade.nome.label("especialidade"),
+                func.sum(fatos.c.total).label("total_consultas"),
+                RelatoriosAdmin._somar_se(fatos.c, "realizada").label("consultas_realizadas"),
+                RelatoriosAdmin._somar_se(fatos.c, "cancelada").label("consultas_canceladas")
+            ).select_from(fatos).join(
+                Medico, Medico.id_medico == fatos.c.id_medico
+            ).join(
+                Especialidade, Especialidade.id_especialidade == Medico.id_especialidade_fk
+            ).group_by(
+                Medico.id_medico, Medico.nome, Especialidade.nome
+            )
+        ).all()
+
+        return [
+            {
+                "medico_nome": r.medico_nome,
+                "especialidade": r.especialidade,
+                "total_consultas": int(r.total_consultas),
+                "consultas_realizadas": int(r.consultas_realizadas),
+                "consultas_canceladas": int(r.consultas_canceladas)
+            }
+            for r in resultados
+        ]
+
+    @staticmethod
+    def consultas_por_especialidade(
+        db: Session,
+        especialidade_id: Optional[int] = None,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Quantidade de consultas e de médicos atuantes por especialidade no período
+
+        Returns:
+            list: especialidade, total_consultas e total_medicos
+        """
+        fatos = AgregadoConsultasDia.fatos(db, data_inicio, data_fim, especialidade_id=especialidade_id)
+        resultados = db.execute(
+            select(
+                Especialidade.nome.label("especialidade"),
+                func.sum(fatos.c.total).label("total_consultas"),
+                func.count(func.distinct(fatos.c.id_medico)).label("total_medicos")
+            ).select_from(fatos).join(
+                Especialidade, Especialidade.id_especialidade == fatos.c.id_especialidade
+            ).group_by(
+                Especialidade.id_especialidade, Especialidade.nome
+            )
+        ).all()
+
+        return [
+            {
+                "especialidade": r.especialidade,
+                "total_consultas": int(r.total_consultas),
+                "total_medicos": r.total_medicos
+            }
+            for r in resultados
+        ]
+
+    @staticmethod
+    def cancelamentos(
+        db: Session,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """
+        Cancelamentos, remarcações e antecedências das consultas do período
+
+        Totais de consultas e cancelamentos vêm do agregado diário (estado
+        atual); remarcações e antecedências médias, dos eventos de consulta.
+
+        Returns:
+            dict: total_consultas, total_cancelamentos, taxa_cancelamento (%),
+                  total_remarcacoes, taxa_remarcacao (%) e as antecedências
+                  médias (horas) de agendamento e de cancelamento
+        """
+        fatos = AgregadoConsultasDia.fatos(db, data_inicio, data_fim)
+        linha = db.execute(
+            select(
+                func.coalesce(func.sum(fatos.c.total), 0).label("total_consultas"),
+                RelatoriosAdmin._somar_se(fatos.c, "cancelada").label("total_cancelamentos")
+            ).select_from(fatos)
+        ).one()
+
+        total_consultas = int(linha.total_consultas)
+        total_cancelamentos = int(linha.total_cancelamentos)
+        taxa_cancelamento = (total_cancelamentos / total_consultas * 100) if total_consultas > 0 else 0
+
+        eventos = EventosConsulta.resumo(db, data_inicio, data_fim)
+        total_remarcacoes = eventos[EVENTO_REAGENDAMENTO]["total"]
+        taxa_remarcacao = (total_remarcacoes / total_consultas * 100) if total_consultas > 0 else 0
+
+        return {
+            "total_consultas": total_consultas,
+            "total_cancelamentos": total_cancelamentos,
+            "taxa_cancelamento": round(taxa_cancelamento, 2),
+            "total_remarcacoes": total_remarcacoes,
+            "taxa_remarcacao": round(taxa_remarcacao, 2),
+            "antecedencia_media_agendamento_horas": RelatoriosAdmin._horas(
+                eventos[EVENTO_AGENDAMENTO]["antecedencia_media_minutos"]
+            ),
+            "antecedencia_media_cancelamento_horas": RelatoriosAdmin._horas(
+                eventos[EVENTO_CANCELAMENTO]["antecedencia_media_minutos"]
+            )
+        }
+
+    @staticmethod
+    def pacientes_frequentes(
+        db: Session,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None,
+        limite: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Pacientes que mais consultaram no período
+
+        Returns:
+            list: paciente_nome, cpf, total_consultas e ultima_consulta (dd/mm/aaaa)
+        """
+        query = db.query(
+            Paciente.nome.label("paciente_nome"),
+            Paciente.cpf,
+            func.count(Consulta.id_consulta).label("total_consultas"),
+            func.max(Consulta.data_hora_inicio).label("ultima_consulta")
+        ).join(
+            Consulta, Consulta.id_paciente_fk == Paciente.id_paciente
+        )
+
+        if data_inicio:
+            query = query.filter(Consulta.data_hora_inicio >= datetime.combine(data_inicio, time.min))
+        if data_fim:
+            query = query.filter(
+                Consulta.data_hora_inicio < datetime.combine(data_fim + timedelta(days=1), time.min)
+            )
+
+        resultados = query.group_by(
+            Paciente.id_paciente, Paciente.nome, Paciente.cpf
+        ).order_by(
+            desc(func.count(Consulta.id_consulta))
+        ).limit(limite).all()
+
+        return [
+            {
+                "paciente_nome": r.paciente_nome,
+                "cpf": r.cpf,
+                "total_consultas": r.total_consultas,
+                "ultima_consulta": r.ultima_consulta.strftime('%d/%m/%Y') if r.ultima_consulta else 'N/A'
+            }
+            for r in resultados
+        ]
+
+    @staticmethod
+    def serie_temporal(
+        db: Session,
+        data_inicio: date,
+        data_fim: date,
+        granularidade: str = "dia",
+        dimensao: Optional[str] = None,
+        medico_id: Optional[int] = None,
+        especialidade_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Quantidade de consultas por intervalo, com quebra opcional por dimensão
+
+        O banco cruza a tabela de intervalos com as chaves da dimensão e soma
+        o agregado diário em cada par: intervalos sem consultas voltam com 0.
+
+        Args:
+            data_inicio: Primeiro dia (inclusivo)
+            data_fim: Último dia (inclusivo)
+            granularidade: 'dia', 'semana' ou 'mes'
+            dimensao: 'status', 'medico', 'especialidade' ou None (só totais)
+            medico_id: Restringe a um médico
+            especialidade_id: Restringe a uma especialidade
+
+        Returns:
+            dict: intervalos (datas de início), totais por intervalo e series
+                  (chave, rotulo e valores por intervalo de cada item da dimensão)
+
+        Raises:
+            ValueError: Período com mais de MAX_INTERVALOS intervalos
+        """
+        inicios = []
+        inicio = inicio_do_intervalo(data_inicio, granularidade)
+        while inicio <= data_fim:
+            inicios.append(inicio)
+            if len(inicios) > MAX_INTERVALOS:
+                raise ValueError(
+                    f"Período muito longo para a granularidade '{granularidade}' "
+                    f"(máximo de {MAX_INTERVALOS} intervalos)"
+                )
+            inicio = proximo_intervalo(inicio, granularidade)
+
+        intervalos = _intervalos(db, inicios, granularidade)
+        fatos = AgregadoConsultasDia.fatos(
+            db, data_inicio, data_fim, medico_id=medico_id, especialidade_id=especialidade_id
+        )
+        no_intervalo = and_(fatos.c.dia >= intervalos.c.inicio, fatos.c.dia < intervalos.c.fim)
+        total = func.coalesce(func.sum(fatos.c.total), 0)
+
+        resultado = {
+            "granularidade": granularidade,
+            "dimensao": dimensao,
+            "data_inicio": data_inicio.isoformat(),
+            "data_fim": data_fim.isoformat(),
+            "intervalos": [i.isoformat() for i in inicios],
+            "totais": [0] * len(inicios),
+            "series": []
+        }
+        posicao = {i: n for n, i in enumerate(inicios)}
+
+        def _indice(valor) -> int:
+            return posicao[valor if isinstance(valor, date) else date.fromisoformat(valor)]
+
+        if dimensao is None:
+            linhas = db.execute(
+                select(intervalos.c.inicio, total.label("total")).select_from(
+                    intervalos.outerjoin(fatos, no_intervalo)
+                ).group_by(intervalos.c.inicio)
+            )
+            for linha in linhas:
+                resultado["totais"][_indice(linha.inicio)] = int(linha.total)
+            return resultado
+
+        if dimensao == "status":
+            chaves = select(fatos.c.status.label("chave"), fatos.c.status.label("rotulo"))
+        elif dimensao == "medico":
+            chaves = select(fatos.c.id_medico.label("chave"), Medico.nome.label("rotulo")).join(
+                Medico, Medico.id_medico == fatos.c.id_medico
+            )
+        else:
+            chaves = select(fatos.c.id_especialidade.label("chave"), Especialidade.nome.label("rotulo")).join(
+                Especialidade, Especialidade.id_especialidade == fatos.c.id_especialidade
+            )
+        chaves = chaves.distinct().subquery("chaves")
+        coluna = {"status": fatos.c.status, "medico": fatos.c.id_medico,
+                  "especialidade": fatos.c.id_especialidade}[dimensao]
+
+        linhas = db.execute(
+            select(intervalos.c.inicio, chaves.c.chave, chaves.c.rotulo, total.label("total")).select_from(
+                intervalos.join(chaves, true()).outerjoin(fatos, and_(no_intervalo, coluna == chaves.c.chave))
+            ).group_by(
+                intervalos.c.inicio, chaves.c.chave, chaves.c.rotulo
+            ).order_by(chaves.c.rotulo, chaves.c.chave)
+        )
+        series: Dict[Any, Dict[str, Any]] = {}
+        for linha in linhas:
+            serie = series.setdefault(linha.chave, {
+                "chave": linha.chave, "rotulo": linha.rotulo, "valores": [0] * len(inicios)
+            })
+            indice = _indice(linha.inicio)
+            serie["valores"][indice] = int(linha.total)
+            resultado["totais"][indice] += int(linha.total)
+        resultado["series"] = list(series.values())
+        return resultado
+
+    @staticmethod
+    def gerar(db: Session, tipo: str, parametros: Dict[str, Any]) -> Any:
+        """
+        Executa um relatório a partir de parâmetros serializados
+
+        Args:
+            tipo: Chave de TIPOS_RELATORIO
+            parametros: data_inicio/data_fim em ISO e os filtros do tipo
+
+        Returns:
+            Os mesmos dados devolvidos pela rota síncrona do relatório
+        """
+        data_inicio = date.fromisoformat(parametros["data_inicio"]) if parametros.get("data_inicio") else None
+        data_fim = date.fromisoformat(parametros["data_fim"]) if parametros.get("data_fim") else None
+
+        if tipo == "consultas-por-medico":
+            return RelatoriosAdmin.consultas_por_medico(db, parametros.get("medico_id"), data_inicio, data_fim)
+        if tipo == "consultas-por-especialidade":
+            return RelatoriosAdmin.consultas_por_especialidade(
+                db, parametros.get("especialidade_id"), data_inicio, data_fim
+            )
+        if tipo == "cancelamentos":
+            return RelatoriosAdmin.cancelamentos(db, data_inicio, data_fim)
+        if tipo == "pacientes-frequentes":
+            return RelatoriosAdmin.pacientes_frequentes(db, data_inicio, data_fim, parametros.get("limite", 10))
+        raise ValueError(f"Tipo de relatório desconhecido: {tipo}")
+
+
+# Tipos de relatório e os filtros aceitos por cada um (além do período)
+TIPOS_RELATORIO: Dict[str, Tuple[str, ...]] = {
+    "consultas-por-medico": ("medico_id",),
+    "consultas-por-especialidade": ("especialidade_id",),
+    "cancelamentos": (),
+    "pacientes-frequentes": ("limite",),
+}
+
+
+def parametros_relatorio(
+    tipo: str,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    **filtros: Any
+) -> Dict[str, Any]:
+    """
+    Normaliza os parâmetros de um relatório para armazenamento (JSON)
+
+    Descarta valores vazios e filtros que o tipo não usa, de modo que
+    pedidos equivalentes produzam o mesmo dicionário.
+    """
+    parametros: Dict[str, Any] = {}
+    if data_inicio:
+        parametros["data_inicio"] = data_inicio.isoformat()
+    if data_fim:
+        parametros["data_fim"] = data_fim.isoformat()
+    for nome in TIPOS_RELATORIO[tipo]:
+        if filtros.get(nome) is not None:
+            parametros[nome] = filtros[nome]
+    if tipo == "pacientes-frequentes":
+        parametros.setdefault("limite", 10)
+    return parametros
@@ -0,0 +1,149 @@
+"""
+PDF dos Relatórios Administrativos - Clínica Saúde+
+Um modelo por tipo de relatório (título, colunas e como extrair as linhas
+dos dados); a montagem do documento fica em app.utils.pdf, fora da thread
+da requisição.
+"""
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.responses import StreamingResponse
+
+from app.utils.pdf import renderizar, transmitir
+
+
+def _texto_horas(horas: Optional[float]) -> str:
+    return f"{horas} h" if horas is not None else "N/A"
+
+
+class ModeloRelatorio:
+    """
+    Layout de um relatório tabular
+
+    Args:
+        titulo: Título do documento (pode usar {limite} etc. dos parâmetros)
+        colunas: (cabeçalho, largura em cm) de cada coluna
+        linhas: Converte os dados do relatório nas linhas da tabela
+        arquivo: Nome do arquivo PDF
+        tamanho_fonte_cabecalho: Fonte da linha de cabeçalho
+    """
+
+    def __init__(
+        self,
+        titulo: str,
+        colunas: Sequence[Tuple[str, float]],
+        linhas: Callable[[Any], List[List[str]]],
+        arquivo: str,
+        tamanho_fonte_cabecalho: int = 12
+    ):
+        self.titulo = titulo
+        self.colunas = colunas
+        self.linhas = linhas
+        self.arquivo = arquivo
+        self.tamanho_fonte_cabecalho = tamanho_fonte_cabecalho
+
+
+MODELOS: Dict[str, ModeloRelatorio] = {
+    "consultas-por-medico": ModeloRelatorio(
+        titulo="Relatório de Consultas por Médico",
+        colunas=[("Médico", 6), ("Especialidade", 4), ("Total", 2), ("Realizadas", 2), ("Canceladas", 2)],
+        linhas=lambda dados: [
+            [d["medico_nome"], d["especialidade"], str(d["total_consultas"]),
+             str(d["consultas_realizadas"]), str(d["consultas_canceladas"])]
+            for d in dados
+        ],
+        arquivo="relatorio_consultas_medico.pdf"
+    ),
+    "consultas-por-especialidade": ModeloRelatorio(
+        titulo="Relatório de Consultas por Especialidade",
+        colunas=[("Especialidade", 8), ("Total de Consultas", 4), ("Médicos Atuantes", 4)],
+        linhas=lambda dados: [
+            [d["especialidade"], str(d["total_consultas"]), str(d["total_medicos"])]
+            for d in dados
+        ],
+        arquivo="relatorio_consultas_especialidade.pdf"
+    ),
+    "cancelamentos": ModeloRelatorio(
+        titulo="Relatório de Taxa de Cancelamentos",
+        colunas=[("Métrica", 8), ("Valor", 4)],
+        linhas=lambda dados: [
+            ["Total de Consultas", str(dados["total_consultas"])],
+            ["Total de Cancelamentos", str(dados["total_cancelamentos"])],
+            ["Taxa de Cancelamento", f"{dados['taxa_cancelamento']}%"],
+            ["Total de Remarcações", str(dados["total_remarcacoes"])],
+            ["Taxa de Remarcação", f"{dados['taxa_remarcacao']}%"],
+            ["Antecedência Média do Agendamento", _texto_horas(dados["antecedencia_media_agendamento_horas"])],
+            ["Antecedência Média do Cancelamento", _texto_horas(dados["antecedencia_media_cancelamento_horas"])],
+        ],
+        arquivo="relatorio_cancelamentos.pdf"
+    ),
+    "pacientes-frequentes": ModeloRelatorio(
+        titulo="Relatório de Pacientes Mais Frequentes (Top {limite})",
+        colunas=[("Posição", 1.5), ("Paciente", 5), ("CPF", 3), ("Total de Consultas", 3), ("Última Consulta", 3)],
+        linhas=lambda dados: [
+            [str(idx), d["paciente_nome"], d["cpf"], str(d["total_consultas"]), d["ultima_consulta"]]
+            for idx, d in enumerate(dados, 1)
+        ],
+        arquivo="relatorio_pacientes_frequentes.pdf",
+        tamanho_fonte_cabecalho=10
+    ),
+}
+
+
+def texto_periodo(data_inicio: Optional[date], data_fim: Optional[date]) -> str:
+    """Descrição do período do relatório"""
+    periodo_texto = "Período: "
+    if data_inicio and data_fim:
+        periodo_texto += f"{data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}"
+    elif data_inicio:
+        periodo_texto += f"A partir de {data_inicio.strftime('%d/%m/%Y')}"
+    elif data_fim:
+        periodo_texto += f"Até {data_fim.strftime('%d/%m/%Y')}"
+    else:
+        periodo_texto += "Todos os registros"
+    return periodo_texto
+
+
+def _argumentos(tipo: str, dados: Any, parametros: Dict[str, Any]) -> Tuple:
+    """Converte os dados de um relatório nos argumentos de montar_documento"""
+    modelo = MODELOS[tipo]
+    data_inicio, data_fim = parametros.get("data_inicio"), parametros.get("data_fim")
+    return (
+        modelo.titulo.format(**parametros),
+        texto_periodo(
+            date.fromisoformat(data_inicio) if data_inicio else None,
+            date.fromisoformat(data_fim) if data_fim else None
+        ),
+        list(modelo.colunas),
+        modelo.linhas(dados),
+        modelo.tamanho_fonte_cabecalho,
+    )
+
+
+def gerar_pdf(tipo: str, dados: Any, parametros: Dict[str, Any]) -> bytes:
+    """
+    Monta o PDF de um relatório no pool de processos e aguarda o resultado
+
+    Args:
+        tipo: Chave de MODELOS
+        dados: Resultado de RelatoriosAdmin.gerar
+        parametros: Parâmetros do relatório (data_inicio, data_fim, limite...)
+
+    Returns:
+        bytes: Documento PDF
+    """
+    return renderizar(*_argumentos(tipo, dados, parametros)).result()
+
+
+def resposta_pdf(tipo: str, dados: Any, parametros: Dict[str, Any]) -> StreamingResponse:
+    """
+    Resposta que transmite o PDF do relatório
+
+    A rota retorna imediatamente: o documento é montado no pool de processos
+    e enviado em pedaços assim que fica pronto, sem prender a thread da rota.
+    """
+    return StreamingResponse(
+        transmitir(renderizar(*_argumentos(tipo, dados, parametros))),
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"inline; filename={MODELOS[tipo].arquivo}"}
+    )
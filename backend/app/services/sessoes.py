@@ -0,0 +1,170 @@
+"""
+Sessões de Login - Clínica Saúde+
+Refresh tokens opacos, guardados no servidor (sessao_usuario) e revogáveis.
+
+O login (bcrypt) cria a sessão; /auth/refresh troca o refresh token por um
+novo access token sem verificar senha. A validação passa por um cache em
+memória por processo: a revogação limpa o cache do próprio processo e, nos
+demais, vale depois de SESSAO_CACHE_TTL_SEGUNDOS.
+"""
+import hashlib
+import secrets
+import threading
+import time as relogio
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional, Tuple
+
+from sqlalchemy import exists
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.models import Paciente, SessaoUsuario
+
+# Máximo de sessões mantidas no cache (as usadas há mais tempo saem primeiro)
+SESSOES_CACHE_MAXIMO = 10000
+
+
+class SessaoAtiva(NamedTuple):
+    """Dados da sessão necessários para emitir um access token"""
+    id_sessao: int
+    tipo: str
+    id_usuario: int
+    email: str
+    expira_em: datetime
+
+
+def _hash_token(refresh_token: str) -> str:
+    return hashlib.sha256(refresh_token.encode("utf-8")).hexdigest()
+
+
+class SessoesUsuario:
+    """
+    Criação, validação e revogação das sessões de login
+    """
+
+    _cache: "OrderedDict[str, Tuple[float, SessaoAtiva]]" = OrderedDict()
+    _trava = threading.Lock()
+
+    @staticmethod
+    def invalidar_cache() -> None:
+        """Descarta todas as sessões em cache"""
+        with SessoesUsuario._trava:
+            SessoesUsuario._cache.clear()
+
+    @staticmethod
+    def criar(db: Session, tipo: str, id_usuario: int, email: str) -> str:
+        """
+        Cria e grava uma sessão para o usuário autenticado
+
+        Args:
+            tipo: 'paciente', 'medico' ou 'administrador'
+            id_usuario: ID do usuário na tabela do tipo
+            email: E-mail do usuário (sub dos access tokens)
+
+        Returns:
+            str: Refresh token (só o hash fica no banco)
+        """
+        refresh_token = secrets.token_urlsafe(32)
+        db.add(SessaoUsuario(
+            token_hash=_hash_token(refresh_token),
+            tipo_usuario=tipo,
+            id_usuario=id_usuario,
+            email=email,
+            criada_em=datetime.utcnow(),
+            expira_em=datetime.utcnow() + timedelta(hours=settings.SESSAO_EXPIRE_HORAS)
+        ))
+        db.commit()
+        return refresh_token
+
+    @staticmethod
+    def validar(db: Session, refresh_token: str) -> Optional[SessaoAtiva]:
+        """
+        Sessão ativa do refresh token, do cache ou do banco
+
+        Sessões de pacientes bloqueados não são aceitas. O bloqueio também
+        revoga as sessões (revogar_do_usuario); a verificação aqui cobre
+        bloqueios gravados sem essa revogação.
+
+        Returns:
+            SessaoAtiva: Sessão não revogada e não expirada, de usuário não bloqueado; ou None
+        """
+        chave = _hash_token(refresh_token)
+        agora = relogio.monotonic()
+
+        with SessoesUsuario._trava:
+            item = SessoesUsuario._cache.get(chave)
+            if item is not None and item[0] > agora:
+                SessoesUsuario._cache.move_to_end(chave)
+                sessao = item[1]
+            else:
+                sessao = None
+        if sessao is not None:
+            return sessao if sessao.expira_em > datetime.utcnow() else None
+
+        registro = db.query(SessaoUsuario).filter(
+            SessaoUsuario.token_hash == chave,
+            SessaoUsuario.revogada_em.is_(None),
+            SessaoUsuario.expira_em > datetime.utcnow(),
+            # Paciente bloqueado não renova o acesso, mesmo com a sessão ainda ativa
+            ~exists().where(
+                SessaoUsuario.tipo_usuario == "paciente",
+                Paciente.id_paciente == SessaoUsuario.id_usuario,
+                Paciente.esta_bloqueado.is_(True)
+            )
+        ).first()
+        if not registro:
+            return None
+
+        sessao = SessaoAtiva(
+            registro.id_sessao, registro.tipo_usuario, registro.id_usuario,
+            registro.email, registro.expira_em
+        )
+        ttl = settings.SESSAO_CACHE_TTL_SEGUNDOS
+        if ttl > 0:
+            with SessoesUsuario._trava:
+                SessoesUsuario._cache[chave] = (agora + ttl, sessao)
+                SessoesUsuario._cache.move_to_end(chave)
+                while len(SessoesUsuario._cache) > SESSOES_CACHE_MAXIMO:
+                    SessoesUsuario._cache.popitem(last=False)
+        return sessao
+
+    @staticmethod
+    def revogar(db: Session, refresh_token: str) -> bool:
+        """
+        Revoga a sessão do refresh token (logout) e grava
+
+        Returns:
+            bool: True se havia uma sessão ativa com esse token
+        """
+        chave = _hash_token(refresh_token)
+        with SessoesUsuario._trava:
+            SessoesUsuario._cache.pop(chave, None)
+
+        revogadas = db.query(SessaoUsuario).filter(
+            SessaoUsuario.token_hash == chave,
+            SessaoUsuario.revogada_em.is_(None)
+        ).update({SessaoUsuario.revogada_em: datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+        return revogadas > 0
+
+    @staticmethod
+    def revogar_do_usuario(db: Session, tipo: str, id_usuario: int) -> int:
+        """
+        Revoga todas as sessões do usuário (troca de senha, bloqueio)
+
+        Não faz commit: a revogação é gravada junto com a alteração da rota.
+
+        Returns:
+            int: Quantidade de sessões revogadas
+        """
+        with SessoesUsuario._trava:
+            for chave, (_, sessao) in list(SessoesUsuario._cache.items()):
+                if sessao.tipo == tipo and sessao.id_usuario == id_usuario:
+                    del SessoesUsuario._cache[chave]
+
+        return db.query(SessaoUsuario).filter(
+            SessaoUsuario.tipo_usuario == tipo,
+            SessaoUsuario.id_usuario == id_usuario,
+            SessaoUsuario.revogada_em.is_(None)
+        ).update({SessaoUsuario.revogada_em: datetime.utcnow()}, synchronize_session=False)
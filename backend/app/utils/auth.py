@@ -1,3 +1,6 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -5,6 +8,7 @@ import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.config import settings
+from app.utils.cache_tokens import BackendMemoria, CacheTokens
 
 security = HTTPBearer(auto_error=False)
 
@@ -12,6 +16,26 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica se a senha em texto corresponde ao hash"""
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+# Pool exclusivo para o bcrypt: picos de login esperam na fila deste pool
+# em vez de ocupar as threads que atendem as demais rotas
+_executor_senhas: Optional[ThreadPoolExecutor] = None
+_trava_executor = threading.Lock()
+
+def _obter_executor_senhas() -> ThreadPoolExecutor:
+    global _executor_senhas
+    with _trava_executor:
+        if _executor_senhas is None:
+            _executor_senhas = ThreadPoolExecutor(
+                max_workers=settings.SENHA_VERIFICACAO_THREADS, thread_name_prefix="bcrypt"
+            )
+        return _executor_senhas
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verifica a senha no pool do bcrypt, sem bloquear o event loop"""
+    return await asyncio.wrap_future(
+        _obter_executor_senhas().submit(verify_password, plain_password, hashed_password)
+    )
+
 def get_password_hash(password: str) -> str:
     """Gera o hash da senha de forma mais rápida para testes"""
     # Usar um cost factor menor para acelerar os testes
@@ -41,6 +65,9 @@ def decode_access_token(token: str) -> Optional[dict]:
     except JWTError:
         return None
 
+# Tokens já verificados (por processo; ver app.utils.cache_tokens)
+tokens_verificados = CacheTokens(BackendMemoria(settings.TOKEN_CACHE_TAMANHO))
+
 def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)) -> dict:
     """
     Dependency para obter usuário atual a partir do token JWT
@@ -57,7 +84,7 @@ def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depen
     
     token = credentials.credentials
     
-    payload = decode_access_token(token)
+    payload = tokens_verificados.decodificar(token, decode_access_token)
     if payload is None:
         raise credentials_exception
     
@@ -0,0 +1,141 @@
+"""
+Cache de Tokens Verificados
+Evita decodificar e verificar o mesmo JWT a cada requisição autenticada.
+
+A chave é o SHA-256 do token (o token em si não é guardado) e cada item
+expira no 'exp' do próprio token: depois disso o token volta a ser
+decodificado e o python-jose o rejeita. Só tokens válidos entram no cache.
+
+O armazenamento é plugável (BackendCacheTokens). O único backend incluído
+é o LRU em memória, e ele é por processo: cada worker tem o próprio cache,
+verifica cada token uma vez e ocupa até TOKEN_CACHE_TAMANHO itens. Como o
+payload verificado de um JWT não muda até o 'exp', caches separados não
+divergem; só o ganho fica dividido entre os workers. Um armazenamento
+comum (ex.: Redis) pode ser registrado com CacheTokens.definir_backend
+implementando os métodos abstratos de BackendCacheTokens.
+"""
+import abc
+import hashlib
+import threading
+import time as relogio
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+
+class BackendCacheTokens(abc.ABC):
+    """
+    Interface dos armazenamentos do cache de tokens
+    """
+
+    @abc.abstractmethod
+    def obter(self, chave: str) -> Optional[dict]:
+        """Payload da chave, ou None se ausente ou expirado"""
+
+    @abc.abstractmethod
+    def guardar(self, chave: str, payload: dict, expira_em: float) -> None:
+        """Guarda o payload até expira_em (timestamp Unix)"""
+
+    @abc.abstractmethod
+    def limpar(self) -> None:
+        """Remove todos os itens"""
+
+    @abc.abstractmethod
+    def tamanho(self) -> int:
+        """Quantidade de itens guardados"""
+
+
+class BackendMemoria(BackendCacheTokens):
+    """
+    LRU em memória do processo, limitado a `capacidade` tokens
+
+    Args:
+        capacidade: Máximo de tokens; o menos usado recentemente sai primeiro
+    """
+
+    def __init__(self, capacidade: int):
+        self.capacidade = capacidade
+        self._itens: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, chave: str) -> Optional[dict]:
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            if item[0] <= relogio.time():
+                del self._itens[chave]
+                return None
+            self._itens.move_to_end(chave)
+            return item[1]
+
+    def guardar(self, chave: str, payload: dict, expira_em: float) -> None:
+        if self.capacidade <= 0 or expira_em <= relogio.time():
+            return
+        with self._trava:
+            self._itens[chave] = (expira_em, payload)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+
+    def limpar(self) -> None:
+        with self._trava:
+            self._itens.clear()
+
+    def tamanho(self) -> int:
+        with self._trava:
+            return len(self._itens)
+
+
+class CacheTokens:
+    """
+    Cache dos payloads de JWT já verificados, com contadores de acertos e falhas
+    """
+
+    def __init__(self, backend: BackendCacheTokens):
+        self._backend = backend
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def definir_backend(self, backend: BackendCacheTokens) -> None:
+        """Troca o armazenamento (ex.: um compartilhado entre workers) e zera os contadores"""
+        with self._trava:
+            self._backend = backend
+            self.acertos = 0
+            self.falhas = 0
+
+    def decodificar(self, token: str, verificar: Callable[[str], Optional[dict]]) -> Optional[dict]:
+        """
+        Payload do token, do cache ou verificado agora
+
+        Args:
+            token: JWT recebido
+            verificar: Decodifica e verifica o token (None se inválido)
+
+        Returns:
+            dict: Payload verificado, ou None se o token for inválido
+        """
+        chave = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        payload = self._backend.obter(chave)
+        with self._trava:
+            if payload is not None:
+                self.acertos += 1
+                return payload
+            self.falhas += 1
+
+        payload = verificar(token)
+        if payload is not None and isinstance(payload.get("exp"), (int, float)):
+            self._backend.guardar(chave, payload, float(payload["exp"]))
+        return payload
+
+    def limpar(self) -> None:
+        """Esvazia o cache e zera os contadores"""
+        self._backend.limpar()
+        with self._trava:
+            self.acertos = 0
+            self.falhas = 0
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Acertos, falhas e tokens guardados"""
+        with self._trava:
+            return {"acertos": self.acertos, "falhas": self.falhas, "tamanho": self._backend.tamanho()}
@@ -0,0 +1,260 @@
+"""
+Paginação por chave (keyset) para as rotas de listagem
+
+A página seguinte é pedida com um cursor opaco devolvido no cabeçalho
+X-Proximo-Cursor; o corpo da resposta continua sendo a lista de itens.
+O cursor guarda os valores das colunas de ordenação do último item, de modo
+que a próxima página é uma busca indexada (sem OFFSET).
+
+O parâmetro opcional fields= restringe os campos retornados: só as colunas
+pedidas são lidas e os relacionamentos só são carregados se solicitados.
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, Union
+
+from fastapi import HTTPException, Response, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query, joinedload
+
+from app.models.models import Consulta, Medico, Paciente
+from app.schemas.schemas import ConsultaResponse
+
+# Cabeçalho com o cursor da próxima página (ausente na última página)
+HEADER_PROXIMO_CURSOR = "X-Proximo-Cursor"
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+
+
+def _serializar(valor: Any) -> Any:
+    if isinstance(valor, datetime):
+        return {"dt": valor.isoformat()}
+    if isinstance(valor, date):
+        return {"d": valor.isoformat()}
+    return valor
+
+
+def _desserializar(valor: Any) -> Any:
+    if isinstance(valor, dict):
+        if "dt" in valor:
+            return datetime.fromisoformat(valor["dt"])
+        if "d" in valor:
+            return date.fromisoformat(valor["d"])
+    return valor
+
+
+def codificar_cursor(valores: Sequence[Any]) -> str:
+    """Codifica os valores de ordenação do último item em um token opaco"""
+    dados = json.dumps([_serializar(v) for v in valores], separators=(",", ":"))
+    return base64.urlsafe_b64encode(dados.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(token: str, tamanho: int) -> Tuple[Any, ...]:
+    """
+    Decodifica um cursor recebido do cliente
+
+    Raises:
+        HTTPException 400: Cursor malformado ou de outra ordenação
+    """
+    try:
+        dados = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        valores = json.loads(dados)
+        if not isinstance(valores, list) or len(valores) != tamanho:
+            raise ValueError(token)
+        return tuple(_desserializar(v) for v in valores)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação inválido"
+        )
+
+
+def aplicar_keyset(
+    query: Query,
+    colunas: Sequence[Any],
+    cursor: Optional[str],
+    limite: int,
+    descendente: bool = False
+) -> Query:
+    """
+    Ordena a consulta pelas colunas e aplica o filtro do cursor
+
+    A última coluna deve ser única (normalmente a PK) para desempatar.
+    Busca limite + 1 linhas: a linha extra indica que há próxima página.
+
+    Args:
+        query: Consulta base (já filtrada)
+        colunas: Colunas de ordenação
+        cursor: Cursor recebido do cliente (None na primeira página)
+        limite: Tamanho da página
+        descendente: Ordem decrescente em todas as colunas
+
+    Returns:
+        Query: Consulta ordenada, filtrada e limitada
+    """
+    if cursor:
+        valores = decodificar_cursor(cursor, len(colunas))
+        # (a, b, c) > (x, y, z) expandido, portável entre bancos
+        condicoes = []
+        for i, coluna in enumerate(colunas):
+            anteriores = [colunas[j] == valores[j] for j in range(i)]
+            passo = coluna < valores[i] if descendente else coluna > valores[i]
+            condicoes.append(and_(*anteriores, passo))
+        query = query.filter(or_(*condicoes))
+
+    ordem = [c.desc() if descendente else c.asc() for c in colunas]
+    return query.order_by(*ordem).limit(limite + 1)
+
+
+def fechar_pagina(
+    linhas: List[Any],
+    limite: int,
+    chave: Callable[[Any], Sequence[Any]],
+    response: Optional[Response] = None
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Corta a linha extra e gera o cursor da próxima página
+
+    Args:
+        linhas: Resultado de uma consulta montada com aplicar_keyset
+        limite: Tamanho da página
+        chave: Extrai de uma linha os valores das colunas de ordenação
+        response: Se informado, recebe o cabeçalho X-Proximo-Cursor
+
+    Returns:
+        tuple: (itens da página, próximo cursor ou None)
+    """
+    if len(linhas) <= limite:
+        return linhas, None
+
+    itens = linhas[:limite]
+    proximo = codificar_cursor(chave(itens[-1]))
+    if response is not None:
+        response.headers[HEADER_PROXIMO_CURSOR] = proximo
+    return itens, proximo
+
+
+def ler_campos(campos: Optional[str], schema: Type[BaseModel]) -> Optional[List[str]]:
+    """
+    Interpreta o parâmetro fields= (lista separada por vírgulas)
+
+    Raises:
+        HTTPException 400: Campo inexistente no schema de resposta
+    """
+    if not campos:
+        return None
+
+    pedidos = list(dict.fromkeys(c.strip() for c in campos.split(",") if c.strip()))
+    invalidos = [c for c in pedidos if c not in schema.model_fields]
+    if invalidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos inválidos: {', '.join(invalidos)}. Permitidos: {', '.join(schema.model_fields)}"
+        )
+    return pedidos or None
+
+
+def paginar_listagem(
+    query: Query,
+    entidade: Any,
+    colunas: Sequence[Any],
+    response: Response,
+    schema: Type[BaseModel],
+    relacoes: Dict[str, Any],
+    limite: int = LIMITE_PADRAO,
+    cursor: Optional[str] = None,
+    campos: Optional[str] = None,
+    descendente: bool = False
+) -> Union[List[Any], JSONResponse]:
+    """
+    Pagina uma listagem por keyset, com projeção opcional de campos
+
+    Args:
+        query: Consulta já filtrada sobre a entidade (sem options)
+        entidade: Classe do modelo listado
+        colunas: Colunas de ordenação (a última deve ser única)
+        response: Resposta da rota (recebe o cabeçalho do cursor)
+        schema: Schema de resposta completo da rota
+        relacoes: {campo do schema: opção de carregamento do relacionamento}
+        limite: Tamanho da página
+        cursor: Cursor recebido do cliente
+        campos: Valor bruto do parâmetro fields=
+        descendente: Ordem decrescente
+
+    Returns:
+        Lista de entidades (sem projeção, validada pelo response_model da rota)
+        ou JSONResponse com os campos pedidos
+    """
+    pedidos = ler_campos(campos, schema)
+    chave = lambda item: [getattr(item, c.key) for c in colunas]
+
+    if pedidos is None:
+        query = query.options(*relacoes.values())
+        linhas = aplicar_keyset(query, colunas, cursor, limite, descendente).all()
+        itens, _ = fechar_pagina(linhas, limite, chave, response)
+        return itens
+
+    relacoes_pedidas = [relacoes[c] for c in pedidos if c in relacoes]
+    if relacoes_pedidas:
+        # Relacionamentos pedidos: entidades, só com os joins necessários
+        query = query.options(*relacoes_pedidas)
+    else:
+        # Apenas colunas: SELECT restrito, sem joins
+        necessarias = list(dict.fromkeys(pedidos + [c.key for c in colunas]))
+        query = query.with_entities(*[getattr(entidade, c) for c in necessarias])
+
+    linhas = aplicar_keyset(query, colunas, cursor, limite, descendente).all()
+    itens, proximo = fechar_pagina(linhas, limite, chave)
+
+    # Serializa campo a campo: atributos não pedidos nunca são acessados
+    adaptadores = {c: TypeAdapter(schema.model_fields[c].annotation) for c in pedidos}
+    corpo = [
+        {
+            c: adaptadores[c].dump_python(
+                adaptadores[c].validate_python(getattr(item, c), from_attributes=True),
+                mode="json"
+            )
+            for c in pedidos
+        }
+        for item in itens
+    ]
+
+    # Uma resposta devolvida diretamente não herda os cabeçalhos de `response`
+    cabecalhos = {HEADER_PROXIMO_CURSOR: proximo} if proximo else None
+    return JSONResponse(content=corpo, headers=cabecalhos)
+
+
+# ============ Listagens de consultas ============
+
+# Cursor das listagens de consultas: (data_hora_inicio, id_consulta)
+COLUNAS_CURSOR_CONSULTA = (Consulta.data_hora_inicio, Consulta.id_consulta)
+
+# Carregamento dos relacionamentos de ConsultaResponse
+RELACOES_CONSULTA = {
+    "medico": joinedload(Consulta.medico).joinedload(Medico.especialidade),
+    "paciente": joinedload(Consulta.paciente).joinedload(Paciente.plano_saude),
+}
+
+
+def paginar_consultas(
+    query: Query,
+    response: Response,
+    limite: int = LIMITE_PADRAO,
+    cursor: Optional[str] = None,
+    campos: Optional[str] = None,
+    descendente: bool = False
+) -> Union[List[Any], JSONResponse]:
+    """Pagina uma listagem de consultas pelo cursor (data_hora_inicio, id_consulta)"""
+    return paginar_listagem(
+        query, Consulta, COLUNAS_CURSOR_CONSULTA, response,
+        schema=ConsultaResponse,
+        relacoes=RELACOES_CONSULTA,
+        limite=limite,
+        cursor=cursor,
+        campos=campos,
+        descendente=descendente
+    )
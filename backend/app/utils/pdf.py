@@ -0,0 +1,144 @@
+"""
+Renderização de PDFs tabulares (reportlab)
+
+Todo relatório em PDF é um título, um subtítulo e uma tabela. A montagem
+roda em um pool de processos, para que o tempo de CPU do reportlab não
+dispute o GIL com as requisições do worker; com RELATORIOS_PDF_PROCESSOS=0
+roda na própria thread.
+
+Este módulo não importa nada da aplicação além das configurações: é o que
+os processos do pool carregam ao iniciar.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from io import BytesIO
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional, Sequence, Tuple
+
+from app.config import settings
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+# Linhas por bloco de tabela: tabelas enormes em um único flowable deixam a
+# quebra de página do reportlab quadrática; cada bloco repete o cabeçalho
+LINHAS_POR_BLOCO = 500
+
+# Tamanho dos pedaços enviados ao cliente
+TAMANHO_PEDACO = 64 * 1024
+
+_pool: Optional["ProcessPoolExecutor"] = None
+_trava = threading.Lock()
+
+
+def montar_documento(
+    titulo: str,
+    subtitulo: str,
+    colunas: Sequence[Tuple[str, float]],
+    linhas: List[List[str]],
+    tamanho_fonte_cabecalho: int = 12
+) -> bytes:
+    """
+    Monta um PDF A4 com título, subtítulo e tabela paginada
+
+    Args:
+        titulo: Título do documento
+        subtitulo: Linha abaixo do título (ex.: período)
+        colunas: (cabeçalho, largura em cm) de cada coluna
+        linhas: Células já formatadas como texto
+        tamanho_fonte_cabecalho: Fonte da linha de cabeçalho
+
+    Returns:
+        bytes: Documento PDF
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.lib.units import cm
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    styles = getSampleStyleSheet()
+    elements = [
+        Paragraph(f"<b>{titulo}</b>", styles['Title']),
+        Spacer(1, 0.5*cm),
+        Paragraph(subtitulo, styles['Normal']),
+        Spacer(1, 0.5*cm),
+    ]
+
+    estilo = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), tamanho_fonte_cabecalho),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    cabecalho = [nome for nome, _ in colunas]
+    larguras = [largura*cm for _, largura in colunas]
+
+    # Cada bloco repete o cabeçalho em todas as páginas que ocupar (repeatRows)
+    for inicio in range(0, max(len(linhas), 1), LINHAS_POR_BLOCO):
+        table = Table(
+            [cabecalho] + linhas[inicio:inicio + LINHAS_POR_BLOCO],
+            colWidths=larguras, repeatRows=1
+        )
+        table.setStyle(estilo)
+        elements.append(table)
+
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def _obter_pool() -> "ProcessPoolExecutor":
+    """Pool de processos criado no primeiro uso ('spawn': seguro com threads)"""
+    global _pool
+    with _trava:
+        if _pool is None:
+            # Importados aqui: multiprocessing só é carregado ao gerar o primeiro PDF
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.RELATORIOS_PDF_PROCESSOS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def renderizar(*args, **kwargs) -> "Future[bytes]":
+    """
+    Agenda montar_documento no pool de processos
+
+    Recebe os mesmos argumentos de montar_documento (todos serializáveis).
+    Sem processos configurados, monta na thread atual e devolve um Future
+    já resolvido.
+    """
+    if settings.RELATORIOS_PDF_PROCESSOS > 0:
+        return _obter_pool().submit(montar_documento, *args, **kwargs)
+
+    futuro: "Future[bytes]" = Future()
+    try:
+        futuro.set_result(montar_documento(*args, **kwargs))
+    except Exception as e:
+        futuro.set_exception(e)
+    return futuro
+
+
+def encerrar_pool() -> None:
+    """Encerra os processos do pool, se criados (fim da aplicação)"""
+    global _pool
+    with _trava:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def transmitir(futuro: "Future[bytes]") -> AsyncIterator[bytes]:
+    """Aguarda o PDF sem ocupar thread e o envia em pedaços"""
+    conteudo = await asyncio.wrap_future(futuro)
+    for inicio in range(0, len(conteudo), TAMANHO_PEDACO):
+        yield conteudo[inicio:inicio + TAMANHO_PEDACO]
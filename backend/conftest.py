@@ -7,14 +7,17 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
-from datetime import datetime, date, time
+from datetime import datetime, date, time, timedelta
 
 from app.main import app
-from app.database import Base, get_db
+from app import database
+from app.database import Base, get_db, get_db_leitura
 from app.models.models import (
     Especialidade, PlanoSaude, Administrador, Medico, 
     Paciente, HorarioTrabalho, Consulta
 )
+from app.services.estatisticas import EstatisticasAdmin
+from app.services.sessoes import SessoesUsuario
 from passlib.context import CryptContext
 
 # Engine SQLite em memória com StaticPool para reutilização entre testes
@@ -28,6 +31,10 @@ engine = create_engine(
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# A aplicação não cria o esquema ao ser importada (python -m app.migracoes);
+# o banco de APP_ENV=test, usado por scripts de verificação, recebe as tabelas aqui
+Base.metadata.create_all(bind=database.engine)
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
@@ -63,6 +70,10 @@ def client(db_session):
             pass
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_db_leitura] = override_get_db
+    # Estatísticas e sessões em cache são por processo: não podem vazar entre testes
+    EstatisticasAdmin.invalidar()
+    SessoesUsuario.invalidar_cache()
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
@@ -187,6 +198,28 @@ def horarios_trabalho_cardio(db_session, medico_cardiologista):
     return horarios
 
 
+@pytest.fixture(scope="function")
+def proxima_segunda():
+    """Próxima segunda-feira (nunca hoje)"""
+    hoje = date.today()
+    return hoje + timedelta(days=7 - hoje.weekday())
+
+
+@pytest.fixture(scope="function")
+def expediente_proxima_segunda(db_session, medico_cardiologista, proxima_segunda):
+    """Expediente do cardiologista na próxima segunda (9h-12h, dia_semana numérico)"""
+    horario = HorarioTrabalho(
+        dia_semana=proxima_segunda.weekday(),
+        hora_inicio=time(9, 0),
+        hora_fim=time(12, 0),
+        id_medico_fk=medico_cardiologista.id_medico
+    )
+    db_session.add(horario)
+    db_session.commit()
+    db_session.refresh(horario)
+    return horario
+
+
 @pytest.fixture(scope="function")
 def paciente_teste(db_session, plano_unimed):
     """Paciente de teste"""
@@ -0,0 +1,168 @@
+"""
+Testes das Rotas Assíncronas (AsyncSession sobre aiosqlite)
+Performance: ~2 segundos total
+"""
+import asyncio
+import threading
+import pytest
+from datetime import datetime, time
+from fastapi import status
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, criar_engine_async, get_async_db, get_db, get_db_leitura
+from app.main import app
+from app.routers import assincrono
+from app.services.concorrencia import agenda_medico_exclusiva, agenda_medico_exclusiva_async
+from app.utils import auth
+
+
+@pytest.mark.integration
+class TestRotasAssincronas:
+    """Suite de testes das versões async de login, disponibilidade, listagem e agendamento"""
+
+    @pytest.fixture
+    def db_session(self, tmp_path):
+        """
+        Banco SQLite em arquivo: os fixtures de dados do conftest gravam nele
+        e as rotas síncronas e assíncronas leem o mesmo arquivo
+        """
+        engine = create_engine(f"sqlite:///{tmp_path / 'clinica.db'}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        yield db
+        db.close()
+        engine.dispose()
+
+    @pytest.fixture
+    def banco(self, client, db_session, paciente_teste, medico_cardiologista, expediente_proxima_segunda):
+        """Rotas síncronas e assíncronas sobre o banco em arquivo, com o expediente da próxima segunda"""
+        engine = db_session.get_bind()
+        sessoes = sessionmaker(bind=engine)
+        engine_async = criar_engine_async(str(engine.url))
+
+        async def override_get_async_db():
+            async with AsyncSession(engine_async, autoflush=False, expire_on_commit=False) as sessao:
+                yield sessao
+
+        def override_get_db():
+            sessao = sessoes()
+            try:
+                yield sessao
+            finally:
+                sessao.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_db_leitura] = override_get_db
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        yield {"paciente_id": paciente_teste.id_paciente, "medico_id": medico_cardiologista.id_medico}
+
+        # Conexões async pertencem ao event loop do TestClient
+        client.portal.call(engine_async.dispose)
+
+    def test_login_e_refresh(self, client, banco):
+        """Login e refresh async seguem o contrato das rotas síncronas"""
+        response = client.post("/async/auth/login", json={"email": "joao@test.com", "senha": "medico123"})
+        assert response.status_code == status.HTTP_200_OK
+        dados = response.json()
+        assert (dados["user_type"], dados["user_id"]) == ("medico", banco["medico_id"])
+
+        response = client.post("/async/auth/refresh", json={"refresh_token": dados["refresh_token"]})
+        assert response.status_code == status.HTTP_200_OK
+        assert auth.decode_access_token(response.json()["access_token"])["id"] == banco["medico_id"]
+
+        response = client.post("/async/auth/login", json={"email": "joao@test.com", "senha": "errada123"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_disponibilidade_igual_a_sincrona(self, client, banco, proxima_segunda):
+        """As duas versões respondem o mesmo para os mesmos parâmetros"""
+        dia = proxima_segunda.isoformat()
+        params = {"data_inicio": dia, "data_fim": dia, "medico_ids": [banco["medico_id"]]}
+        sincrona = client.get("/pacientes/disponibilidade", params=params)
+        assincrona = client.get("/async/pacientes/disponibilidade", params=params)
+        assert assincrona.status_code == status.HTTP_200_OK
+        assert assincrona.json() == sincrona.json()
+        assert assincrona.json()["primeiro_horario"].endswith("09:00:00")
+
+        caminho = f"/pacientes/medicos/{banco['medico_id']}/horarios-disponiveis"
+        assert client.get(f"/async{caminho}", params={"data": dia}).json() == \
+            client.get(caminho, params={"data": dia}).json()
+
+        response = client.get("/async/pacientes/disponibilidade", params={"data_inicio": dia, "data_fim": dia})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_disponibilidade_fora_do_event_loop(self, client, banco, proxima_segunda, monkeypatch):
+        """Enquanto os slots são gerados, o event loop continua atendendo outras requisições"""
+        iniciado, liberado = threading.Event(), threading.Event()
+        esperas = []
+        original = assincrono.horarios_disponiveis_medico
+
+        def geracao_demorada(*args):
+            iniciado.set()
+            # Na thread do event loop, /health só seria atendida após o timeout
+            esperas.append(liberado.wait(timeout=5))
+            return original(*args)
+
+        monkeypatch.setattr(assincrono, "horarios_disponiveis_medico", geracao_demorada)
+        caminho = f"/async/pacientes/medicos/{banco['medico_id']}/horarios-disponiveis"
+        respostas = []
+        requisicao = threading.Thread(
+            target=lambda: respostas.append(client.get(caminho, params={"data": proxima_segunda.isoformat()}))
+        )
+        requisicao.start()
+        try:
+            assert iniciado.wait(timeout=5)
+            assert client.get("/health").status_code == status.HTTP_200_OK
+        finally:
+            liberado.set()
+            requisicao.join(timeout=10)
+
+        assert esperas == [True]
+        assert respostas[0].json()["horarios_disponiveis"][0] == "09:00"
+
+    def test_agendamento_e_listagem(self, client, banco, proxima_segunda):
+        """Agendamento async aplica RN4 e aparece na listagem (síncrona e async)"""
+        inicio = datetime.combine(proxima_segunda, time(10, 0))
+        corpo = {"id_medico": banco["medico_id"], "data_hora": inicio.isoformat()}
+        params = {"paciente_id": banco["paciente_id"]}
+
+        response = client.post("/async/pacientes/consultas", params=params, json=corpo)
+        assert response.status_code == status.HTTP_201_CREATED
+        consulta = response.json()
+        assert consulta["status"] == "agendada"
+        assert consulta["medico"]["id_medico"] == banco["medico_id"]
+
+        response = client.post("/async/pacientes/consultas", params=params, json=corpo)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        caminho = f"/pacientes/consultas/{banco['paciente_id']}"
+        assincrona = client.get(f"/async{caminho}")
+        assert assincrona.status_code == status.HTTP_200_OK
+        assert [c["id_consulta"] for c in assincrona.json()] == [consulta["id_consulta"]]
+        assert assincrona.json() == client.get(caminho).json()
+
+        response = client.get(f"/async{caminho}", params={"fields": "id_consulta,status"})
+        assert response.json() == [{"id_consulta": consulta["id_consulta"], "status": "agendada"}]
+
+    def test_lock_async_compartilhado_com_o_sincrono(self, db_session):
+        """Com o lock síncrono do médico ocupado, a versão async espera sem bloquear o loop"""
+        class SessaoFalsa:
+            def get_bind(self):
+                return db_session.get_bind()
+
+        eventos = []
+
+        async def cenario():
+            async def agendar():
+                async with agenda_medico_exclusiva_async(SessaoFalsa(), 1):
+                    eventos.append("async")
+
+            with agenda_medico_exclusiva(db_session, 1):
+                tarefa = asyncio.ensure_future(agendar())
+                await asyncio.sleep(0.05)
+                eventos.append("sync")
+            await asyncio.wait_for(tarefa, timeout=2)
+
+        asyncio.run(cenario())
+        assert eventos == ["sync", "async"]
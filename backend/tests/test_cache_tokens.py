@@ -0,0 +1,117 @@
+"""
+Testes do Cache de Tokens Verificados
+Performance: < 1 segundo total
+"""
+import time as relogio
+import pytest
+from datetime import timedelta
+from fastapi import status
+
+from app.utils import auth
+from app.utils.cache_tokens import BackendCacheTokens, BackendMemoria, CacheTokens
+
+
+@pytest.mark.unit
+class TestCacheTokens:
+    """Suite de testes do cache de JWT verificados"""
+
+    def _verificador(self, payload):
+        chamadas = []
+
+        def verificar(token):
+            chamadas.append(token)
+            return payload
+        return verificar, chamadas
+
+    def test_acertos_falhas_e_tokens_invalidos(self):
+        """Segundo uso do token vem do cache; token inválido nunca é guardado"""
+        cache = CacheTokens(BackendMemoria(10))
+        verificar, chamadas = self._verificador({"sub": "a@b.com", "exp": relogio.time() + 60})
+
+        assert cache.decodificar("token-a", verificar)["sub"] == "a@b.com"
+        assert cache.decodificar("token-a", verificar)["sub"] == "a@b.com"
+        assert chamadas == ["token-a"]
+
+        invalido, chamadas_invalido = self._verificador(None)
+        assert cache.decodificar("token-b", invalido) is None
+        assert cache.decodificar("token-b", invalido) is None
+        assert chamadas_invalido == ["token-b", "token-b"]
+        assert cache.estatisticas() == {"acertos": 1, "falhas": 3, "tamanho": 1}
+
+    def test_expira_no_exp_do_token(self):
+        """Item vencido sai do cache e o token volta a ser verificado"""
+        cache = CacheTokens(BackendMemoria(10))
+        verificar, chamadas = self._verificador({"sub": "a@b.com", "exp": relogio.time() - 1})
+
+        cache.decodificar("token-a", verificar)
+        cache.decodificar("token-a", verificar)
+        assert len(chamadas) == 2
+        assert cache.estatisticas()["tamanho"] == 0
+
+    def test_lru_limitado_pela_capacidade(self):
+        """O token usado há mais tempo é descartado primeiro"""
+        backend = BackendMemoria(2)
+        cache = CacheTokens(backend)
+        verificar, chamadas = self._verificador({"exp": relogio.time() + 60})
+
+        for token in ("a", "b", "a", "c"):
+            cache.decodificar(token, verificar)
+        assert backend.tamanho() == 2
+        cache.decodificar("a", verificar)
+        cache.decodificar("b", verificar)
+        assert chamadas == ["a", "b", "c", "b"]
+
+    def test_backend_plugavel(self):
+        """Qualquer BackendCacheTokens pode substituir o LRU em memória"""
+        class BackendDicionario(BackendCacheTokens):
+            def __init__(self):
+                self.itens = {}
+
+            def obter(self, chave):
+                return self.itens.get(chave)
+
+            def guardar(self, chave, payload, expira_em):
+                self.itens[chave] = payload
+
+            def limpar(self):
+                self.itens.clear()
+
+            def tamanho(self):
+                return len(self.itens)
+
+        compartilhado = BackendDicionario()
+        verificar, chamadas = self._verificador({"exp": relogio.time() + 60})
+        CacheTokens(compartilhado).decodificar("token", verificar)
+        CacheTokens(compartilhado).decodificar("token", verificar)
+        assert chamadas == ["token"]
+        assert "token" not in compartilhado.itens
+
+        class BackendIncompleto(BackendCacheTokens):
+            def obter(self, chave):
+                return None
+
+        with pytest.raises(TypeError):
+            BackendIncompleto()
+
+    def test_get_current_user_usa_o_cache(self, client, paciente_teste, monkeypatch):
+        """Requisições com o mesmo token decodificam o JWT uma única vez"""
+        auth.tokens_verificados.limpar()
+        decodificados = []
+        original = auth.decode_access_token
+        monkeypatch.setattr(
+            auth, "decode_access_token", lambda token: decodificados.append(token) or original(token)
+        )
+        token = auth.create_access_token(
+            {"sub": paciente_teste.email, "tipo": "paciente", "id": paciente_teste.id_paciente},
+            expires_delta=timedelta(minutes=5)
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+
+        for _ in range(3):
+            response = client.get("/admin/dashboard", headers=headers)
+            assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert decodificados == [token]
+        assert auth.tokens_verificados.estatisticas()["acertos"] == 2
+
+        response = client.get("/admin/dashboard", headers={"Authorization": "Bearer invalido"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
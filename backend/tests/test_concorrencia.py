@@ -0,0 +1,43 @@
+"""
+Testes de Concorrência no Agendamento (exclusividade da agenda do médico)
+Performance: < 1 segundo total
+"""
+import threading
+import pytest
+
+from app.services.concorrencia import agenda_medico_exclusiva
+
+
+@pytest.mark.unit
+class TestAgendaExclusiva:
+    """Suite de testes do lock de agenda por médico"""
+
+    def test_mesmo_medico_serializado(self, db_session):
+        """Enquanto um agendamento está em andamento, outro do mesmo médico espera"""
+        entrou = threading.Event()
+
+        def concorrente():
+            with agenda_medico_exclusiva(db_session, 1):
+                entrou.set()
+
+        with agenda_medico_exclusiva(db_session, 1):
+            thread = threading.Thread(target=concorrente)
+            thread.start()
+            assert not entrou.wait(timeout=0.2)
+
+        thread.join(timeout=2)
+        assert entrou.is_set()
+
+    def test_medicos_diferentes_nao_bloqueiam(self, db_session):
+        """Agendas de médicos diferentes são independentes"""
+        entrou = threading.Event()
+
+        def concorrente():
+            with agenda_medico_exclusiva(db_session, 2):
+                entrou.set()
+
+        with agenda_medico_exclusiva(db_session, 1):
+            thread = threading.Thread(target=concorrente)
+            thread.start()
+            assert entrou.wait(timeout=2)
+        thread.join(timeout=2)
@@ -0,0 +1,344 @@
+"""
+Testes do Motor de Disponibilidade (horários livres)
+Performance: ~1 segundo total
+"""
+import pytest
+from datetime import datetime, date, time, timedelta
+from fastapi import status
+
+from app.models.models import HorarioTrabalho, BloqueioHorario, Consulta
+from app.services import disponibilidade
+from app.services.disponibilidade import (
+    intervalos_no_periodo,
+    mesclar_intervalos,
+    subtrair_intervalos,
+    gerar_slots,
+)
+from app.services.regras_negocio import RegraHorarioDisponivel
+
+
+def _dt(hora: int, minuto: int = 0) -> datetime:
+    return datetime(2030, 1, 7, hora, minuto)  # Segunda-feira
+
+
+@pytest.mark.unit
+class TestMotorDisponibilidade:
+    """Suite de testes das operações de intervalo"""
+
+    def test_mesclar_intervalos_sobrepostos(self):
+        """Intervalos sobrepostos e adjacentes são unidos"""
+        resultado = mesclar_intervalos([
+            (_dt(10), _dt(11)), (_dt(9), _dt(10)), (_dt(10, 30), _dt(12)), (_dt(14), _dt(15))
+        ])
+        assert resultado == [(_dt(9), _dt(12)), (_dt(14), _dt(15))]
+
+    def test_subtrair_intervalos(self):
+        """Subtração deixa apenas os trechos livres"""
+        livres = subtrair_intervalos(
+            [(_dt(8), _dt(12)), (_dt(13), _dt(18))],
+            [(_dt(7), _dt(8, 30)), (_dt(10), _dt(10, 30)), (_dt(11, 30), _dt(13, 30))]
+        )
+        assert livres == [
+            (_dt(8, 30), _dt(10)),
+            (_dt(10, 30), _dt(11, 30)),
+            (_dt(13, 30), _dt(18)),
+        ]
+
+    def test_gerar_slots_respeita_grade_da_janela(self):
+        """Slots seguem a grade da janela e precisam caber no trecho livre"""
+        slots = gerar_slots(
+            [(_dt(9), _dt(11))],
+            [(_dt(9, 10), _dt(9, 40))],
+            timedelta(minutes=30)
+        )
+        assert slots == [_dt(10), _dt(10, 30)]
+
+    def test_gerar_slots_dez_minutos(self):
+        """Slots de 10 minutos em turno longo sem ocupação"""
+        slots = gerar_slots([(_dt(7), _dt(19))], [], timedelta(minutes=10))
+        assert len(slots) == 72
+        assert slots[0] == _dt(7)
+        assert slots[-1] == _dt(18, 50)
+
+
+    def test_intervalos_no_periodo(self):
+        """Só os intervalos que cruzam o período, inclusive os que atravessam as bordas"""
+        intervalos = [(_dt(7), _dt(8)), (_dt(8, 30), _dt(9, 30)), (_dt(11), _dt(12)), (_dt(12), _dt(13))]
+        assert intervalos_no_periodo(intervalos, _dt(9), _dt(12)) == intervalos[1:3]
+        assert intervalos_no_periodo(intervalos, _dt(8), _dt(8, 30)) == []
+        assert intervalos_no_periodo(intervalos, _dt(6), _dt(14)) == intervalos
+
+    def test_periodo_de_semanas_percorre_so_o_dia(
+        self, db_session, medico_cardiologista, paciente_teste, proxima_segunda, monkeypatch
+    ):
+        """Seis semanas com consultas em todos os dias úteis: cada dia subtrai só as próprias consultas"""
+        medico_id = medico_cardiologista.id_medico
+        inicio = proxima_segunda
+        fim = inicio + timedelta(weeks=6) - timedelta(days=1)
+        for dia_semana in range(5):
+            db_session.add(HorarioTrabalho(
+                dia_semana=dia_semana, hora_inicio=time(8, 0), hora_fim=time(12, 0), id_medico_fk=medico_id
+            ))
+        dia = inicio
+        while dia <= fim:
+            if dia.weekday() < 5:
+                for hora in (time(8, 0), time(10, 30)):
+                    db_session.add(Consulta(
+                        data_hora_inicio=datetime.combine(dia, hora),
+                        data_hora_fim=datetime.combine(dia, hora) + timedelta(minutes=30),
+                        status="agendada", id_paciente_fk=paciente_teste.id_paciente, id_medico_fk=medico_id
+                    ))
+            dia += timedelta(days=1)
+        db_session.commit()
+
+        percorridos = []
+        original = disponibilidade.subtrair_intervalos
+
+        def medir(base, remover):
+            percorridos.append(len(remover))
+            return original(base, remover)
+
+        monkeypatch.setattr(disponibilidade, "subtrair_intervalos", medir)
+        periodo = RegraHorarioDisponivel.calcular_disponibilidade_periodo(db_session, [medico_id], inicio, fim)
+
+        dias = periodo[medico_id]
+        assert len(dias) == 30
+        assert all(d.weekday() < 5 for d in dias)
+        assert all(
+            [s.time() for s in slots] == [
+                time(8, 30), time(9, 0), time(9, 30), time(10, 0), time(11, 0), time(11, 30)
+            ]
+            for slots in dias.values()
+        )
+        # 60 consultas no período, mas cada janela só vê as 2 do seu dia
+        assert len(percorridos) == 30
+        assert max(percorridos) == 2
+
+@pytest.mark.integration
+class TestHorariosDisponiveisEndpoint:
+    """Suite de testes do endpoint de horários disponíveis"""
+
+    def test_horarios_consideram_consultas_e_bloqueios(
+        self, client, db_session, medico_cardiologista, paciente_teste
+    ):
+        """Consultas ativas e bloqueios removem slots; canceladas não"""
+        data = date.today() + timedelta(days=7)
+        medico_id = medico_cardiologista.id_medico
+
+        db_session.add(HorarioTrabalho(
+            dia_semana=data.weekday(), hora_inicio=time(9, 0), hora_fim=time(12, 0),
+            id_medico_fk=medico_id
+        ))
+        db_session.add(BloqueioHorario(
+            data=data, hora_inicio=time(11, 0), hora_fim=time(12, 0),
+            motivo="Reunião", id_medico_fk=medico_id
+        ))
+        db_session.add_all([
+            Consulta(
+                data_hora_inicio=datetime.combine(data, time(9, 30)),
+                data_hora_fim=datetime.combine(data, time(10, 0)),
+                status="agendada", id_paciente_fk=paciente_teste.id_paciente,
+                id_medico_fk=medico_id
+            ),
+            Consulta(
+                data_hora_inicio=datetime.combine(data, time(10, 0)),
+                data_hora_fim=datetime.combine(data, time(10, 30)),
+                status="cancelada", id_paciente_fk=paciente_teste.id_paciente,
+                id_medico_fk=medico_id
+            ),
+        ])
+        db_session.commit()
+
+        response = client.get(
+            f"/pacientes/medicos/{medico_id}/horarios-disponiveis",
+            params={"data": data.isoformat()}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["horarios_disponiveis"] == ["09:00", "10:00", "10:30"]
+
+    def test_busca_disponibilidade_por_especialidade(
+        self, client, db_session, medico_cardiologista, medico_ortopedista, paciente_teste
+    ):
+        """Busca em período retorna slots por dia e o primeiro horário livre"""
+        inicio = date.today() + timedelta(days=1)
+        fim = inicio + timedelta(days=6)
+        medico_id = medico_cardiologista.id_medico
+
+        # Atende em um único dia da semana, das 8h às 9h
+        alvo = inicio + timedelta(days=2)
+        db_session.add(HorarioTrabalho(
+            dia_semana=alvo.weekday(), hora_inicio=time(8, 0), hora_fim=time(9, 0),
+            id_medico_fk=medico_id
+        ))
+        db_session.add(HorarioTrabalho(
+            dia_semana=alvo.weekday(), hora_inicio=time(8, 0), hora_fim=time(9, 0),
+            id_medico_fk=medico_ortopedista.id_medico
+        ))
+        db_session.add(Consulta(
+            data_hora_inicio=datetime.combine(alvo, time(8, 0)),
+            data_hora_fim=datetime.combine(alvo, time(8, 30)),
+            status="confirmada", id_paciente_fk=paciente_teste.id_paciente,
+            id_medico_fk=medico_id
+        ))
+        db_session.commit()
+
+        response = client.get(
+            "/pacientes/disponibilidade",
+            params={
+                "especialidade_id": medico_cardiologista.id_especialidade_fk,
+                "data_inicio": inicio.isoformat(),
+                "data_fim": fim.isoformat(),
+            }
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [m["id_medico"] for m in data["medicos"]] == [medico_id]
+        assert data["medicos"][0]["dias"] == [
+            {"data": alvo.isoformat(), "horarios_disponiveis": ["08:30"]}
+        ]
+        assert data["id_medico_primeiro_horario"] == medico_id
+        assert data["primeiro_horario"].startswith(f"{alvo.isoformat()}T08:30")
+
+    def test_busca_disponibilidade_exige_filtro(self, client):
+        """Sem especialidade nem médicos a busca é rejeitada"""
+        hoje = date.today().isoformat()
+        response = client.get(
+            "/pacientes/disponibilidade",
+            params={"data_inicio": hoje, "data_fim": hoje}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.integration
+class TestCalendarioSlots:
+    """Suite de testes do calendário de slots materializado"""
+
+    def test_calendario_acompanha_agendamento_e_cancelamento(
+        self, client, db_session, medico_cardiologista, paciente_teste
+    ):
+        """Agendar ocupa o slot materializado; cancelar o libera"""
+        from app.models.models import AgendaDia
+
+        data = date.today() + timedelta(days=7)
+        medico_id = medico_cardiologista.id_medico
+        db_session.add(HorarioTrabalho(
+            dia_semana=data.weekday(), hora_inicio=time(14, 0), hora_fim=time(15, 0),
+            id_medico_fk=medico_id
+        ))
+        db_session.commit()
+
+        url = f"/pacientes/medicos/{medico_id}/horarios-disponiveis"
+        params = {"data": data.isoformat()}
+
+        assert client.get(url, params=params).json()["horarios_disponiveis"] == ["14:00", "14:30"]
+        assert db_session.query(AgendaDia).filter(
+            AgendaDia.id_medico_fk == medico_id, AgendaDia.data == data
+        ).count() == 1
+
+        response = client.post(
+            "/pacientes/consultas",
+            params={"paciente_id": paciente_teste.id_paciente},
+            json={"id_medico": medico_id, "data_hora": f"{data.isoformat()}T14:30:00"}
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert client.get(url, params=params).json()["horarios_disponiveis"] == ["14:00"]
+
+        response = client.request(
+            "DELETE",
+            f"/pacientes/consultas/{response.json()['id_consulta']}",
+            params={"paciente_id": paciente_teste.id_paciente},
+            json={}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert client.get(url, params=params).json()["horarios_disponiveis"] == ["14:00", "14:30"]
+
+    def test_rotas_legadas_de_consultas_mantem_calendario_e_eventos(
+        self, client, db_session, medico_cardiologista, paciente_teste, auth_headers_paciente
+    ):
+        """/consultas/agendar, reagendar e cancelar seguem o mesmo fluxo das rotas de pacientes"""
+        from app.models.models import ConsultaEvento
+
+        data = date.today() + timedelta(days=7)
+        medico_id = medico_cardiologista.id_medico
+        db_session.add(HorarioTrabalho(
+            dia_semana=data.weekday(), hora_inicio=time(14, 0), hora_fim=time(15, 0),
+            id_medico_fk=medico_id
+        ))
+        db_session.commit()
+
+        url = f"/pacientes/medicos/{medico_id}/horarios-disponiveis"
+        params = {"data": data.isoformat()}
+        assert client.get(url, params=params).json()["horarios_disponiveis"] == ["14:00", "14:30"]
+
+        response = client.post(
+            "/consultas/agendar", headers=auth_headers_paciente,
+            json={"id_medico": medico_id, "data_hora": f"{data.isoformat()}T14:30:00"}
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        consulta_id = response.json()["id_consulta"]
+        assert client.get(url, params=params).json()["horarios_disponiveis"] == ["14:00"]
+
+        response = client.put(
+            f"/consultas/{consulta_id}/reagendar", headers=auth_headers_paciente,
+            json={"nova_data_hora": f"{data.isoformat()}T14:00:00"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert client.get(url, params=params).json()["horarios_disponiveis"] == ["14:30"]
+
+        response = client.put(f"/consultas/{consulta_id}/cancelar", headers=auth_headers_paciente)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["status"] == "cancelada"
+        assert client.get(url, params=params).json()["horarios_disponiveis"] == ["14:00", "14:30"]
+
+        eventos = db_session.query(ConsultaEvento.tipo).filter(
+            ConsultaEvento.id_consulta_fk == consulta_id
+        ).order_by(ConsultaEvento.id_evento).all()
+        assert [tipo for (tipo,) in eventos] == ["agendamento", "reagendamento", "cancelamento"]
+
+    def test_calendario_invalidado_ao_alterar_horarios(
+        self, client, db_session, medico_cardiologista
+    ):
+        """Cadastrar horário de trabalho descarta o calendário gerado"""
+        data = date.today() + timedelta(days=7)
+        medico_id = medico_cardiologista.id_medico
+        url = f"/pacientes/medicos/{medico_id}/horarios-disponiveis"
+        params = {"data": data.isoformat()}
+
+        assert client.get(url, params=params).json()["horarios_disponiveis"] == []
+
+        response = client.post(
+            "/medicos/horarios",
+            params={"medico_id": medico_id},
+            json={"horarios": [{"dia_semana": data.weekday(), "hora_inicio": "08:00", "hora_fim": "08:30"}]}
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert client.get(url, params=params).json()["horarios_disponiveis"] == ["08:00"]
+
+    def test_geracao_preserva_transacao_do_chamador(
+        self, db_session, medico_cardiologista, monkeypatch
+    ):
+        """Gerar dias (ou perder a corrida) não confirma nem desfaz o que a sessão de leitura tem pendente"""
+        from sqlalchemy.exc import IntegrityError
+        from app.models.models import AgendaDia, Especialidade
+        from app.services.calendario import CalendarioSlots
+
+        data = date.today() + timedelta(days=7)
+        medico_id = medico_cardiologista.id_medico
+        pendente = Especialidade(nome="Dermatologia")
+        db_session.add(pendente)
+
+        CalendarioSlots.garantir_dias(db_session, [medico_id], data, data)
+        assert pendente in db_session.new
+        assert db_session.query(AgendaDia).filter(AgendaDia.data == data).count() == 1
+
+        def perder_corrida(*args):
+            raise IntegrityError("INSERT", {}, Exception("agenda_dia_pkey"))
+
+        monkeypatch.setattr(CalendarioSlots, "_materializar", perder_corrida)
+        seguinte = data + timedelta(days=1)
+        CalendarioSlots.garantir_dias(db_session, [medico_id], seguinte, seguinte)
+        assert pendente in db_session.new
+        assert db_session.query(AgendaDia).filter(AgendaDia.data == data).count() == 1
+        assert db_session.query(AgendaDia).filter(AgendaDia.data == seguinte).count() == 0
@@ -3,8 +3,11 @@ Testes de Endpoints Admin
 Performance: ~2-3 segundos total
 """
 import pytest
+from datetime import date, datetime, timedelta
 from fastapi import status
 
+from app.models.models import Paciente, Consulta, AgregadoMes
+
 
 @pytest.mark.integration
 class TestAdminEndpoints:
@@ -20,6 +23,121 @@ class TestAdminEndpoints:
         assert len(data) >= 1
         assert data[0]["nome"] == "Carlos Teste"
     
+    def test_listar_pacientes_paginado(
+        self, client, auth_headers_admin, db_session, paciente_teste, medico_cardiologista
+    ):
+        """Teste: Páginas por cursor, busca e estatísticas agregadas"""
+        for i in range(4):
+            db_session.add(Paciente(
+                nome=f"Paciente Pagina {i}", cpf=f"1000000000{i}", email=f"pagina{i}@test.com",
+                senha_hash="x", data_nascimento=date(1990, 1, 1)
+            ))
+        inicio = datetime.now() - timedelta(days=3)
+        for situacao in ("realizada", "realizada", "agendada", "cancelada"):
+            db_session.add(Consulta(
+                data_hora_inicio=inicio, data_hora_fim=inicio + timedelta(minutes=30),
+                status=situacao, id_paciente_fk=paciente_teste.id_paciente,
+                id_medico_fk=medico_cardiologista.id_medico
+            ))
+            inicio += timedelta(hours=1)
+        db_session.commit()
+        
+        nomes = []
+        cursor = None
+        while True:
+            params = {"limite": 2, "ordenar_por": "nome"}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/admin/pacientes", headers=auth_headers_admin, params=params)
+            assert response.status_code == status.HTTP_200_OK
+            assert len(response.json()) <= 2
+            nomes += [p["nome"] for p in response.json()]
+            cursor = response.headers.get("X-Proximo-Cursor")
+            if not cursor:
+                break
+        
+        assert nomes == sorted(nomes)
+        assert len(nomes) == 5
+        
+        response = client.get(
+            "/admin/pacientes", headers=auth_headers_admin, params={"busca": "999.888"}
+        )
+        data = response.json()
+        assert [p["id_paciente"] for p in data] == [paciente_teste.id_paciente]
+        assert data[0]["total_consultas"] == 2
+        assert data[0]["consultas_agendadas"] == 1
+        assert data[0]["plano_saude"]["nome"] == "Unimed"
+    
+    def test_listar_pacientes_cursor_invalido(self, client, auth_headers_admin):
+        """Teste: Cursor malformado é rejeitado"""
+        response = client.get(
+            "/admin/pacientes", headers=auth_headers_admin, params={"cursor": "invalido"}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_dashboard_contagens(
+        self, client, auth_headers_admin, db_session, paciente_teste, medico_cardiologista
+    ):
+        """Teste: Dashboard agrega contagens por período e status"""
+        agora = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        for inicio, situacao in [
+            (agora, "agendada"),
+            (agora - timedelta(days=400), "realizada"),
+            (agora + timedelta(days=400), "cancelada"),
+        ]:
+            db_session.add(Consulta(
+                data_hora_inicio=inicio, data_hora_fim=inicio + timedelta(minutes=30),
+                status=situacao, id_paciente_fk=paciente_teste.id_paciente,
+                id_medico_fk=medico_cardiologista.id_medico
+            ))
+        db_session.commit()
+        
+        response = client.get("/admin/dashboard", headers=auth_headers_admin)
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["total_pacientes"] == 1
+        assert data["total_medicos"] == 1
+        assert data["total_consultas"] == 3
+        assert data["consultas_hoje"] == 1
+        assert data["consultas_semana"] == 1
+        assert data["consultas_mes"] == 1
+        assert data["consultas_agendadas"] == 1
+        assert data["consultas_realizadas"] == 1
+        assert data["consultas_canceladas"] == 1
+    
+    def test_dashboard_cache_invalidado_por_status(
+        self, client, auth_headers_admin, db_session, paciente_teste, medico_cardiologista
+    ):
+        """Teste: Dashboard vem do cache até uma mudança de status invalidá-lo"""
+        inicio = datetime.now() - timedelta(days=1)
+        consulta = Consulta(
+            data_hora_inicio=inicio, data_hora_fim=inicio + timedelta(minutes=30),
+            status="agendada", id_paciente_fk=paciente_teste.id_paciente,
+            id_medico_fk=medico_cardiologista.id_medico
+        )
+        db_session.add(consulta)
+        db_session.commit()
+        
+        assert client.get("/admin/dashboard", headers=auth_headers_admin).json()["consultas_realizadas"] == 0
+        
+        # Alteração direta no banco não invalida: o valor em cache é mantido
+        consulta.status = "realizada"
+        db_session.commit()
+        assert client.get("/admin/dashboard", headers=auth_headers_admin).json()["consultas_realizadas"] == 0
+        
+        consulta.status = "agendada"
+        db_session.commit()
+        response = client.put(
+            f"/medicos/consultas/{consulta.id_consulta}/status",
+            params={"medico_id": medico_cardiologista.id_medico, "novo_status": "realizada"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        
+        geral = client.get("/admin/relatorios/estatisticas-gerais", headers=auth_headers_admin).json()
+        assert geral["realizadas"] == 1
+        assert geral["especialidades_top"] == [{"nome": "Cardiologia", "total": 1}]
+    
     def test_buscar_paciente_por_id(self, client, auth_headers_admin, paciente_teste):
         """Teste: Buscar paciente por ID"""
         response = client.get(
@@ -108,6 +226,56 @@ class TestAdminEndpoints:
         data = response.json()
         assert data["nome"] == "Neurologia"
     
+    def test_estatisticas_planos_por_periodo(
+        self, client, auth_headers_admin, db_session, paciente_teste, paciente_sem_plano,
+        plano_sulamerica, medico_cardiologista
+    ):
+        """Teste: Estatísticas por plano no mês atual e em períodos com meses fechados"""
+        mes_atual = date.today().replace(day=1)
+        mes_passado = (mes_atual - timedelta(days=1)).replace(day=1)
+        for paciente, dia in [
+            (paciente_teste, mes_atual),
+            (paciente_teste, mes_passado),
+            (paciente_teste, mes_passado + timedelta(days=5)),
+            (paciente_sem_plano, mes_passado),
+        ]:
+            inicio = datetime.combine(dia, datetime.min.time()).replace(hour=9)
+            db_session.add(Consulta(
+                data_hora_inicio=inicio, data_hora_fim=inicio + timedelta(minutes=30),
+                status="realizada", id_paciente_fk=paciente.id_paciente,
+                id_medico_fk=medico_cardiologista.id_medico
+            ))
+        db_session.commit()
+        url = "/admin/planos-saude/estatisticas"
+        
+        response = client.get(url, headers=auth_headers_admin)
+        assert response.status_code == status.HTTP_200_OK
+        por_nome = {p["nome"]: p for p in response.json()}
+        assert por_nome["Unimed"]["qtd_pacientes"] == 1
+        assert por_nome["Unimed"]["percentual_pacientes"] == 50.0
+        assert por_nome["Unimed"]["consultas_mes"] == 1
+        assert por_nome["SulAmérica"]["consultas_mes"] == 0
+        
+        periodo = {"mes_inicio": mes_passado.strftime("%Y-%m"), "mes_fim": mes_atual.strftime("%Y-%m")}
+        response = client.get(url, headers=auth_headers_admin, params=periodo)
+        por_nome = {p["nome"]: p for p in response.json()}
+        assert por_nome["Unimed"]["consultas_mes"] == 3
+        
+        # O mês fechado foi consolidado e não é recontado a partir de consulta
+        assert db_session.query(AgregadoMes).filter(AgregadoMes.mes == mes_passado).count() == 1
+        db_session.query(Consulta).filter(Consulta.data_hora_inicio < mes_atual).delete()
+        db_session.commit()
+        response = client.get(url, headers=auth_headers_admin, params={"mes_inicio": periodo["mes_inicio"]})
+        assert {p["nome"]: p for p in response.json()}["Unimed"]["consultas_mes"] == 2
+    
+    def test_estatisticas_planos_periodo_invalido(self, client, auth_headers_admin):
+        """Teste: Período invertido ou mês malformado é rejeitado"""
+        url = "/admin/planos-saude/estatisticas"
+        response = client.get(url, headers=auth_headers_admin, params={"mes_inicio": "2026-05", "mes_fim": "2026-04"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = client.get(url, headers=auth_headers_admin, params={"mes_inicio": "2026-13"})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    
     def test_admin_nao_autenticado(self, client):
         """Teste: Acesso negado sem autenticação"""
         response = client.get("/admin/pacientes")
@@ -0,0 +1,128 @@
+"""
+Testes da Exportação em Massa (CSV e NDJSON)
+Performance: ~1 segundo total
+"""
+import csv
+import json
+import pytest
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+from fastapi import status
+
+from app.models.models import Consulta
+from app.services import exportacao
+from app.services.exportacao import COLUNAS_CONSULTA, ExportacaoDados
+
+
+@pytest.fixture
+def consultas_exportacao(
+    db_session, paciente_teste, paciente_sem_plano, medico_cardiologista, medico_ortopedista
+):
+    """Cinco consultas em dias distintos, para dois médicos e dois pacientes"""
+    hoje = date.today()
+    dados = [
+        (-20, "realizada", paciente_teste, medico_cardiologista),
+        (-10, "cancelada", paciente_sem_plano, medico_cardiologista),
+        (-5, "realizada", paciente_teste, medico_ortopedista),
+        (0, "agendada", paciente_teste, medico_cardiologista),
+        (3, "agendada", paciente_sem_plano, medico_ortopedista),
+    ]
+    consultas = []
+    for dias, situacao, paciente, medico in dados:
+        inicio = datetime.combine(hoje + timedelta(days=dias), time(10, 0))
+        consultas.append(Consulta(
+            data_hora_inicio=inicio, data_hora_fim=inicio + timedelta(minutes=30),
+            status=situacao, id_paciente_fk=paciente.id_paciente,
+            id_medico_fk=medico.id_medico
+        ))
+    db_session.add_all(consultas)
+    db_session.commit()
+    return consultas
+
+
+@pytest.mark.integration
+class TestExportacao:
+    """Suite de testes da exportação de consultas e relatórios"""
+
+    def test_csv_de_consultas_com_relacionamentos(
+        self, client, auth_headers_admin, consultas_exportacao
+    ):
+        """CSV traz cabeçalho, uma linha por consulta (ordem cronológica) e o plano do paciente"""
+        response = client.get("/admin/exportacoes/consultas", headers=auth_headers_admin)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "consultas.csv" in response.headers["content-disposition"]
+
+        linhas = list(csv.DictReader(StringIO(response.text)))
+        assert len(linhas) == 5
+        assert list(linhas[0].keys()) == list(COLUNAS_CONSULTA)
+        assert [int(l["id_consulta"]) for l in linhas] == [c.id_consulta for c in consultas_exportacao]
+        assert linhas[0]["medico_nome"] == "Dr. João Silva"
+        assert linhas[0]["especialidade"] == "Cardiologia"
+        assert linhas[0]["plano_saude"] == "Unimed"
+        assert linhas[1]["plano_saude"] == ""
+
+    def test_ndjson_com_filtros(
+        self, client, auth_headers_admin, medico_cardiologista, consultas_exportacao
+    ):
+        """Período, médico e status filtram a exportação NDJSON"""
+        hoje = date.today()
+        response = client.get(
+            "/admin/exportacoes/consultas",
+            params={
+                "formato": "ndjson",
+                "medico_id": medico_cardiologista.id_medico,
+                "data_inicio": (hoje - timedelta(days=10)).isoformat(),
+                "data_fim": hoje.isoformat(),
+            },
+            headers=auth_headers_admin
+        )
+        assert response.status_code == status.HTTP_200_OK
+        registros = [json.loads(l) for l in response.text.splitlines()]
+        assert [r["status"] for r in registros] == ["cancelada", "agendada"]
+        assert registros[0]["data_hora_inicio"].startswith((hoje - timedelta(days=10)).isoformat())
+
+        response = client.get(
+            "/admin/exportacoes/consultas",
+            params={"formato": "ndjson", "status": "realizada"}, headers=auth_headers_admin
+        )
+        assert len(response.text.splitlines()) == 2
+
+    def test_consultas_lidas_em_lotes(self, db_session, monkeypatch, consultas_exportacao):
+        """O cursor entrega lotes de TAMANHO_LOTE linhas"""
+        monkeypatch.setattr(exportacao, "TAMANHO_LOTE", 2)
+        lotes = list(ExportacaoDados.consultas(db_session))
+        assert [len(lote) for lote in lotes] == [2, 2, 1]
+
+    def test_exportacao_de_relatorio(self, client, auth_headers_admin, consultas_exportacao):
+        """Relatórios exportam as mesmas colunas da rota; tipo desconhecido é 404"""
+        response = client.get(
+            "/admin/exportacoes/relatorios/cancelamentos", headers=auth_headers_admin
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.text.splitlines() == [
+            "total_consultas,total_cancelamentos,taxa_cancelamento,total_remarcacoes,taxa_remarcacao,"
+            "antecedencia_media_agendamento_horas,antecedencia_media_cancelamento_horas",
+            "5,1,20.0,0,0.0,,"
+        ]
+
+        response = client.get(
+            "/admin/exportacoes/relatorios/consultas-por-medico",
+            params={"formato": "ndjson"}, headers=auth_headers_admin
+        )
+        totais = {r["medico_nome"]: r["total_consultas"] for r in map(json.loads, response.text.splitlines())}
+        assert totais == {"Dr. João Silva": 3, "Dra. Maria Santos": 2}
+
+        response = client.get("/admin/exportacoes/relatorios/inexistente", headers=auth_headers_admin)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_periodo_invertido_e_acesso(self, client, auth_headers_admin, auth_headers_paciente):
+        """Período invertido é 400; apenas administradores exportam"""
+        response = client.get(
+            "/admin/exportacoes/consultas",
+            params={"data_inicio": "2030-02-01", "data_fim": "2030-01-01"}, headers=auth_headers_admin
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = client.get("/admin/exportacoes/consultas", headers=auth_headers_paciente)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
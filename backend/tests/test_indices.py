@@ -0,0 +1,104 @@
+"""
+Testes de Regressão de Plano de Consulta (índices da tabela consulta)
+Executa EXPLAIN QUERY PLAN (SQLite) sobre o SQL real emitido pelas rotinas
+mais frequentes e garante que nenhuma delas varre a tabela consulta.
+Performance: < 1 segundo total
+"""
+import pytest
+from datetime import datetime, date, time, timedelta
+from fastapi import Response
+from sqlalchemy import event
+
+from app.models.models import Consulta, HorarioTrabalho
+from app.services.regras_negocio import ValidadorAgendamento, RegraHorarioDisponivel
+from app.utils.paginacao import paginar_consultas
+
+
+def _planos(db_session, db_engine, acao):
+    """Executa `acao` e devolve o plano de cada SELECT emitido"""
+    capturadas = []
+
+    def ouvinte(conn, cursor, instrucao, parametros, contexto, varios):
+        capturadas.append((instrucao, parametros))
+
+    event.listen(db_engine, "before_cursor_execute", ouvinte)
+    try:
+        acao()
+    finally:
+        event.remove(db_engine, "before_cursor_execute", ouvinte)
+
+    conexao = db_session.connection()
+    planos = []
+    for instrucao, parametros in capturadas:
+        if not instrucao.lstrip().upper().startswith("SELECT"):
+            continue
+        linhas = conexao.exec_driver_sql("EXPLAIN QUERY PLAN " + instrucao, parametros).fetchall()
+        planos.append(" | ".join(linha[3] for linha in linhas))
+    assert planos, "nenhuma instrução foi capturada"
+    return planos
+
+
+@pytest.mark.performance
+class TestPlanoConsultas:
+    """Suite de testes dos índices usados pelas consultas críticas"""
+
+    @pytest.fixture(autouse=True)
+    def _dados(self, db_session, paciente_teste, medico_cardiologista):
+        self.paciente_id = paciente_teste.id_paciente
+        self.medico_id = medico_cardiologista.id_medico
+        self.dia = date.today() + timedelta(days=7)
+        db_session.add(HorarioTrabalho(
+            dia_semana=self.dia.weekday(), hora_inicio=time(8, 0), hora_fim=time(18, 0),
+            id_medico_fk=self.medico_id
+        ))
+        base = datetime.combine(self.dia, time(8, 0))
+        for i in range(40):
+            inicio = base + timedelta(days=i - 20, minutes=30 * (i % 10))
+            db_session.add(Consulta(
+                data_hora_inicio=inicio, data_hora_fim=inicio + timedelta(minutes=30),
+                status=("agendada", "realizada", "cancelada", "faltou")[i % 4],
+                id_paciente_fk=self.paciente_id, id_medico_fk=self.medico_id
+            ))
+        db_session.commit()
+
+    def _sem_varredura(self, planos):
+        for plano in planos:
+            assert "SCAN consulta" not in plano, plano
+
+    def test_validacao_agendamento_usa_indices_parciais(self, db_session, db_engine):
+        """Conflito (RN4) e limite (RN2) usam os índices de consultas ativas"""
+        inicio = datetime.combine(self.dia, time(10, 0))
+        planos = _planos(db_session, db_engine, lambda: ValidadorAgendamento.consultar_fatos_agendamento(
+            db_session, self.paciente_id, self.medico_id, inicio, inicio + timedelta(minutes=30)
+        ))
+
+        self._sem_varredura(planos)
+        assert "SCAN horario_trabalho" not in planos[0]
+        assert "USING INDEX ix_consulta_medico_inicio" in planos[0]
+        assert "ix_consulta_paciente_inicio_ativa" in planos[0]
+
+    def test_disponibilidade_usa_indice_parcial_do_medico(self, db_session, db_engine):
+        """Busca de horários livres lê apenas consultas ativas do médico no período"""
+        planos = _planos(db_session, db_engine, lambda: RegraHorarioDisponivel.calcular_disponibilidade_periodo(
+            db_session, [self.medico_id], self.dia, self.dia + timedelta(days=6)
+        ))
+
+        self._sem_varredura(planos)
+        assert any("ix_consulta_medico_inicio_ativa" in plano for plano in planos)
+        assert any("ix_bloqueio_horario_medico_data" in plano for plano in planos)
+
+    def test_listagens_paginadas_usam_indices_compostos(self, db_session, db_engine):
+        """Histórico do paciente e agenda do médico usam (fk, data_hora_inicio)"""
+        planos = _planos(db_session, db_engine, lambda: paginar_consultas(
+            db_session.query(Consulta).filter(Consulta.id_paciente_fk == self.paciente_id),
+            Response(), limite=10, campos="id_consulta,status", descendente=True
+        ))
+        self._sem_varredura(planos)
+        assert "ix_consulta_paciente_inicio" in planos[0]
+
+        planos = _planos(db_session, db_engine, lambda: paginar_consultas(
+            db_session.query(Consulta).filter(Consulta.id_medico_fk == self.medico_id),
+            Response(), limite=10, campos="id_consulta,status"
+        ))
+        self._sem_varredura(planos)
+        assert "ix_consulta_medico_inicio" in planos[0]
@@ -0,0 +1,195 @@
+"""
+Testes da Inicialização da Aplicação (importação, lifespan e migrações)
+Performance: ~5 segundos total (processos Python novos para medir a importação a frio)
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc, inspect, text
+
+from app import database
+from app.main import app
+from app.migracoes import migrar
+
+DIRETORIO_BACKEND = Path(__file__).resolve().parents[1]
+
+# Tempo máximo de `import app.main` em um processo novo (segundos)
+ORCAMENTO_IMPORTACAO_SEGUNDOS = 5.0
+
+SCRIPT_IMPORTACAO = """
+import json, sys, time
+inicio = time.perf_counter()
+import app.main
+duracao = time.perf_counter() - inicio
+from app.database import engine
+print(json.dumps({
+    "segundos": duracao,
+    "conexoes": engine.pool.checkedin() + engine.pool.checkedout(),
+    "modulos": [m for m in ("reportlab", "multiprocessing", "app.routers.populate") if m in sys.modules]
+}))
+"""
+
+
+def _importar_a_frio(tmp_path, **ambiente) -> dict:
+    variaveis = {
+        **os.environ,
+        "APP_ENV": "test",
+        # Banco inacessível: a importação não pode depender dele
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'nao' / 'existe.db'}",
+        **ambiente
+    }
+    resultado = subprocess.run(
+        [sys.executable, "-c", SCRIPT_IMPORTACAO], cwd=DIRETORIO_BACKEND, env=variaveis,
+        capture_output=True, text=True, timeout=60
+    )
+    assert resultado.returncode == 0, resultado.stderr
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+
+def _historico() -> ScriptDirectory:
+    config = Config(str(DIRETORIO_BACKEND / "alembic.ini"))
+    config.set_main_option("script_location", str(DIRETORIO_BACKEND / "alembic"))
+    return ScriptDirectory.from_config(config)
+
+
+def _revisao(alvo) -> str:
+    with alvo.connect() as conexao:
+        return conexao.execute(text("SELECT version_num FROM alembic_version")).scalar_one()
+
+
+@pytest.mark.performance
+class TestImportacao:
+    """Suite de testes da importação a frio de app.main"""
+
+    def test_importacao_sem_banco_e_sem_modulos_pesados(self, tmp_path):
+        """Importar a aplicação não conecta ao banco nem carrega reportlab/multiprocessing"""
+        medicao = _importar_a_frio(tmp_path)
+        assert medicao["conexoes"] == 0
+        assert medicao["modulos"] == ["app.routers.populate"]
+
+        assert _importar_a_frio(tmp_path, ROTAS_POPULATE="false")["modulos"] == []
+
+    def test_orcamento_de_importacao(self, tmp_path):
+        """Importação a frio dentro do orçamento"""
+        medicao = _importar_a_frio(tmp_path, ROTAS_POPULATE="false")
+        print(f"\n📊 import app.main: {medicao['segundos'] * 1000:.0f} ms")
+        assert medicao["segundos"] < ORCAMENTO_IMPORTACAO_SEGUNDOS
+
+
+@pytest.mark.unit
+class TestInicializacao:
+    """Suite de testes do lifespan e do comando de migrações"""
+
+    @pytest.fixture
+    def banco_inacessivel(self, tmp_path):
+        inacessivel = create_engine(f"sqlite:///{tmp_path / 'nao' / 'existe.db'}")
+        yield inacessivel
+        inacessivel.dispose()
+
+    def test_verificar_conexao_com_tentativas(self, banco_inacessivel, monkeypatch):
+        """Tenta de novo até esgotar as tentativas e então propaga o erro"""
+        esperas = []
+        monkeypatch.setattr(database.relogio, "sleep", esperas.append)
+
+        with pytest.raises(exc.OperationalError):
+            database.verificar_conexao(banco_inacessivel, tentativas=3, intervalo=0.5)
+        assert esperas == [0.5, 0.5]
+
+    def test_lifespan_exige_banco(self, banco_inacessivel, monkeypatch):
+        """O worker não começa a atender com o banco inacessível"""
+        monkeypatch.setattr(database, "engine", banco_inacessivel)
+        monkeypatch.setattr(database.settings, "DB_CONEXAO_TENTATIVAS", 1)
+
+        with pytest.raises(exc.OperationalError):
+            with TestClient(app):
+                pass
+
+    def test_lifespan_com_banco(self):
+        """Com o banco acessível, a aplicação inicia e encerra normalmente"""
+        with TestClient(app) as client:
+            assert client.get("/health").json() == {"status": "healthy"}
+
+    def test_historico_alembic_linear(self):
+        """O histórico de revisões tem uma única raiz e uma única cabeça"""
+        historico = _historico()
+        assert historico.get_bases() == ["001"]
+        assert len(historico.get_heads()) == 1
+
+    def test_migrar_cria_esquema(self, tmp_path):
+        """Banco novo recebe todas as tabelas e a revisão mais recente; executar de novo não altera nada"""
+        alvo = create_engine(f"sqlite:///{tmp_path / 'novo.db'}")
+        try:
+            migrar(alvo)
+            tabelas = set(inspect(alvo).get_table_names())
+            assert set(database.Base.metadata.tables) <= tabelas
+            assert _revisao(alvo) == _historico().get_current_head()
+
+            migrar(alvo)
+            assert set(inspect(alvo).get_table_names()) == tabelas
+        finally:
+            alvo.dispose()
+
+    def test_migrar_banco_versionado(self, tmp_path):
+        """Banco versionado só recebe as revisões pendentes, sem create_all por cima"""
+        alvo = create_engine(f"sqlite:///{tmp_path / 'versionado.db'}")
+        try:
+            database.Base.metadata.create_all(bind=alvo)
+            with alvo.begin() as conexao:
+                # Esquema de 010: sem o que as revisões seguintes criam
+                conexao.execute(text("DROP TABLE sessao_usuario"))
+                conexao.execute(text("DROP TABLE agenda_slot"))
+                conexao.execute(text("DROP TABLE agenda_dia"))
+                conexao.execute(text("ALTER TABLE paciente DROP COLUMN desbloqueado_em"))
+                # Tabela de uma revisão já aplicada: sumir dela é divergência, não pendência
+                conexao.execute(text("DROP TABLE consulta_evento"))
+                conexao.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) PRIMARY KEY)"))
+                conexao.execute(text("INSERT INTO alembic_version VALUES ('010')"))
+
+            migrar(alvo)
+            tabelas = set(inspect(alvo).get_table_names())
+            assert {"sessao_usuario", "agenda_dia", "agenda_slot"} <= tabelas
+            assert "consulta_evento" not in tabelas
+            assert "desbloqueado_em" in {c["name"] for c in inspect(alvo).get_columns("paciente")}
+            assert _revisao(alvo) == _historico().get_current_head()
+        finally:
+            alvo.dispose()
+
+    def test_status_do_relatorio_padrao_pendente(self, tmp_path):
+        """Migração 009 marca os relatórios antigos como concluídos; novos nascem pendentes, como no create_all"""
+        alvo = create_engine(f"sqlite:///{tmp_path / 'relatorio.db'}")
+        novo = create_engine(f"sqlite:///{tmp_path / 'novo.db'}")
+        inserir = text("INSERT INTO relatorio (tipo, id_admin_fk) VALUES ('cancelamentos', 1)")
+        try:
+            database.Base.metadata.create_all(bind=alvo)
+            with alvo.begin() as conexao:
+                # Esquema de 008: relatorio sem as colunas da fila e sem as revisões seguintes
+                conexao.execute(text("DROP INDEX ix_relatorio_chave_geracao"))
+                for coluna in ("parametros", "chave", "status", "mensagem_erro", "data_conclusao", "arquivo_pdf"):
+                    conexao.execute(text(f"ALTER TABLE relatorio DROP COLUMN {coluna}"))
+                for tabela in ("consulta_evento", "sessao_usuario", "agenda_slot", "agenda_dia"):
+                    conexao.execute(text(f"DROP TABLE {tabela}"))
+                conexao.execute(text("ALTER TABLE paciente DROP COLUMN desbloqueado_em"))
+                conexao.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) PRIMARY KEY)"))
+                conexao.execute(text("INSERT INTO alembic_version VALUES ('008')"))
+                conexao.execute(inserir)
+
+            migrar(alvo)
+            migrar(novo)
+            with alvo.begin() as conexao:
+                conexao.execute(inserir)
+                assert conexao.execute(
+                    text("SELECT status FROM relatorio ORDER BY id_relatorio")
+                ).scalars().all() == ["concluido", "pendente"]
+            with novo.begin() as conexao:
+                conexao.execute(inserir)
+                assert conexao.execute(text("SELECT status FROM relatorio")).scalar_one() == "pendente"
+        finally:
+            alvo.dispose()
+            novo.dispose()
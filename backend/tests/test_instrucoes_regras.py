@@ -0,0 +1,150 @@
+"""
+Testes das Instruções Parametrizadas das Regras de Negócio
+Performance: ~2 segundos total (inclui micro-benchmark informativo)
+"""
+import time as relogio
+import pytest
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import event
+from sqlalchemy.engine.default import CACHE_HIT
+
+from app.models.models import Consulta, HorarioTrabalho
+from app.services import regras_negocio
+from app.services.regras_negocio import (
+    RegraConsulta, RegraHorarioDisponivel, RegraPaciente, ValidadorAgendamento, montar_fatos_agendamento
+)
+
+
+def _consulta(db, paciente, medico, inicio: datetime, status: str = "agendada") -> Consulta:
+    consulta = Consulta(
+        data_hora_inicio=inicio, data_hora_fim=inicio + timedelta(minutes=30), status=status,
+        id_paciente_fk=paciente.id_paciente, id_medico_fk=medico.id_medico
+    )
+    db.add(consulta)
+    db.commit()
+    return consulta
+
+
+@pytest.mark.unit
+class TestInstrucoesRegras:
+    """Suite de testes das regras sobre instruções montadas uma única vez"""
+
+    def test_conflito_ignora_a_propria_consulta(
+        self, db_session, paciente_teste, medico_cardiologista, proxima_segunda
+    ):
+        """RN4 com e sem consulta_id_ignorar (reagendamento)"""
+        inicio = datetime.combine(proxima_segunda, time(10, 0))
+        consulta = _consulta(db_session, paciente_teste, medico_cardiologista, inicio)
+        fim = inicio + timedelta(minutes=30)
+
+        livre, mensagem = RegraConsulta.validar_conflito_horario_medico(
+            db_session, medico_cardiologista.id_medico, inicio, fim
+        )
+        assert not livre and "10:00 às 10:30" in mensagem
+        assert RegraConsulta.validar_conflito_horario_medico(
+            db_session, medico_cardiologista.id_medico, inicio, fim, consulta_id_ignorar=consulta.id_consulta
+        )[0]
+
+    def test_faltas_e_limite_de_consultas(
+        self, db_session, paciente_teste, medico_cardiologista, proxima_segunda
+    ):
+        """RN2 e RN3 com os mesmos parâmetros reaproveitados entre chamadas"""
+        segunda = proxima_segunda
+        passado = datetime.combine(date.today() - timedelta(days=10), time(9, 0))
+        _consulta(db_session, paciente_teste, medico_cardiologista, passado, "realizada")
+        for dias in (1, 2):
+            _consulta(db_session, paciente_teste, medico_cardiologista, passado + timedelta(days=dias), "faltou")
+        _consulta(db_session, paciente_teste, medico_cardiologista, datetime.combine(segunda, time(9, 0)))
+
+        assert RegraPaciente.calcular_faltas_consecutivas(db_session, paciente_teste.id_paciente) == 2
+        assert RegraPaciente.atualizar_faltas_consecutivas(db_session, paciente_teste.id_paciente) == 2
+        db_session.flush()
+        assert RegraPaciente.contar_faltas_consecutivas(db_session, paciente_teste.id_paciente) == 2
+        assert RegraConsulta.validar_limite_consultas_futuras(db_session, paciente_teste.id_paciente)[0]
+
+        _consulta(db_session, paciente_teste, medico_cardiologista, datetime.combine(segunda, time(11, 0)))
+        assert not RegraConsulta.validar_limite_consultas_futuras(db_session, paciente_teste.id_paciente)[0]
+
+    def test_disponibilidade_com_lista_de_medicos(
+        self, db_session, paciente_teste, medico_cardiologista, medico_ortopedista, proxima_segunda
+    ):
+        """A lista de médicos é expandida na execução; tamanhos diferentes reaproveitam a instrução"""
+        segunda = proxima_segunda
+        for medico in (medico_cardiologista, medico_ortopedista):
+            db_session.add(HorarioTrabalho(
+                dia_semana=segunda.weekday(), hora_inicio=time(9, 0), hora_fim=time(10, 0),
+                id_medico_fk=medico.id_medico
+            ))
+        db_session.commit()
+        _consulta(db_session, paciente_teste, medico_cardiologista, datetime.combine(segunda, time(9, 0)))
+
+        ids = [medico_cardiologista.id_medico, medico_ortopedista.id_medico]
+        periodo = RegraHorarioDisponivel.calcular_disponibilidade_periodo(db_session, ids, segunda, segunda)
+        assert [s.time() for s in periodo[ids[0]][segunda]] == [time(9, 30)]
+        assert len(periodo[ids[1]][segunda]) == 2
+
+        unico = RegraHorarioDisponivel.calcular_disponibilidade_periodo(db_session, ids[:1], segunda, segunda)
+        assert unico == {ids[0]: periodo[ids[0]]}
+        assert RegraConsulta.validar_horario_trabalho_medico(
+            db_session, ids[1], datetime.combine(segunda, time(9, 30))
+        )[0]
+
+
+@pytest.mark.performance
+class TestDesempenhoInstrucoes:
+    """Micro-benchmark: custo em Python por chamada da validação de agendamento"""
+
+    REPETICOES = 300
+
+    def _por_chamada(self, funcao) -> float:
+        for _ in range(20):
+            funcao()
+        inicio = relogio.perf_counter()
+        for _ in range(self.REPETICOES):
+            funcao()
+        return (relogio.perf_counter() - inicio) / self.REPETICOES
+
+    def test_instrucao_pronta_vs_montada_a_cada_chamada(
+        self, db_session, paciente_teste, medico_cardiologista, proxima_segunda
+    ):
+        """A instrução pronta é sempre o mesmo objeto e sai do cache de compilação (tempos só informativos)"""
+        inicio = datetime.combine(proxima_segunda, time(10, 0))
+        parametros = {
+            "paciente_id": paciente_teste.id_paciente,
+            "medico_id": medico_cardiologista.id_medico,
+            "agora": datetime.now(),
+            "dia_semana": inicio.weekday(),
+            "hora": inicio.time(),
+            "data_hora_inicio": inicio,
+            "data_hora_fim": inicio + timedelta(minutes=30)
+        }
+
+        def consultar():
+            return ValidadorAgendamento.consultar_fatos_agendamento(
+                db_session, paciente_teste.id_paciente, medico_cardiologista.id_medico,
+                inicio, inicio + timedelta(minutes=30)
+            )
+
+        consultar()
+        execucoes = []
+
+        def registrar(conn, cursor, statement, parameters, context, executemany):
+            execucoes.append((context.invoked_statement, context.cache_hit))
+
+        engine = db_session.get_bind().engine
+        event.listen(engine, "after_cursor_execute", registrar)
+        try:
+            for _ in range(5):
+                consultar()
+        finally:
+            event.remove(engine, "after_cursor_execute", registrar)
+        assert len(execucoes) == 5
+        assert all(instrucao is regras_negocio._FATOS_AGENDAMENTO for instrucao, _ in execucoes)
+        assert [acerto for _, acerto in execucoes] == [CACHE_HIT] * 5
+
+        assert db_session.execute(regras_negocio._FATOS_AGENDAMENTO, parametros).one() == \
+            db_session.execute(montar_fatos_agendamento(), parametros).one()
+
+        montada = self._por_chamada(lambda: db_session.execute(montar_fatos_agendamento(), parametros).one())
+        pronta = self._por_chamada(consultar)
+        print(f"\n📊 Fatos do agendamento: montada {montada * 1e6:.0f} µs, pronta {pronta * 1e6:.0f} µs por chamada")
@@ -0,0 +1,94 @@
+"""
+Testes do Login (consulta unificada de identidade e bcrypt em pool dedicado)
+Performance: ~2 segundos total
+"""
+import pytest
+from fastapi import status
+from sqlalchemy import event
+
+from app.models.models import Administrador
+from app.services.identidade import IdentidadeUsuario
+from app.utils import auth
+
+
+@pytest.mark.integration
+class TestLoginIdentidade:
+    """Suite de testes do caminho de login"""
+
+    @pytest.fixture
+    def verificacoes(self, monkeypatch):
+        """Registra as senhas verificadas pelo bcrypt"""
+        chamadas = []
+        original = auth.verify_password
+
+        def verificar(senha, senha_hash):
+            chamadas.append(senha)
+            return original(senha, senha_hash)
+
+        monkeypatch.setattr(auth, "verify_password", verificar)
+        return chamadas
+
+    def test_identidade_em_uma_consulta(
+        self, db_session, db_engine, paciente_teste, medico_cardiologista, admin_user
+    ):
+        """Cada tipo de usuário é resolvido por e-mail com um único SELECT"""
+        instrucoes = []
+        ouvinte = lambda *args: instrucoes.append(args[2])
+        event.listen(db_engine, "before_cursor_execute", ouvinte)
+        try:
+            resultados = {
+                email: IdentidadeUsuario.buscar(db_session, email)
+                for email in ("carlos@test.com", "joao@test.com", "admin@test.com", "ninguem@test.com")
+            }
+        finally:
+            event.remove(db_engine, "before_cursor_execute", ouvinte)
+
+        assert len(instrucoes) == 4
+        assert [(i.tipo, i.id) for i in resultados["carlos@test.com"]] == [("paciente", paciente_teste.id_paciente)]
+        assert [(i.tipo, i.id) for i in resultados["joao@test.com"]] == [("medico", medico_cardiologista.id_medico)]
+        assert [(i.tipo, i.id) for i in resultados["admin@test.com"]] == [("administrador", admin_user.id_admin)]
+        assert resultados["ninguem@test.com"] == []
+
+    def test_login_verifica_a_senha_uma_vez(
+        self, client, verificacoes, paciente_teste, medico_cardiologista
+    ):
+        """Login válido faz um bcrypt; e-mail desconhecido nenhum"""
+        response = client.post("/auth/login", json={"email": "joao@test.com", "senha": "medico123"})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["user_type"] == "medico"
+        assert response.json()["user_id"] == medico_cardiologista.id_medico
+        assert verificacoes == ["medico123"]
+
+        response = client.post("/auth/login", json={"email": "ninguem@test.com", "senha": "qualquer1"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert verificacoes == ["medico123"]
+
+        response = client.post("/auth/login", json={"email": "carlos@test.com", "senha": "errada123"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_email_repetido_e_paciente_bloqueado(
+        self, client, db_session, paciente_teste
+    ):
+        """Mesmo e-mail em duas tabelas: vale a senha de cada uma; paciente bloqueado é 403"""
+        db_session.add(Administrador(
+            nome="Carlos Admin", email="carlos@test.com",
+            senha_hash=auth.get_password_hash("admin1234"), papel="Admin"
+        ))
+        paciente_teste.esta_bloqueado = True
+        db_session.commit()
+
+        response = client.post("/auth/login", json={"email": "carlos@test.com", "senha": "admin1234"})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["user_type"] == "administrador"
+
+        response = client.post("/auth/login", json={"email": "carlos@test.com", "senha": "paciente123"})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_bcrypt_em_pool_limitado(self, client, paciente_teste):
+        """A verificação roda nas threads do pool dedicado, limitado pela configuração"""
+        response = client.post("/auth/login", json={"email": "carlos@test.com", "senha": "paciente123"})
+        assert response.status_code == status.HTTP_200_OK
+
+        executor = auth._obter_executor_senhas()
+        assert executor._max_workers == auth.settings.SENHA_VERIFICACAO_THREADS
+        assert all(t.name.startswith("bcrypt") for t in executor._threads)
@@ -0,0 +1,117 @@
+"""
+Testes da Paginação por Cursor e Projeção de Campos nas listagens
+Performance: ~2 segundos total
+"""
+import pytest
+from datetime import datetime, timedelta
+from fastapi import status
+
+from app.models.models import Consulta
+from app.utils.paginacao import codificar_cursor, decodificar_cursor
+
+
+@pytest.fixture
+def consultas_paciente(db_session, paciente_teste, medico_cardiologista):
+    """Cinco consultas do paciente, duas delas no mesmo horário (desempate por id)"""
+    base = datetime(2030, 3, 4, 9, 0)
+    inicios = [base, base, base + timedelta(hours=1), base + timedelta(days=1), base + timedelta(days=2)]
+    consultas = [
+        Consulta(
+            data_hora_inicio=inicio, data_hora_fim=inicio + timedelta(minutes=30),
+            status="realizada", id_paciente_fk=paciente_teste.id_paciente,
+            id_medico_fk=medico_cardiologista.id_medico
+        )
+        for inicio in inicios
+    ]
+    db_session.add_all(consultas)
+    db_session.commit()
+    return consultas
+
+
+@pytest.mark.integration
+class TestPaginacaoConsultas:
+    """Suite de testes das listagens paginadas de consultas"""
+
+    def _percorrer(self, client, url, params=None, headers=None):
+        itens, paginas, cursor = [], 0, None
+        while True:
+            pedido = dict(params or {})
+            if cursor:
+                pedido["cursor"] = cursor
+            response = client.get(url, params=pedido, headers=headers)
+            assert response.status_code == status.HTTP_200_OK
+            itens += response.json()
+            paginas += 1
+            cursor = response.headers.get("X-Proximo-Cursor")
+            if not cursor:
+                return itens, paginas
+
+    def test_cursor_ida_e_volta(self):
+        """O cursor preserva datas e inteiros"""
+        valores = (datetime(2030, 1, 1, 8, 30), 42)
+        assert decodificar_cursor(codificar_cursor(valores), 2) == valores
+
+    def test_paginas_do_paciente_sem_repeticao(
+        self, client, paciente_teste, consultas_paciente
+    ):
+        """Páginas de 2 cobrem todas as consultas, da mais recente à mais antiga"""
+        itens, paginas = self._percorrer(
+            client, f"/pacientes/consultas/{paciente_teste.id_paciente}", {"limite": 2}
+        )
+
+        assert paginas == 3
+        chaves = [(c["data_hora_inicio"], c["id_consulta"]) for c in itens]
+        assert chaves == sorted(chaves, reverse=True)
+        assert {c["id_consulta"] for c in itens} == {c.id_consulta for c in consultas_paciente}
+        assert itens[0]["medico"]["nome"] == "Dr. João Silva"
+
+    def test_projecao_de_campos(
+        self, client, paciente_teste, consultas_paciente
+    ):
+        """fields= devolve apenas os campos pedidos, inclusive relacionamentos"""
+        url = f"/pacientes/consultas/{paciente_teste.id_paciente}"
+
+        response = client.get(url, params={"fields": "id_consulta,status", "limite": 3})
+        assert response.status_code == status.HTTP_200_OK
+        assert all(set(c) == {"id_consulta", "status"} for c in response.json())
+        assert response.headers.get("X-Proximo-Cursor")
+
+        itens, _ = self._percorrer(client, url, {"fields": "id_consulta", "limite": 3})
+        assert len(itens) == len(consultas_paciente)
+
+        response = client.get(url, params={"fields": "data_hora_inicio,medico"})
+        primeiro = response.json()[0]
+        assert set(primeiro) == {"data_hora_inicio", "medico"}
+        assert primeiro["medico"]["especialidade"]["nome"] == "Cardiologia"
+
+        response = client.get(url, params={"fields": "id_consulta,senha"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_listagens_do_medico_e_admin(
+        self, client, auth_headers_admin, medico_cardiologista, consultas_paciente
+    ):
+        """Médico lista em ordem crescente; admin filtra por status e pagina"""
+        itens, _ = self._percorrer(
+            client, f"/medicos/consultas/{medico_cardiologista.id_medico}", {"limite": 4}
+        )
+        chaves = [(c["data_hora_inicio"], c["id_consulta"]) for c in itens]
+        assert chaves == sorted(chaves)
+        assert len(itens) == len(consultas_paciente)
+
+        itens, paginas = self._percorrer(
+            client, "/admin/consultas",
+            {"status": "realizada", "limite": 2, "fields": "id_consulta"},
+            headers=auth_headers_admin
+        )
+        assert paginas == 3
+        assert len(itens) == len(consultas_paciente)
+
+    def test_minhas_consultas(
+        self, client, auth_headers_paciente, consultas_paciente
+    ):
+        """Paciente logado lista as próprias consultas paginadas"""
+        itens, paginas = self._percorrer(
+            client, "/consultas/minhas", {"limite": 4}, headers=auth_headers_paciente
+        )
+        assert paginas == 2
+        assert len(itens) == len(consultas_paciente)
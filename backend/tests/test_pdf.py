@@ -0,0 +1,58 @@
+"""
+Testes do Renderizador de PDFs Tabulares (app.utils.pdf)
+Performance: ~3 segundos total (inclui a partida do pool de processos)
+"""
+import asyncio
+import re
+
+import pytest
+
+from app.config import settings
+from app.utils import pdf
+
+
+def _paginas(conteudo: bytes) -> int:
+    return len(re.findall(rb"/Type /Page\b", conteudo))
+
+
+@pytest.mark.unit
+class TestRenderizadorPDF:
+    """Suite de testes da montagem e transmissão dos PDFs"""
+
+    COLUNAS = [("Nome", 8), ("Total", 4)]
+
+    def test_tabela_longa_pagina_em_blocos(self, monkeypatch):
+        """Tabelas longas ocupam várias páginas, em blocos com cabeçalho repetido"""
+        monkeypatch.setattr(pdf, "LINHAS_POR_BLOCO", 50)
+        linhas = [[f"Paciente {i}", str(i)] for i in range(300)]
+
+        conteudo = pdf.montar_documento("Título", "Período: todos", self.COLUNAS, linhas)
+
+        assert conteudo.startswith(b"%PDF")
+        assert _paginas(conteudo) > 1
+        assert _paginas(pdf.montar_documento("Vazio", "-", self.COLUNAS, [])) == 1
+
+    def test_renderizar_na_thread_e_transmitir(self, monkeypatch):
+        """Sem processos configurados o Future já vem resolvido; a transmissão reparte os bytes"""
+        monkeypatch.setattr(settings, "RELATORIOS_PDF_PROCESSOS", 0)
+        monkeypatch.setattr(pdf, "TAMANHO_PEDACO", 1024)
+        futuro = pdf.renderizar("Título", "-", self.COLUNAS, [["a", "1"]])
+        assert futuro.done()
+
+        async def coletar():
+            return [pedaco async for pedaco in pdf.transmitir(futuro)]
+
+        pedacos = asyncio.run(coletar())
+        assert len(pedacos) > 1
+        assert all(len(p) <= 1024 for p in pedacos)
+        assert b"".join(pedacos) == futuro.result()
+
+    def test_renderizar_no_pool_de_processos(self, monkeypatch):
+        """Com processos configurados a montagem roda fora do processo atual"""
+        monkeypatch.setattr(settings, "RELATORIOS_PDF_PROCESSOS", 1)
+        monkeypatch.setattr(pdf, "_pool", None)
+        try:
+            conteudo = pdf.renderizar("Título", "-", self.COLUNAS, [["a", "1"]]).result(timeout=60)
+        finally:
+            pdf._pool.shutdown()
+        assert conteudo.startswith(b"%PDF")
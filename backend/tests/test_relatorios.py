@@ -0,0 +1,382 @@
+"""
+Testes dos Relatórios Administrativos (agregado diário e fila de relatórios)
+Performance: ~2 segundos total
+"""
+import pytest
+from datetime import date, datetime, time, timedelta
+from fastapi import status
+
+from app.models.models import (
+    AgregadoDia, Consulta, ConsultaDiaria, ConsultaEvento, Especialidade, HorarioTrabalho, Relatorio
+)
+from app.config import settings
+from app.services import relatorios_pdf
+from app.services.agregados import AgregadoConsultasDia
+from app.services.fila_relatorios import FilaRelatorios
+from app.utils import relatorios
+
+
+@pytest.fixture
+def consultas_relatorio(
+    db_session, paciente_teste, paciente_sem_plano, medico_cardiologista, medico_ortopedista
+):
+    """Consultas em dias fechados, hoje e no futuro, para dois médicos"""
+    hoje = date.today()
+    dados = [
+        (-10, "realizada", paciente_teste, medico_cardiologista),
+        (-10, "cancelada", paciente_teste, medico_cardiologista),
+        (-3, "faltou", paciente_teste, medico_cardiologista),
+        (-3, "realizada", paciente_sem_plano, medico_ortopedista),
+        (0, "agendada", paciente_teste, medico_cardiologista),
+        (5, "cancelada", paciente_sem_plano, medico_ortopedista),
+    ]
+    consultas = []
+    for i, (dias, situacao, paciente, medico) in enumerate(dados):
+        inicio = datetime.combine(hoje + timedelta(days=dias), time(9, 0)) + timedelta(minutes=30 * i)
+        consultas.append(Consulta(
+            data_hora_inicio=inicio, data_hora_fim=inicio + timedelta(minutes=30),
+            status=situacao, id_paciente_fk=paciente.id_paciente,
+            id_medico_fk=medico.id_medico
+        ))
+    db_session.add_all(consultas)
+    db_session.commit()
+    return consultas
+
+
+@pytest.mark.integration
+class TestRelatoriosAgregados:
+    """Suite de testes dos relatórios lidos do agregado diário"""
+
+    def _get(self, client, headers, relatorio, **params):
+        response = client.get(f"/admin/relatorios/{relatorio}", headers=headers, params=params)
+        assert response.status_code == status.HTTP_200_OK
+        return response.json()
+
+    def test_relatorios_somam_dias_fechados_e_abertos(
+        self, client, auth_headers_admin, db_session, consultas_relatorio
+    ):
+        """Totais combinam o agregado (dias passados) com hoje e o futuro"""
+        por_medico = {
+            r["medico_nome"]: r
+            for r in self._get(client, auth_headers_admin, "consultas-por-medico")
+        }
+        assert por_medico["Dr. João Silva"] == {
+            "medico_nome": "Dr. João Silva", "especialidade": "Cardiologia",
+            "total_consultas": 4, "consultas_realizadas": 1, "consultas_canceladas": 1
+        }
+        assert por_medico["Dra. Maria Santos"]["total_consultas"] == 2
+
+        por_especialidade = {
+            r["especialidade"]: r
+            for r in self._get(client, auth_headers_admin, "consultas-por-especialidade")
+        }
+        assert por_especialidade["Ortopedia"] == {
+            "especialidade": "Ortopedia", "total_consultas": 2, "total_medicos": 1
+        }
+
+        assert self._get(client, auth_headers_admin, "cancelamentos") == {
+            "total_consultas": 6, "total_cancelamentos": 2, "taxa_cancelamento": 33.33,
+            "total_remarcacoes": 0, "taxa_remarcacao": 0,
+            "antecedencia_media_agendamento_horas": None,
+            "antecedencia_media_cancelamento_horas": None
+        }
+
+        # Dias fechados foram consolidados; hoje não
+        assert db_session.query(AgregadoDia).filter(AgregadoDia.dia == date.today()).count() == 0
+        assert db_session.query(AgregadoDia).filter(
+            AgregadoDia.dia == date.today() - timedelta(days=10)
+        ).count() == 1
+        assert db_session.query(ConsultaDiaria).count() == 4
+
+    def test_filtros_de_periodo_e_medico(
+        self, client, auth_headers_admin, medico_cardiologista, consultas_relatorio
+    ):
+        """Período inclusivo nas duas pontas e filtro por médico"""
+        hoje = date.today()
+        dados = self._get(
+            client, auth_headers_admin, "consultas-por-medico",
+            medico_id=medico_cardiologista.id_medico,
+            data_inicio=(hoje - timedelta(days=3)).isoformat(), data_fim=hoje.isoformat()
+        )
+        assert len(dados) == 1
+        assert dados[0]["total_consultas"] == 2
+
+        cancelamentos = self._get(
+            client, auth_headers_admin, "cancelamentos",
+            data_inicio=(hoje - timedelta(days=10)).isoformat(),
+            data_fim=(hoje - timedelta(days=10)).isoformat()
+        )
+        assert cancelamentos["total_consultas"] == 2
+        assert cancelamentos["taxa_cancelamento"] == 50.0
+
+        frequentes = self._get(
+            client, auth_headers_admin, "pacientes-frequentes",
+            data_inicio=(hoje - timedelta(days=3)).isoformat(), limite=1
+        )
+        assert frequentes[0]["paciente_nome"] == "Carlos Teste"
+        assert frequentes[0]["total_consultas"] == 2
+
+    def test_mudanca_de_status_reconsolida_o_dia(
+        self, client, auth_headers_admin, db_session, medico_cardiologista, consultas_relatorio
+    ):
+        """Dia consolidado é lido do agregado até a rota de status invalidá-lo"""
+        falta = consultas_relatorio[2]
+        assert self._get(client, auth_headers_admin, "consultas-por-medico",
+                         medico_id=medico_cardiologista.id_medico)[0]["consultas_realizadas"] == 1
+
+        # Alteração direta no banco não é vista: o dia já foi consolidado
+        falta.status = "cancelada"
+        db_session.commit()
+        assert self._get(client, auth_headers_admin, "cancelamentos")["total_cancelamentos"] == 2
+
+        response = client.put(
+            f"/medicos/consultas/{falta.id_consulta}/status",
+            params={"medico_id": medico_cardiologista.id_medico, "novo_status": "realizada"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        dados = self._get(client, auth_headers_admin, "consultas-por-medico",
+                          medico_id=medico_cardiologista.id_medico)
+        assert dados[0]["consultas_realizadas"] == 2
+        assert self._get(client, auth_headers_admin, "cancelamentos")["total_cancelamentos"] == 2
+
+
+    def test_consolidacao_preserva_transacao_do_chamador(self, db_session, consultas_relatorio):
+        """Consolidar dias fechados não confirma o que a sessão de leitura tem pendente"""
+        pendente = Especialidade(nome="Dermatologia")
+        db_session.add(pendente)
+
+        hoje = date.today()
+        assert AgregadoConsultasDia.garantir_dias(db_session, hoje - timedelta(days=10), hoje)
+        assert pendente in db_session.new
+        assert db_session.query(AgregadoDia).count() == 10
+
+
+    def test_relatorios_legados_usam_modelos_comuns(self, db_session, consultas_relatorio, monkeypatch):
+        """As funções de app.utils.relatorios leem os relatórios atuais e o layout de MODELOS"""
+        monkeypatch.setattr(settings, "RELATORIOS_PDF_PROCESSOS", 0)
+        titulos = []
+        renderizar = relatorios_pdf.renderizar
+        monkeypatch.setattr(
+            relatorios_pdf, "renderizar",
+            lambda titulo, *args: titulos.append(titulo) or renderizar(titulo, *args)
+        )
+
+        por_medico = relatorios.gerar_relatorio_consultas_por_medico(db_session)
+        assert {r["medico_nome"]: r["total_consultas"] for r in por_medico["dados"]} == {
+            "Dr. João Silva": 4, "Dra. Maria Santos": 1
+        }
+        for dados in (
+            por_medico,
+            relatorios.gerar_relatorio_consultas_por_especialidade(db_session),
+            relatorios.gerar_relatorio_cancelamentos(db_session),
+            relatorios.gerar_relatorio_pacientes_frequentes(db_session, limite=5),
+        ):
+            assert relatorios.criar_pdf_relatorio(dados).getvalue().startswith(b"%PDF")
+
+        assert titulos == [
+            relatorios_pdf.MODELOS[tipo].titulo.format(limite=5)
+            for tipo in ("consultas-por-medico", "consultas-por-especialidade",
+                         "cancelamentos", "pacientes-frequentes")
+        ]
+
+@pytest.mark.integration
+class TestEventosConsulta:
+    """Suite de testes do histórico de eventos e das métricas de remarcação"""
+
+    def test_rotas_registram_eventos_e_relatorio_os_agrega(
+        self, client, auth_headers_admin, db_session, medico_cardiologista, paciente_teste
+    ):
+        """Agendar, reagendar, cancelar e mudar status gravam eventos; o relatório mede remarcações"""
+        data = date.today() + timedelta(days=7)
+        medico_id = medico_cardiologista.id_medico
+        paciente = {"paciente_id": paciente_teste.id_paciente}
+        db_session.add(HorarioTrabalho(
+            dia_semana=data.weekday(), hora_inicio=time(14, 0), hora_fim=time(16, 0),
+            id_medico_fk=medico_id
+        ))
+        db_session.commit()
+
+        consulta_id = client.post(
+            "/pacientes/consultas", params=paciente,
+            json={"id_medico": medico_id, "data_hora": f"{data.isoformat()}T14:00:00"}
+        ).json()["id_consulta"]
+        response = client.put(
+            f"/pacientes/consultas/{consulta_id}/reagendar", params=paciente,
+            json={"nova_data_hora_inicio": f"{data.isoformat()}T15:00:00"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        response = client.request(
+            "DELETE", f"/pacientes/consultas/{consulta_id}", params=paciente, json={}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        response = client.put(
+            f"/medicos/consultas/{consulta_id}/status",
+            params={"medico_id": medico_id, "novo_status": "agendada"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        eventos = db_session.query(ConsultaEvento).filter(
+            ConsultaEvento.id_consulta_fk == consulta_id
+        ).order_by(ConsultaEvento.id_evento).all()
+        assert [(e.tipo, e.status_anterior, e.status_novo) for e in eventos] == [
+            ("agendamento", None, "agendada"),
+            ("reagendamento", "agendada", "agendada"),
+            ("cancelamento", "agendada", "cancelada"),
+            ("status", "cancelada", "agendada"),
+        ]
+        assert eventos[1].data_consulta_anterior == datetime.combine(data, time(14, 0))
+        assert eventos[1].data_consulta == datetime.combine(data, time(15, 0))
+
+        relatorio = client.get("/admin/relatorios/cancelamentos", headers=auth_headers_admin).json()
+        assert relatorio["total_consultas"] == 1
+        assert relatorio["total_remarcacoes"] == 1
+        assert relatorio["taxa_remarcacao"] == 100.0
+        assert 6 * 24 < relatorio["antecedencia_media_agendamento_horas"] <= 8 * 24
+        assert 6 * 24 < relatorio["antecedencia_media_cancelamento_horas"] <= 8 * 24
+
+        # Eventos contam no período da consulta (data após o reagendamento)
+        fora = client.get(
+            "/admin/relatorios/cancelamentos",
+            params={"data_fim": (data - timedelta(days=1)).isoformat()}, headers=auth_headers_admin
+        ).json()
+        assert fora["total_remarcacoes"] == 0
+
+
+@pytest.mark.integration
+class TestFilaRelatorios:
+    """Suite de testes da geração assíncrona de relatórios"""
+
+    @pytest.fixture(autouse=True)
+    def _fila(self, monkeypatch):
+        """Registra os despachos em vez de entregá-los ao pool de threads"""
+        self.despachados = []
+        monkeypatch.setattr(FilaRelatorios, "_despachar", self.despachados.append)
+
+    def test_enfileirar_executar_e_baixar(
+        self, client, auth_headers_admin, db_session, medico_cardiologista, consultas_relatorio
+    ):
+        """Pedido volta pendente; executado, expõe dados e PDF"""
+        pedido = {"tipo": "consultas-por-medico", "medico_id": medico_cardiologista.id_medico}
+        response = client.post("/admin/relatorios/solicitacoes", json=pedido, headers=auth_headers_admin)
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        relatorio = response.json()
+        assert relatorio["status"] == "pendente"
+        assert self.despachados == [relatorio["id_relatorio"]]
+
+        url = f"/admin/relatorios/solicitacoes/{relatorio['id_relatorio']}"
+        assert client.get(f"{url}/pdf", headers=auth_headers_admin).status_code == status.HTTP_409_CONFLICT
+
+        FilaRelatorios.executar(relatorio["id_relatorio"], db_session)
+
+        concluido = client.get(url, headers=auth_headers_admin).json()
+        assert concluido["status"] == "concluido"
+        assert '"total_consultas": 4' in concluido["dados_resultado"]
+        response = client.get(f"{url}/pdf", headers=auth_headers_admin)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/pdf"
+        assert response.content.startswith(b"%PDF")
+
+    def test_pedido_identico_reaproveitado(self, client, auth_headers_admin, db_session):
+        """Mesmo tipo e filtros devolvem o relatório existente, sem novo despacho"""
+        pedido = {"tipo": "cancelamentos", "data_inicio": "2030-01-01", "medico_id": 99}
+        primeiro = client.post("/admin/relatorios/solicitacoes", json=pedido, headers=auth_headers_admin).json()
+        # medico_id não é filtro de cancelamentos: o pedido é equivalente
+        segundo = client.post(
+            "/admin/relatorios/solicitacoes",
+            json={"tipo": "cancelamentos", "data_inicio": "2030-01-01"}, headers=auth_headers_admin
+        ).json()
+
+        assert segundo["id_relatorio"] == primeiro["id_relatorio"]
+        assert len(self.despachados) == 1
+        assert db_session.query(Relatorio).count() == 1
+
+        outro = client.post(
+            "/admin/relatorios/solicitacoes",
+            json={"tipo": "cancelamentos", "data_inicio": "2030-01-02"}, headers=auth_headers_admin
+        ).json()
+        assert outro["id_relatorio"] != primeiro["id_relatorio"]
+
+    def test_tipo_invalido_e_pdf_sincrono(self, client, auth_headers_admin, consultas_relatorio):
+        """Tipo desconhecido é rejeitado; a rota síncrona continua gerando PDF"""
+        response = client.post(
+            "/admin/relatorios/solicitacoes", json={"tipo": "inexistente"}, headers=auth_headers_admin
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+        response = client.get(
+            "/admin/relatorios/pacientes-frequentes",
+            params={"formato": "pdf", "limite": 5}, headers=auth_headers_admin
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content.startswith(b"%PDF")
+
+
+@pytest.mark.integration
+class TestSerieTemporal:
+    """Suite de testes da série temporal de consultas"""
+
+    def _serie(self, client, headers, **params):
+        response = client.get("/admin/relatorios/serie-temporal", headers=headers, params=params)
+        assert response.status_code == status.HTTP_200_OK
+        return response.json()
+
+    def test_intervalos_vazios_voltam_com_zero(self, client, auth_headers_admin, consultas_relatorio):
+        """Série diária cobre todo o período, somando dias fechados e abertos"""
+        hoje = date.today()
+        serie = self._serie(
+            client, auth_headers_admin,
+            data_inicio=(hoje - timedelta(days=10)).isoformat(), data_fim=(hoje + timedelta(days=5)).isoformat()
+        )
+        assert len(serie["intervalos"]) == 16
+        assert serie["intervalos"][0] == (hoje - timedelta(days=10)).isoformat()
+        assert serie["totais"][0] == 2
+        assert serie["totais"][7] == 2
+        assert serie["totais"][10] == 1
+        assert serie["totais"][15] == 1
+        assert sum(serie["totais"]) == 6
+        assert serie["series"] == []
+
+    def test_quebra_por_status_e_medico(
+        self, client, auth_headers_admin, medico_cardiologista, consultas_relatorio
+    ):
+        """Cada item da dimensão tem um valor por intervalo, inclusive zeros"""
+        hoje = date.today()
+        inicio = (hoje - timedelta(days=10)).isoformat()
+        serie = self._serie(
+            client, auth_headers_admin, data_inicio=inicio, data_fim=hoje.isoformat(), dimensao="status"
+        )
+        por_status = {s["chave"]: s["valores"] for s in serie["series"]}
+        assert set(por_status) == {"realizada", "cancelada", "faltou", "agendada"}
+        assert all(len(v) == 11 for v in por_status.values())
+        assert por_status["realizada"][0] == 1 and por_status["realizada"][7] == 1
+        assert sum(por_status["cancelada"]) == 1
+
+        serie = self._serie(
+            client, auth_headers_admin, data_inicio=inicio, data_fim=hoje.isoformat(),
+            granularidade="mes", dimensao="medico"
+        )
+        por_medico = {s["rotulo"]: sum(s["valores"]) for s in serie["series"]}
+        assert por_medico == {"Dr. João Silva": 4, "Dra. Maria Santos": 1}
+        assert sum(serie["totais"]) == 5
+
+    def test_semanas_e_limites(self, client, auth_headers_admin, consultas_relatorio):
+        """Semanas começam na segunda; período longo demais ou invertido é 400"""
+        hoje = date.today()
+        serie = self._serie(
+            client, auth_headers_admin, data_inicio=(hoje - timedelta(days=30)).isoformat(),
+            data_fim=hoje.isoformat(), granularidade="semana", dimensao="especialidade"
+        )
+        assert all(date.fromisoformat(i).weekday() == 0 for i in serie["intervalos"])
+        assert sum(serie["totais"]) == 5
+
+        response = client.get(
+            "/admin/relatorios/serie-temporal", headers=auth_headers_admin,
+            params={"data_inicio": "2000-01-01", "data_fim": "2030-01-01"}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = client.get(
+            "/admin/relatorios/serie-temporal", headers=auth_headers_admin,
+            params={"data_inicio": "2030-01-02", "data_fim": "2030-01-01", "granularidade": "mes"}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
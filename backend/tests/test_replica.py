@@ -0,0 +1,224 @@
+"""
+Testes do Roteamento de Leituras para a Réplica
+Performance: < 2 segundos total
+"""
+import shutil
+import time as relogio
+import pytest
+from datetime import date, datetime, timedelta
+from fastapi import status
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import database
+from app.database import SESSAO_PRIMARIA, Base, RoteadorLeitura, get_db, get_db_leitura
+from app.main import app
+from app.routers import admin
+from app.models.models import (
+    Administrador, Consulta, ConsultaDiaria, Especialidade, Medico, Paciente
+)
+from app.services.agregados import AgregadoConsultasDia
+from app.utils import auth
+
+
+def _banco(caminho):
+    engine = create_engine(f"sqlite:///{caminho}")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def _popular(sessoes) -> int:
+    """Admin, médico, paciente e consultas nos últimos dias; devolve o id do admin"""
+    db = sessoes()
+    especialidade = Especialidade(nome="Cardiologia")
+    db.add(especialidade)
+    db.flush()
+    medico = Medico(
+        nome="Dr. João Silva", cpf="11122233344", email="joao@test.com", senha_hash="x",
+        crm="CRM-12345", id_especialidade_fk=especialidade.id_especialidade
+    )
+    paciente = Paciente(
+        nome="Carlos Teste", cpf="99988877766", email="carlos@test.com", senha_hash="x",
+        data_nascimento=date(1990, 5, 15), esta_bloqueado=False
+    )
+    admin = Administrador(nome="Admin", email="admin@test.com", senha_hash="x", papel="Admin")
+    db.add_all([medico, paciente, admin])
+    db.flush()
+    for dias, situacao in ((1, "Realizada"), (2, "Realizada"), (2, "Cancelada"), (-3, "Agendada")):
+        inicio = datetime.combine(date.today() - timedelta(days=dias), datetime.min.time()).replace(hour=9 + dias % 5)
+        db.add(Consulta(
+            data_hora_inicio=inicio, data_hora_fim=inicio + timedelta(minutes=30), status=situacao,
+            id_paciente_fk=paciente.id_paciente, id_medico_fk=medico.id_medico
+        ))
+    db.commit()
+    admin_id = admin.id_admin
+    db.close()
+    return admin_id
+
+
+def _totais(db):
+    fatos = AgregadoConsultasDia.fatos(db)
+    linhas = db.execute(
+        select(fatos.c.dia, fatos.c.status, func.sum(fatos.c.total)).group_by(fatos.c.dia, fatos.c.status)
+    ).all()
+    # No SQLite, dia vem como date de consulta_diaria e como texto de consulta
+    return sorted((str(dia), situacao, total) for dia, situacao, total in linhas)
+
+
+@pytest.mark.unit
+class TestRoteadorLeitura:
+    """Suite de testes da escolha entre réplica e primário"""
+
+    @pytest.fixture
+    def bancos(self, tmp_path):
+        primario = _banco(tmp_path / "primario.db")
+        replica = _banco(tmp_path / "replica.db")
+        yield sessionmaker(bind=primario), replica
+        primario.dispose()
+        replica.dispose()
+
+    def test_sem_replica_tudo_no_primario(self, bancos):
+        """Sem DATABASE_REPLICA_URL o roteador só devolve sessões do primário"""
+        primario, _ = bancos
+        roteador = RoteadorLeitura(primario)
+        with roteador.abrir_sessao(relogio.time()) as sessao:
+            assert SESSAO_PRIMARIA not in sessao.info
+        assert roteador.estatisticas() == {
+            "ativa": False, "suspensa": False,
+            "leituras_replica": 0, "leituras_primario": 1, "falhas_replica": 0
+        }
+
+    def test_leitura_apos_escrita(self, bancos):
+        """Com uma escrita dentro da janela, a leitura vai ao primário"""
+        primario, replica = bancos
+        roteador = RoteadorLeitura(primario, replica, janela_escrita=60)
+
+        with roteador.abrir_sessao() as sessao:
+            assert sessao.get_bind() is replica
+            assert sessao.info[SESSAO_PRIMARIA] is primario
+        with roteador.abrir_sessao(relogio.time() - 1) as sessao:
+            assert sessao.get_bind() is not replica
+        with roteador.abrir_sessao(relogio.time() - 61) as sessao:
+            assert sessao.get_bind() is replica
+
+        # O instante vem do cliente: outro worker (outro roteador) dá a mesma resposta
+        outro_worker = RoteadorLeitura(primario, replica, janela_escrita=60)
+        with outro_worker.abrir_sessao(relogio.time() - 1) as sessao:
+            assert sessao.get_bind() is not replica
+        assert roteador.estatisticas()["leituras_replica"] == 2
+
+    def test_replica_fora_do_ar(self, bancos, tmp_path):
+        """Réplica inacessível: leitura no primário e réplica suspensa pela pausa"""
+        primario, _ = bancos
+        inacessivel = create_engine(f"sqlite:///{tmp_path / 'nao' / 'existe.db'}")
+        roteador = RoteadorLeitura(primario, inacessivel, pausa_falha=60)
+
+        for _ in range(3):
+            with roteador.abrir_sessao() as sessao:
+                assert sessao.get_bind() is not inacessivel
+        estatisticas = roteador.estatisticas()
+        assert estatisticas["suspensa"] is True
+        assert (estatisticas["falhas_replica"], estatisticas["leituras_primario"]) == (1, 3)
+
+    def test_agregados_consolidados_so_no_primario(self, tmp_path):
+        """Na réplica, fatos() dá os mesmos totais, lendo consulta, e consolida no primário"""
+        primario = _banco(tmp_path / "primario.db")
+        sessoes = sessionmaker(bind=primario)
+        _popular(sessoes)
+        shutil.copy(tmp_path / "primario.db", tmp_path / "replica.db")
+        replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+        roteador = RoteadorLeitura(sessoes, replica)
+
+        with roteador.abrir_sessao() as leitura:
+            assert leitura.get_bind() is replica
+            totais_replica = _totais(leitura)
+            assert leitura.query(ConsultaDiaria).count() == 0
+        with sessoes() as db:
+            assert db.query(ConsultaDiaria).count() > 0
+            assert _totais(db) == totais_replica
+        assert sum(total for _, _, total in totais_replica) == 4
+
+        primario.dispose()
+        replica.dispose()
+
+
+@pytest.mark.integration
+class TestRotasComReplica:
+    """Suite de testes das rotas de leitura com uma réplica configurada"""
+
+    @pytest.fixture
+    def ambiente(self, tmp_path, client, monkeypatch):
+        """
+        Primário e réplica em arquivos SQLite (a réplica é uma cópia do primário,
+        sem replicação: o que for gravado depois só existe no primário)
+        """
+        primario = _banco(tmp_path / "primario.db")
+        sessoes = sessionmaker(bind=primario)
+        admin_id = _popular(sessoes)
+        shutil.copy(tmp_path / "primario.db", tmp_path / "replica.db")
+        replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+        roteador = RoteadorLeitura(sessoes, replica, janela_escrita=60)
+        monkeypatch.setattr(database, "roteador_leitura", roteador)
+        monkeypatch.setattr(admin, "roteador_leitura", roteador)
+
+        def override_get_db():
+            sessao = sessoes()
+            try:
+                yield sessao
+            finally:
+                sessao.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides.pop(get_db_leitura, None)
+
+        def cabecalho(email):
+            token = auth.create_access_token({"sub": email, "tipo": "administrador", "id": admin_id})
+            return {"Authorization": f"Bearer {token}"}
+
+        yield roteador, cabecalho
+        primario.dispose()
+        replica.dispose()
+
+    def test_listagens_e_leitura_apos_escrita(self, client, ambiente):
+        """Listagens vêm da réplica; quem acabou de gravar lê do primário"""
+        roteador, cabecalho = ambiente
+        headers = cabecalho("admin@test.com")
+
+        response = client.get("/admin/especialidades", headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert [e["nome"] for e in response.json()] == ["Cardiologia"]
+        assert roteador.estatisticas()["leituras_replica"] == 1
+
+        response = client.post("/admin/especialidades", headers=headers, json={"nome": "Ortopedia"})
+        assert response.status_code == status.HTTP_201_CREATED
+        instante = response.headers["X-Ultima-Escrita"]
+        assert client.cookies.get(database.COOKIE_ULTIMA_ESCRITA) == instante
+
+        # Cookie guardado pelo cliente
+        nomes = [e["nome"] for e in client.get("/admin/especialidades", headers=headers).json()]
+        assert sorted(nomes) == ["Cardiologia", "Ortopedia"]
+
+        # Sem o cookie (outro navegador, ou token renovado sem a marca): réplica
+        client.cookies.clear()
+        nomes = [e["nome"] for e in client.get("/admin/especialidades", headers=headers).json()]
+        assert nomes == ["Cardiologia"]
+
+        # Clientes sem cookies reenviam o cabeçalho
+        nomes = [e["nome"] for e in client.get(
+            "/admin/especialidades", headers={**headers, "X-Ultima-Escrita": instante}
+        ).json()]
+        assert sorted(nomes) == ["Cardiologia", "Ortopedia"]
+
+        telemetria = client.get("/admin/telemetria", headers=headers).json()["replica_leitura"]
+        assert (telemetria["leituras_replica"], telemetria["leituras_primario"]) == (2, 2)
+
+    def test_relatorios_na_replica(self, client, ambiente):
+        """Relatórios são calculados na réplica sem gravar nela"""
+        roteador, cabecalho = ambiente
+
+        response = client.get("/admin/relatorios/consultas-por-medico", headers=cabecalho("admin@test.com"))
+        assert response.status_code == status.HTTP_200_OK
+        assert sum(linha["total_consultas"] for linha in response.json()) == 4
+        assert roteador.estatisticas()["leituras_replica"] == 1
+        with roteador._sessoes_replica() as replica:
+            assert replica.query(ConsultaDiaria).count() == 0
@@ -0,0 +1,153 @@
+"""
+Testes das Sessões Renováveis (refresh token)
+Performance: ~2 segundos total
+"""
+import pytest
+from datetime import datetime, timedelta
+from fastapi import status
+from sqlalchemy import event
+
+from app.models.models import SessaoUsuario
+from app.services.sessoes import SessoesUsuario
+from app.utils import auth
+
+
+@pytest.mark.integration
+class TestSessoesUsuario:
+    """Suite de testes de refresh, logout e revogação de sessões"""
+
+    @pytest.fixture
+    def verificacoes(self, monkeypatch):
+        """Registra as senhas verificadas pelo bcrypt"""
+        chamadas = []
+        original = auth.verify_password
+
+        def verificar(senha, senha_hash):
+            chamadas.append(senha)
+            return original(senha, senha_hash)
+
+        monkeypatch.setattr(auth, "verify_password", verificar)
+        return chamadas
+
+    def _login(self, client, email, senha):
+        response = client.post("/auth/login", json={"email": email, "senha": senha})
+        assert response.status_code == status.HTTP_200_OK
+        return response.json()
+
+    def test_refresh_sem_bcrypt(self, client, db_session, medico_cardiologista, verificacoes):
+        """Login cria a sessão; o refresh emite novo access token sem verificar senha"""
+        dados = self._login(client, "joao@test.com", "medico123")
+        assert dados["refresh_token"]
+        sessao = db_session.query(SessaoUsuario).one()
+        assert sessao.token_hash != dados["refresh_token"]
+        assert (sessao.tipo_usuario, sessao.id_usuario) == ("medico", medico_cardiologista.id_medico)
+
+        for _ in range(3):
+            response = client.post("/auth/refresh", json={"refresh_token": dados["refresh_token"]})
+            assert response.status_code == status.HTTP_200_OK
+        novo = response.json()
+        assert verificacoes == ["medico123"]
+        assert novo["user_type"] == "medico"
+        assert novo["refresh_token"] == dados["refresh_token"]
+
+        payload = auth.decode_access_token(novo["access_token"])
+        assert (payload["sub"], payload["tipo"], payload["id"]) == (
+            "joao@test.com", "medico", medico_cardiologista.id_medico
+        )
+        response = client.get(
+            "/admin/dashboard", headers={"Authorization": f"Bearer {novo['access_token']}"}
+        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_refresh_usa_o_cache(self, client, db_engine, paciente_teste):
+        """Depois da primeira validação, o refresh não consulta o banco"""
+        dados = self._login(client, "carlos@test.com", "paciente123")
+        client.post("/auth/refresh", json={"refresh_token": dados["refresh_token"]})
+
+        instrucoes = []
+        ouvinte = lambda *args: instrucoes.append(args[2])
+        event.listen(db_engine, "before_cursor_execute", ouvinte)
+        try:
+            response = client.post("/auth/refresh", json={"refresh_token": dados["refresh_token"]})
+        finally:
+            event.remove(db_engine, "before_cursor_execute", ouvinte)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert instrucoes == []
+
+    def test_logout_revoga(self, client, paciente_teste):
+        """Sessão encerrada ou token desconhecido não renovam"""
+        dados = self._login(client, "carlos@test.com", "paciente123")
+        client.post("/auth/refresh", json={"refresh_token": dados["refresh_token"]})
+
+        response = client.post("/auth/logout", json={"refresh_token": dados["refresh_token"]})
+        assert response.status_code == status.HTTP_200_OK
+        response = client.post("/auth/refresh", json={"refresh_token": dados["refresh_token"]})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        response = client.post("/auth/refresh", json={"refresh_token": "desconhecido"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_sessao_expirada(self, client, db_session, paciente_teste):
+        """Sessão vencida não renova, mesmo já estando no cache"""
+        dados = self._login(client, "carlos@test.com", "paciente123")
+        sessao = db_session.query(SessaoUsuario).one()
+        sessao.expira_em = datetime.utcnow() - timedelta(minutes=1)
+        db_session.commit()
+
+        response = client.post("/auth/refresh", json={"refresh_token": dados["refresh_token"]})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_bloqueio_e_troca_de_senha_revogam(
+        self, client, db_session, paciente_teste, auth_headers_admin
+    ):
+        """Bloquear o paciente ou trocar a senha encerra todas as sessões dele"""
+        primeira = self._login(client, "carlos@test.com", "paciente123")
+        client.post("/auth/refresh", json={"refresh_token": primeira["refresh_token"]})
+
+        response = client.post(
+            f"/admin/pacientes/{paciente_teste.id_paciente}/bloquear", headers=auth_headers_admin
+        )
+        assert response.status_code == status.HTTP_200_OK
+        response = client.post("/auth/refresh", json={"refresh_token": primeira["refresh_token"]})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        client.post(f"/admin/pacientes/{paciente_teste.id_paciente}/desbloquear", headers=auth_headers_admin)
+        segunda = self._login(client, "carlos@test.com", "paciente123")
+        response = client.put(
+            f"/pacientes/perfil/{paciente_teste.id_paciente}/senha",
+            json={"senha_atual": "paciente123", "senha_nova": "novasenha1"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        response = client.post("/auth/refresh", json={"refresh_token": segunda["refresh_token"]})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert db_session.query(SessaoUsuario).filter(
+            SessaoUsuario.tipo_usuario == "paciente", SessaoUsuario.revogada_em.is_(None)
+        ).count() == 0
+        assert SessoesUsuario.revogar_do_usuario(db_session, "paciente", paciente_teste.id_paciente) == 0
+
+    def test_bloqueio_automatico_encerra_sessoes(self, client, db_session, paciente_teste, medico_cardiologista):
+        """RN3 no agendamento revoga as sessões; bloqueio gravado direto também impede o refresh"""
+        dados = self._login(client, "carlos@test.com", "paciente123")
+        paciente_teste.faltas_consecutivas = 3
+        db_session.commit()
+
+        response = client.post(
+            "/pacientes/consultas", params={"paciente_id": paciente_teste.id_paciente},
+            json={"id_medico": medico_cardiologista.id_medico,
+                  "data_hora": (datetime.now() + timedelta(days=7)).replace(hour=10, minute=0).isoformat()}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        db_session.refresh(paciente_teste)
+        assert paciente_teste.esta_bloqueado
+        response = client.post("/auth/refresh", json={"refresh_token": dados["refresh_token"]})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        # Sessão criada e o bloqueio gravado sem revogação (ex.: direto no banco)
+        paciente_teste.esta_bloqueado = False
+        db_session.commit()
+        token = SessoesUsuario.criar(db_session, "paciente", paciente_teste.id_paciente, paciente_teste.email)
+        paciente_teste.esta_bloqueado = True
+        db_session.commit()
+        SessoesUsuario.invalidar_cache()
+        assert SessoesUsuario.validar(db_session, token) is None
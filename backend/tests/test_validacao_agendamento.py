@@ -0,0 +1,187 @@
+"""
+Testes da Validação de Agendamento em Lote (RN2, RN3, RN4 e expediente)
+e do contador de faltas consecutivas
+Performance: < 1 segundo total
+"""
+import pytest
+from datetime import datetime, time, timedelta
+from fastapi import status
+from sqlalchemy import event
+
+from app.models.models import Consulta
+from app.services.regras_negocio import RegraPaciente, ValidadorAgendamento
+
+
+@pytest.mark.business_rules
+class TestValidacaoEmLote:
+    """Suite de testes da validação com uma única consulta ao banco"""
+
+    def test_validacao_em_uma_consulta(
+        self, db_session, db_engine, paciente_teste, medico_cardiologista,
+        proxima_segunda, expediente_proxima_segunda
+    ):
+        """Agendamento válido é aprovado com um único SELECT"""
+        paciente_id = paciente_teste.id_paciente
+        medico_id = medico_cardiologista.id_medico
+        inicio = datetime.combine(proxima_segunda, time(10, 0))
+
+        instrucoes = []
+        ouvinte = lambda *args: instrucoes.append(args[2])
+        event.listen(db_engine, "before_cursor_execute", ouvinte)
+        try:
+            pode, mensagem = ValidadorAgendamento.validar_novo_agendamento(
+                db_session, paciente_id, medico_id,
+                inicio, inicio + timedelta(minutes=30)
+            )
+        finally:
+            event.remove(db_engine, "before_cursor_execute", ouvinte)
+
+        assert pode, mensagem
+        assert len(instrucoes) == 1
+
+    def test_todos_os_vereditos_de_uma_vez(
+        self, db_session, paciente_teste, medico_cardiologista,
+        proxima_segunda, expediente_proxima_segunda
+    ):
+        """Todas as regras violadas aparecem no resultado; a ordem define a mensagem"""
+        dia = proxima_segunda
+        medico_id = medico_cardiologista.id_medico
+        for hora in (9, 11):
+            db_session.add(Consulta(
+                data_hora_inicio=datetime.combine(dia, time(hora, 0)),
+                data_hora_fim=datetime.combine(dia, time(hora, 30)),
+                status="agendada", id_paciente_fk=paciente_teste.id_paciente,
+                id_medico_fk=medico_id
+            ))
+        db_session.commit()
+
+        inicio = datetime.combine(dia, time(11, 0))
+        fatos = ValidadorAgendamento.consultar_fatos_agendamento(
+            db_session, paciente_teste.id_paciente, medico_id,
+            inicio, inicio + timedelta(minutes=30)
+        )
+        veredito = ValidadorAgendamento.avaliar_regras(fatos, inicio)
+
+        assert veredito["RN3"][0]
+        assert not veredito["RN2"][0]
+        assert veredito["horario_trabalho"][0]
+        assert veredito["RN4"][1] == (
+            "Horário indisponível. O médico já possui consulta agendada das 11:00 às 11:30."
+        )
+
+        pode, mensagem = ValidadorAgendamento.validar_novo_agendamento(
+            db_session, paciente_teste.id_paciente, medico_id,
+            inicio, inicio + timedelta(minutes=30), fatos=fatos
+        )
+        assert not pode
+        assert mensagem.startswith("Limite de consultas futuras atingido")
+
+    def test_bloqueio_automatico_por_faltas(
+        self, client, db_session, paciente_teste, medico_cardiologista, proxima_segunda
+    ):
+        """Status marcados pelo médico mantêm o contador; três faltas bloqueiam"""
+        paciente_id = paciente_teste.id_paciente
+        medico_id = medico_cardiologista.id_medico
+        base = datetime.now() - timedelta(days=30)
+        consultas = [
+            Consulta(
+                data_hora_inicio=base + timedelta(days=i),
+                data_hora_fim=base + timedelta(days=i, minutes=30),
+                status="agendada", id_paciente_fk=paciente_id,
+                id_medico_fk=medico_id
+            )
+            for i in range(4)
+        ]
+        db_session.add_all(consultas)
+        db_session.commit()
+        ids = [c.id_consulta for c in consultas]
+
+        def marcar(consulta_id, novo_status):
+            response = client.put(
+                f"/medicos/consultas/{consulta_id}/status",
+                params={"medico_id": medico_id, "novo_status": novo_status}
+            )
+            assert response.status_code == status.HTTP_200_OK
+
+        for consulta_id, novo_status in zip(ids, ["realizada", "faltou", "faltou", "faltou"]):
+            marcar(consulta_id, novo_status)
+        db_session.refresh(paciente_teste)
+        assert paciente_teste.faltas_consecutivas == 3
+
+        # Corrigir uma falta no meio da sequência reinicia a contagem a partir dela
+        marcar(ids[2], "realizada")
+        db_session.refresh(paciente_teste)
+        assert paciente_teste.faltas_consecutivas == 1
+
+        marcar(ids[2], "faltou")
+        inicio = datetime.combine(proxima_segunda, time(10, 0))
+        pode, mensagem = ValidadorAgendamento.validar_novo_agendamento(
+            db_session, paciente_id, medico_id,
+            inicio, inicio + timedelta(minutes=30)
+        )
+
+        assert not pode
+        assert "3 faltas consecutivas" in mensagem
+        db_session.refresh(paciente_teste)
+        assert paciente_teste.esta_bloqueado
+
+    def test_desbloqueio_sobrevive_ao_recalculo(
+        self, client, db_session, paciente_teste, medico_cardiologista, auth_headers_admin
+    ):
+        """Faltas anteriores ao desbloqueio não voltam a contar quando o médico altera um status"""
+        paciente_id = paciente_teste.id_paciente
+        medico_id = medico_cardiologista.id_medico
+        base = datetime.now() - timedelta(days=30)
+        consultas = [
+            Consulta(
+                data_hora_inicio=inicio, data_hora_fim=inicio + timedelta(minutes=30),
+                status="faltou", id_paciente_fk=paciente_id, id_medico_fk=medico_id
+            )
+            for inicio in (base, base + timedelta(days=1), base + timedelta(days=2))
+        ]
+        posterior = Consulta(
+            data_hora_inicio=datetime.now() + timedelta(days=1),
+            data_hora_fim=datetime.now() + timedelta(days=1, minutes=30),
+            status="agendada", id_paciente_fk=paciente_id, id_medico_fk=medico_id
+        )
+        db_session.add_all(consultas + [posterior])
+        paciente_teste.esta_bloqueado = True
+        paciente_teste.faltas_consecutivas = 3
+        db_session.commit()
+
+        response = client.post(f"/admin/pacientes/{paciente_id}/desbloquear", headers=auth_headers_admin)
+        assert response.status_code == status.HTTP_200_OK
+        db_session.refresh(paciente_teste)
+        assert paciente_teste.desbloqueado_em is not None
+
+        def marcar(consulta_id, novo_status):
+            response = client.put(
+                f"/medicos/consultas/{consulta_id}/status",
+                params={"medico_id": medico_id, "novo_status": novo_status}
+            )
+            assert response.status_code == status.HTTP_200_OK
+            db_session.refresh(paciente_teste)
+            return paciente_teste.faltas_consecutivas
+
+        assert marcar(consultas[1].id_consulta, "realizada") == 0
+        assert marcar(consultas[1].id_consulta, "faltou") == 0
+        assert marcar(posterior.id_consulta, "faltou") == 1
+        assert not paciente_teste.esta_bloqueado
+
+    def test_desbloqueio_pela_regra(self, db_session, paciente_teste, medico_cardiologista):
+        """RegraPaciente.desbloquear_paciente zera o contador e marca o desbloqueio"""
+        base = datetime.now() - timedelta(days=10)
+        for dias in range(3):
+            db_session.add(Consulta(
+                data_hora_inicio=base + timedelta(days=dias),
+                data_hora_fim=base + timedelta(days=dias, minutes=30), status="faltou",
+                id_paciente_fk=paciente_teste.id_paciente, id_medico_fk=medico_cardiologista.id_medico
+            ))
+        paciente_teste.esta_bloqueado = True
+        paciente_teste.faltas_consecutivas = 3
+        db_session.commit()
+
+        assert RegraPaciente.desbloquear_paciente(db_session, paciente_teste.id_paciente)[0]
+        assert paciente_teste.faltas_consecutivas == 0
+        assert RegraPaciente.calcular_faltas_consecutivas(db_session, paciente_teste.id_paciente) == 0
+        assert RegraPaciente.atualizar_faltas_consecutivas(db_session, paciente_teste.id_paciente) == 0
@@ -22,6 +22,9 @@ async function carregarDadosDashboard() {
         // Carregar consultas recentes
         await carregarConsultasRecentes();
         
+        // Carregar tendência diária (contagens agregadas no servidor)
+        await carregarTendencia();
+        
         // Carregar alertas
         await carregarAlertas();
         
@@ -52,10 +55,7 @@ function atualizarEstatisticas(stats) {
     if (cards[0]) cards[0].textContent = stats.total_pacientes || 0;
     if (cards[1]) cards[1].textContent = stats.total_medicos || 0;
     if (cards[2]) cards[2].textContent = stats.consultas_mes || 0;
-    if (cards[3]) {
-        // Calcular cancelamentos (consultas com status Cancelada)
-        cards[3].textContent = '...'; // Será atualizado em carregarConsultasRecentes
-    }
+    if (cards[3]) cards[3].textContent = stats.consultas_canceladas || 0;
     
     console.log('📈 Estatísticas atualizadas:', stats);
 }
@@ -63,23 +63,9 @@ function atualizarEstatisticas(stats) {
 async function carregarConsultasRecentes() {
     try {
         console.log('📅 Carregando consultas recentes...');
-        const consultas = await api.get(API_CONFIG.ENDPOINTS.ADMIN_CONSULTAS);
-        
-        // Ordenar por data (mais recentes primeiro)
-        const consultasOrdenadas = consultas.sort((a, b) => {
-            return new Date(b.data_hora_inicio) - new Date(a.data_hora_inicio);
-        });
-        
-        // Pegar apenas as 10 mais recentes
-        const consultasRecentes = consultasOrdenadas.slice(0, 10);
-        
-        // Contar cancelamentos
-        const cancelamentos = consultas.filter(c => c.status.toLowerCase() === 'cancelada').length;
-        const cards = document.querySelectorAll('.grid-2 .card:first-child h4');
-        if (cards[3]) {
-            cards[3].textContent = cancelamentos;
-        }
-        console.log(`📊 Cancelamentos encontrados: ${cancelamentos}`);
+        // A API já devolve as mais recentes primeiro: basta a primeira página
+        const recentes = await api.getPagina(API_CONFIG.ENDPOINTS.ADMIN_CONSULTAS, { limite: 10 });
+        const consultasRecentes = recentes.itens;
         
         // Renderizar tabela
         const tbody = document.querySelector('.card.mt-20 tbody');
@@ -129,15 +115,36 @@ async function carregarConsultasRecentes() {
     }
 }
 
+async function carregarTendencia() {
+    const container = document.getElementById('graficoConsultas');
+    if (!container) return;
+    
+    try {
+        // Um total por dia, já com zero nos dias sem consultas
+        const serie = await api.get(API_CONFIG.ENDPOINTS.ADMIN_RELATORIO_SERIE_TEMPORAL, { granularidade: 'dia' });
+        const maximo = Math.max(1, ...serie.totais);
+        
+        container.innerHTML = serie.intervalos.map((dia, i) => {
+            const total = serie.totais[i];
+            const altura = Math.round(total / maximo * 100);
+            const rotulo = new Date(dia + 'T00:00:00').toLocaleDateString('pt-BR');
+            return `<div title="${rotulo}: ${total} consulta(s)" style="flex: 1; height: ${Math.max(altura, 1)}%; background: var(--primary-color); border-radius: 2px 2px 0 0;"></div>`;
+        }).join('');
+    } catch (error) {
+        console.error('❌ Erro ao carregar tendência:', error);
+        container.innerHTML = '<p style="color: var(--accent-color);">Erro ao carregar tendência</p>';
+    }
+}
+
 async function carregarAlertas() {
     try {
         console.log('⚠️ Carregando alertas...');
         
-        // Carregar pacientes
-        const pacientes = await api.get(API_CONFIG.ENDPOINTS.ADMIN_PACIENTES);
+        // Carregar pacientes bloqueados (uma página basta para o alerta)
+        const pagina = await api.getPagina(API_CONFIG.ENDPOINTS.ADMIN_PACIENTES, { bloqueado: true, limite: 200 });
         
         // Contar pacientes bloqueados
-        const pacientesBloqueados = pacientes.filter(p => p.esta_bloqueado).length;
+        const pacientesBloqueados = pagina.itens.length;
         
         // Atualizar alertas
         const alertContainer = document.querySelector('.card.mt-20:last-of-type');
@@ -131,7 +131,7 @@ async function carregarEspecialidades() {
 async function carregarMedicos() {
     try {
         showLoading();
-        medicos = await api.get(API_CONFIG.ENDPOINTS.ADMIN_MEDICOS_LISTAR);
+        medicos = await api.getTodos(API_CONFIG.ENDPOINTS.ADMIN_MEDICOS_LISTAR);
         renderizarMedicos();
         hideLoading();
     } catch (error) {
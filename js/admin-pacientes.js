@@ -1,6 +1,8 @@
 // Gerenciar Pacientes - Admin - Integrado com API
 let pacientes = [];
 let pacientesFiltrados = [];
+let proximoCursor = null;
+let termoBusca = '';
 
 document.addEventListener('DOMContentLoaded', async function() {
     requireAuth();
@@ -10,11 +12,16 @@ document.addEventListener('DOMContentLoaded', async function() {
     configurarBusca();
 });
 
-// Carregar lista de pacientes
-async function carregarPacientes() {
+// Carregar lista de pacientes (primeira página ou continuação)
+async function carregarPacientes(continuar = false) {
     try {
         showLoading();
-        pacientes = await api.get(API_CONFIG.ENDPOINTS.ADMIN_PACIENTES_LISTAR);
+        const pagina = await api.getPagina(API_CONFIG.ENDPOINTS.ADMIN_PACIENTES_LISTAR, {
+            busca: termoBusca,
+            cursor: continuar ? proximoCursor : null
+        });
+        pacientes = continuar ? pacientes.concat(pagina.itens) : pagina.itens;
+        proximoCursor = pagina.proximoCursor;
         pacientesFiltrados = [...pacientes];
         renderizarPacientes();
         hideLoading();
@@ -91,31 +98,30 @@ function renderizarPacientes() {
                 <td>${acoesHtml}</td>
             </tr>
         `;
-    }).join('');
+    }).join('') + (proximoCursor ? `
+        <tr>
+            <td colspan="8" style="text-align: center; padding: 15px;">
+                <button class="btn btn-secondary" onclick="carregarPacientes(true)">
+                    <i class="fas fa-chevron-down"></i> Carregar mais
+                </button>
+            </td>
+        </tr>
+    ` : '');
 }
 
-// Configurar busca
+// Configurar busca (feita no servidor por nome, CPF ou email)
 function configurarBusca() {
     const searchInput = document.getElementById('buscaPaciente');
     
     if (!searchInput) return;
     
+    let temporizador = null;
     searchInput.addEventListener('input', function() {
-        const termo = this.value.toLowerCase().trim();
-        
-        if (!termo) {
-            pacientesFiltrados = [...pacientes];
-        } else {
-            pacientesFiltrados = pacientes.filter(paciente => {
-                const nome = (paciente.nome || '').toLowerCase();
-                const cpf = (paciente.cpf || '').replace(/\D/g, '');
-                const termoBusca = termo.replace(/\D/g, '');
-                
-                return nome.includes(termo) || cpf.includes(termoBusca);
-            });
-        }
-        
-        renderizarPacientes();
+        clearTimeout(temporizador);
+        temporizador = setTimeout(async () => {
+            termoBusca = this.value.trim();
+            await carregarPacientes();
+        }, 300);
     });
 }
 
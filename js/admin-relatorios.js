@@ -9,6 +9,7 @@ document.addEventListener('DOMContentLoaded', async function() {
         await carregarMedicos();
         await carregarEspecialidades();
         await carregarEstatisticasGerais();
+        await carregarSerieSemanal();
         configurarFormularios();
         formulariosConfigurados = true;
     }
@@ -17,7 +18,7 @@ document.addEventListener('DOMContentLoaded', async function() {
 // Carregar lista de médicos
 async function carregarMedicos() {
     try {
-        const medicos = await api.get(API_CONFIG.ENDPOINTS.ADMIN_MEDICOS_LISTAR);
+        const medicos = await api.getTodos(API_CONFIG.ENDPOINTS.ADMIN_MEDICOS_LISTAR, { fields: 'id_medico,nome,crm' });
         const select = document.getElementById('medico');
         
         if (select && medicos && medicos.length > 0) {
@@ -89,6 +90,44 @@ async function carregarEstatisticasGerais() {
     }
 }
 
+// Carregar série semanal por status (agregada no servidor)
+async function carregarSerieSemanal() {
+    const container = document.getElementById('serieSemanal');
+    if (!container) return;
+    
+    try {
+        const hoje = new Date();
+        const inicio = new Date(hoje);
+        inicio.setDate(hoje.getDate() - 7 * 11);
+        const serie = await api.get(API_CONFIG.ENDPOINTS.ADMIN_RELATORIO_SERIE_TEMPORAL, {
+            granularidade: 'semana',
+            dimensao: 'status',
+            data_inicio: inicio.toISOString().slice(0, 10),
+            data_fim: hoje.toISOString().slice(0, 10)
+        });
+        
+        const semanas = serie.intervalos.map(dia =>
+            new Date(dia + 'T00:00:00').toLocaleDateString('pt-BR', { day: '2-digit', month: '2-digit' })
+        );
+        const linhas = serie.series.map(s => `
+            <tr><td>${s.rotulo}</td>${s.valores.map(v => `<td>${v}</td>`).join('')}</tr>
+        `).join('');
+        
+        container.innerHTML = `
+            <table>
+                <thead><tr><th>Status</th>${semanas.map(s => `<th>${s}</th>`).join('')}</tr></thead>
+                <tbody>
+                    ${linhas}
+                    <tr><td><strong>Total</strong></td>${serie.totais.map(t => `<td><strong>${t}</strong></td>`).join('')}</tr>
+                </tbody>
+            </table>
+        `;
+    } catch (error) {
+        console.error('Erro ao carregar série semanal:', error);
+        container.innerHTML = '<p style="color: red; text-align: center;">Erro ao carregar série</p>';
+    }
+}
+
 // Configurar formulários de relatórios
 function configurarFormularios() {
     // Relatório 1: Consultas por Médico
@@ -180,6 +219,27 @@ function configurarFormularios() {
     }
 }
 
+// Intervalo e limite da espera pelo relatório gerado em segundo plano
+const RELATORIO_INTERVALO_MS = 1000;
+const RELATORIO_TENTATIVAS = 300;
+
+const esperar = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+// Enfileira o relatório e aguarda a geração (o PDF não é montado na requisição)
+async function aguardarRelatorio(tipo, params) {
+    let relatorio = await api.post(API_CONFIG.ENDPOINTS.ADMIN_RELATORIO_SOLICITACOES, { tipo, ...params });
+    
+    for (let tentativa = 0; tentativa < RELATORIO_TENTATIVAS; tentativa++) {
+        if (relatorio.status === 'concluido') return relatorio;
+        if (relatorio.status === 'erro') {
+            throw new Error(relatorio.mensagem_erro || 'Falha na geração do relatório');
+        }
+        await esperar(RELATORIO_INTERVALO_MS);
+        relatorio = await api.get(API_CONFIG.ENDPOINTS.ADMIN_RELATORIO_SOLICITACAO(relatorio.id_relatorio));
+    }
+    throw new Error('Tempo esgotado aguardando o relatório');
+}
+
 // Função para gerar PDF e abrir em nova aba
 async function gerarPDF(endpoint, params = {}) {
     console.log('=== GERANDO PDF ===');
@@ -189,21 +249,21 @@ async function gerarPDF(endpoint, params = {}) {
     try {
         showLoading();
         
-        // Adicionar formato PDF aos parâmetros
-        params.formato = 'pdf';
-        
-        // Construir URL com query params
-        const queryParams = new URLSearchParams();
+        // O tipo do relatório é o último trecho do endpoint síncrono
+        const tipo = endpoint.split('/').pop();
+        const filtros = {};
         for (const [key, value] of Object.entries(params)) {
-            if (value) {
-                queryParams.append(key, value);
+            if (value && key !== 'motivo') {
+                filtros[key] = value;
             }
         }
         
-        const url = `${API_CONFIG.BASE_URL}${endpoint}?${queryParams.toString()}`;
+        const relatorio = await aguardarRelatorio(tipo, filtros);
+        
+        const url = `${API_CONFIG.BASE_URL}${API_CONFIG.ENDPOINTS.ADMIN_RELATORIO_SOLICITACAO_PDF(relatorio.id_relatorio)}`;
         const token = localStorage.getItem('token');
         
-        console.log('Fazendo requisição PDF:', url);
+        console.log('Baixando PDF:', url);
         
         // Fazer requisição para obter PDF
         const response = await fetch(url, {
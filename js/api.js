@@ -7,6 +7,8 @@ const API_CONFIG = {
         LOGIN_CRM: '/auth/login/crm',
         ALTERAR_SENHA: '/auth/alterar-senha',
         VERIFICAR_TOKEN: '/auth/verificar-token',
+        REFRESH: '/auth/refresh',
+        LOGOUT: '/auth/logout',
         
         // Pacientes
         PACIENTE_CADASTRO: '/pacientes/cadastro',
@@ -19,6 +21,7 @@ const API_CONFIG = {
         PACIENTE_CONSULTA_REAGENDAR: (id) => `/pacientes/consultas/${id}/reagendar`,
         PACIENTE_MEDICOS: '/pacientes/medicos',
         PACIENTE_HORARIOS_DISPONIVEIS: (id) => `/pacientes/medicos/${id}/horarios-disponiveis`,
+        PACIENTE_DISPONIBILIDADE: '/pacientes/disponibilidade',
         PACIENTE_ESPECIALIDADES: '/pacientes/especialidades',
         PACIENTE_PLANOS_SAUDE: '/pacientes/planos-saude',
         
@@ -57,7 +60,11 @@ const API_CONFIG = {
         ADMIN_RELATORIO_CONSULTAS_ESPECIALIDADE: '/admin/relatorios/consultas-por-especialidade',
         ADMIN_RELATORIO_CANCELAMENTOS: '/admin/relatorios/cancelamentos',
         ADMIN_RELATORIO_PACIENTES_FREQUENTES: '/admin/relatorios/pacientes-frequentes',
-        ADMIN_RELATORIO_ESTATISTICAS_GERAIS: '/admin/relatorios/estatisticas-gerais'
+        ADMIN_RELATORIO_ESTATISTICAS_GERAIS: '/admin/relatorios/estatisticas-gerais',
+        ADMIN_RELATORIO_SERIE_TEMPORAL: '/admin/relatorios/serie-temporal',
+        ADMIN_RELATORIO_SOLICITACOES: '/admin/relatorios/solicitacoes',
+        ADMIN_RELATORIO_SOLICITACAO: (id) => `/admin/relatorios/solicitacoes/${id}`,
+        ADMIN_RELATORIO_SOLICITACAO_PDF: (id) => `/admin/relatorios/solicitacoes/${id}/pdf`
     }
 };
 
@@ -68,16 +75,23 @@ class APIClient {
         this.token = localStorage.getItem('token');
         this.userType = localStorage.getItem('user_type');
         this.userId = localStorage.getItem('user_id');
+        this.refreshToken = localStorage.getItem('refresh_token');
+        this.renovacao = null;
+        this.ultimaEscrita = sessionStorage.getItem('ultima_escrita');
     }
 
     // Armazena o token e informações do usuário
-    setToken(token, userType, userId) {
+    setToken(token, userType, userId, refreshToken = null) {
         this.token = token;
         this.userType = userType;
         this.userId = userId;
         localStorage.setItem('token', token);
         localStorage.setItem('user_type', userType);
         localStorage.setItem('user_id', userId);
+        if (refreshToken) {
+            this.refreshToken = refreshToken;
+            localStorage.setItem('refresh_token', refreshToken);
+        }
     }
 
     // Remove o token e informações do usuário
@@ -85,9 +99,57 @@ class APIClient {
         this.token = null;
         this.userType = null;
         this.userId = null;
+        this.refreshToken = null;
         localStorage.removeItem('token');
         localStorage.removeItem('user_type');
         localStorage.removeItem('user_id');
+        localStorage.removeItem('refresh_token');
+    }
+
+    // Troca o refresh token por um novo access token (sem senha); uma renovação por vez
+    async renovarSessao() {
+        if (!this.refreshToken) {
+            return false;
+        }
+        if (!this.renovacao) {
+            this.renovacao = fetch(`${this.baseURL}${API_CONFIG.ENDPOINTS.REFRESH}`, {
+                method: 'POST',
+                headers: this.getHeaders(false),
+                body: JSON.stringify({ refresh_token: this.refreshToken })
+            })
+                .then(async (response) => {
+                    if (!response.ok) {
+                        return false;
+                    }
+                    const data = await response.json();
+                    this.setToken(data.access_token, data.user_type, data.user_id, data.refresh_token);
+                    return true;
+                })
+                .catch(() => false)
+                .finally(() => {
+                    this.renovacao = null;
+                });
+        }
+        return await this.renovacao;
+    }
+
+    // fetch autenticado: com o access token vencido (401), renova a sessão e repete uma vez
+    async requisitar(url, options, includeAuth = true) {
+        const response = await fetch(url, { ...options, headers: this.getHeaders(includeAuth) });
+        if (response.status !== 401 || !includeAuth || !this.token || !(await this.renovarSessao())) {
+            return this.guardarUltimaEscrita(response);
+        }
+        return this.guardarUltimaEscrita(await fetch(url, { ...options, headers: this.getHeaders(includeAuth) }));
+    }
+
+    // Instante da última escrita: reenviado nas leituras para não ler dados antigos da réplica
+    guardarUltimaEscrita(response) {
+        const instante = response.headers.get('X-Ultima-Escrita');
+        if (instante) {
+            this.ultimaEscrita = instante;
+            sessionStorage.setItem('ultima_escrita', instante);
+        }
+        return response;
     }
 
     // Obtém o tipo de usuário
@@ -110,6 +172,10 @@ class APIClient {
             headers['Authorization'] = `Bearer ${this.token}`;
         }
 
+        if (this.ultimaEscrita) {
+            headers['X-Ultima-Escrita'] = this.ultimaEscrita;
+        }
+
         return headers;
     }
 
@@ -124,9 +190,8 @@ class APIClient {
                 url += `?${queryString}`;
             }
 
-            const response = await fetch(url, {
-                method: 'GET',
-                headers: this.getHeaders()
+            const response = await this.requisitar(url, {
+                method: 'GET'
             });
 
             return await this.handleResponse(response);
@@ -136,14 +201,50 @@ class APIClient {
         }
     }
 
+    // GET paginado: retorna os itens e o cursor da próxima página (cabeçalho X-Proximo-Cursor)
+    async getPagina(endpoint, params = {}) {
+        try {
+            let url = `${this.baseURL}${endpoint}`;
+            const filtros = Object.fromEntries(
+                Object.entries(params).filter(([, valor]) => valor !== undefined && valor !== null && valor !== '')
+            );
+
+            if (Object.keys(filtros).length > 0) {
+                const queryString = new URLSearchParams(filtros).toString();
+                url += `?${queryString}`;
+            }
+
+            const response = await this.requisitar(url, {
+                method: 'GET'
+            });
+
+            const itens = await this.handleResponse(response);
+            return { itens, proximoCursor: response.headers.get('X-Proximo-Cursor') };
+        } catch (error) {
+            console.error('GET Error:', error);
+            throw error;
+        }
+    }
+
+    // GET de todas as páginas (para listas pequenas, como médicos ou consultas de um paciente)
+    async getTodos(endpoint, params = {}) {
+        let itens = [];
+        let cursor = null;
+        do {
+            const pagina = await this.getPagina(endpoint, { ...params, limite: 200, cursor });
+            itens = itens.concat(pagina.itens);
+            cursor = pagina.proximoCursor;
+        } while (cursor);
+        return itens;
+    }
+
     // POST request
     async post(endpoint, data = {}, includeAuth = true) {
         try {
-            const response = await fetch(`${this.baseURL}${endpoint}`, {
+            const response = await this.requisitar(`${this.baseURL}${endpoint}`, {
                 method: 'POST',
-                headers: this.getHeaders(includeAuth),
                 body: JSON.stringify(data)
-            });
+            }, includeAuth);
 
             return await this.handleResponse(response);
         } catch (error) {
@@ -155,9 +256,8 @@ class APIClient {
     // PUT request
     async put(endpoint, data = {}) {
         try {
-            const response = await fetch(`${this.baseURL}${endpoint}`, {
+            const response = await this.requisitar(`${this.baseURL}${endpoint}`, {
                 method: 'PUT',
-                headers: this.getHeaders(),
                 body: JSON.stringify(data)
             });
 
@@ -172,8 +272,7 @@ class APIClient {
     async delete(endpoint, data = null) {
         try {
             const options = {
-                method: 'DELETE',
-                headers: this.getHeaders()
+                method: 'DELETE'
             };
 
             // Adiciona body se houver dados
@@ -181,7 +280,7 @@ class APIClient {
                 options.body = JSON.stringify(data);
             }
 
-            const response = await fetch(`${this.baseURL}${endpoint}`, options);
+            const response = await this.requisitar(`${this.baseURL}${endpoint}`, options);
 
             return await this.handleResponse(response);
         } catch (error) {
@@ -224,7 +323,7 @@ class APIClient {
     async login(email, senha) {
         const response = await this.post(API_CONFIG.ENDPOINTS.LOGIN, { email, senha }, false);
         if (response.access_token) {
-            this.setToken(response.access_token, response.user_type, response.user_id);
+            this.setToken(response.access_token, response.user_type, response.user_id, response.refresh_token);
         }
         return response;
     }
@@ -233,7 +332,7 @@ class APIClient {
     async loginCRM(crm, senha) {
         const response = await this.post(API_CONFIG.ENDPOINTS.LOGIN_CRM, { crm, senha }, false);
         if (response.access_token) {
-            this.setToken(response.access_token, response.user_type, response.user_id);
+            this.setToken(response.access_token, response.user_type, response.user_id, response.refresh_token);
         }
         return response;
     }
@@ -260,8 +359,16 @@ class APIClient {
         }
     }
 
-    // Logout
+    // Logout: encerra a sessão no servidor (sem aguardar) e limpa os dados locais
     logout() {
+        if (this.refreshToken) {
+            fetch(`${this.baseURL}${API_CONFIG.ENDPOINTS.LOGOUT}`, {
+                method: 'POST',
+                headers: this.getHeaders(false),
+                body: JSON.stringify({ refresh_token: this.refreshToken }),
+                keepalive: true
+            }).catch(() => {});
+        }
         this.clearToken();
         window.location.href = '/index.html';
     }
@@ -63,8 +63,10 @@ async function carregarAgenda(data) {
         showLoading();
         
         // Usar endpoint com filtro de data
-        const url = `/medicos/consultas/${medicoId}?data_inicio=${data}&data_fim=${data}`;
-        consultasAgenda = await api.get(url);
+        consultasAgenda = await api.getTodos(`/medicos/consultas/${medicoId}`, {
+            data_inicio: data,
+            data_fim: data
+        });
         
         renderizarAgenda();
         hideLoading();
@@ -64,17 +64,10 @@ async function carregarConsultas() {
         const dataInicio = document.getElementById('dataInicio').value;
         const dataFim = document.getElementById('dataFim').value;
         
-        let url = `/medicos/consultas/${medicoId}`;
-        
-        if (dataInicio && dataFim) {
-            url += `?data_inicio=${dataInicio}&data_fim=${dataFim}`;
-        } else if (dataInicio) {
-            url += `?data_inicio=${dataInicio}`;
-        } else if (dataFim) {
-            url += `?data_fim=${dataFim}`;
-        }
-        
-        todasConsultas = await api.get(url);
+        todasConsultas = await api.getTodos(`/medicos/consultas/${medicoId}`, {
+            data_inicio: dataInicio,
+            data_fim: dataFim
+        });
         renderizarConsultas(todasConsultas);
         hideLoading();
     } catch (error) {
@@ -34,7 +34,7 @@ async function carregarDadosDashboard() {
         
         // Carregar consultas
         console.log('📡 Buscando consultas...');
-        const consultas = await api.get(API_CONFIG.ENDPOINTS.PACIENTE_CONSULTAS_LISTAR(pacienteId));
+        const consultas = await api.getTodos(API_CONFIG.ENDPOINTS.PACIENTE_CONSULTAS_LISTAR(pacienteId));
         console.log('✅ Consultas carregadas:', consultas);
         
         // Renderizar próximas consultas